@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Stand-in for the EnergyPlus executable, used by the benchmarks to run the full CESAR-P workflow without EnergyPlus installed.
+
+It takes the same command line as EnergyPlus (as called by :py:mod:`cesarp.eplus_adapter.eplus_sim_runner`) and writes
+eplusout.eso, eplusout.eio and eplusout.err to the output directory. Zones, their multiplier and floor area (from the floor surfaces) as well
+as the requested Output:Meter and Output:Variable objects are read from the IDF file, the values reported are canned demands per
+floor area. Hourly outputs have 8760 values, so writing and reading the outputs costs about the same as for a real simulation.
+
+To use it, point the environment variable ENERGYPLUS_EXE to this file (it must be executable, on Windows use a wrapper .bat).
+The environment variable CESARP_FAKE_EPLUS_SECONDS can be set to a simulation runtime to emulate, default is 0.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+HOURS_PER_YEAR = 8760
+_J_PER_KWH = 3.6e6
+
+# canned annual demand per floor area in kWh/m2 for the meters CESAR-P is using
+_ANNUAL_DEMAND_PER_AREA_KWH_M2 = {
+    "DISTRICTHEATING:HVAC": 80.0,
+    "DISTRICTHEATING:BUILDING": 20.0,
+    "ELECTRICITY:FACILITY": 30.0,
+    "DISTRICTCOOLING:FACILITY": 5.0,
+}
+_DEFAULT_DEMAND_PER_AREA_KWH_M2 = 10.0
+
+_FREQUENCIES = {"RUNPERIOD": "RunPeriod", "ANNUAL": "RunPeriod", "MONTHLY": "Monthly", "DAILY": "Daily", "HOURLY": "Hourly", "TIMESTEP": "Hourly", "DETAILED": "Hourly"}
+_NR_OF_VALUES = {"RunPeriod": 1, "Monthly": 12, "Daily": 365, "Hourly": HOURS_PER_YEAR}
+
+
+def parse_idf(idf_content: str) -> Tuple[Dict[str, float], Dict[str, int], List[Tuple[str, str]], List[Tuple[str, str, str]]]:
+    """
+    :return: (floor area in m2 per zone name, multiplier per zone name, (meter name, frequency) for all meters, (key, variable name, frequency) for all variables)
+    """
+    zone_floor_areas: Dict[str, float] = {}
+    zone_multipliers: Dict[str, int] = {}
+    meters = []
+    variables = []
+    without_comments = re.sub(r"!.*", "", idf_content)
+    for idf_obj in without_comments.split(";"):
+        fields = [field.strip() for field in idf_obj.split(",")]
+        obj_type = fields[0].upper()
+        if obj_type == "ZONE":
+            zone_floor_areas.setdefault(fields[1].upper(), 0.0)
+            zone_multipliers[fields[1].upper()] = int(fields[7]) if len(fields) > 7 and fields[7] else 1
+        elif obj_type == "BUILDINGSURFACE:DETAILED" and fields[2].upper() == "FLOOR":
+            coords = [float(coord) for coord in fields[11:] if coord]
+            zone_floor_areas[fields[4].upper()] = zone_floor_areas.get(fields[4].upper(), 0.0) + _horizontal_area(coords[0::3], coords[1::3])
+        elif obj_type in ["OUTPUT:METER", "OUTPUT:METER:METERFILEONLY"]:
+            meters.append((fields[1], _FREQUENCIES.get(fields[2].upper(), "Hourly")))
+        elif obj_type == "OUTPUT:VARIABLE":
+            variables.append((fields[1], fields[2], _FREQUENCIES.get(fields[3].upper(), "Hourly")))
+    return zone_floor_areas, zone_multipliers, meters, variables
+
+
+def _horizontal_area(xs: List[float], ys: List[float]) -> float:
+    return abs(sum(xs[i] * ys[i - 1] - xs[i - 1] * ys[i] for i in range(len(xs)))) / 2
+
+
+def write_eso(output_dir: Path, total_floor_area: float, zone_names: List[str], meters: List[Tuple[str, str]], variables: List[Tuple[str, str, str]]) -> None:
+    report_items = []  # (dictionary line without id, frequency, annual value in J)
+    for (meter, frequency) in meters:
+        annual_value = _ANNUAL_DEMAND_PER_AREA_KWH_M2.get(meter.upper(), _DEFAULT_DEMAND_PER_AREA_KWH_M2) * total_floor_area * _J_PER_KWH
+        report_items.append((f"{meter} [J]", frequency, annual_value))
+    for (key, variable, frequency) in variables:
+        keys = zone_names if key == "*" else [key]
+        for key_value in keys:
+            report_items.append((f"{key_value},{variable} [J]", frequency, _DEFAULT_DEMAND_PER_AREA_KWH_M2 * _J_PER_KWH))
+
+    lines = [
+        "Program Version,EnergyPlus, Version 9.5.0-fake, YMD=2000.01.01 00:00",
+        "1,5,Environment Title[],Latitude[deg],Longitude[deg],Time Zone[],Elevation[m]",
+        "2,8,Day of Simulation[],Month[],Day of Month[],DST Indicator[1=yes 0=no],Hour[],StartMinute[],EndMinute[],DayType",
+        "3,5,Cumulative Day of Month[],Month[],DayType  ! When Daily Report Variables Requested",
+        "4,2,Cumulative Days of Simulation[],Month[]  ! When Monthly Report Variables Requested",
+        "5,1,Cumulative Days of Simulation[]  ! When Run Period Report Variables Requested",
+    ]
+    first_id = 7
+    for idx, (dict_entry, frequency, _) in enumerate(report_items):
+        nr_of_fields = 11 if frequency == "RunPeriod" else 1
+        details = " [Value,Min,Month,Day,Hour,Minute,Max,Month,Day,Hour,Minute]" if frequency == "RunPeriod" else ""
+        lines.append(f"{first_id + idx},{nr_of_fields},{dict_entry} !{frequency}{details}")
+    lines.append("End of Data Dictionary")
+    lines.append("1,RUN PERIOD 1,47.38,8.57,1.00,556.00")
+    for frequency, nr_of_values in _NR_OF_VALUES.items():
+        items = [(first_id + idx, annual_value / nr_of_values) for idx, (_, freq, annual_value) in enumerate(report_items) if freq == frequency]
+        if not items:
+            continue
+        for step in range(nr_of_values):
+            lines.append(f"2,{step // 24 + 1},1,1,0,{step % 24 + 1},0.00,60.00,Monday")
+            lines.extend(f"{report_id},{value:.4f}" for (report_id, value) in items)
+    lines.append("End of Data")
+    lines.append(f"Number of Records Written={len(lines)}")
+    (output_dir / "eplusout.eso").write_text("\n".join(lines) + "\n")
+
+
+def write_eio(output_dir: Path, zone_floor_areas: Dict[str, float], zone_multipliers: Dict[str, int]) -> None:
+    lines = [
+        "Program Version,EnergyPlus, Version 9.5.0-fake, YMD=2000.01.01 00:00",
+        "! <Zone Summary>, Number of Zones, Number of Zone Surfaces, Number of SubSurfaces",
+        f" Zone Summary,{len(zone_floor_areas)},0,0",
+        "! <Zone Information>,Zone Name,Zone Multiplier,Zone List Multiplier,Floor Area {m2},Volume {m3}",
+    ]
+    lines += [f" Zone Information, {name},{zone_multipliers.get(name, 1)},1,{area:.2f},{area * 3:.2f}" for name, area in zone_floor_areas.items()]
+    (output_dir / "eplusout.eio").write_text("\n".join(lines) + "\n")
+
+
+def write_err(output_dir: Path, elapsed_seconds: float) -> None:
+    (output_dir / "eplusout.err").write_text(
+        "Program Version,EnergyPlus, Version 9.5.0-fake, YMD=2000.01.01 00:00\n"
+        "   ************* Beginning Simulation\n"
+        f"   ************* EnergyPlus Completed Successfully-- 0 Warning; 0 Severe Errors; Elapsed Time=00hr 00min {elapsed_seconds:5.2f}sec\n"
+    )
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="fake EnergyPlus for CESAR-P benchmarks")
+    parser.add_argument("--weather", "-w", required=True)
+    parser.add_argument("--output-directory", "-d", default=".")
+    parser.add_argument("--idd", "-i")
+    parser.add_argument("idf")
+    (args, _) = parser.parse_known_args(argv)
+    start = time.time()
+    for input_file in [args.idf, args.weather]:
+        if not os.path.isfile(input_file):
+            print(f"input file {input_file} not found", file=sys.stderr)
+            return 1
+    output_dir = Path(args.output_directory)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (zone_floor_areas, zone_multipliers, meters, variables) = parse_idf(Path(args.idf).read_text())
+    time.sleep(float(os.environ.get("CESARP_FAKE_EPLUS_SECONDS", 0)))
+    total_floor_area = sum(area * zone_multipliers.get(name, 1) for name, area in zone_floor_areas.items())
+    write_eso(output_dir, total_floor_area, list(zone_floor_areas.keys()), meters, variables)
+    write_eio(output_dir, zone_floor_areas, zone_multipliers)
+    write_err(output_dir, time.time() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,277 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+End-to-end performance benchmarks of the :py:class:`cesarp.manager.SimulationManager` workflow.
+
+For each scenario a synthetic site is generated (see :py:mod:`benchmarks.synthetic_site`) and all workflow steps are run,
+EnergyPlus is replaced by :py:mod:`benchmarks.fake_energyplus`, thus no EnergyPlus installation is needed. Wall time and CPU
+time of the main process are measured per step, the peak memory usage of the main process at the end of each step. The
+result is written to a JSON report, which can be compared against a report of an earlier run to detect regressions.
+
+Usage, from the repository root::
+
+    python -m benchmarks.run_benchmarks --scenarios small complex_footprints --report bench.json
+    python -m benchmarks.run_benchmarks --report bench_new.json --compare bench.json --max-slowdown 0.25
+
+After the workflow steps, the saved project is reloaded from disk (stage reload), run with --bldg-container-archive to compare
+the loading of the building containers from binary archives with the loading from json files.
+
+Note that the CPU time does not include the worker processes, for steps run on the worker pool the wall time is the relevant value.
+
+The fake EnergyPlus does no shadow calculation, thus the effect of --neighbour-shading-reduction on the simulation time is not
+measured. Instead the number of shading surfaces and their vertices, on which the EnergyPlus shadow calculation time depends,
+are reported per scenario.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None  # type: ignore
+
+import cesarp
+import cesarp.common
+from cesarp.manager.SimulationManager import SimulationManager, create_worker_pool
+from benchmarks.synthetic_site import SyntheticSiteParams, create_site
+
+REPORT_FORMAT_VERSION = 1
+
+FAKE_EPLUS_EXE = Path(__file__).parent / "fake_energyplus.py"
+WEATHER_FILE = Path(cesarp.__file__).parent / "weather" / "swiss_communities" / "ressources" / "weather_files" / "Zuerich-SMA.epw"
+
+SCENARIOS = {
+    "small": SyntheticSiteParams(nr_of_bldgs=10, nr_of_vertices=4, nr_of_floors=3),
+    "complex_footprints": SyntheticSiteParams(nr_of_bldgs=10, nr_of_vertices=24, nr_of_floors=3),
+    "tall": SyntheticSiteParams(nr_of_bldgs=10, nr_of_vertices=4, nr_of_floors=15),
+    "dense": SyntheticSiteParams(nr_of_bldgs=50, nr_of_vertices=6, nr_of_floors=4, spacing=22.0),
+    "large": SyntheticSiteParams(nr_of_bldgs=200, nr_of_vertices=8, nr_of_floors=4),
+    # many low buildings with detailed footprints, to check the effect of --neighbour-shading-reduction
+    "urban_core": SyntheticSiteParams(nr_of_bldgs=100, nr_of_vertices=24, nr_of_floors=3, spacing=25.0),
+}
+
+# workflow steps in the order they are run, name used in the report and method of the SimulationManager
+STAGES: List[str] = ["create_bldg_models", "create_IDFs", "run_simulations", "process_results", "save_bldg_containers", "save_summary_result"]
+
+
+def get_config(
+    site_files: Dict[str, Path],
+    nr_of_workers: int,
+    eplus_version: str,
+    do_calc_op_emissions_and_costs: bool,
+    neighbour_shading_reduction: bool = False,
+    output_retention: bool = False,
+    bldg_container_archive: bool = False,
+) -> Dict[str, Any]:
+    bldg_info = str(site_files["bldg_info"])
+    return {
+        "MANAGER": {
+            "NR_OF_PARALLEL_WORKERS": nr_of_workers,
+            "SITE_VERTICES_FILE": {"PATH": str(site_files["vertices"])},
+            "BLDG_FID_FILE": {"PATH": bldg_info},
+            "BLDG_AGE_FILE": {"PATH": bldg_info},
+            "BLDG_TYPE_PER_BLDG_FILE": {"PATH": bldg_info},
+            "BLDG_INSTALLATION_FILE": {"PATH": bldg_info},
+            "DO_CALC_OP_EMISSIONS_AND_COSTS": do_calc_op_emissions_and_costs,
+            "SINGLE_SITE": {"ACTIVE": True, "WEATHER_FILE": str(WEATHER_FILE)},
+            "BLDG_CONTAINER_ARCHIVE": {"ACTIVE": bldg_container_archive},
+        },
+        "EPLUS_ADAPTER": {"EPLUS_VERSION": eplus_version, "OUTPUT_RETENTION": {"ACTIVE": output_retention}},
+        "GEOMETRY": {"NEIGHBOURHOOD": {"SHADING_REDUCTION": {"ACTIVE": neighbour_shading_reduction}}},
+    }
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """:return: peak resident memory of the current process in MB, None if not available on this platform"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def measure(stage_method: Callable[[], Any]) -> Dict[str, Any]:
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    stage_method()
+    return {"wall_s": time.perf_counter() - wall_start, "cpu_s": time.process_time() - cpu_start, "peak_rss_mb": get_peak_rss_mb()}
+
+
+def count_shading_surfaces(sim_manager: SimulationManager) -> Dict[str, int]:
+    """:return: total number of shading surfaces (walls and roofs of neighbours) and their vertices over all buildings of the site"""
+    nr_of_surfaces = 0
+    nr_of_vertices = 0
+    for container in sim_manager.bldg_containers.values():
+        if not container.has_bldg_model():
+            continue
+        for neighbour in container.get_bldg_model().neighbours.values():
+            nr_of_surfaces += len(neighbour.walls[0]) + 1
+            nr_of_vertices += 4 * len(neighbour.walls[0]) + len(neighbour.roof)
+    return {"nr_of_shading_surfaces": nr_of_surfaces, "nr_of_shading_vertices": nr_of_vertices}
+
+
+def get_folder_size_mb(folder: Path) -> float:
+    return sum(file_path.stat().st_size for file_path in Path(folder).rglob("*") if file_path.is_file()) / 1024**2
+
+
+def run_scenario(name: str, params: SyntheticSiteParams, worker_pool, config_args: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
+    scenario_dir = work_dir / name
+    shutil.rmtree(scenario_dir, ignore_errors=True)
+    site_files = create_site(params, scenario_dir / "site")
+    result = {"name": name, "params": params.to_dict(), **config_args, "stages": {}}
+    config = get_config(site_files, **config_args)
+    managers = []
+    result["stages"]["init"] = measure(lambda: managers.append(SimulationManager(scenario_dir / "output", config, cesarp.common.init_unit_registry(), worker_pool=worker_pool)))
+    sim_manager = managers[0]
+    for stage in STAGES:
+        logging.getLogger(__name__).info(f"{name}: {stage}")
+        result["stages"][stage] = measure(getattr(sim_manager, stage))
+        if stage == "create_bldg_models":
+            result.update(count_shading_surfaces(sim_manager))
+        if stage == "run_simulations":
+            result["eplus_output_mb"] = get_folder_size_mb(sim_manager._storage.eplus_output_dir)
+    result["stages"]["reload"] = measure(
+        lambda: managers.append(SimulationManager(scenario_dir / "output", config, cesarp.common.init_unit_registry(), load_from_disk=True, worker_pool=worker_pool))
+    )
+    result["total_wall_s"] = sum(stage_res["wall_s"] for stage_res in result["stages"].values())
+    result["failed_fids"] = sorted(sim_manager.failed_fids)
+    return result
+
+
+def get_environment_info() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "cesarp_version": cesarp.__version__,
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], max_slowdown: float, min_seconds: float) -> List[str]:
+    """
+    :param report: report of the current run
+    :param baseline: report to compare with, only scenarios and stages contained in both reports are compared
+    :param max_slowdown: relative increase of the wall time considered as regression, e.g. 0.25 for 25%
+    :param min_seconds: stages taking less time in the baseline are not compared, as their timing is too noisy
+    :return: description of each regression found
+    """
+    baseline_scenarios = {scenario["name"]: scenario for scenario in baseline["scenarios"]}
+    regressions = []
+    for scenario in report["scenarios"]:
+        if scenario["name"] not in baseline_scenarios:
+            continue
+        base_stages = baseline_scenarios[scenario["name"]]["stages"]
+        for stage, timing in scenario["stages"].items():
+            if stage not in base_stages or base_stages[stage]["wall_s"] < min_seconds:
+                continue
+            ratio = timing["wall_s"] / base_stages[stage]["wall_s"]
+            if ratio > 1 + max_slowdown:
+                regressions.append(f"{scenario['name']} - {stage}: {timing['wall_s']:.2f}s, baseline {base_stages[stage]['wall_s']:.2f}s ({(ratio - 1) * 100:+.0f}%)")
+    return regressions
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="CESAR-P end-to-end performance benchmarks")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS.keys()), default=["small", "complex_footprints", "tall"])
+    parser.add_argument("--nr-of-bldgs", type=int, help="overwrite number of buildings of all scenarios")
+    parser.add_argument("--workers", type=int, default=-1, help="number of worker processes, -1 means half of the available processors")
+    # the IDD extended for many vertices is only shipped for some versions, the IDF files are the same for all versions supported by the fake
+    parser.add_argument("--eplus-version", default="8.8.0", help="EnergyPlus version the IDF files are written for")
+    parser.add_argument("--skip-op-emissions-and-costs", action="store_true", help="do not calculate operational emissions and costs when processing the results")
+    parser.add_argument(
+        "--neighbour-shading-reduction", action="store_true", help="reduce the neighbours used as shading objects, see GEOMETRY - NEIGHBOURHOOD - SHADING_REDUCTION"
+    )
+    parser.add_argument("--output-retention", action="store_true", help="delete and compress EnergyPlus output files after each simulation, see EPLUS_ADAPTER - OUTPUT_RETENTION")
+    parser.add_argument(
+        "--bldg-container-archive", action="store_true", help="save the building containers to binary archives instead of json files, see MANAGER - BLDG_CONTAINER_ARCHIVE"
+    )
+    parser.add_argument("--report", default="benchmark_report.json", help="JSON file to write the results to")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare with")
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="relative slowdown per stage considered as regression")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="stages faster than this in the baseline are not compared")
+    parser.add_argument("--work-dir", help="folder for the synthetic sites and simulation outputs, temporary folder if not set")
+    parser.add_argument("--keep-output", action="store_true", help="do not delete the work dir after the run")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    for noisy_logger in ["cesarp", "py.warnings"]:
+        logging.getLogger(noisy_logger).setLevel(logging.WARNING)
+    logging.getLogger(__name__).setLevel(logging.INFO)
+
+    report_path = Path(args.report).absolute()
+    work_dir = Path(args.work_dir).absolute() if args.work_dir else Path(tempfile.mkdtemp(prefix="cesarp-benchmark-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["ENERGYPLUS_EXE"] = str(FAKE_EPLUS_EXE)
+    cwd = os.getcwd()
+    os.chdir(work_dir)  # the workers write their logs to the current directory
+    try:
+        pool_start = time.perf_counter()
+        worker_pool = create_worker_pool(args.workers)
+        report = {"format_version": REPORT_FORMAT_VERSION, "environment": get_environment_info(), "worker_pool_start_s": time.perf_counter() - pool_start, "scenarios": []}
+        config_args = {
+            "nr_of_workers": args.workers,
+            "eplus_version": args.eplus_version,
+            "do_calc_op_emissions_and_costs": not args.skip_op_emissions_and_costs,
+            "neighbour_shading_reduction": args.neighbour_shading_reduction,
+            "output_retention": args.output_retention,
+            "bldg_container_archive": args.bldg_container_archive,
+        }
+        for name in args.scenarios:
+            params = SCENARIOS[name]
+            if args.nr_of_bldgs:
+                params = SyntheticSiteParams(**{**params.to_dict(), "nr_of_bldgs": args.nr_of_bldgs})
+            report["scenarios"].append(run_scenario(name, params, worker_pool, config_args, work_dir))
+            logging.getLogger(__name__).info(f"{name}: done in {report['scenarios'][-1]['total_wall_s']:.1f}s")
+        worker_pool.close()
+        worker_pool.join()
+    finally:
+        os.chdir(cwd)
+        if not args.keep_output:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report_path.write_text(json.dumps(report, indent=2))
+    logging.getLogger(__name__).info(f"report written to {report_path}")
+    if args.compare:
+        regressions = compare_reports(report, json.loads(Path(args.compare).read_text()), args.max_slowdown, args.min_seconds)
+        for regression in regressions:
+            logging.getLogger(__name__).error(f"regression {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,108 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Generator for synthetic sites used by the benchmarks.
+
+Buildings are placed on a square grid, each footprint is a closed polygon around the grid point with a configurable number of
+vertices. With an even number of vertices of at least 8, every second vertex is moved inwards, so the footprints are non-convex
+like many real buildings. Building age and type cycle through typical values, so the construction and operation archetypes vary.
+"""
+import math
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+
+# story height used by CESAR-P per default, see GEOMETRY:MAIN_BLDG_SHAPE:MINIMAL_STORY_HEIGHT
+_STORY_HEIGHT = 2.4
+
+_BLDG_AGES = [1900, 1930, 1960, 1985, 2000, 2008, 2015]
+_BLDG_TYPES = ["MFH", "SFH", "OFFICE", "SCHOOL", "SHOP"]
+_ENERGY_CARRIERS = [1, 2, 3, 4]
+
+
+@dataclass
+class SyntheticSiteParams:
+    """
+    :param nr_of_bldgs: number of buildings on the site
+    :param nr_of_vertices: number of vertices of each footprint, at least 3
+    :param nr_of_floors: number of floors of each building
+    :param footprint_radius: distance of the outer footprint vertices to the center of the building in m
+    :param spacing: distance between the centers of neighbouring buildings in m
+    """
+
+    nr_of_bldgs: int = 10
+    nr_of_vertices: int = 4
+    nr_of_floors: int = 3
+    footprint_radius: float = 10.0
+    spacing: float = 30.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def create_footprint(center_x: float, center_y: float, nr_of_vertices: int, radius: float) -> List[List[float]]:
+    """
+    :return: closed polygon in clockwise order, first vertex is repeated at the end
+    """
+    assert nr_of_vertices >= 3, "a footprint needs at least three vertices"
+    is_concave = nr_of_vertices >= 8 and nr_of_vertices % 2 == 0
+    vertices = []
+    for i in range(nr_of_vertices):
+        angle = -2 * math.pi * i / nr_of_vertices  # negative angle gives clockwise order
+        vertex_radius = radius * 0.7 if is_concave and i % 2 == 1 else radius
+        vertices.append([round(center_x + vertex_radius * math.cos(angle), 3), round(center_y + vertex_radius * math.sin(angle), 3)])
+    return vertices + [vertices[0]]
+
+
+def create_site(params: SyntheticSiteParams, folder: Path) -> Dict[str, Path]:
+    """
+    Write site vertices and building information files in the format expected by the default MANAGER configuration.
+
+    :param params: properties of the site to create
+    :param folder: folder to write the files to, created if not existing
+    :return: dict with the keys "vertices" and "bldg_info" and the path of the written file as value
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    grid_size = math.ceil(math.sqrt(params.nr_of_bldgs))
+    height = params.nr_of_floors * _STORY_HEIGHT + _STORY_HEIGHT / 4  # avoid rounding issues when CESAR-P calculates the nr of floors
+    vertices_rows = []
+    bldg_info_rows = []
+    for idx in range(params.nr_of_bldgs):
+        fid = idx + 1
+        (center_x, center_y) = ((idx % grid_size) * params.spacing, (idx // grid_size) * params.spacing)
+        for (x, y) in create_footprint(center_x, center_y, params.nr_of_vertices, params.footprint_radius):
+            vertices_rows.append({"TARGET_FID": fid, "POINT_X": x, "POINT_Y": y, "HEIGHT": height})
+        bldg_info_rows.append(
+            {
+                "ORIG_FID": fid,
+                "SIA2024BuildingType": _BLDG_TYPES[idx % len(_BLDG_TYPES)],
+                "BuildingAge": _BLDG_AGES[idx % len(_BLDG_AGES)],
+                "ECarrierHeating": _ENERGY_CARRIERS[idx % len(_ENERGY_CARRIERS)],
+                "ECarrierDHW": _ENERGY_CARRIERS[(idx + 1) % len(_ENERGY_CARRIERS)],
+            }
+        )
+    files = {"vertices": folder / "SiteVertices.csv", "bldg_info": folder / "BuildingInformation.csv"}
+    pd.DataFrame(vertices_rows).to_csv(files["vertices"], index=False)
+    pd.DataFrame(bldg_info_rows).to_csv(files["bldg_info"], index=False)
+    return files
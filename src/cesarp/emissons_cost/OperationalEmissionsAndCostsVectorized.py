@@ -0,0 +1,218 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+from typing import Dict, Any, Optional, Sequence, Union, cast
+import numpy as np
+import pint
+
+from cesarp.energy_strategy.EnergyStrategy import EnergyStrategy
+from cesarp.model.EnergySource import EnergySource
+from cesarp.emissons_cost.EmissionAndCostCalculationError import EmissonAndCostCalculationError
+from cesarp.emissons_cost.OperationalEmissionsAndCosts import (
+    OperationalEmissionsAndCostsResult,
+    PerSystemResults,
+    FUEL_COST_UNIT,
+    PEN_UNIT,
+    CO2_EMISSION_UNIT,
+    SPECIFIC_ENERGY_DEMAND_UNIT,
+)
+
+_CARRIERS = list(EnergySource)
+_CARRIER_IDX = {carrier: idx for idx, carrier in enumerate(_CARRIERS)}
+_FUEL_COST_FACTOR_UNIT = "CHF / kWh"
+_PEN_FACTOR_UNIT = "Oileq"
+_CO2_COEFF_UNIT = "kg * CO2eq / MJ"
+
+
+class OperationalEmissionsAndCostsVectorized:
+    """
+    Array version of :py:class:`cesarp.emissons_cost.OperationalEmissionsAndCosts.OperationalEmissionsAndCosts`, calculating the operational
+    emissions and costs for many buildings at once, e.g. for the whole site and all TIME_PERIODS of the energy strategy in post-processing.
+
+    All factors of the energy strategy are read once on initialization into tables per energy carrier and time period. Per calculation they are
+    looked up for all buildings with one numpy indexing operation and units are only handled once per result column.
+    The results are the same as when calling OperationalEmissionsAndCosts for each building. Use split_per_bldg() if you need the
+    results per building, e.g. to create the summary tables with :py:class:`cesarp.results.ResultProcessor`.
+    """
+
+    def __init__(self, ureg: pint.UnitRegistry, custom_config: Optional[Dict[str, Any]] = None):
+        self._ureg = ureg
+        energy_strategy = EnergyStrategy(ureg, custom_config)
+        self._time_periods = np.array(sorted(energy_strategy.system_efficiencis.time_periods))
+        self._heating_sys_eff = self._init_table(energy_strategy.system_efficiencis.get_heating_system_efficiency)
+        self._dhw_sys_eff = self._init_table(energy_strategy.system_efficiencis.get_dhw_system_efficiency)
+        self._heating_value_factor = self._init_table(energy_strategy.system_efficiencis.get_heating_value_factor)
+        self._pen_factor = self._init_table(energy_strategy.energy_mix.get_pen_factor_for, _PEN_FACTOR_UNIT)
+        self._co2_coeff = self._init_table(energy_strategy.energy_mix.get_co2_coeff_for, _CO2_COEFF_UNIT)
+        self._fuel_cost_factor = self._init_table(energy_strategy.fuel_cost_factors.get_fuel_cost_factor, _FUEL_COST_FACTOR_UNIT)
+
+    def _init_table(self, get_factor, unit: Optional[str] = None) -> np.ndarray:
+        """
+        :param get_factor: method taking energy carrier and time period returning the factor
+        :param unit: unit to convert factors to, None if factors are plain numbers
+        :return: table with the factors, rows are energy carriers as in _CARRIERS and columns the time periods; NaN if there is no factor defined,
+                 the KeyError the energy strategy raises for those is raised by _lookup() only if the factor is actually needed
+        """
+        table = np.full((len(_CARRIERS), len(self._time_periods)), np.nan)
+        for carrier_idx, carrier in enumerate(_CARRIERS):
+            for period_idx, period in enumerate(self._time_periods):
+                try:
+                    factor = get_factor(carrier, int(period))
+                except KeyError:
+                    continue
+                table[carrier_idx, period_idx] = factor.to(unit).m if unit else factor
+        return table
+
+    def get_operational_emissions_and_costs(
+        self,
+        specific_dhw_demand: pint.Quantity,
+        total_dhw_demand: pint.Quantity,
+        dhw_carriers: Sequence[EnergySource],
+        specific_heating_demand: pint.Quantity,
+        total_heating_demand: pint.Quantity,
+        heating_carriers: Sequence[EnergySource],
+        specific_electricity_demand: pint.Quantity,
+        total_electricity_demand: pint.Quantity,
+        sim_years: Union[int, Sequence[int]],
+    ) -> OperationalEmissionsAndCostsResult:
+        """
+        Calculate operational cost and emissions for many buildings, parameters are the same as for OperationalEmissionsAndCosts.get_operational_emissions_and_costs(),
+        but the demand values are Quantities holding a numpy array with one value per building and energy carriers are passed as sequences.
+        Pass the same building several times with different sim_years to get the results for different time periods.
+
+        :param sim_years: year of simulation per building, if just one year is given it is used for all buildings
+        :return: results with one value per building in each of the Quantities, energy_carrier and simulation_year are numpy arrays
+        """
+        period_idx = self._get_period_idx(np.broadcast_to(np.asarray(sim_years), np.shape(specific_dhw_demand.m)))
+        heating_res = self._calc_heat_producing_system(specific_heating_demand, total_heating_demand, heating_carriers, period_idx, self._heating_sys_eff, "heating")
+        dhw_res = self._calc_heat_producing_system(specific_dhw_demand, total_dhw_demand, dhw_carriers, period_idx, self._dhw_sys_eff, "dhw")
+        el_res = self._calc_electricity(specific_electricity_demand, total_electricity_demand, period_idx)
+        return OperationalEmissionsAndCostsResult(
+            total_pen=heating_res.pen + dhw_res.pen + el_res.pen,
+            total_co2_emission=heating_res.co2_emission + dhw_res.co2_emission + el_res.co2_emission,
+            heating_system=heating_res,
+            dhw_system=dhw_res,
+            electricity=el_res,
+            simulation_year=cast(int, self._time_periods[period_idx]),
+        )
+
+    def _get_period_idx(self, sim_years: np.ndarray) -> np.ndarray:
+        period_idx = np.searchsorted(self._time_periods, sim_years).clip(max=len(self._time_periods) - 1)
+        invalid = self._time_periods[period_idx] != sim_years
+        assert not np.any(invalid), f"requested {np.unique(sim_years[invalid])} is not valid as time period, available are {self._time_periods}"
+        return period_idx
+
+    def _calc_heat_producing_system(
+        self,
+        specific_demand: pint.Quantity,
+        total_demand: pint.Quantity,
+        carriers: Sequence[EnergySource],
+        period_idx: np.ndarray,
+        sys_eff_table: np.ndarray,
+        system_name: str,
+    ) -> PerSystemResults:
+        carrier_idx = np.fromiter((_CARRIER_IDX[carrier] for carrier in carriers), dtype=int, count=len(carriers))
+        # no cost and emissions if energy source is NO - same as procedure in Matlab version
+        is_used = carrier_idx != _CARRIER_IDX[EnergySource.NO]
+        sys_eff = self._lookup(sys_eff_table, f"{system_name} system efficiency", carrier_idx, period_idx, is_used)
+        no_eff = is_used & (sys_eff == 0)
+        if np.any(no_eff):
+            raise EmissonAndCostCalculationError(
+                f"Could not calculate {system_name} cost and emissions because {system_name} system efficiency for energy carrier(s) "
+                f"{set(np.asarray(_CARRIERS, dtype=object)[carrier_idx[no_eff]])} and simulation year(s) {set(self._time_periods[period_idx[no_eff]])} is 0"
+            )
+        sys_eff = np.where(is_used, sys_eff, 1)
+
+        def lookup(table: np.ndarray, factor_name: str) -> np.ndarray:
+            return np.where(is_used, self._lookup(table, factor_name, carrier_idx, period_idx, is_used), 0)
+
+        fuel_demand = np.where(is_used, total_demand.m / sys_eff, 0)
+        specific_fuel_demand = specific_demand.to(SPECIFIC_ENERGY_DEMAND_UNIT).m / sys_eff * lookup(self._heating_value_factor, "heating value factor")
+        return PerSystemResults(
+            pen=self._ureg.Quantity(
+                specific_fuel_demand * lookup(self._pen_factor, "PEN factor") * self._to_factor(SPECIFIC_ENERGY_DEMAND_UNIT, _PEN_FACTOR_UNIT, PEN_UNIT), PEN_UNIT
+            ),
+            co2_emission=self._ureg.Quantity(
+                specific_fuel_demand * lookup(self._co2_coeff, "CO2 coefficient") * self._to_factor(SPECIFIC_ENERGY_DEMAND_UNIT, _CO2_COEFF_UNIT, CO2_EMISSION_UNIT),
+                CO2_EMISSION_UNIT,
+            ),
+            fuel_demand=self._ureg.Quantity(fuel_demand, total_demand.u),
+            fuel_cost=self._ureg.Quantity(
+                fuel_demand * lookup(self._fuel_cost_factor, "fuel cost factor") * self._to_factor(total_demand.u, _FUEL_COST_FACTOR_UNIT, FUEL_COST_UNIT), FUEL_COST_UNIT
+            ),
+            # array with the energy carrier per building instead of a single EnergySource, see get_operational_emissions_and_costs()
+            energy_carrier=cast(EnergySource, np.asarray(_CARRIERS, dtype=object)[carrier_idx]),
+        )
+
+    def _calc_electricity(self, specific_el_demand: pint.Quantity, total_el_demand: pint.Quantity, period_idx: np.ndarray) -> PerSystemResults:
+        el_idx = np.full(len(period_idx), _CARRIER_IDX[EnergySource.ELECTRICITY])
+        is_used = np.full(len(period_idx), True)
+        pen_factor = self._lookup(self._pen_factor, "PEN factor", el_idx, period_idx, is_used)
+        co2_coeff = self._lookup(self._co2_coeff, "CO2 coefficient", el_idx, period_idx, is_used)
+        fuel_cost_factor = self._lookup(self._fuel_cost_factor, "fuel cost factor", el_idx, period_idx, is_used)
+        specific_el_demand_m = specific_el_demand.m
+        return PerSystemResults(
+            pen=self._ureg.Quantity(specific_el_demand_m * pen_factor * self._to_factor(specific_el_demand.u, _PEN_FACTOR_UNIT, PEN_UNIT), PEN_UNIT),
+            co2_emission=self._ureg.Quantity(specific_el_demand_m * co2_coeff * self._to_factor(specific_el_demand.u, _CO2_COEFF_UNIT, CO2_EMISSION_UNIT), CO2_EMISSION_UNIT),
+            fuel_demand=total_el_demand,
+            fuel_cost=self._ureg.Quantity(total_el_demand.m * fuel_cost_factor * self._to_factor(total_el_demand.u, _FUEL_COST_FACTOR_UNIT, FUEL_COST_UNIT), FUEL_COST_UNIT),
+            energy_carrier=cast(EnergySource, np.full(len(period_idx), EnergySource.ELECTRICITY, dtype=object)),
+        )
+
+    def _lookup(self, table: np.ndarray, factor_name: str, carrier_idx: np.ndarray, period_idx: np.ndarray, is_used: np.ndarray) -> np.ndarray:
+        """
+        :return: factors for each building from the table, raises KeyError as the energy strategy does if a factor is missing for a building where is_used is True
+        """
+        factors = table[carrier_idx, period_idx]
+        missing = is_used & np.isnan(factors)
+        if np.any(missing):
+            raise KeyError(
+                f"no {factor_name} defined for energy carrier(s) {set(np.asarray(_CARRIERS, dtype=object)[carrier_idx[missing]])} "
+                f"and simulation year(s) {set(self._time_periods[period_idx[missing]])}"
+            )
+        return factors
+
+    def _to_factor(self, value_unit, factor_unit, result_unit) -> float:
+        """:return: multiplier to get result in result_unit when multiplying magnitudes of a value and a factor"""
+        return (self._ureg.Quantity(1, value_unit) * self._ureg.Quantity(1, factor_unit)).to(result_unit).m
+
+
+def split_per_bldg(result: OperationalEmissionsAndCostsResult, fids: Sequence[int]) -> Dict[int, OperationalEmissionsAndCostsResult]:
+    """
+    :param result: result of OperationalEmissionsAndCostsVectorized.get_operational_emissions_and_costs()
+    :param fids: fid for each of the values in the result, in the same order as the demand values were passed
+    :return: results per building as they would be returned by OperationalEmissionsAndCosts
+    """
+
+    def system_res_at(res: PerSystemResults, idx: int) -> PerSystemResults:
+        return PerSystemResults(res.pen[idx], res.co2_emission[idx], res.fuel_demand[idx], res.fuel_cost[idx], np.asarray(res.energy_carrier)[idx])
+
+    return {
+        fid: OperationalEmissionsAndCostsResult(
+            total_pen=result.total_pen[idx],
+            total_co2_emission=result.total_co2_emission[idx],
+            heating_system=system_res_at(result.heating_system, idx),
+            dhw_system=system_res_at(result.dhw_system, idx),
+            electricity=system_res_at(result.electricity, idx),
+            simulation_year=int(np.asarray(result.simulation_year)[idx]),
+        )
+        for idx, fid in enumerate(fids)
+    }
@@ -33,6 +33,8 @@ class / module
 ======================================================================================= ===========================================================
 :py:class:`cesarp.emissions_cost.OperationalEmissionsAndCosts`                          calculate operational emissions and costs for a building
 
+:py:class:`cesarp.emissions_cost.OperationalEmissionsAndCostsVectorized`                calculate operational emissions and costs for many buildings and time periods at once
+
 ======================================================================================= ===========================================================
 
 """
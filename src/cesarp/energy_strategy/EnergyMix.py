@@ -24,6 +24,7 @@ import pint
 from typing import Dict, Any
 
 from cesarp.model.EnergySource import EnergySource
+from cesarp.energy_strategy.compiled_tables import get_source_table
 
 
 class EnergyMix:
@@ -77,13 +78,16 @@ class EnergyMix:
         """
         self.ureg = unit_registry
         self._es_cfg = energy_strategy_config
-        primary_energy_factors = pd.read_excel(self._es_cfg["PRIMARY_ENERGY_FACTORS_FILE"], index_col=self.COL_KEY_NAME_OF_FUEL)[[self.PEF_COL_PEN, self.PEF_COL_CO2_EQUIV]]
+        primary_energy_factors = get_source_table(self._es_cfg, self._es_cfg["PRIMARY_ENERGY_FACTORS_FILE"]).set_index(self.COL_KEY_NAME_OF_FUEL)[
+            [self.PEF_COL_PEN, self.PEF_COL_CO2_EQUIV]
+        ]
 
         if self._es_cfg["ENERGYMIX"]["ELECTRICITY_FACTORS"]["MIX_WITH_TRADE"]:
             row_selection = self.EL_ROW_SELECTION_WITH_TRADE
         else:
             row_selection = self.EL_ROW_SELECTION_WITHOUT_TRADE
-        electricity_factors_all_rows = pd.read_excel(self._es_cfg["ENERGYMIX"]["ELECTRICITY_FACTORS"]["PATH"], index_col=self.EL_KEY_COL)
+        electricity_factors_all_rows = get_source_table(self._es_cfg, self._es_cfg["ENERGYMIX"]["ELECTRICITY_FACTORS"]["PATH"])
+        electricity_factors_all_rows = electricity_factors_all_rows.set_index(electricity_factors_all_rows.columns[self.EL_KEY_COL])
         electricity_factors = electricity_factors_all_rows.loc[row_selection.keys()].rename(row_selection)
         wood_mix_per_period = self.get_mix_input_data(self._es_cfg["ENERGYMIX"]["WOOD_MIX_FILE"], index_col_name=self.COL_KEY_NAME_OF_FUEL)
         gas_mix_per_period = self.get_mix_input_data(self._es_cfg["ENERGYMIX"]["GAS_MIX_FILE"], index_col_name=self.COL_KEY_NAME_OF_FUEL)
@@ -111,7 +115,7 @@ class EnergyMix:
         )
 
     def get_mix_input_data(self, file_path, index_col_name):
-        mix_data_all_columns = pd.read_excel(file_path, index_col=index_col_name)
+        mix_data_all_columns = get_source_table(self._es_cfg, file_path).set_index(index_col_name)
         try:
             mix_data_per_time_period = mix_data_all_columns[self._es_cfg["TIME_PERIODS"]]
         except KeyError as kerr:
@@ -37,7 +37,7 @@ class FuelCosts:
         self.ureg = ureg
         self._es_cfg = energy_strategy_config
         self.fuel_costs_param = get_energysource_vs_timeperiod_params_table(
-            self._es_cfg["FUEL"]["FUEL_COST_FACTORS_FILE"], self._es_cfg["TIME_PERIODS"], self.COL_NR_ENERGY_CARRIER
+            self._es_cfg, self._es_cfg["FUEL"]["FUEL_COST_FACTORS_FILE"], self._es_cfg["TIME_PERIODS"], self.COL_NR_ENERGY_CARRIER
         )
 
     def get_fuel_cost_factor(self, energy_carrier: EnergySource, time_period: int):
@@ -27,6 +27,7 @@ from cesarp.model.BuildingElement import BuildingElement
 from cesarp.model.BldgType import BldgType
 from cesarp.energy_strategy import get_selected_energy_strategy_cfg
 from cesarp.energy_strategy.input_parser_helper import check_timeperiod
+from cesarp.energy_strategy.compiled_tables import get_source_table
 
 
 class RetrofitRates:
@@ -85,13 +86,10 @@ class RetrofitRates:
 
     def _get_all_partial_retrofit_shares(self, sim_year: int, bldg_type: BldgType):
         try:
-            partial_shares_df = self._partial_shares[bldg_type].loc[:, [sim_year, self._COL_LABEL_BLDG_ELEMS]]
-            ret_shares_per_ac = {}
-            for age_class in set(partial_shares_df.index):
-                shares_for_ac = []
-                for idx, row in partial_shares_df.loc[age_class].iterrows():
-                    shares_for_ac.append((row["Building Element"], row[sim_year]))
-                ret_shares_per_ac[age_class] = shares_for_ac
+            partial_shares_df = self._partial_shares[bldg_type]
+            ret_shares_per_ac: Dict[AgeClass, List[Tuple[List[BuildingElement], float]]] = {}
+            for age_class, bldg_elems, share in zip(partial_shares_df.index, partial_shares_df[self._COL_LABEL_BLDG_ELEMS], partial_shares_df[sim_year]):
+                ret_shares_per_ac.setdefault(age_class, []).append((bldg_elems, share))
             return ret_shares_per_ac
         except KeyError:
             print(f"no partial retrofit share found for simulation period {sim_year}, bldg type {bldg_type.name}")
@@ -109,7 +107,7 @@ class RetrofitRates:
         ac_to_part_ret_ac = full_ret_rates[self._COL_LABEL_PARTIAL_AC_MAPPING].apply(lambda ac: AgeClass.from_string(ac))
         full_ret_rates.drop(self._COL_LABEL_PARTIAL_AC_MAPPING, axis="columns", inplace=True)
         full_ret_rates.columns = [int(col_idx) for col_idx in full_ret_rates.columns]
-        full_ret_rates = full_ret_rates.applymap(lambda x: x / 100)  # in input files retrofit rates are in % from 0..100
+        full_ret_rates = full_ret_rates / 100  # in input files retrofit rates are in % from 0..100
         return pd.concat([full_ret_rates, ac_to_part_ret_ac], axis="columns")
 
     def __read_partial_shares(self, bldg_type: BldgType):
@@ -119,8 +117,8 @@ class RetrofitRates:
         partial_ret_shares.drop(self._COL_LABEL_YOC, axis="columns", inplace=True)
         partial_ret_shares.columns = [int(col_idx) if col_idx != self._COL_LABEL_BLDG_ELEMS else col_idx for col_idx in partial_ret_shares.columns]
         bldg_elem_col = partial_ret_shares[self._COL_LABEL_BLDG_ELEMS].apply(self.__convert_bldg_elems_str_to_enum_array)
-        partial_ret_shares.drop(self._COL_LABEL_BLDG_ELEMS, axis="columns", inplace=True)  # remove column to be able to use applymap on all numeric entries...
-        partial_ret_shares = partial_ret_shares.applymap(lambda x: x / 100)  # in input files retrofit rates are in % from 0..100
+        partial_ret_shares.drop(self._COL_LABEL_BLDG_ELEMS, axis="columns", inplace=True)  # remove column to be able to divide all numeric entries...
+        partial_ret_shares = partial_ret_shares / 100  # in input files retrofit rates are in % from 0..100
         partial_ret_shares = pd.concat([partial_ret_shares, bldg_elem_col], axis="columns")  # add bldg elem col again
         return partial_ret_shares
 
@@ -133,4 +131,4 @@ class RetrofitRates:
         return [BuildingElement(bldg_elem_name.strip()) for bldg_elem_name in bldg_elems_as_str.split("+")]
 
     def __read_raw_df(self, file_cfg):
-        return pd.read_csv(file_cfg["PATH"], sep=file_cfg["SEPARATOR"])
+        return get_source_table(self._es_cfg, file_cfg["PATH"], separator=file_cfg["SEPARATOR"])
@@ -46,15 +46,16 @@ class SystemEfficiencies:
         self._es_cfg = energy_strategy_config
         self.time_periods = self._es_cfg["TIME_PERIODS"]
         self.dhw_system_efficiencies = get_energysource_vs_timeperiod_params_table(
-            self._es_cfg["EFFICIENCIES"]["DHW_SYSTEM_EFFICIENCY_FILE"], self.time_periods, self.COL_NR_ENERGY_CARRIER
+            self._es_cfg, self._es_cfg["EFFICIENCIES"]["DHW_SYSTEM_EFFICIENCY_FILE"], self.time_periods, self.COL_NR_ENERGY_CARRIER
         )
         self.heating_system_efficiencies = get_energysource_vs_timeperiod_params_table(
+            self._es_cfg,
             self._es_cfg["EFFICIENCIES"]["HEATING_SYSTEM_EFFICIENCY_FILE"],
             self.time_periods,
             self.COL_NR_ENERGY_CARRIER,
         )
         self.heating_value_factor = get_energysource_vs_timeperiod_params_table(
-            self._es_cfg["EFFICIENCIES"]["HEATING_VALUE_FACTOR_FILE"], self.time_periods, self.COL_NR_ENERGY_CARRIER
+            self._es_cfg, self._es_cfg["EFFICIENCIES"]["HEATING_VALUE_FACTOR_FILE"], self.time_periods, self.COL_NR_ENERGY_CARRIER
         )
 
     def get_dhw_system_efficiency(self, carrier: EnergySource, sim_year: int):
@@ -31,6 +31,8 @@ The package handles data access for the two strategies, but has no buisness logi
 The input files are all Excel files, as there are quite many files and they did exist already, the format was not changed to YAML or CSV.
 Data seems also to be fairly stable, if changes occure more frequent you could think of changing the data format. If you do so, just keep
 the interface of the classes as it is now, so that the other packages accessing data do not need to be changed.
+To avoid parsing the Excel files over and over, the source tables are compiled into one binary file per strategy on first use, see
+:py:mod:`cesarp.energy_strategy.compiled_tables`.
 
 The energy strategy is used in two places:
 
@@ -52,6 +54,8 @@ class / module
 :py:class:`cesarp.energy_strategy.SystemEfficiencies`                                   query efficiency of system installations (for dhw, heating)
 
 :py:class:`cesarp.energy_strategy.RetrofitRates`                                        query retrofit rates
+
+:py:mod:`cesarp.energy_strategy.compiled_tables`                                        read source tables from the compiled binary bundle of the strategy
 ======================================================================================= ===========================================================
 
 """
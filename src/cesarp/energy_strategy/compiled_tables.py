@@ -0,0 +1,170 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Compiled energy strategy tables. The source tables of an energy strategy (Excel and CSV files linked in the strategy
+configuration) are parsed once and stored together in a binary bundle file per strategy. Further reads take the table
+from the bundle, which is much faster than parsing the Excel files and does not need an Excel engine (openpyxl).
+
+A table in the bundle is only used if modification time and size of its source file match the ones recorded when
+compiling, otherwise the source is parsed again and the bundle is updated. If the bundle can not be written, e.g. because
+the bundle location is read-only, a warning is logged and the parsed tables are used.
+
+Configuration per energy strategy, see COMPILED_TABLES in energy_strategy_config.yml. If no FILE is configured, the bundle is
+stored in the cache directory of the user, named after the source files of the strategy. Thus each strategy and installation of
+cesar-p gets its own bundle and nothing is written into the installed package.
+
+Attention: the bundle is a pickle file, only use bundles you created yourself.
+"""
+from typing import Dict, Any, Tuple, Union, Iterator
+from pathlib import Path
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import pandas as pd
+
+# 1 - initial version of the bundle format
+_BUNDLE_VERSION = 1
+_PICKLE_PROTOCOL = 4
+
+_BUNDLE_KEY_VERSION = "version"
+_BUNDLE_KEY_SOURCES = "sources"
+_BUNDLE_KEY_TABLES = "tables"
+
+_EXCEL_SUFFIXES = [".xlsx", ".xls"]
+_CSV_SUFFIXES = [".csv"]
+
+# per bundle file the bundle content, so that the bundle is read only once per process
+_bundles_in_memory: Dict[str, Dict[str, Any]] = {}
+
+
+def get_source_table(energy_strategy_config: Dict[str, Any], source_file: Union[str, Path], separator: str = ",") -> pd.DataFrame:
+    """
+    :param energy_strategy_config: dictonary with configuration entries of energy strategy in use
+    :param source_file: full path of the Excel or CSV file to read
+    :param separator: column separator, only used for CSV files
+    :return: table as read with pandas read_excel/read_csv without specifying an index column, the returned DataFrame can be changed by the caller
+    """
+    compiled_cfg = energy_strategy_config.get("COMPILED_TABLES", {"ACTIVE": False})
+    if not compiled_cfg["ACTIVE"]:
+        return _parse_source(source_file, separator)
+
+    bundle_file = str(compiled_cfg["FILE"]) if compiled_cfg.get("FILE", None) else _get_default_bundle_file(energy_strategy_config)
+    bundle = _get_bundle(bundle_file)
+    key = _source_key(source_file)
+    if bundle[_BUNDLE_KEY_SOURCES].get(key, None) != _source_stamp(source_file):
+        bundle[_BUNDLE_KEY_TABLES][key] = _parse_source(source_file, separator)
+        bundle[_BUNDLE_KEY_SOURCES][key] = _source_stamp(source_file)
+        _write_bundle(bundle, bundle_file)
+    return bundle[_BUNDLE_KEY_TABLES][key].copy()
+
+
+def compile_energy_strategy_tables(energy_strategy_config: Dict[str, Any]) -> None:
+    """
+    Parse all source tables linked in the energy strategy configuration and write them to the bundle file defined in COMPILED_TABLES - FILE.
+    Tables in an existing bundle which are up to date are not parsed again.
+    Calling this method is optional, tables not yet in the bundle are compiled on first access.
+
+    :param energy_strategy_config: dictonary with configuration entries of energy strategy to compile
+    """
+    for source_file, separator in _get_all_sources(energy_strategy_config):
+        get_source_table(energy_strategy_config, source_file, separator)
+
+
+def _get_all_sources(cfg: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    for value in cfg.values():
+        if isinstance(value, dict):
+            yield from _get_all_sources(value)
+    for key, value in cfg.items():
+        if isinstance(value, (str, Path)) and ("FILE" in key or "PATH" in key) and Path(value).suffix.lower() in _EXCEL_SUFFIXES + _CSV_SUFFIXES:
+            yield (str(value), cfg.get("SEPARATOR", ","))
+
+
+def _get_default_bundle_file(energy_strategy_config: Dict[str, Any]) -> str:
+    sources = sorted(_source_key(source_file) for (source_file, _) in _get_all_sources(energy_strategy_config))
+    sources_hash = hashlib.sha1("\n".join(sources).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(_get_user_cache_dir(), f"energy_strategy_{sources_hash}.bin")
+
+
+def _get_user_cache_dir() -> str:
+    if sys.platform == "win32":
+        cache_base_dir = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    elif sys.platform == "darwin":
+        cache_base_dir = os.path.expanduser("~/Library/Caches")
+    else:
+        cache_base_dir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(cache_base_dir, "cesarp", "compiled_tables")
+
+
+def _get_bundle(bundle_file: str) -> Dict[str, Any]:
+    if bundle_file not in _bundles_in_memory:
+        _bundles_in_memory[bundle_file] = _read_bundle(bundle_file)
+    return _bundles_in_memory[bundle_file]
+
+
+def _read_bundle(bundle_file: str) -> Dict[str, Any]:
+    empty_bundle: Dict[str, Any] = {_BUNDLE_KEY_VERSION: _BUNDLE_VERSION, _BUNDLE_KEY_SOURCES: {}, _BUNDLE_KEY_TABLES: {}}
+    if not os.path.exists(bundle_file):
+        return empty_bundle
+    try:
+        with open(bundle_file, "rb") as fh:
+            bundle = pickle.load(fh)
+    except Exception as ex:
+        logging.getLogger(__name__).warning(f"could not read compiled energy strategy tables {bundle_file}, compiling again. Reason: {ex}")
+        return empty_bundle
+    if not isinstance(bundle, dict) or bundle.get(_BUNDLE_KEY_VERSION, None) != _BUNDLE_VERSION:
+        logging.getLogger(__name__).info(f"compiled energy strategy tables {bundle_file} have an outdated format, compiling again")
+        return empty_bundle
+    return bundle
+
+
+def _write_bundle(bundle: Dict[str, Any], bundle_file: str) -> None:
+    # write to a temporary file and replace, so that parallel processes never read a partially written bundle
+    try:
+        os.makedirs(os.path.dirname(bundle_file), exist_ok=True)
+        (fd, tmp_path) = tempfile.mkstemp(dir=os.path.dirname(bundle_file), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(bundle, fh, protocol=_PICKLE_PROTOCOL)
+            os.replace(tmp_path, bundle_file)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+    except OSError as ex:
+        logging.getLogger(__name__).warning(f"could not write compiled energy strategy tables to {bundle_file}, tables are compiled again in each process. Reason: {ex}")
+
+
+def _source_key(source_file: Union[str, Path]) -> str:
+    return os.path.normcase(os.path.abspath(source_file))
+
+
+def _source_stamp(source_file: Union[str, Path]) -> Tuple[int, int]:
+    stat = os.stat(source_file)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _parse_source(source_file: Union[str, Path], separator: str) -> pd.DataFrame:
+    if Path(source_file).suffix.lower() in _CSV_SUFFIXES:
+        return pd.read_csv(source_file, sep=separator)
+    return pd.read_excel(source_file)
@@ -19,19 +19,20 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
-import pandas as pd
-
 from cesarp.model.EnergySource import EnergySource
+from cesarp.energy_strategy.compiled_tables import get_source_table
 
 
-def get_energysource_vs_timeperiod_params_table(filepath, expected_time_periods, COL_NR_ENERGY_CARRIER):
+def get_energysource_vs_timeperiod_params_table(energy_strategy_config, filepath, expected_time_periods, COL_NR_ENERGY_CARRIER):
     """
     Get parameters form excel file, having COL_NR_ENERGY_CARRIER string descriptions of the Energy Carrier / Energy Source (matching string values of Enum EnergySource) and
     columns beeing time periods matching time periods defined in configuration TIME_PERIODS.
+    :param energy_strategy_config: dictonary with configuration entries of energy strategy in use, used for reading the compiled tables
     :param filepath: full file path to excel file
     :return: pandas dataframe with parameters, index EnergySource and columns time period (int)
     """
-    parameters = pd.read_excel(filepath, index_col=COL_NR_ENERGY_CARRIER)
+    parameters = get_source_table(energy_strategy_config, filepath)
+    parameters = parameters.set_index(parameters.columns[COL_NR_ENERGY_CARRIER])
     parameters.index = map(lambda es_name: EnergySource(es_name), list(parameters.index))
     assert all(
         [tp in parameters.columns for tp in expected_time_periods]
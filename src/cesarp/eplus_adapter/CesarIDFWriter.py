@@ -99,6 +99,7 @@ class CesarIDFWriter:
         self.idf_file_path = idf_file_path
         self.__create_empty_idf()
         self.zone_data = Optional[Dict[int, Tuple[str, List[EpBunch]]]]
+        self.floor_groups: Optional[List[List[int]]] = None
         if profiles_files_handler:
             self.profiles_files_handler_method = profiles_files_handler.add_file
         else:
@@ -111,7 +112,14 @@ class CesarIDFWriter:
         """
         idf = IDF(str(self.idf_file_path))
         self.add_basic_simulation_settings(idf, bldg_model.site.site_ground_temperatures)
-        constr_handler = ConstructionIDFWritingHandler(bldg_model.bldg_construction, bldg_model.neighbours_construction_props, self.unit_registry)
+        constr_handler = ConstructionIDFWritingHandler(
+            bldg_model.bldg_construction, bldg_model.neighbours_construction_props, self.unit_registry, self._cfg["CONSTRUCTION_CACHE"]["ACTIVE"]
+        )
+        if self._cfg["ZONE_MULTIPLIERS"]["ACTIVE"]:
+            op_mapping = bldg_model.bldg_operation_mapping
+            self.floor_groups = idf_writer_geometry.group_repeated_floors(
+                bldg_model.bldg_shape, lambda floor_a, floor_b: op_mapping.get_operation_for_floor(floor_a) is op_mapping.get_operation_for_floor(floor_b)
+            )
         self.add_building_geometry(idf, bldg_model.bldg_shape, constr_handler)
 
         self.add_neighbours(idf, bldg_model.neighbours, constr_handler)
@@ -242,7 +250,7 @@ class CesarIDFWriter:
         """
 
         idf_writer_geometry.add_basic_geometry_settings(idf)
-        self.zone_data = idf_writer_geometry.add_building(idf, bldg_shape_detailed, constr_handler)
+        self.zone_data = idf_writer_geometry.add_building(idf, bldg_shape_detailed, constr_handler, self.floor_groups)
 
     def add_neighbours(
         self,
@@ -278,9 +286,10 @@ class CesarIDFWriter:
         :return: nothing, changes are saved to the idf
         """
         assert self.zone_data is not None, "make sure that prior to calling add_buidlding_properties attribute zone_data is initialized, e.g. by calling add_buidling_geometry"
+        modeled_floor_nrs = [floor_nr for group in self.floor_groups for floor_nr in group] if self.floor_groups else list(self.zone_data.keys())  # type: ignore
         assert (
-            list(self.zone_data.keys()) == building_operation_mapping.all_assigned_floor_nrs  # type: ignore  # checked self.zone_data for none in assert on line 288
-        ), f"zones/floors {list(self.zone_data.keys())} in geometry do not match with the floors in the building operation mapping ({building_operation_mapping.all_assigned_floor_nrs})"  # type: ignore  # checked self.zone_data for none in assert on line 288
+            modeled_floor_nrs == building_operation_mapping.all_assigned_floor_nrs
+        ), f"zones/floors {modeled_floor_nrs} in geometry do not match with the floors in the building operation mapping ({building_operation_mapping.all_assigned_floor_nrs})"
 
         for (floor_nrs, bldg_op) in building_operation_mapping.get_operation_assignments():
             bldg_op_local_profiles = copy.deepcopy(bldg_op)
@@ -300,7 +309,9 @@ class CesarIDFWriter:
                 if floor_nr in floor_nrs:
                     idf_writer_operation.add_building_operation(idf, zone_name, bldg_op_local_profiles, installation_characteristics, self.unit_registry)
                     idf_writer_operation.add_zone_infiltration(idf, zone_name, infiltrationRate, infiltrationProfile, self.unit_registry)
-                    idf_writer_operation.add_passive_cooling(idf, zone_name, windows_in_zone, bldg_op_local_profiles, window_shading_material)
+                    idf_writer_operation.add_passive_cooling(
+                        idf, zone_name, windows_in_zone, bldg_op_local_profiles, window_shading_material, self._cfg["CONSTRUCTION_CACHE"]["ACTIVE"]
+                    )
 
         return idf
 
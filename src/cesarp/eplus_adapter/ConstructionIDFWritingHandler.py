@@ -29,7 +29,7 @@ from cesarp.model.Construction import Construction
 from cesarp.model.WindowConstruction import WindowGlassConstruction
 from cesarp.model.ShadingObjectConstruction import ShadingObjectConstruction
 from cesarp.model.BuildingConstruction import BuildingConstruction
-from cesarp.eplus_adapter import idf_writer_construction
+from cesarp.eplus_adapter import idf_writer_construction, idf_construction_cache
 
 
 class ConstructionIDFWritingHandler:
@@ -38,6 +38,8 @@ class ConstructionIDFWritingHandler:
     On initialization, constructions to be used for the main building and the neighbouring shading objects are passed.
     The class caches the names so that the lookup is not done repeatedly, which increases the runtime a lot (name lookup is done for each wall, window, and each neighbour,
     leading to many calls making the caching worse it...)
+    If use_construction_cache is True, the IDF objects of the constructions are taken from the process-wide cache in
+    cesarp.eplus_adapter.idf_construction_cache, so that each construction is translated to IDF objects only once for all buildings.
     """
 
     def __init__(
@@ -45,8 +47,10 @@ class ConstructionIDFWritingHandler:
         main_building_construction: BuildingConstruction,
         shading_surfaces_construction: Mapping[str, ShadingObjectConstruction],
         unit_reg: pint.UnitRegistry,
+        use_construction_cache: bool = False,
     ):
         self.unit_reg = unit_reg
+        self._use_construction_cache = use_construction_cache
         self._main_building_construction = main_building_construction
         self._shading_surfaces_construction = shading_surfaces_construction
         self.__constr_idf_obj_names_cache: Dict[str, str] = dict()
@@ -71,7 +75,13 @@ class ConstructionIDFWritingHandler:
         if construction.name in self.__constr_idf_obj_names_cache.keys():
             return self.__constr_idf_obj_names_cache[construction.name]
         if isinstance(construction, Construction):
-            idf_obj_name = idf_writer_construction.add_detailed_construction(idf, construction, self.unit_reg)
+            if self._use_construction_cache:
+                opaque_constr = construction
+                idf_obj_name = idf_construction_cache.add_cached(
+                    idf, opaque_constr, lambda target_idf: idf_writer_construction.add_detailed_construction(target_idf, opaque_constr, self.unit_reg)
+                )
+            else:
+                idf_obj_name = idf_writer_construction.add_detailed_construction(idf, construction, self.unit_reg)
         else:
             raise Exception(f"{__name__} cannot handle construction of tpye {type(construction)} used for building element {bldg_elem}")
 
@@ -113,7 +123,14 @@ class ConstructionIDFWritingHandler:
     def __add_specific_window_glass_construction(self, idf: IDF, win_glass_constr: WindowGlassConstruction, ureg: pint.UnitRegistry) -> str:
         if win_glass_constr.name in self.__win_idf_obj_names_cache:
             return self.__win_idf_obj_names_cache[win_glass_constr.name]
-        return idf_writer_construction.add_win_glass_construction(idf, win_glass_constr, ureg)
+        if self._use_construction_cache:
+            idf_obj_name = idf_construction_cache.add_cached(
+                idf, win_glass_constr, lambda target_idf: idf_writer_construction.add_win_glass_construction(target_idf, win_glass_constr, ureg)
+            )
+        else:
+            idf_obj_name = idf_writer_construction.add_win_glass_construction(idf, win_glass_constr, ureg)
+        self.__win_idf_obj_names_cache[win_glass_constr.name] = idf_obj_name
+        return idf_obj_name
 
     @staticmethod
     def unique_elements_of_list(orig_list: List[Any]):
@@ -26,6 +26,7 @@ from pathlib import Path
 
 import cesarp.common
 from cesarp.eplus_adapter import _default_config_file
+from cesarp.eplus_adapter.eplus_output_retention import open_output_file
 
 
 class EPlusEioResultAnalyzer:
@@ -53,16 +54,20 @@ class EPlusEioResultAnalyzer:
     def get_total_floor_area(self) -> pint.Quantity:
         """
 
-        :return: Total floor area of all zones of the building
+        :return: Total floor area of all zones of the building, zone multipliers are taken into account
         """
-        return sum(self.zone_info[self.floor_area_header_key]) * self.area_unit
+        zone_floor_areas = self.zone_info[self.floor_area_header_key]
+        for multiplier_header in self._cfg_eio_reader["ZONE_MULTIPLIER_HEADERS"]:
+            if multiplier_header in self.zone_info.columns:
+                zone_floor_areas = zone_floor_areas * self.zone_info[multiplier_header]
+        return sum(zone_floor_areas) * self.area_unit
 
     def _read_zone_information(self, result_folder_path):
         zone_summary_start_tag = self._cfg_eio_reader["ZONE_SUMMARY_START_TAG"]
         zone_info_offset_cnt = self._cfg_eio_reader["ZONE_INFO_TO_SUMMARY_OFFSET"]
         sep = self._cfg_eio_reader["SEPARATOR"]
 
-        with open(result_folder_path / Path(self._EIO_FILE_NAME)) as fh:
+        with open_output_file(result_folder_path / Path(self._EIO_FILE_NAME)) as fh:
             line = fh.readline()
             while line and line.find(zone_summary_start_tag) != 0:  # tag must be at the beginning of the line
                 line = fh.readline()  # skip any unexpected header lines before the YAML block is starting
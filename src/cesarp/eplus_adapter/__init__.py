@@ -44,6 +44,12 @@ class / module
 
 :py:mod:`cesarp.eplus_adapter.eplus_error_file_handling`                                extract error level from EnergyPlus err log file
 
+:py:mod:`cesarp.eplus_adapter.eplus_output_retention`                                   delete and compress EnergyPlus output files after the simulation, read compressed output files
+
+:py:mod:`cesarp.eplus_adapter.idf_canonicalization`                                     detect IDF files giving the same simulation results, used to skip duplicate simulations
+
+:py:mod:`cesarp.eplus_adapter.idf_construction_cache`                                   process-wide cache of the IDF objects of constructions, written once and copied to each building's IDF
+
 ======================================================================================= ===========================================================
 
 
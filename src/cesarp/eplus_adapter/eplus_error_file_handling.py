@@ -23,11 +23,14 @@
 Module providing functions to parse energyplus error file.
 """
 import mmap
+import os
 from enum import Enum
 import re
 from typing import Union
 from pathlib import Path
 
+from cesarp.eplus_adapter.eplus_output_retention import open_output_file, output_file_exists
+
 
 EPLUS_ERROR_FILE_NAME = "eplusout.err"
 
@@ -59,15 +62,23 @@ def check_eplus_error_level(eplus_err_file: Union[str, Path]) -> EplusErrorLevel
 
     :return EplusErrorLevel stating the most critical error found in the log file, EplusErrorLevel.NO_ERRORS if all is good
     """
+    if not os.path.isfile(eplus_err_file) and output_file_exists(eplus_err_file):
+        # compressed error file, see cesarp.eplus_adapter.eplus_output_retention
+        with open_output_file(eplus_err_file, "rb") as err_file:
+            return _find_most_severe_error_level(err_file.read())
     with open(eplus_err_file, "rb", 0) as err_file, mmap.mmap(err_file.fileno(), 0, access=mmap.ACCESS_READ) as err_file_content:
-        err_levels_sorted = sorted(list(eplusout_err_identifiers.keys()), key=lambda err_lev: err_lev.value)
-        for err_level_key in err_levels_sorted:
-            identifier_to_search = bytearray(map(ord, eplusout_err_identifiers[err_level_key]))
-            if err_level_key == EplusErrorLevel.WARNING:
-                # match ** Warning **, but not ** Warning ** -- IP Note
-                the_regex = re.compile(rb"(?!\s*\*\*\sWarning\s\*\*\s+.*IP:\sNote\s+--.*)(?=\s*\*\*\sWarning\s\*\*\.*).*")
-                if re.search(the_regex, err_file_content):  # type: ignore
-                    return EplusErrorLevel.WARNING
-            elif err_file_content.find(identifier_to_search) != -1:
-                return err_level_key
+        return _find_most_severe_error_level(err_file_content)
+
+
+def _find_most_severe_error_level(err_file_content) -> EplusErrorLevel:
+    err_levels_sorted = sorted(list(eplusout_err_identifiers.keys()), key=lambda err_lev: err_lev.value)
+    for err_level_key in err_levels_sorted:
+        identifier_to_search = bytearray(map(ord, eplusout_err_identifiers[err_level_key]))
+        if err_level_key == EplusErrorLevel.WARNING:
+            # match ** Warning **, but not ** Warning ** -- IP Note
+            the_regex = re.compile(rb"(?!\s*\*\*\sWarning\s\*\*\s+.*IP:\sNote\s+--.*)(?=\s*\*\*\sWarning\s\*\*\.*).*")
+            if re.search(the_regex, err_file_content):  # type: ignore
+                return EplusErrorLevel.WARNING
+        elif err_file_content.find(identifier_to_search) != -1:
+            return err_level_key
     return EplusErrorLevel.NO_ERRORS
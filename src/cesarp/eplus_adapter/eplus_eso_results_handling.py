@@ -23,15 +23,17 @@ Module providing functions to read and aggregate results of several buildings.
 """
 import logging
 import esoreader
+import numpy as np
 import pandas as pd
 import pint
-from typing import Mapping, Sequence, Dict, Any, Optional
+from typing import Mapping, Sequence, Dict, Any, List, Optional
 from pathlib import Path
 import cesarp.common
 from cesarp.results.EnergyDemandSimulationResults import EnergyDemandSimulationResults
 from cesarp.eplus_adapter import _default_config_file
 from cesarp.eplus_adapter.EPlusEioResultAnalyzer import EPlusEioResultAnalyzer
 from cesarp.eplus_adapter.idf_strings import ResultsFrequency
+from cesarp.eplus_adapter.eplus_output_retention import open_output_file
 
 _ESO_FILE_NAME = "eplusout.eso"
 
@@ -53,8 +55,20 @@ def check_cesar_results_are_enabled(custom_config: Optional[Dict[str, Any]] = No
     return all([req_res in all_annual_res for req_res in _CESAR_SIMULATION_RESULT])
 
 
-def collect_cesar_simulation_summary(result_folder, ureg: pint.UnitRegistry) -> EnergyDemandSimulationResults:
-    res_dict = _cesar_summary_one_bldg_annual(result_folder, _CESAR_SIMULATION_RESULT, ureg)
+def get_meters_not_in_hourly_output(meter_names: Sequence[str], custom_config: Optional[Dict[str, Any]] = None) -> List[str]:
+    """:return: the meters which are not configured to be in the EnergyPlus output with frequency HOURLY"""
+    cfg = cesarp.common.config_loader.load_config_for_package(_default_config_file, __package__, custom_config)
+    hourly_meters = cfg["OUTPUT_METER"].get("HOURLY") or []
+    return [meter for meter in meter_names if meter not in hourly_meters]
+
+
+def collect_cesar_simulation_summary(result_folder, ureg: pint.UnitRegistry, eso: Optional[esoreader.EsoFile] = None) -> EnergyDemandSimulationResults:
+    """
+    :param result_folder: folder with energy plus result files for one building
+    :param ureg: reference to unit registry object
+    :param eso: eplusout.eso of result_folder if already read, see read_result_eso()
+    """
+    res_dict = _cesar_summary_one_bldg_annual(result_folder, _CESAR_SIMULATION_RESULT, ureg, eso)
     total_floor_area = EPlusEioResultAnalyzer(result_folder, ureg).get_total_floor_area()
 
     sim_res = EnergyDemandSimulationResults(
@@ -68,7 +82,7 @@ def collect_cesar_simulation_summary(result_folder, ureg: pint.UnitRegistry) ->
     return sim_res
 
 
-def _cesar_summary_one_bldg_annual(single_result_folder: str, res_param_keys, ureg: pint.UnitRegistry) -> Dict[str, pint.Quantity]:
+def _cesar_summary_one_bldg_annual(single_result_folder: str, res_param_keys, ureg: pint.UnitRegistry, eso: Optional[esoreader.EsoFile] = None) -> Dict[str, pint.Quantity]:
     """
     Quite tailered function to assemble yearly results for one building. It should replicate the result summary excel file known from the cesar Matlab version.
     All energies (Unit J) are reported by square meter, which is done by dividing the per building demand by the total floor area.
@@ -78,9 +92,11 @@ def _cesar_summary_one_bldg_annual(single_result_folder: str, res_param_keys, ur
     :param res_param_keys: name of result parameters to collect
     :param ureg: reference to unit registry object
     :param do_report_agg_val: names of result parameters to add as per building values
+    :param eso: eplusout.eso of single_result_folder if already read
     :return: pandas.DataFrame with one row, columns with a multiindex of parameter name and unit
     """
-    eso = esoreader.read_from_path(single_result_folder / Path(_ESO_FILE_NAME))
+    if eso is None:
+        eso = read_result_eso(single_result_folder)
 
     res = dict()
     # res = pd.DataFrame(columns=pd.MultiIndex(levels=[[], []], codes=[[], []], names=[PD_FRAME_IDX_VAR_NAME, PD_FRAME_IDX_UNIT_NAME]))
@@ -125,7 +141,7 @@ def collect_multi_params_for_site(result_folders: Mapping[int, str], result_keys
         try:
             eso_path = single_result_folder / Path(_ESO_FILE_NAME)
             logging.getLogger(__name__).debug(f"Open {eso_path}")
-            eso = esoreader.read_from_path(eso_path)
+            eso = _read_eso(eso_path)
         except FileNotFoundError:
             logging.getLogger(__name__).warning(f"No {eso_path} not found. Skipping.")
             continue
@@ -166,7 +182,7 @@ def collect_single_param_for_site(result_folders: Mapping[int, str], result_key,
 
 def collect_multi_entry_annual_result(single_result_folder: str, var_name: str):
 
-    eso = esoreader.read_from_path(single_result_folder / Path(_ESO_FILE_NAME))
+    eso = _read_eso(single_result_folder / Path(_ESO_FILE_NAME))
 
     variable_instances = eso.dd.find_variable(var_name)
 
@@ -181,6 +197,36 @@ def collect_multi_entry_annual_result(single_result_folder: str, var_name: str):
     return results_dict
 
 
+def read_result_eso(single_result_folder) -> esoreader.EsoFile:
+    """
+    :param single_result_folder: folder with energy plus result files for one building
+    :return: parsed eplusout.eso, e.g. to get several results from it without reading the file again
+    """
+    return _read_eso(single_result_folder / Path(_ESO_FILE_NAME))
+
+
+def get_hourly_meter_values(eso: esoreader.EsoFile, meter_names: Sequence[str], ureg: pint.UnitRegistry) -> Dict[str, np.ndarray]:
+    """
+    :param eso: parsed eplusout.eso, see read_result_eso()
+    :param meter_names: full names of the meters, e.g. DistrictHeating:HVAC. The meters must be in the output with frequency HOURLY.
+    :return: energy per hour in kWh, which is the mean load of each hour in kW, for each meter found in the eso
+    """
+    values_per_meter = dict()
+    for meter_name in meter_names:
+        variables = [var for var in eso.find_variable(meter_name, frequency=ResultsFrequency.HOURLY.value) if var[2].lower() == meter_name.lower()]
+        if variables:
+            (data, unit_str) = __get_data_series_with_unit(eso, variables[0])
+            to_kwh = ureg(unit_str).to(ureg.kWh).m
+            values_per_meter[meter_name] = np.asarray(data, dtype=float) * to_kwh
+    return values_per_meter
+
+
+def _read_eso(eso_path) -> esoreader.EsoFile:
+    """read eso file, compressed or not, see cesarp.eplus_adapter.eplus_output_retention"""
+    with open_output_file(eso_path) as eso_file:
+        return esoreader.EsoFile(eso_file)
+
+
 def _get_all_annual_vars_from_config(custom_config: Optional[Dict[str, Any]] = None):
     cfg = cesarp.common.config_loader.load_config_for_package(_default_config_file, __package__, custom_config)
     try:
@@ -0,0 +1,99 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Retention policy for the EnergyPlus output files, see EPLUS_ADAPTER:OUTPUT_RETENTION.
+
+Right after a successful simulation, output files not needed by cesar-p are deleted and the retained ones are compressed with
+gzip in place (eplusout.eso becomes eplusout.eso.gz). The readers of cesar-p open the output files with :py:func:`open_output_file`,
+which falls back to the compressed file if the original one does not exist, thus results can be read from compressed and
+not compressed output folders alike.
+"""
+import gzip
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, IO, Union, cast
+
+COMPRESSED_SUFFIX = ".gz"
+
+
+def get_compressed_path(file_path: Union[str, Path]) -> Path:
+    return Path(f"{file_path}{COMPRESSED_SUFFIX}")
+
+
+def output_file_exists(file_path: Union[str, Path]) -> bool:
+    """:return: True if the output file exists either as is or compressed"""
+    return os.path.isfile(file_path) or get_compressed_path(file_path).is_file()
+
+
+def open_output_file(file_path: Union[str, Path], mode: str = "r") -> IO[Any]:
+    """
+    Open an EnergyPlus output file for reading. If the file does not exist but the compressed version does, that one is opened.
+
+    :param file_path: path of the not compressed output file, e.g. .../eplusout.eso
+    :param mode: "r" for text or "rb" for binary mode
+    :return: file object, use it as context manager
+    """
+    assert mode in ["r", "rb"], "output files can only be opened for reading"
+    compressed_path = get_compressed_path(file_path)
+    if not os.path.isfile(file_path) and compressed_path.is_file():
+        # GzipFile in binary, TextIOWrapper in text mode
+        return cast(IO[Any], gzip.open(compressed_path, "rt" if mode == "r" else "rb"))
+    return open(file_path, mode)
+
+
+def apply_retention_policy(output_folder: Union[str, Path], retention_cfg: Dict[str, Any]) -> None:
+    """
+    Delete the files matching one of DELETE_PATTERNS and compress the files matching one of COMPRESS_PATTERNS.
+    Files matching both are deleted.
+
+    :param output_folder: EnergyPlus output folder of one building
+    :param retention_cfg: configuration EPLUS_ADAPTER:OUTPUT_RETENTION
+    """
+    output_folder = Path(output_folder)
+    nr_of_deleted = 0
+    for pattern in retention_cfg["DELETE_PATTERNS"]:
+        for file_path in output_folder.glob(pattern):
+            if file_path.is_file():
+                file_path.unlink()
+                nr_of_deleted += 1
+    nr_of_compressed = 0
+    for pattern in retention_cfg["COMPRESS_PATTERNS"]:
+        for file_path in output_folder.glob(pattern):
+            if file_path.is_file() and file_path.suffix != COMPRESSED_SUFFIX:
+                compress_file(file_path, retention_cfg["COMPRESSION_LEVEL"])
+                nr_of_compressed += 1
+    logging.getLogger(__name__).debug(f"{output_folder}: deleted {nr_of_deleted} and compressed {nr_of_compressed} output files")
+
+
+def compress_file(file_path: Union[str, Path], compression_level: int) -> Path:
+    """
+    Replace the file with a gzip compressed version named file_path.gz
+
+    :return: path of the compressed file
+    """
+    compressed_path = get_compressed_path(file_path)
+    with open(file_path, "rb") as src, gzip.open(compressed_path, "wb", compresslevel=compression_level) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(file_path)
+    return compressed_path
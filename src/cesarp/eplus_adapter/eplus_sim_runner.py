@@ -43,6 +43,7 @@ except ImportError:
 
 from cesarp.eplus_adapter import _default_config_file
 from cesarp.common import config_loader
+import cesarp.eplus_adapter.eplus_output_retention
 
 EPLUS_LOG_FILE_NAME = "eplusout.err"
 EPLUS_MAIN_RES_FILE_NAME = "eplusout.eso"
@@ -153,13 +154,16 @@ def run_single(idffile, epwfile, output_path, ep_config: Optional[Dict[str, Any]
     :param output_path: Folder where the EnergyPlus output is stored
     :param ep_config: eplus adapter configuration (full, including custom configuration)
     :param custom_config: only custom configuration parameters, eplus adapter config will be loaded from disk and merged with custom config. Ignored if full_config is passed.
-    :return: None, result is stored to output_path
+    :return: None, result is stored to output_path. If EPLUS_ADAPTER:OUTPUT_RETENTION is active, output files are deleted or compressed
+             after the simulation, see cesarp.eplus_adapter.eplus_output_retention
     """
     if ep_config is None:
         ep_config = get_config(custom_config)
     args = __get_eplus_run_args(output_path, ep_config)
     os.makedirs(output_path)
     __run_eplus(idf_path=str(idffile), weather=epwfile, ep_executable_path=get_eplus_executable(ep_config=ep_config), **args)
+    if ep_config["OUTPUT_RETENTION"]["ACTIVE"]:
+        cesarp.eplus_adapter.eplus_output_retention.apply_retention_policy(output_path, ep_config["OUTPUT_RETENTION"])
 
 
 def run_batch(
@@ -323,8 +327,11 @@ def __run_eplus(
             check_call(cmd)
         elif verbose == "q":
             check_call(cmd, stdout=open(os.devnull, "w"))
-    except CalledProcessError:
+    except CalledProcessError as cpe:
         message = __parse_error(tmp_err, args["output_directory"])
+        if cpe.returncode < 0:
+            # terminated by a signal, e.g. SIGKILL sent by the out of memory killer
+            raise EnergyPlusKilledError(f"EnergyPlus was killed by signal {-cpe.returncode}{message}")
         raise EnergyPlusRunError(message)
     except Exception as e:
         raise EnergyPlusRunError(f"\r\nEnergyPlus command: {' '.join(cmd)}\r\n", e)
@@ -380,3 +387,9 @@ def __parse_error(tmp_err, output_dir):
 
 class EnergyPlusRunError(Exception):
     pass
+
+
+class EnergyPlusKilledError(EnergyPlusRunError):
+    """EnergyPlus process was terminated by a signal (POSIX only), most probably because the system run out of memory"""
+
+    pass
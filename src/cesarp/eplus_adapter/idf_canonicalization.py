@@ -0,0 +1,83 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Detects simulations which give the same results, i.e. IDF files which only differ in comments, formatting or object names depending
+on the fid of a building, to be simulated with the same weather file.
+
+The IDF is canonicalized by removing comments and whitespace and by replacing the fid of neighbouring buildings in the names of
+the shading objects by a running number. The key of a simulation is the hash of the canonical IDF together with the hash of the weather file.
+Files referenced in the IDF, e.g. schedule files, are compared by their path as written in the IDF.
+"""
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, Union
+from pathlib import Path
+
+from cesarp.eplus_adapter import idf_strings
+
+_COMMENT_PATTERN = re.compile(r"!.*")
+_WHITESPACE_AROUND_SEPARATOR_PATTERN = re.compile(r"\s*([,;])\s*")
+# names of shading objects are e.g. Ext1234_Wall0 and Ext1234_Roof, where 1234 is the fid of the neighbour
+_NEIGHBOUR_NAME_PREFIX = idf_strings.CustomObjNames.shading_bldg_roof_name.split("{}")[0]
+_NEIGHBOUR_FID_PATTERN = re.compile(
+    re.escape(_NEIGHBOUR_NAME_PREFIX)
+    + r"(-?\d+)(?="
+    + "|".join(
+        re.escape(name_template.split("{}", 1)[1]).replace(r"\{\}", r"\d+")
+        for name_template in [idf_strings.CustomObjNames.shading_bldg_wall_name, idf_strings.CustomObjNames.shading_bldg_roof_name]
+    )
+    + ")"
+)
+
+
+def canonicalize_idf(idf_content: str) -> str:
+    """
+    :param idf_content: content of an IDF file
+    :return: IDF content without comments and formatting, neighbour fids in the shading object names replaced by a running number
+    """
+    idf_content = _COMMENT_PATTERN.sub("", idf_content)
+    idf_content = _WHITESPACE_AROUND_SEPARATOR_PATTERN.sub(r"\1", idf_content).strip()
+    neighbour_nrs: Dict[str, int] = {}
+
+    def replace_neighbour_fid(match: re.Match) -> str:
+        neighbour_nr = neighbour_nrs.setdefault(match.group(1), len(neighbour_nrs))
+        return f"{_NEIGHBOUR_NAME_PREFIX}#{neighbour_nr}"
+
+    return _NEIGHBOUR_FID_PATTERN.sub(replace_neighbour_fid, idf_content)
+
+
+def get_simulation_key(idf_path: Union[str, Path], weather_file_path: Union[str, Path]) -> str:
+    """
+    :param idf_path: path of IDF file
+    :param weather_file_path: path of weather file used for the simulation
+    :return: key which is the same for simulations giving the same results
+    """
+    with open(idf_path, "r") as idf_file:
+        idf_hash = hashlib.sha256(canonicalize_idf(idf_file.read()).encode("utf-8")).hexdigest()
+    return f"{idf_hash}-{_get_file_hash(str(weather_file_path))}"
+
+
+@lru_cache(maxsize=32)
+def _get_file_hash(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
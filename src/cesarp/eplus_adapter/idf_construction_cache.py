@@ -0,0 +1,99 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Process-wide cache for the IDF objects of constructions and materials.
+
+Buildings of the same archetype share their constructions, but the IDF is written per building, so without the cache each
+construction with its materials is translated to eppy objects again for each building, including the unit conversion of every field.
+With the cache, each distinct construction is written once to an empty scratch IDF, the resulting raw IDF objects are kept and copied
+into the IDF of every building using that construction. The key of a construction is a hash over all its properties (including the
+name), thus constructions having the same name but different properties, e.g. after a retrofit, are cached separately.
+Objects already in the target IDF, e.g. a material shared between two constructions, are not added a second time, the same way the
+idf_writer functions do it without the cache.
+
+Only objects which are not modified after being added are cached, e.g. the window frame and the shading surface reflectance are
+linked to the geometry by the caller and thus are not cached.
+"""
+import hashlib
+from io import StringIO
+from typing import Any, Callable, Dict, List, Tuple
+
+from eppy.modeleditor import IDF, obj2bunch
+
+from cesarp.eplus_adapter import idf_writing_helpers
+
+# key: (IDD file, type of model object, hash of model object); value: (name of the main IDF object, raw IDF objects)
+_idf_objs_cache: Dict[Tuple[str, str, str], Tuple[str, List[List[Any]]]] = dict()
+# creating an IDF object is expensive, thus one empty IDF per IDD is kept to write the objects to be cached
+_scratch_idfs: Dict[str, IDF] = dict()
+
+
+def get_structural_key(model_obj: Any) -> str:
+    """
+    :param model_obj: construction or material object from cesarp.model, all of them are dataclasses, thus repr() includes all properties
+    :return: hash over all properties of the object
+    """
+    return hashlib.sha1(repr(model_obj).encode("utf-8")).hexdigest()
+
+
+def add_cached(idf: IDF, model_obj: Any, write_to_idf: Callable[[IDF], str]) -> str:
+    """
+    Adds the IDF objects for model_obj to idf. If model_obj was not seen before in this process, write_to_idf is called
+    with an empty IDF to create the IDF objects, which are then cached.
+
+    :param idf: IDF to add the objects to, modified in place
+    :param model_obj: object from cesarp.model, e.g. Construction, used to build the cache key
+    :param write_to_idf: function writing model_obj to the IDF passed and returning the name of the main IDF object,
+                         e.g. lambda idf: idf_writer_construction.add_detailed_construction(idf, constr, ureg)
+    :return: name of the main IDF object, as returned by write_to_idf
+    """
+    key = (str(idf.iddname), type(model_obj).__name__, get_structural_key(model_obj))
+    if key not in _idf_objs_cache:
+        scratch_idf = _get_empty_scratch_idf(key[0])
+        idf_obj_name = write_to_idf(scratch_idf)
+        raw_idf_objs: List[List[Any]] = []
+        for idf_objs in scratch_idf.idfobjects.values():
+            if len(idf_objs) > 0:
+                raw_idf_objs.extend(list(idf_obj.obj) for idf_obj in idf_objs)
+                del idf_objs[:]
+        _idf_objs_cache[key] = (idf_obj_name, raw_idf_objs)
+    idf_obj_name, raw_idf_objs = _idf_objs_cache[key]
+    for raw_idf_obj in raw_idf_objs:
+        obj_type = raw_idf_obj[0].upper()
+        if not idf_writing_helpers.exists_in_idf(idf, obj_type, raw_idf_obj[1]):
+            idf.idfobjects[obj_type].append(obj2bunch(idf.model, idf.idd_info, list(raw_idf_obj)))
+    return idf_obj_name
+
+
+def _get_empty_scratch_idf(idd_name: str) -> IDF:
+    if idd_name not in _scratch_idfs:
+        _scratch_idfs[idd_name] = IDF(StringIO(""))
+    return _scratch_idfs[idd_name]
+
+
+def clear_cache() -> None:
+    _idf_objs_cache.clear()
+    _scratch_idfs.clear()
+
+
+def get_nr_of_cached_entries() -> int:
+    return len(_idf_objs_cache)
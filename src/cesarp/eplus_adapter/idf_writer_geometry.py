@@ -30,8 +30,10 @@ Up to 250 footprint vertices for a building are supported (limited by the IDD re
 Other objects have been extended in the IDD as well. If you want to know all, compare the IDD included in ressources with an original one or have a look
 at the notes at the top of the modified IDD.
 """
-from typing import Any, Protocol, Tuple, Mapping, Dict, List
+from typing import Any, Callable, Optional, Protocol, Tuple, Mapping, Dict, List
 
+import numpy as np
+import pandas as pd
 from eppy.modeleditor import IDF
 from eppy.bunch_subclass import EpBunch
 from cesarp.model.Construction import BuildingElement as bec
@@ -71,15 +73,25 @@ def add_basic_shading_settings(idf, shadow_calculation_frequency: int):
         shadow_calc_idf_obj.Calculation_Frequency = shadow_calculation_frequency
 
 
-def add_building(idf, bldg_shape: BldgShapeDetailed, constr_handler: ConstrWriterProtocol) -> Dict[int, Tuple[str, List[EpBunch]]]:
+def add_building(idf, bldg_shape: BldgShapeDetailed, constr_handler: ConstrWriterProtocol, floor_groups: Optional[List[List[int]]] = None) -> Dict[int, Tuple[str, List[EpBunch]]]:
     """
     Constraints: floor_nr in walls, adjacent_walls_bool, windows start at 0 for groundfloor and are ascending
 
+    If floor_groups are passed, each group of floors is modeled as one zone with the geometry of the representative floor of the group
+    (see get_representative_floor_nr) and a zone multiplier equal to the number of floors in the group. Floor and ceiling of zones
+    with a multiplier, and the adjoining ceiling resp. floor of the zone below/above, are modeled as adiabatic surfaces.
+    Use group_repeated_floors to get the floor groups.
+
     :param bldg_shape - dict according to cesarp.manager.manager_protocols.BldgShapeDetailed
+    :param floor_groups - list of groups of consecutive floor nrs, groups must be ascending and cover all floors. if None, one zone per floor is created
+    :return: dict with representative floor nr as key and (zone name, windows in zone) as value
     """
     zones = {}
 
     assert len(bldg_shape.walls) == (len(bldg_shape.internal_floors) + 1), "number of floors in 'walls' should be one more than number of internal floors"
+    if floor_groups is None:
+        floor_groups = [[story_nr] for story_nr in range(len(bldg_shape.walls))]
+    assert [floor_nr for group in floor_groups for floor_nr in group] == list(range(len(bldg_shape.walls))), f"floor groups {floor_groups} do not match floors of building"
 
     # frame and divider geometry and construction properties are currently defined per building
     constr_groundfloor_idf_obj_name = constr_handler.add_construction(idf, BuildingElement.GROUNDFLOOR)
@@ -94,15 +106,19 @@ def add_building(idf, bldg_shape: BldgShapeDetailed, constr_handler: ConstrWrite
     constr_win_glass_idf_obj_name = constr_handler.add_window_glass_construction(idf)
 
     zone_idf_obj_name = None
-    for story_nr, walls_on_story in enumerate(bldg_shape.walls):
+    previous_story_nr: Optional[int] = None
+    previous_multiplier = 1
+    for floor_group in floor_groups:
+        story_nr = get_representative_floor_nr(floor_group)
+        multiplier = len(floor_group)
         zone_block_nr = story_nr
         previouse_zone_obj_name = zone_idf_obj_name
-        zone_idf_obj_name = add_zone(idf, zone_block_nr)
+        zone_idf_obj_name = add_zone(idf, zone_block_nr, multiplier)
         windows_in_zone = []
 
         if story_nr == 0:
             add_groundfloor(idf, bldg_shape.groundfloor, zone_idf_obj_name, constr_groundfloor_idf_obj_name)
-        else:
+        elif multiplier == 1 and previous_multiplier == 1:
             add_ceiling_floor_pair(
                 idf,
                 bldg_shape.internal_floors[story_nr - 1],
@@ -111,8 +127,19 @@ def add_building(idf, bldg_shape: BldgShapeDetailed, constr_handler: ConstrWrite
                 constr_internal_ceileing_idf_obj_name,
                 constr_internal_floor_idf_obj_name,
             )
+        else:
+            assert previous_story_nr is not None, f"no zone below story {story_nr}"
+            add_adiabatic_ceiling_floor_pair(
+                idf,
+                bldg_shape.internal_floors[previous_story_nr],
+                bldg_shape.internal_floors[story_nr - 1],
+                previouse_zone_obj_name,
+                zone_idf_obj_name,
+                constr_internal_ceileing_idf_obj_name,
+                constr_internal_floor_idf_obj_name,
+            )
 
-        for wall_nr, wall in enumerate(walls_on_story):
+        for wall_nr, wall in enumerate(bldg_shape.walls[story_nr]):
             wall_idf_obj_name = add_wall(
                 idf,
                 wall,
@@ -138,10 +165,58 @@ def add_building(idf, bldg_shape: BldgShapeDetailed, constr_handler: ConstrWrite
             add_roof(idf, bldg_shape.roof, zone_idf_obj_name, constr_roof_idf_obj_name)
 
         zones[story_nr] = (zone_idf_obj_name, windows_in_zone)
+        previous_story_nr = story_nr
+        previous_multiplier = multiplier
 
     return zones
 
 
+def group_repeated_floors(bldg_shape: BldgShapeDetailed, is_same_operation: Callable[[int, int], bool]) -> List[List[int]]:
+    """
+    Groups consecutive intermediate floors which are repetitions of each other, meaning walls, windows and internal floors are the
+    same apart from the height and the same walls are adjacent to neighbouring buildings. Groundfloor and top floor are never grouped.
+    As there is only one construction per building element, the constructions of the floors are always the same.
+
+    :param bldg_shape: building geometry
+    :param is_same_operation: function returning True if the two floor nrs passed have the same building operation assigned
+    :return: list of groups of floor nrs, groups and floor nrs within groups are ascending
+    """
+    nr_of_floors = len(bldg_shape.walls)
+    floor_groups = [[0]]
+    for floor_nr in range(1, nr_of_floors):
+        group_start = floor_groups[-1][0]
+        is_intermediate = group_start != 0 and floor_nr != nr_of_floors - 1
+        if is_intermediate and is_same_operation(group_start, floor_nr) and _is_repeated_floor(bldg_shape, group_start, floor_nr):
+            floor_groups[-1].append(floor_nr)
+        else:
+            floor_groups.append([floor_nr])
+    return floor_groups
+
+
+def get_representative_floor_nr(floor_group: List[int]) -> int:
+    """floor in the middle of the group, its geometry is used for the zone representing the floor group"""
+    return floor_group[len(floor_group) // 2]
+
+
+def _is_repeated_floor(bldg_shape: BldgShapeDetailed, ref_floor_nr: int, floor_nr: int) -> bool:
+    if len(bldg_shape.walls[ref_floor_nr]) != len(bldg_shape.walls[floor_nr]):
+        return False
+    if list(bldg_shape.adjacent_walls_bool[ref_floor_nr]) != list(bldg_shape.adjacent_walls_bool[floor_nr]):
+        return False
+    delta_z = min(bldg_shape.walls[floor_nr][0]["z"]) - min(bldg_shape.walls[ref_floor_nr][0]["z"])
+    ref_elements = bldg_shape.walls[ref_floor_nr] + bldg_shape.windows[ref_floor_nr] + [bldg_shape.internal_floors[ref_floor_nr - 1]]
+    elements = bldg_shape.walls[floor_nr] + bldg_shape.windows[floor_nr] + [bldg_shape.internal_floors[floor_nr - 1]]
+    return all(_is_shifted_vertically(ref_elem, elem, delta_z) for (ref_elem, elem) in zip(ref_elements, elements))
+
+
+def _is_shifted_vertically(ref_coords: Optional[pd.DataFrame], coords: Optional[pd.DataFrame], delta_z: float) -> bool:
+    if ref_coords is None or coords is None:
+        return ref_coords is None and coords is None
+    if ref_coords.shape != coords.shape:
+        return False
+    return np.allclose(ref_coords[["x", "y"]].to_numpy(), coords[["x", "y"]].to_numpy()) and np.allclose(ref_coords["z"].to_numpy() + delta_z, coords["z"].to_numpy())
+
+
 def add_neighbours_as_shading_objects(idf: IDF, bldg_shapes_simple: Mapping[int, BldgShapeEnvelope], constr_handler: ConstrWriterProtocol):
     for gis_fid, single_bldg_shape in bldg_shapes_simple.items():
         assert len(single_bldg_shape.walls) == 1, f"only one story expected for shading object with gis id {gis_fid}"
@@ -195,6 +270,30 @@ def add_ceiling_floor_pair(idf, coords, zone_ceiling_obj_name, zone_floor_obj_na
     set_coordinates_clockwise(floor_idf_obj, coords)
 
 
+def add_adiabatic_ceiling_floor_pair(idf, ceiling_coords, floor_coords, zone_ceiling_obj_name, zone_floor_obj_name, ceiling_constr_obj_name, floor_constr_obj_name):
+    """
+    Ceiling and floor between two zones of which at least one has a zone multiplier. Surfaces of such zones can't be linked with each other,
+    thus both are adiabatic, heat transfer between the zones is neglected.
+    """
+    ceiling_idf_obj = idf.newidfobject(idf_strings.IDFObjects.bldg_surface_detailed)
+    ceiling_idf_obj.Name = idf_strings.CustomObjNames.ceiling_name.format(zone_ceiling_obj_name)
+    ceiling_idf_obj.Surface_Type = idf_strings.BldgSurfaceType.ceiling
+    ceiling_idf_obj.Construction_Name = ceiling_constr_obj_name
+    ceiling_idf_obj.Zone_Name = zone_ceiling_obj_name
+    ceiling_idf_obj.Outside_Boundary_Condition = idf_strings.OutsideBoundaryCond.adiabatic
+    set_params_not_weather_exposed(ceiling_idf_obj)
+    set_coordinates_counterclockwise(ceiling_idf_obj, ceiling_coords)
+
+    floor_idf_obj = idf.newidfobject(idf_strings.IDFObjects.bldg_surface_detailed)
+    floor_idf_obj.Name = idf_strings.CustomObjNames.floor_name.format(zone_floor_obj_name)
+    floor_idf_obj.Surface_Type = idf_strings.BldgSurfaceType.floor
+    floor_idf_obj.Construction_Name = floor_constr_obj_name
+    floor_idf_obj.Zone_Name = zone_floor_obj_name
+    floor_idf_obj.Outside_Boundary_Condition = idf_strings.OutsideBoundaryCond.adiabatic
+    set_params_not_weather_exposed(floor_idf_obj)
+    set_coordinates_clockwise(floor_idf_obj, floor_coords)
+
+
 def add_roof(idf, coords, zone_obj_name, constr_obj_name):
     roof_idf_obj = idf.newidfobject(idf_strings.IDFObjects.bldg_surface_detailed)
     roof_idf_obj.Name = idf_strings.CustomObjNames.roof_name.format(zone_obj_name)
@@ -235,9 +334,11 @@ def add_win_frame_geometry(idf_frame_divder_obj, shape_frame):
     idf_frame_divder_obj.Frame_Width = shape_frame["WIDTH"]
 
 
-def add_zone(idf, zone_block_nr):
+def add_zone(idf, zone_block_nr, multiplier=1):
     zone_idf_obj = idf.newidfobject(idf_strings.IDFObjects.zone)
     zone_idf_obj.Name = idf_strings.CustomObjNames.bldg_zone_name.format(zone_block_nr)
+    if multiplier != 1:
+        zone_idf_obj.Multiplier = multiplier
     return zone_idf_obj.Name
 
 
@@ -53,8 +53,10 @@ def add_building_operation(idf, zone_idf_name, bldg_operation: BuildingOperation
     add_HVAC_template(idf, zone_idf_name, bldg_operation.hvac, bldg_operation.name, ureg)
 
 
-def add_passive_cooling(idf, zone_idf_name, windows_in_zone: List[EpBunch], bldg_operation: BuildingOperation, shading_mat_model: WindowShadingMaterial):
-    add_shading_on_windows(idf, zone_idf_name, windows_in_zone, bldg_operation.win_shading_ctrl, shading_mat_model)
+def add_passive_cooling(
+    idf, zone_idf_name, windows_in_zone: List[EpBunch], bldg_operation: BuildingOperation, shading_mat_model: WindowShadingMaterial, use_construction_cache: bool = False
+):
+    add_shading_on_windows(idf, zone_idf_name, windows_in_zone, bldg_operation.win_shading_ctrl, shading_mat_model, use_construction_cache)
     if bldg_operation.night_vent.is_active:
         idf_writer_night_vent.add_night_ventilation_for_zone(idf, zone_idf_name, bldg_operation.night_vent)
 
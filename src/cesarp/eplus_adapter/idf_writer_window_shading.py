@@ -22,7 +22,7 @@
 from typing import Any, List
 from eppy.modeleditor import IDF
 from eppy.bunch_subclass import EpBunch
-from cesarp.eplus_adapter import idf_writing_helpers, idf_strings
+from cesarp.eplus_adapter import idf_writing_helpers, idf_strings, idf_construction_cache
 from cesarp.model.BuildingOperation import WindowShadingControl
 from cesarp.model.WindowConstruction import WindowShadingMaterial
 
@@ -30,7 +30,14 @@ from cesarp.model.WindowConstruction import WindowShadingMaterial
 SHADE_CTRL_IDF_NAME_PREFIX = "shade_control"
 
 
-def add_shading_on_windows(idf: IDF, zone_name: str, windows_in_zone: List[EpBunch], shading_ctrl_model: WindowShadingControl, shading_mat: WindowShadingMaterial):
+def add_shading_on_windows(
+    idf: IDF,
+    zone_name: str,
+    windows_in_zone: List[EpBunch],
+    shading_ctrl_model: WindowShadingControl,
+    shading_mat: WindowShadingMaterial,
+    use_construction_cache: bool = False,
+):
     """
     For description of model used for window shading please refer to docs/features/passive-cooling.rst.
 
@@ -43,24 +50,35 @@ def add_shading_on_windows(idf: IDF, zone_name: str, windows_in_zone: List[EpBun
      :param windows_in_zone: list of all window idf objects for that zone
      :param shading_ctrl_model: control/operational parameters for the window shade
      :param shading_mat: material parameters for the window shade
+     :param use_construction_cache: if True, the shading material IDF object is taken from cesarp.eplus_adapter.idf_construction_cache
      :return: nothing, idf is extended in place
     """
     if shading_ctrl_model.is_active and shading_mat.is_shading_available:
         if idf.idd_version[0] < 9:
-            _add_shading_on_windows_EP8(idf, zone_name, windows_in_zone, shading_ctrl_model, shading_mat)
+            _add_shading_on_windows_EP8(idf, zone_name, windows_in_zone, shading_ctrl_model, shading_mat, use_construction_cache)
         else:
-            _add_shading_on_windows_EP9(idf, zone_name, windows_in_zone, shading_ctrl_model, shading_mat)
+            _add_shading_on_windows_EP9(idf, zone_name, windows_in_zone, shading_ctrl_model, shading_mat, use_construction_cache)
 
 
-def _add_shading_on_windows_EP8(idf: IDF, zone_name: str, windows_in_zone: List[EpBunch], shading_ctrl_model: WindowShadingControl, shading_mat: WindowShadingMaterial):
-    shade_mat_idf_name = _add_shading_mat(idf, shading_mat)
+def _add_shading_on_windows_EP8(
+    idf: IDF, zone_name: str, windows_in_zone: List[EpBunch], shading_ctrl_model: WindowShadingControl, shading_mat: WindowShadingMaterial, use_construction_cache: bool
+):
+    if use_construction_cache:
+        shade_mat_idf_name = idf_construction_cache.add_cached(idf, shading_mat, lambda target_idf: _add_shading_mat(target_idf, shading_mat))
+    else:
+        shade_mat_idf_name = _add_shading_mat(idf, shading_mat)
     shd_ctrl_idf_name = _add_shading_control_EP8(idf, SHADE_CTRL_IDF_NAME_PREFIX, shade_mat_idf_name, shading_ctrl_model)
     for window in windows_in_zone:
         window.Shading_Control_Name = shd_ctrl_idf_name
 
 
-def _add_shading_on_windows_EP9(idf: IDF, zone_name: str, windows_in_zone: List[EpBunch], shading_ctrl_model: WindowShadingControl, shading_mat: WindowShadingMaterial):
-    shade_mat_idf_name = _add_shading_mat(idf, shading_mat)
+def _add_shading_on_windows_EP9(
+    idf: IDF, zone_name: str, windows_in_zone: List[EpBunch], shading_ctrl_model: WindowShadingControl, shading_mat: WindowShadingMaterial, use_construction_cache: bool
+):
+    if use_construction_cache:
+        shade_mat_idf_name = idf_construction_cache.add_cached(idf, shading_mat, lambda target_idf: _add_shading_mat(target_idf, shading_mat))
+    else:
+        shade_mat_idf_name = _add_shading_mat(idf, shading_mat)
     _add_shading_control_EP9(idf, SHADE_CTRL_IDF_NAME_PREFIX + "_" + zone_name, shade_mat_idf_name, zone_name, windows_in_zone, shading_ctrl_model)
 
 
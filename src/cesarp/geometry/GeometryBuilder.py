@@ -26,6 +26,7 @@ from cesarp.common.CesarpException import CesarpException
 from cesarp.common import config_loader
 from cesarp.geometry import building
 from cesarp.geometry import neighbourhood
+from cesarp.geometry import neighbour_shading_reduction
 from cesarp.geometry import vertices_basics
 from cesarp.geometry import _default_config_file
 from cesarp.model.BldgShape import BldgShapeEnvelope, BldgShapeDetailed
@@ -126,6 +127,7 @@ class GeometryBuilder:
     def get_bldg_shape_of_neighbours(self) -> Dict[int, BldgShapeEnvelope]:
         """
         Search neighbouring buildings in the radius defined in the configuration as ["NEIGHBOURHOOD"]["RADIUS"]
+        If ["NEIGHBOURHOOD"]["SHADING_REDUCTION"] is active, the neighbours are reduced, see :py:mod:`cesarp.geometry.neighbour_shading_reduction`
 
         :return: series of dicts defining the envelopes of all neighbours, details see return value of
                  :py:func:`cesarp.geometry.building.create_bldg_shape_envelope`
@@ -133,8 +135,13 @@ class GeometryBuilder:
         if self._neighbours is None:
             self._init_neighbours()
 
-        if self._neighbours:
-            envelop_shapes = {neighbour["gis_fid"]: self.__translate_bldg_shape_to_origin(building.create_bldg_shape_envelope(neighbour)) for neighbour in self._neighbours}
+        shading_neighbours = self._neighbours
+        reduction_cfg = self._cfg["NEIGHBOURHOOD"]["SHADING_REDUCTION"]
+        if shading_neighbours and reduction_cfg["ACTIVE"]:
+            shading_neighbours = neighbour_shading_reduction.reduce_neighbours(self.bldg_main, shading_neighbours, reduction_cfg)
+
+        if shading_neighbours:
+            envelop_shapes = {neighbour["gis_fid"]: self.__translate_bldg_shape_to_origin(building.create_bldg_shape_envelope(neighbour)) for neighbour in shading_neighbours}
             return envelop_shapes  # type: ignore
         else:
             return {}
@@ -34,12 +34,18 @@ class/module                                                    description
 =============================================================== ===========================================================
 :py:mod:`cesarp.geometry.area_calculator`                       calculate different areas of a model.BldgShapeDetailed
 
+:py:mod:`cesarp.geometry.polygon_metrics`                       area and perimeter of arbitrary planar polygons in 3d, vectorized
+                                                                for many polygons at once
+
 :py:class:`cesarp.geometry.GeometryBuilderFactory`              create GeometryBuilder instance for different building on same site
 
 :py:class:`cesarp.geometry.GeometryBuilder`                     this is the main class of this package, which
                                                                 creates a full building geometry from footprint and height, for the main
                                                                 building to be simulated and the more simple geometries for its neighbours
 
+:py:mod:`cesarp.geometry.neighbour_shading_reduction`           reduce the neighbours used as shading objects by culling, merging
+                                                                and simplifying their footprints
+
 :py:mod:`cesarp.geometry.csv_input_parser`                      For reading the site vertices form file, the dataframe returned
 :py:mod:`cesarp.geometry.shp_input_parser`                      can be fed into .. py:class:: name cesarp.geometry.GeometryBuilderFactory
 
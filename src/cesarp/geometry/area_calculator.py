@@ -19,17 +19,16 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
+"""
+Areas of the building elements of a BldgShapeDetailed, in m2 but returned without unit.
+All elements can be arbitrary planar polygons, see :py:mod:`cesarp.geometry.polygon_metrics`.
+"""
 from cesarp.model.BldgShape import BldgShapeDetailed
-from cesarp.geometry.vertices_basics import calc_circumference_of_polygon, calc_proj_area_of_polygon, calc_area_of_rectangle
-from cesarp.geometry.CesarGeometryException import CesarGeometryException
+from cesarp.geometry.polygon_metrics import calc_areas_of_polygons, calc_perimeters_of_polygons, calc_area_of_polygon
 
 
 def calc_wall_area_including_windows(bldg_detailed: BldgShapeDetailed):
-    try:
-        total_wall_area = sum(calc_area_of_rectangle(wall) for walls_per_floor in bldg_detailed.walls for wall in walls_per_floor)
-    except AssertionError:
-        raise CesarGeometryException("could not calculate wall area because not all walls build a rectangle")
-    return total_wall_area
+    return calc_areas_of_polygons(wall for walls_per_floor in bldg_detailed.walls for wall in walls_per_floor).sum()
 
 
 def calc_wall_area_without_window_glass_area(bldg_detailed: BldgShapeDetailed):
@@ -37,28 +36,27 @@ def calc_wall_area_without_window_glass_area(bldg_detailed: BldgShapeDetailed):
 
 
 def calc_window_glass_area(bldg_detailed: BldgShapeDetailed):
-    try:
-        total_window_area = sum(calc_area_of_rectangle(win) for wins_per_floor in bldg_detailed.windows for win in wins_per_floor if win is not None)
-    except AssertionError:
-        raise CesarGeometryException("could not calculate windows area because not all windows build a rectangle")
-    return total_window_area
+    return calc_areas_of_polygons(_all_windows(bldg_detailed)).sum()
 
 
 def calc_window_frame_area(bldg_detailed: BldgShapeDetailed):
     win_frame_width = bldg_detailed.window_frame["WIDTH"]
     area_corner = win_frame_width * win_frame_width
-    return sum(calc_circumference_of_polygon(win) * win_frame_width + 4 * area_corner for wins_per_floor in bldg_detailed.windows for win in wins_per_floor if win is not None)
+    perimeters = calc_perimeters_of_polygons(_all_windows(bldg_detailed))
+    return (perimeters * win_frame_width + 4 * area_corner).sum()
 
 
 def calc_roof_area(bldg_detailed: BldgShapeDetailed):
-    return calc_proj_area_of_polygon(bldg_detailed.roof)
+    return calc_area_of_polygon(bldg_detailed.roof)
 
 
 def calc_groundfloor_area(bldg_detailed: BldgShapeDetailed):
-    return calc_proj_area_of_polygon(bldg_detailed.groundfloor)
+    return calc_area_of_polygon(bldg_detailed.groundfloor)
 
 
 def calc_total_floor_area(bldg_detailed: BldgShapeDetailed):
-    groundfloor_area = calc_groundfloor_area(bldg_detailed)
-    internal_floors_area = sum(calc_proj_area_of_polygon(floor) for floor in bldg_detailed.internal_floors)
-    return groundfloor_area + internal_floors_area
+    return calc_areas_of_polygons([bldg_detailed.groundfloor] + list(bldg_detailed.internal_floors)).sum()
+
+
+def _all_windows(bldg_detailed: BldgShapeDetailed):
+    return (win for wins_per_floor in bldg_detailed.windows for win in wins_per_floor if win is not None)
@@ -45,9 +45,9 @@ from cesarp.geometry.custom_contracts import (
 )
 from cesarp.geometry.vertices_basics import (
     calc_center_of_rectangle,
-    calc_area_of_rectangle,
     calc_distance_between_vertices,
 )
+from cesarp.geometry.polygon_metrics import calc_areas_of_polygons
 
 
 @ic(footprint_shape=coords_2d, total_height=positive_number, min_story_height=positive_number)
@@ -285,12 +285,8 @@ def create_bldg_shape_detailed(
 
 
 def calc_glz_ratio_for_bldg(bldg_shape: BldgShapeDetailed):
-    wall_area = sum(map(lambda floor: sum(map(lambda wall: calc_area_of_rectangle(wall), floor)), bldg_shape.walls))
-
-    def area_win_func(win):
-        return calc_area_of_rectangle(win) if win is not None else 0
-
-    windows_area = sum(map(lambda floor: sum(map(area_win_func, floor)), bldg_shape.windows))
+    wall_area = calc_areas_of_polygons(wall for walls_per_floor in bldg_shape.walls for wall in walls_per_floor).sum()
+    windows_area = calc_areas_of_polygons(win for wins_per_floor in bldg_shape.windows for win in wins_per_floor if win is not None).sum()
     return 1 / wall_area * windows_area
 
 
@@ -0,0 +1,203 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Reduces the neighbouring buildings used as shading objects for a main building, as the time EnergyPlus needs for the shadow
+calculation grows with the square of the number of shading surfaces.
+
+The reduction is done in three steps, see :py:func:`reduce_neighbours`:
+
+1. neighbours which are too low or too far away to cast a relevant shadow on the main building are removed. The elevation angle
+   and the solid angle a neighbour covers are calculated as seen from the ground at the point of the main building footprint
+   closest to the neighbour, which is the point where the neighbour appears largest.
+2. neighbours with adjacent footprints and similar height are merged into one envelope, the height of the envelope is the
+   mean height of the buildings weighted with their footprint area. Walls between merged buildings disappear.
+3. footprints with more vertices than allowed are simplified.
+
+Neighbours are represented as dicts as returned by :py:func:`cesarp.geometry.neighbourhood.search_neighbouring_buildings_for`.
+"""
+import logging
+import math
+from typing import Any, Dict, List, Mapping
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point, Polygon
+from shapely.geometry.polygon import orient
+from shapely.ops import nearest_points, unary_union
+
+_SIMPLIFY_START_TOLERANCE = 0.1  # meter
+_SIMPLIFY_MAX_ITERATIONS = 20
+
+
+def reduce_neighbours(main: Mapping[str, Any], neighbours: List[Dict[str, Any]], reduction_cfg: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """
+    :param main: main building, with entries "gis_fid" and "footprint_shape"
+    :param neighbours: neighbouring buildings, each with entries "gis_fid", "footprint_shape", "height", "main_vertex_x", "main_vertex_y"
+    :param reduction_cfg: configuration GEOMETRY - NEIGHBOURHOOD - SHADING_REDUCTION
+    :return: reduced neighbours, merged ones get the smallest gis_fid of the buildings merged. The neighbours passed are not changed.
+    """
+    reduced = cull_neighbours(main, neighbours, reduction_cfg["MIN_ELEVATION_ANGLE"], reduction_cfg["MIN_SOLID_ANGLE"])
+    nr_after_culling = len(reduced)
+    merge_cfg = reduction_cfg["MERGE_ADJACENT"]
+    if merge_cfg["ACTIVE"]:
+        reduced = merge_adjacent_neighbours(reduced, merge_cfg["MAX_DISTANCE"], merge_cfg["MAX_HEIGHT_DIFFERENCE"])
+    max_nr_of_vertices = reduction_cfg["MAX_NR_OF_VERTICES"]
+    if max_nr_of_vertices:
+        for idx, neighbour in enumerate(reduced):
+            if len(neighbour["footprint_shape"]) > max_nr_of_vertices:
+                reduced[idx] = dict(neighbour)  # do not change the neighbours passed, they are used for other purposes, e.g. adjacency
+                _set_footprint(reduced[idx], simplify_footprint(neighbour["footprint_shape"], max_nr_of_vertices))
+    logging.getLogger(__name__).debug(
+        f"bldg with gis_fid {main['gis_fid']}: shading neighbours reduced from {len(neighbours)} to {nr_after_culling} by culling, {len(reduced)} after merging"
+    )
+    return reduced
+
+
+def cull_neighbours(main: Mapping[str, Any], neighbours: List[Dict[str, Any]], min_elevation_angle: float, min_solid_angle: float) -> List[Dict[str, Any]]:
+    """
+    :param main: main building, with entry "footprint_shape"
+    :param neighbours: neighbouring buildings, with entries "footprint_shape" and "height"
+    :param min_elevation_angle: in degree, neighbours whose top appears lower above the horizon are removed
+    :param min_solid_angle: in steradian, neighbours covering a smaller part of the sky are removed
+    :return: neighbours kept, the same objects as passed
+    """
+    main_polygon = _to_polygon(main["footprint_shape"])
+    kept = []
+    for neighbour in neighbours:
+        (elevation_angle, solid_angle) = calc_view_angles(main_polygon, _to_polygon(neighbour["footprint_shape"]), neighbour["height"])
+        if math.degrees(elevation_angle) >= min_elevation_angle and solid_angle >= min_solid_angle:
+            kept.append(neighbour)
+    return kept
+
+
+def calc_view_angles(main_polygon: Polygon, neighbour_polygon: Polygon, neighbour_height: float):
+    """
+    :return: (elevation angle in radian, solid angle in steradian) of the neighbour seen from the point of the main footprint closest to it.
+             The solid angle is the one of the part of the sky hidden, with the neighbour approximated as a wall of its height
+             spanning the azimuth range covered by its footprint vertices.
+    """
+    (view_point, closest_point) = nearest_points(main_polygon.exterior, neighbour_polygon)
+    distance = view_point.distance(closest_point)
+    elevation_angle = math.atan2(neighbour_height, distance)
+    return (elevation_angle, _calc_azimuth_span(view_point, neighbour_polygon) * math.sin(elevation_angle))
+
+
+def _calc_azimuth_span(view_point: Point, polygon: Polygon) -> float:
+    vertices = np.array(polygon.exterior.coords)[:-1]
+    azimuths = np.sort(np.arctan2(vertices[:, 1] - view_point.y, vertices[:, 0] - view_point.x))
+    gaps = np.diff(np.append(azimuths, azimuths[0] + 2 * math.pi))
+    # the polygon covers the full circle except the largest gap between the directions to its vertices
+    return float(min(2 * math.pi - max(gaps), math.pi))
+
+
+def merge_adjacent_neighbours(neighbours: List[Dict[str, Any]], max_distance: float, max_height_difference: float) -> List[Dict[str, Any]]:
+    """
+    Buildings are merged if their footprints are not further apart than max_distance and their height differs by max_height_difference
+    at most, buildings connected over several others are merged as well. If the merged envelope would enclose a courtyard,
+    the buildings are kept separate.
+
+    :param neighbours: neighbouring buildings, with entries "gis_fid", "footprint_shape", "height"
+    :param max_distance: in meter
+    :param max_height_difference: in meter
+    :return: new list of neighbours, buildings not merged are the same objects as passed
+    """
+    polygons = [_to_polygon(neighbour["footprint_shape"]) for neighbour in neighbours]
+    group_ids = list(range(len(neighbours)))
+
+    def find_group(idx):
+        while group_ids[idx] != idx:
+            group_ids[idx] = group_ids[group_ids[idx]]
+            idx = group_ids[idx]
+        return idx
+
+    for idx_a in range(len(neighbours)):
+        bounds_a = polygons[idx_a].buffer(max_distance).bounds
+        for idx_b in range(idx_a + 1, len(neighbours)):
+            bounds_b = polygons[idx_b].bounds
+            if bounds_b[0] > bounds_a[2] or bounds_b[2] < bounds_a[0] or bounds_b[1] > bounds_a[3] or bounds_b[3] < bounds_a[1]:
+                continue
+            if abs(neighbours[idx_a]["height"] - neighbours[idx_b]["height"]) <= max_height_difference and polygons[idx_a].distance(polygons[idx_b]) <= max_distance:
+                group_ids[find_group(idx_b)] = find_group(idx_a)
+
+    groups: Dict[int, List[int]] = {}
+    for idx in range(len(neighbours)):
+        groups.setdefault(find_group(idx), []).append(idx)
+
+    merged_neighbours = []
+    for members in groups.values():
+        if len(members) == 1:
+            merged_neighbours.append(neighbours[members[0]])
+            continue
+        # grow the footprints to close the gaps between them and shrink the union back, mitred to keep the corners
+        union = unary_union([polygons[idx].buffer(max_distance, join_style=2) for idx in members]).buffer(-max_distance, join_style=2)
+        if not isinstance(union, Polygon) or union.interiors:
+            merged_neighbours.extend(neighbours[idx] for idx in members)
+            continue
+        areas = [polygons[idx].area for idx in members]
+        merged = {
+            "gis_fid": min(neighbours[idx]["gis_fid"] for idx in members),
+            "height": float(np.average([neighbours[idx]["height"] for idx in members], weights=areas)),
+        }
+        _set_footprint(merged, _to_footprint(union, clockwise=_is_clockwise(neighbours[members[0]]["footprint_shape"])))
+        merged_neighbours.append(merged)
+    return merged_neighbours
+
+
+def simplify_footprint(footprint_shape: pd.DataFrame, max_nr_of_vertices: int) -> pd.DataFrame:
+    """
+    Simplify the footprint with an increasing tolerance until it has not more than max_nr_of_vertices vertices.
+    If this is not reached, the minimum rotated rectangle around the footprint is returned.
+
+    :param footprint_shape: DataFrame[columns=[x,y]] with the vertices of the footprint
+    :param max_nr_of_vertices: maximum number of vertices of the simplified footprint, at least 4
+    :return: DataFrame[columns=[x,y]] with the vertices of the simplified footprint, same orientation as the footprint passed
+    """
+    assert max_nr_of_vertices >= 4, "footprints can not be simplified to less than 4 vertices"
+    polygon = _to_polygon(footprint_shape)
+    tolerance = _SIMPLIFY_START_TOLERANCE
+    for _ in range(_SIMPLIFY_MAX_ITERATIONS):
+        simplified = polygon.simplify(tolerance, preserve_topology=True)
+        if len(simplified.exterior.coords) - 1 <= max_nr_of_vertices:
+            break
+        tolerance *= 2
+    else:
+        simplified = polygon.minimum_rotated_rectangle
+    return _to_footprint(simplified, clockwise=_is_clockwise(footprint_shape))
+
+
+def _to_polygon(footprint_shape: pd.DataFrame) -> Polygon:
+    return Polygon(footprint_shape[["x", "y"]].to_numpy())
+
+
+def _is_clockwise(footprint_shape: pd.DataFrame) -> bool:
+    return not _to_polygon(footprint_shape).exterior.is_ccw
+
+
+def _to_footprint(polygon: Polygon, clockwise: bool) -> pd.DataFrame:
+    oriented = orient(polygon, sign=-1.0 if clockwise else 1.0)
+    return pd.DataFrame(np.array(oriented.exterior.coords)[:-1], columns=["x", "y"])
+
+
+def _set_footprint(neighbour: Dict[str, Any], footprint_shape: pd.DataFrame) -> None:
+    neighbour["footprint_shape"] = footprint_shape
+    neighbour["main_vertex_x"] = footprint_shape.loc[0, "x"]
+    neighbour["main_vertex_y"] = footprint_shape.loc[0, "y"]
@@ -0,0 +1,107 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Area and perimeter of arbitrary planar polygons in 3d space, e.g. walls, windows, roof and groundfloor of a building.
+
+The area is calculated with Newell's method, which for polygons in the x-y plane is the same as the shoelace formula.
+Polygons do not need to be rectangular or convex, but they must not be self-intersecting. For non-planar polygons the
+result is the area of the polygon projected onto its best fitting plane.
+
+The functions taking several polygons calculate all of them in one go with numpy, without a python loop over the vertices,
+so prefer them over calling the single polygon functions in a loop.
+"""
+from typing import Iterable, List, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from cesarp.geometry.CesarGeometryException import CesarGeometryException
+
+POLYGON_VERTICES = Union[pd.DataFrame, np.ndarray]
+
+
+def calc_area_of_polygon(polygon_vertices: POLYGON_VERTICES) -> float:
+    """
+    :param polygon_vertices: vertices of the polygon, one per row, either 2d (x, y) or 3d (x, y, z) coordinates
+    :return: area of the polygon (without unit)
+    """
+    return float(calc_areas_of_polygons([polygon_vertices])[0])
+
+
+def calc_perimeter_of_polygon(polygon_vertices: POLYGON_VERTICES) -> float:
+    """
+    :param polygon_vertices: vertices of the polygon, one per row, either 2d (x, y) or 3d (x, y, z) coordinates
+    :return: perimeter of the polygon, including the edge from last to first vertex (without unit)
+    """
+    return float(calc_perimeters_of_polygons([polygon_vertices])[0])
+
+
+def calc_areas_of_polygons(polygons: Iterable[POLYGON_VERTICES]) -> np.ndarray:
+    """
+    :param polygons: polygons, each with one vertex per row, either 2d (x, y) or 3d (x, y, z) coordinates
+    :return: array with the area of each polygon (without unit)
+    """
+    (vertices, next_vertices, first_vertex_idx) = _stack_polygons(polygons)
+    if len(first_vertex_idx) == 0:
+        return np.zeros(0)
+    # Newell's method: the sum of the cross products of all edges gives the polygon normal with length twice the polygon area
+    normals = np.add.reduceat(np.cross(vertices, next_vertices), first_vertex_idx, axis=0)
+    return 0.5 * np.linalg.norm(normals, axis=1)
+
+
+def calc_perimeters_of_polygons(polygons: Iterable[POLYGON_VERTICES]) -> np.ndarray:
+    """
+    :param polygons: polygons, each with one vertex per row, either 2d (x, y) or 3d (x, y, z) coordinates
+    :return: array with the perimeter of each polygon (without unit)
+    """
+    (vertices, next_vertices, first_vertex_idx) = _stack_polygons(polygons)
+    if len(first_vertex_idx) == 0:
+        return np.zeros(0)
+    return np.add.reduceat(np.linalg.norm(next_vertices - vertices, axis=1), first_vertex_idx)
+
+
+def _stack_polygons(polygons: Iterable[POLYGON_VERTICES]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :return: vertices of all polygons stacked as 3d coordinates, for each of those vertices the following vertex of the same polygon
+             (the first one for the last vertex of each polygon), index of the first vertex of each polygon
+    """
+    per_polygon: List[np.ndarray] = [_as_3d_coordinates(polygon) for polygon in polygons]
+    if not per_polygon:
+        return (np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0, dtype=int))
+    nr_of_vertices = np.array([len(vertices) for vertices in per_polygon])
+    first_vertex_idx = np.concatenate(([0], np.cumsum(nr_of_vertices)[:-1]))
+    # relative to the first vertex of each polygon to avoid loosing precision with large coordinates, e.g. swiss LV95
+    vertices = np.concatenate(per_polygon)
+    vertices = vertices - np.repeat(vertices[first_vertex_idx], nr_of_vertices, axis=0)
+    next_idx = np.arange(1, len(vertices) + 1)
+    next_idx[first_vertex_idx + nr_of_vertices - 1] = first_vertex_idx
+    return (vertices, vertices[next_idx], first_vertex_idx)
+
+
+def _as_3d_coordinates(polygon_vertices: POLYGON_VERTICES) -> np.ndarray:
+    vertices = polygon_vertices.to_numpy(dtype=float) if isinstance(polygon_vertices, pd.DataFrame) else np.asarray(polygon_vertices, dtype=float)
+    if vertices.ndim != 2 or vertices.shape[1] not in (2, 3):
+        raise CesarGeometryException(f"polygon vertices must be given as 2d or 3d coordinates, got shape {vertices.shape}")
+    if len(vertices) < 3:
+        raise CesarGeometryException(f"a polygon needs at least 3 vertices, got {len(vertices)}")
+    if vertices.shape[1] == 2:
+        vertices = np.column_stack((vertices, np.zeros(len(vertices))))
+    return vertices
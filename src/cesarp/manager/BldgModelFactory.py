@@ -51,6 +51,7 @@ from cesarp.operation.PassiveCoolingOperationFactory import PassiveCoolingOperat
 from cesarp.site.SingleSiteFactory import SingleSiteFactory
 from cesarp.site.SitePerSwissCommunityFactory import SitePerSwissCommunityFactory
 from cesarp.site.SitePerBuildingSpecificWeatherFile import SitePerBuildingSpecificWeatherFile
+from cesarp.site.SiteRegistry import SiteRegistry
 from cesarp.construction.ConstructionBuilder import ConstructionBuilder
 from cesarp.construction.ConstructionFacade import ConstructionFacade
 from cesarp.model.BuildingModel import BuildingModel
@@ -121,6 +122,8 @@ class BldgModelFactory:
         self._neighbouring_bldg_constr_factory: NeighbouringConstructionFactoryProtocol = NeighbouringBldgConstructionFactory(self._unit_reg, self._custom_config)
         self._glazing_ratio_provider: Optional[GlazingRatioProviderProtocol] = self.__create_glazing_ratio_provider()
         self._bldg_operation_factory: BuildingOperationFactoryProtocol = self.__create_bldg_operation_factory(_bldg_type_per_bldg_series, sia_params_generation_lock)
+        # one Site object per distinct site, shared by the building models
+        self.site_registry = SiteRegistry()
         self._site_factory: SiteFactoryProtocol = self.__create_site_factory()
 
     def create_bldg_model(self, bldg_fid: int) -> BuildingModel:
@@ -270,7 +273,7 @@ class BldgModelFactory:
             (single_site_active and ch_sites_active) or (single_site_active and weather_file_per_bldg_active) or (ch_sites_active and weather_file_per_bldg_active)
         ), "check configuration. only one of SITE_PER_CH_COMMUNITY, SINGLE_SITE, WEATHER_FILE_PER_BUILDING should be active."
         if single_site_active:
-            return SingleSiteFactory(self._mgr_config["SINGLE_SITE"]["WEATHER_FILE"], self._unit_reg, self._custom_config)
+            return SingleSiteFactory(self._mgr_config["SINGLE_SITE"]["WEATHER_FILE"], self._unit_reg, self._custom_config, site_registry=self.site_registry)
         elif ch_sites_active:
             mapping_file_cfg = self._mgr_config["SITE_PER_CH_COMMUNITY"]["BLDG_TO_COMMUNITY_FILE"]
             bldg_fid_to_community_id = cesarp.common.read_csvy(
@@ -280,7 +283,7 @@ class BldgModelFactory:
                 mapping_file_cfg["SEPARATOR"],
                 index_column_name="bldg_fid",
             )
-            return SitePerSwissCommunityFactory(bldg_fid_to_community_id["community_id"].to_dict(), self._unit_reg, self._custom_config)
+            return SitePerSwissCommunityFactory(bldg_fid_to_community_id["community_id"].to_dict(), self._unit_reg, self._custom_config, site_registry=self.site_registry)
         elif weather_file_per_bldg_active:
             mapping_file_cfg = self._mgr_config["WEATHER_FILE_PER_BUILDING"]["WEATHER_FILE_PER_BLDG_FILE"]
             bldg_fid_to_weather_file = cesarp.common.read_csvy(
@@ -291,7 +294,9 @@ class BldgModelFactory:
                 index_column_name="gis_fid",
             )
             weather_files_folder_path = self._mgr_config["WEATHER_FILE_PER_BUILDING"]["WEATHER_FILES_FOLDER"]
-            return SitePerBuildingSpecificWeatherFile(bldg_fid_to_weather_file["weather"].to_dict(), weather_files_folder_path, self._unit_reg, self._custom_config)
+            return SitePerBuildingSpecificWeatherFile(
+                bldg_fid_to_weather_file["weather"].to_dict(), weather_files_folder_path, self._unit_reg, self._custom_config, site_registry=self.site_registry
+            )
         else:
             raise Exception("no site strategy activated in config. set SITE_PER_CH_COMMUNITY or SINGLE_SITE or WEATHER_FILE_PER_BUILDING active")
 
@@ -19,8 +19,11 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
-from typing import Any
+from typing import Any, Dict, Optional
+from dataclasses import dataclass
 from cesarp.model.BuildingModel import BuildingModel
+from cesarp.model.BldgType import BldgType
+from cesarp.model.EnergySource import EnergySource
 from cesarp.emissons_cost.OperationalEmissionsAndCosts import OperationalEmissionsAndCostsResult
 from cesarp.results.EnergyDemandSimulationResults import EnergyDemandSimulationResults
 from cesarp.retrofit.RetrofitLog import RetrofitLog
@@ -38,6 +41,32 @@ class BldgContainerDefaultEntries:
     CONTAINER_VERSION = "container_version"  # version number introduced with cesar-p V1.2.0
 
 
+@dataclass
+class BldgModelSummary:
+    """
+    The few properties of a BuildingModel needed to process results and to select buildings for retrofit.
+    Allows to work with containers without having the full building model in memory, see :py:class:`cesarp.manager.LazyBuildingContainer`
+    """
+
+    fid: int
+    year_of_construction: int
+    bldg_type: BldgType
+    simulation_year: int
+    e_carrier_heating: Optional[EnergySource]
+    e_carrier_dhw: Optional[EnergySource]
+
+    @classmethod
+    def from_bldg_model(cls, bldg_model: BuildingModel) -> "BldgModelSummary":
+        return cls(
+            fid=bldg_model.fid,
+            year_of_construction=bldg_model.year_of_construction,
+            bldg_type=bldg_model.bldg_type,
+            simulation_year=bldg_model.site.simulation_year,
+            e_carrier_heating=bldg_model.bldg_construction.installation_characteristics.e_carrier_heating,
+            e_carrier_dhw=bldg_model.bldg_construction.installation_characteristics.e_carrier_dhw,
+        )
+
+
 class BuildingContainer:
     """
     Bucket to save all information for a simulated building.
@@ -100,6 +129,15 @@ class BuildingContainer:
     def get_bldg_model(self) -> BuildingModel:
         return self.container[BldgContainerDefaultEntries.BLDG_MODEL_KEY]
 
+    def get_bldg_model_summary(self) -> BldgModelSummary:
+        return BldgModelSummary.from_bldg_model(self.get_bldg_model())
+
+    def get_entries_without_bldg_model(self) -> Dict[str, Any]:
+        """
+        :return: shallow copy of all container entries except the building model
+        """
+        return {key: entry for key, entry in self.container.items() if key != BldgContainerDefaultEntries.BLDG_MODEL_KEY}
+
     def set_op_cost_and_emission(self, op_res: OperationalEmissionsAndCostsResult) -> None:
         assert isinstance(op_res, OperationalEmissionsAndCostsResult)
         self.container[BldgContainerDefaultEntries.COST_EMISSON_RES_KEY] = op_res
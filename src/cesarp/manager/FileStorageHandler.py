@@ -22,17 +22,25 @@
 import os
 import logging
 from pathlib import Path, PurePath
-from typing import Dict, Any, List, Sequence, Union, Optional
+from typing import Dict, Any, List, Sequence, Union, Optional, Tuple
 from shutil import copyfileobj
+import shutil
+from functools import partial
 import pandas as pd
 from datetime import datetime
 
 import cesarp.common
+import cesarp.common.filehandling
 from cesarp.common.DatasetMetadata import DatasetMetadata
 import cesarp.manager.json_pickling
+import cesarp.manager.binary_pickling
+import cesarp.manager.project_archive
 from cesarp.manager import _default_config_file
 from cesarp.manager.BuildingContainer import BuildingContainer
+from cesarp.manager.LazyBuildingContainer import LazyBuildingContainer, BldgModelCache
 from cesarp.model.BuildingModel import BuildingModel
+from cesarp.results.DistrictLoadAggregator import DistrictLoadAggregator
+from cesarp.eplus_adapter.eplus_output_retention import open_output_file
 
 
 def get_timestamp():
@@ -40,6 +48,58 @@ def get_timestamp():
     return now.strftime("%Y%m%d_%H%M")
 
 
+def load_bldg_containers_batch(json_container_pathes: Dict[int, Any], container_save_path) -> Dict[int, Optional[BuildingContainer]]:
+    """
+    Read building containers from JSON files. Module-level method to be able to run it in a worker process.
+    Files which can not be read are logged and the fid is included with None as the container.
+
+    :param json_container_pathes: dict with fid and path to the JSON file of its building container
+    :param container_save_path: folder used to resolve relative pathes in the building models
+    :return: dict with fid and its building container, None if loading failed
+    """
+    logger = logging.getLogger(__name__)
+    bldg_containers: Dict[int, Optional[BuildingContainer]] = {}
+    for fid, container_file_path in json_container_pathes.items():
+        try:
+            bldg_containers[fid] = cesarp.manager.json_pickling.read_bldg_container_from_disk(container_file_path)
+        except Exception as ex:
+            logger.error(f"Could not load builing model from {container_file_path}. Skip this file.")
+            logger.exception(ex)
+            bldg_containers[fid] = None
+    return _resolve_pathes_in_bldg_containers(bldg_containers, container_save_path)
+
+
+def load_bldg_containers_from_archive(archive_path, container_save_path) -> Dict[int, Optional[BuildingContainer]]:
+    """
+    Read all building containers from a binary archive. If the archive can not be read, the error is logged and an empty dict returned.
+
+    :param archive_path: binary archive file to read all containers from
+    :param container_save_path: folder used to resolve relative pathes in the building models
+    :return: dict with fid and its building container, None if resolving the pathes in the building model failed
+    """
+    try:
+        bldg_containers: Dict[int, Optional[BuildingContainer]] = dict(cesarp.manager.binary_pickling.read_bldg_containers_from_archive(archive_path))
+    except Exception as ex:
+        logger = logging.getLogger(__name__)
+        logger.error(f"Could not load builing containers from archive {archive_path}. Skip this file.")
+        logger.exception(ex)
+        return {}
+    return _resolve_pathes_in_bldg_containers(bldg_containers, container_save_path)
+
+
+def _resolve_pathes_in_bldg_containers(bldg_containers: Dict[int, Optional[BuildingContainer]], container_save_path) -> Dict[int, Optional[BuildingContainer]]:
+    logger = logging.getLogger(__name__)
+    for fid, cont in bldg_containers.items():
+        if cont is not None and cont.has_bldg_model():
+            try:
+                FileStorageHandler.convert_rel_to_abs_pathes_in_model(cont.get_bldg_model(), container_save_path)
+            except Exception as ex:
+                logger.error(f"Could not resolve pathes in builing model for {fid}. Skip this building.")
+                logger.exception(ex)
+                bldg_containers[fid] = None
+    return bldg_containers
+
+
 class FileStorageHandler:
     """
     This class is responsible for reading and writing intermediate and final result files to disk.
@@ -68,8 +128,11 @@ class FileStorageHandler:
     - contains a json file per building with serialized representation of that building (bldg model, results incl
       op costs and emission) main usage is to reload a previously simulated site to python or to derive a new
       simulation scenario from existing building models
+    - if BLDG_CONTAINER_ARCHIVE is active, binary archives holding the serialized containers of many buildings instead of the json files
     """
 
+    _TMP_ARCHIVE_FOLDER_NAME = "tmp_archives"
+
     def __init__(self, base_output_path, custom_config: Optional[Dict[str, Any]], reloading=False):
         """
         :param base_output_path: path to main folder to store files for that simulation run
@@ -90,6 +153,8 @@ class FileStorageHandler:
         self.weather_files_mapped_save_path = self.idf_output_dir / Path(self._mgr_config["WEATHER_FILES_MAPPED_REL"])
         self.eplus_output_dir = self.base_output_path / Path(self._mgr_config["OUTPUT_FOLDER_REL"])
         os.makedirs(self.eplus_output_dir, exist_ok=True)
+        # caches of the building models of lazy loaded containers, cleared when the archives are rewritten
+        self._lazy_model_caches: List[BldgModelCache] = []
         if not reloading:
             self._assert_no_files_in_dir(self.container_save_path)
             self._assert_no_files_in_dir(self.idf_output_dir)
@@ -102,34 +167,67 @@ class FileStorageHandler:
     def _assert_no_files_in_dir(self, path) -> None:
         assert not list(filter(os.path.isfile, os.listdir(path))), f"{path} contains files! - Please delete and run again."
 
-    def load_existing_bldg_containers(self) -> Dict[int, BuildingContainer]:
+    def load_existing_bldg_containers(self, worker_pool=None) -> Dict[int, BuildingContainer]:
         """
         Try to load building containers.
         Expected path were the building containers are stored is specified in the configuration.
+        Both, JSON files per building and binary archives (see BLDG_CONTAINER_ARCHIVE in the configuration) are loaded,
+        if a fid is found in both the container from the binary archive is used.
+        If LAZY_LOADING is active, containers from the archives are returned as LazyBuildingContainer, which load the building model only on access.
         It's not checked wheter the loaded containers contain all properties or for example only the building models...
 
-        :return: dict with fid and its building container object, empty dict if building containers are not available on disk or could not be loaded
+        :param worker_pool: optional multiprocessing pool, if passed the JSON files are read and decoded in parallel by the workers
+        :return: dict with fid and its building container object, empty dict if building containers are not available on disk or could not be loaded.
+                 buildings for which the container could not be loaded are not included.
         """
-
-        def fail_safe_read_from_disk(container_file_path):
+        if not os.path.exists(self.container_save_path):
+            return {}
+
+        json_pathes = cesarp.common.filehandling.scan_directory(self.container_save_path, self._mgr_config["BLDG_CONTAINER_FILENAME_REL"])
+        archive_pathes = cesarp.common.filehandling.scan_directory(self.container_save_path, self._mgr_config["BLDG_CONTAINER_ARCHIVE"]["FILENAME_REL"])
+        # decoding the json files is expensive, thus they are split into one batch per worker. archives are read in this process, as unpickling
+        # is about as fast as transferring the containers back from a worker would be.
+        # archives are last, so that on duplicated fids the containers from the archives are used
+        json_batches: List[Dict[int, Any]] = []
+        if json_pathes:
+            nr_of_json_batches = worker_pool._processes if worker_pool else 1
+            json_fids = list(json_pathes.keys())
+            json_batches = [{fid: json_pathes[fid] for fid in json_fids[i::nr_of_json_batches]} for i in range(0, nr_of_json_batches)]
+
+        if worker_pool:
+            job_res_list = [worker_pool.apply_async(load_bldg_containers_batch, (json_batch, self.container_save_path)) for json_batch in json_batches]
+            res_list = [res.get() for res in job_res_list]
+        else:
+            res_list = [load_bldg_containers_batch(json_batch, self.container_save_path) for json_batch in json_batches]
+        lazy_loading = self._mgr_config["BLDG_CONTAINER_ARCHIVE"]["LAZY_LOADING"]
+        if not lazy_loading:
+            res_list += [load_bldg_containers_from_archive(archive_path, self.container_save_path) for archive_path in archive_pathes.values()]
+
+        bldg_containers: Dict[int, BuildingContainer] = {}
+        for res in res_list:
+            bldg_containers.update({fid: cont for fid, cont in res.items() if cont is not None})
+        if lazy_loading:
+            bldg_containers.update(self._load_lazy_bldg_containers(list(archive_pathes.values())))
+        self.logger.info(f"loaded {len(bldg_containers)} building containers from {self.container_save_path}")
+        return bldg_containers
+
+    def _load_lazy_bldg_containers(self, archive_pathes: List[Any]) -> Dict[int, BuildingContainer]:
+        model_cache = BldgModelCache(
+            self._mgr_config["BLDG_CONTAINER_ARCHIVE"]["LAZY_LOADING_CACHE_SIZE"],
+            partial(FileStorageHandler.convert_rel_to_abs_pathes_in_model, base_dir=str(self.container_save_path)),
+        )
+        self._lazy_model_caches.append(model_cache)
+        bldg_containers: Dict[int, BuildingContainer] = {}
+        for archive_path in archive_pathes:
             try:
-                cont = cesarp.manager.json_pickling.read_bldg_container_from_disk(container_file_path)
-                if cont.has_bldg_model():
-                    FileStorageHandler.convert_rel_to_abs_pathes_in_model(cont.get_bldg_model(), self.container_save_path)
-                return cont
+                summaries = cesarp.manager.binary_pickling.read_archive_summaries(archive_path)
             except Exception as ex:
-                self.logger.error(f"Could not load builing model from {container_file_path}. Skip this file.")
+                self.logger.error(f"Could not load builing containers from archive {archive_path}. Skip this file.")
                 self.logger.exception(ex)
-            return None
-
-        if os.path.exists(self.container_save_path):
-            containers_save_pathes = cesarp.common.filehandling.scan_directory(self.container_save_path, self._mgr_config["BLDG_CONTAINER_FILENAME_REL"])
-            bldg_containers = {fid: fail_safe_read_from_disk(container_path) for fid, container_path in containers_save_pathes.items()}
-            self.logger.info(f"loaded {len(bldg_containers)} building containers from {self.container_save_path}")
-
-            return bldg_containers
-
-        return {}
+                continue
+            for fid, (offset, length, entries, model_summary) in summaries.items():
+                bldg_containers[fid] = LazyBuildingContainer(entries, model_summary, archive_path, offset, length, model_cache)
+        return bldg_containers
 
     def load_existing_idfs(self) -> Dict[int, Any]:
         """
@@ -263,6 +361,9 @@ class FileStorageHandler:
         assert bldg_containers_to_save, "nothing to safe, building containers empty"
 
         self.logger.info(f"saving building containers to {self.container_save_path}")
+        if self._mgr_config["BLDG_CONTAINER_ARCHIVE"]["ACTIVE"]:
+            return self.save_bldg_containers_to_archives(bldg_containers_to_save)
+
         save_failed = []
         for fid, container in bldg_containers_to_save.items():
             try:
@@ -274,16 +375,134 @@ class FileStorageHandler:
 
         return save_failed
 
+    def save_bldg_containers_to_archives(self, bldg_containers_to_save) -> Sequence[int]:
+        """
+        Save all building containers to binary archives, each archive holding up to NR_OF_BLDGS_PER_ARCHIVE containers.
+        Archives from a previous save are replaced. As lazy loaded containers might read from the previous archives, the new
+        archives are first written to a temporary folder and lazy loaded containers are pointed to the new archives after replacing.
+        If writing one of the archives fails, the archives from the previous save are kept and all fids are reported as failed.
+
+        :return: fid's for which the building model could not be saved.
+        """
+        archive_cfg = self._mgr_config["BLDG_CONTAINER_ARCHIVE"]
+        tmp_dir = self.container_save_path / Path(self._TMP_ARCHIVE_FOLDER_NAME)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        fids = list(bldg_containers_to_save.keys())
+        per_archive = archive_cfg["NR_OF_BLDGS_PER_ARCHIVE"]
+        save_failed = []
+        saved_entries: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        for archive_nr, start_index in enumerate(range(0, len(fids), per_archive)):
+            fids_in_archive = fids[start_index : start_index + per_archive]
+            filename = archive_cfg["FILENAME_REL"].format(archive_nr)
+            try:
+                saved_entries[filename] = cesarp.manager.binary_pickling.save_bldg_containers_to_archive(
+                    {fid: bldg_containers_to_save[fid] for fid in fids_in_archive}, tmp_dir / Path(filename)
+                )
+            except Exception as ex:
+                self.logger.error(f"Could not save builing container archive {filename} for fids {fids_in_archive}. Skip those buildings for saving and continue...")
+                self.logger.exception(ex)
+                save_failed.extend(fids_in_archive)
+
+        if save_failed:
+            self.logger.error(f"Saving building containers to {self.container_save_path} failed, archives from previous save are kept.")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return fids
+
+        for old_archive_path in cesarp.common.filehandling.scan_directory(self.container_save_path, archive_cfg["FILENAME_REL"]).values():
+            os.remove(old_archive_path)
+        for model_cache in self._lazy_model_caches:
+            model_cache.clear()
+        for filename, entries in saved_entries.items():
+            archive_path = self.container_save_path / Path(filename)
+            shutil.move(str(tmp_dir / Path(filename)), str(archive_path))
+            for fid, (offset, length) in entries.items():
+                container = bldg_containers_to_save[fid]
+                if isinstance(container, LazyBuildingContainer):
+                    container.rebind(archive_path, offset, length)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        return save_failed
+
     def save_single_bldg_container(self, fid: int, bldg_container: BuildingContainer, save_folder_path: Union[str, Path]) -> str:
         filename = self._mgr_config["BLDG_CONTAINER_FILENAME_REL"].format(fid)
         filepath = str(save_folder_path / Path(filename))
         self.logger.debug(f"save building conteiner for {fid} to {filepath}")
+        if isinstance(bldg_container, LazyBuildingContainer):
+            bldg_container = bldg_container.to_bldg_container()
         cesarp.manager.json_pickling.save_to_disk(bldg_container, filepath)
         return filepath
 
     def save_eplus_sim_time_log(self, eplus_run_timelog):
         pd.DataFrame(eplus_run_timelog.items(), columns=["idf path", "simulation time in sec"]).to_csv(self.base_output_path / Path("eplus_simulation_timelog.csv"))
 
+    def save_run_profile(self, run_profile: pd.DataFrame):
+        """
+        :param run_profile: per processing step and building the resources used, see cesarp.manager.stage_profiling
+        """
+        run_profile.to_csv(self.base_output_path / Path(self._mgr_config["STAGE_PROFILING"]["PROFILE_FILE_REL"]), index=False)
+
+    def save_simulation_dedup_mapping(self, simulated_fid_per_fid: Dict[int, int]):
+        """
+        :param simulated_fid_per_fid: for each fid the fid of the building which was simulated and of which the EnergyPlus output was copied
+        """
+        mapping_file_path = self.base_output_path / Path(self._mgr_config["SIMULATION_DEDUPLICATION"]["MAPPING_FILE_REL"])
+        pd.DataFrame(simulated_fid_per_fid.items(), columns=["fid", "simulated fid"]).to_csv(mapping_file_path, index=False)
+
+    def _get_simulation_cost_samples_path(self) -> Path:
+        # an absolute path in the config is kept as is by the join, so the samples can be shared between projects
+        return Path(self.base_output_path) / Path(self._mgr_config["SIMULATION_SCHEDULING"]["CALIBRATION_FILE_REL"])
+
+    def load_simulation_cost_samples(self) -> Optional[pd.DataFrame]:
+        """
+        :return: simulation times measured in earlier runs along with the cost features, see cesarp.manager.SimulationCostPredictor; None if no samples were saved yet
+        """
+        samples_path = self._get_simulation_cost_samples_path()
+        if not samples_path.is_file():
+            return None
+        return pd.read_csv(samples_path)
+
+    def save_simulation_cost_samples(self, samples: pd.DataFrame, max_nr_of_samples: int):
+        """
+        Append the samples to the ones saved in earlier runs, only the latest max_nr_of_samples samples are kept.
+
+        :param samples: see cesarp.manager.SimulationCostPredictor.to_samples()
+        :param max_nr_of_samples: maximum number of samples kept in the file
+        """
+        existing_samples = self.load_simulation_cost_samples()
+        if existing_samples is not None:
+            samples = pd.concat([existing_samples, samples], ignore_index=True)
+        samples_path = self._get_simulation_cost_samples_path()
+        os.makedirs(samples_path.parent, exist_ok=True)
+        samples.tail(max_nr_of_samples).to_csv(samples_path, index=False)
+
+    def save_district_loads(self, load_aggregator: DistrictLoadAggregator):
+        """
+        Save the aggregated hourly loads and the peak loads of all groupings, pathes according to MANAGER:LOAD_AGGREGATION.
+        """
+        aggregation_cfg = self._mgr_config["LOAD_AGGREGATION"]
+        groupings = load_aggregator.get_groupings()
+        if not groupings:
+            self.logger.warning("no hourly loads were aggregated, district load files are not written")
+            return
+        load_curves = pd.concat({grouping: load_aggregator.get_load_curves(grouping) for grouping in groupings}, axis="columns", names=["grouping"])
+        load_curves.to_csv(self.base_output_path / Path(aggregation_cfg["LOAD_CURVES_FILE_REL"]))
+        peak_loads = pd.concat({grouping: load_aggregator.get_peak_loads(grouping) for grouping in groupings}, axis="index", names=["grouping"])
+        peak_loads.to_csv(self.base_output_path / Path(aggregation_cfg["PEAK_LOADS_FILE_REL"]))
+
+    def _get_project_archive_manifest_path(self) -> Path:
+        return Path(self.base_output_path) / Path(self._mgr_config["PROJECT_ARCHIVE"]["MANIFEST_FILE_REL"])
+
+    def load_project_archive_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: manifest of the last ZIP the project was saved to, see cesarp.manager.project_archive; empty if the project was not saved yet
+        """
+        return cesarp.manager.project_archive.load_manifest(self._get_project_archive_manifest_path())
+
+    def save_project_archive_manifest(self, manifest: Dict[str, Dict[str, Any]]):
+        cesarp.manager.project_archive.save_manifest(manifest, self._get_project_archive_manifest_path())
+
     @staticmethod
     def convert_rel_to_abs_pathes_in_model(model: BuildingModel, base_dir: str) -> None:
         """
@@ -345,5 +564,5 @@ class FileStorageHandler:
             for filename_to_be_appended in files_to_append:
                 file_sep_lines = f"\n=======\n{filename_to_be_appended}\n=======\n\n"
                 file_to_append_to.write(file_sep_lines.encode("utf-8"))
-                with open(filename_to_be_appended, "rb") as to_be_appended:
+                with open_output_file(filename_to_be_appended, "rb") as to_be_appended:
                     copyfileobj(to_be_appended, file_to_append_to, 1024)
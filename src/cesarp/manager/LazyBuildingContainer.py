@@ -0,0 +1,149 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from collections import OrderedDict
+import os
+from pathlib import Path
+import copy
+import copyreg
+
+from cesarp.model.BuildingModel import BuildingModel
+from cesarp.manager.BuildingContainer import BuildingContainer, BldgContainerDefaultEntries, BldgModelSummary
+import cesarp.manager.binary_pickling
+
+
+class BldgModelCache:
+    """
+    Least-recently-used cache for building models read from building container archives.
+    Shared by all LazyBuildingContainer objects loaded from the same project folder.
+
+    The models are cached per archive file, position within the archive and modification time and size of the archive, thus
+    after an archive was rewritten the models are read again. Call clear() after saving archives to not rely on the
+    modification time resolution of the file system.
+    """
+
+    def __init__(self, max_size: int, prepare_loaded_model: Optional[Callable[[BuildingModel], None]] = None):
+        """
+        :param max_size: maximum number of building models kept in memory
+        :param prepare_loaded_model: optional method called for each model after loading, e.g. to resolve relative pathes
+        """
+        assert max_size > 0, "building model cache size must be at least one"
+        self._max_size = max_size
+        self._prepare_loaded_model = prepare_loaded_model
+        self._models: "OrderedDict[Tuple[str, int, Tuple[int, int, int]], BuildingModel]" = OrderedDict()
+
+    def get(self, archive_path: Union[str, Path], offset: int, length: int) -> BuildingModel:
+        archive_stat = os.stat(archive_path)
+        key = (str(archive_path), offset, (archive_stat.st_mtime_ns, archive_stat.st_size, archive_stat.st_ino))
+        if key in self._models:
+            self._models.move_to_end(key)
+            return self._models[key]
+        model = cesarp.manager.binary_pickling.read_bldg_container_at(archive_path, offset, length).get_bldg_model()
+        if self._prepare_loaded_model:
+            self._prepare_loaded_model(model)
+        self._models[key] = model
+        if len(self._models) > self._max_size:
+            self._models.popitem(last=False)
+        return model
+
+    def clear(self) -> None:
+        self._models.clear()
+
+
+class LazyBuildingContainer(BuildingContainer):
+    """
+    BuildingContainer of which only the building model is kept on disk, it is loaded from the building container archive on
+    access and kept in a small cache shared between the containers. All other entries, e.g. results and retrofit log are
+    held in memory, so result summaries can be created without loading the building models.
+    For processing results and selecting buildings for retrofit use get_bldg_model_summary(), which does not load the model.
+
+    Attention: changes to a building model you got with get_bldg_model() might get lost when the model is removed from
+    the cache. Set the changed model with set_bldg_model(), from then on it is held in memory.
+
+    When pickled or copied with shallow_copy() you get a plain BuildingContainer with the building model loaded.
+    """
+
+    def __init__(
+        self,
+        entries: Dict[str, Any],
+        bldg_model_summary: Optional[BldgModelSummary],
+        archive_path: Union[str, Path],
+        offset: int,
+        length: int,
+        model_cache: BldgModelCache,
+    ):
+        """
+        :param entries: all container entries except the building model
+        :param bldg_model_summary: summary of the building model in the archive, None if the container has no building model
+        :param archive_path: archive file holding the full container
+        :param offset: offset of the pickled container within the archive
+        :param length: length of the pickled container
+        :param model_cache: cache to be used when loading the building model
+        """
+        self.container = entries
+        self._bldg_model_summary = bldg_model_summary
+        self._archive_path = archive_path
+        self._offset = offset
+        self._length = length
+        self._model_cache = model_cache
+
+    def rebind(self, archive_path: Union[str, Path], offset: int, length: int) -> None:
+        """Point to a new location of the pickled container, e.g. after the container was saved to a new archive"""
+        self._archive_path = archive_path
+        self._offset = offset
+        self._length = length
+
+    def is_bldg_model_loaded(self) -> bool:
+        """True if the building model is held in memory by this container, not counting the cache"""
+        return super().has_bldg_model()
+
+    def has_bldg_model(self) -> bool:
+        return self.is_bldg_model_loaded() or self._bldg_model_summary is not None
+
+    def get_bldg_model(self) -> BuildingModel:
+        if self.is_bldg_model_loaded():
+            return super().get_bldg_model()
+        if self._bldg_model_summary is None:
+            raise KeyError(BldgContainerDefaultEntries.BLDG_MODEL_KEY)
+        return self._model_cache.get(self._archive_path, self._offset, self._length)
+
+    def get_bldg_model_summary(self) -> BldgModelSummary:
+        if self.is_bldg_model_loaded() or self._bldg_model_summary is None:
+            return super().get_bldg_model_summary()
+        return self._bldg_model_summary
+
+    def to_bldg_container(self) -> BuildingContainer:
+        """
+        :return: plain BuildingContainer with shallow copies of all entries, building model is loaded if necessary
+        """
+        the_copy = BuildingContainer()
+        the_copy.container = copy.copy(self.container)
+        if self.has_bldg_model():
+            the_copy.container[BldgContainerDefaultEntries.BLDG_MODEL_KEY] = self.get_bldg_model()
+        return the_copy
+
+    def shallow_copy(self) -> BuildingContainer:
+        return self.to_bldg_container()
+
+    def __reduce_ex__(self, protocol):
+        # pickle and copy as plain BuildingContainer, so that the result does not depend on the archive this container was read from
+        return (copyreg._reconstructor, (BuildingContainer, object, None), self.to_bldg_container().__dict__)
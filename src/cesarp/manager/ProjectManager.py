@@ -27,7 +27,7 @@ from typing import Callable, Any, Dict, Optional, Sequence, Union
 from pathlib import Path
 
 import cesarp.common
-from cesarp.manager.SimulationManager import SimulationManager
+from cesarp.manager.SimulationManager import SimulationManager, create_worker_pool
 from cesarp.model.BuildingModel import BuildingModel
 import cesarp.eplus_adapter.eplus_sim_runner
 from cesarp.manager import _default_config_file
@@ -43,6 +43,8 @@ class ProjectManager:
     Whenever you reference a scenario use those keys specified.
     For each scenario a folder named with the scenario name/key is created under the main project folder.
     It is also possible to load existing scenarios that were previously saved.
+    All scenarios share one pool of worker processes, thus when running several scenarios at once (see run_not_simulated_scenarios()),
+    the simulations of all scenarios are queued together and the workers are kept busy until the last simulation of the project finished.
     """
 
     def __init__(
@@ -79,6 +81,7 @@ class ProjectManager:
         self.scenario_summary_res: Dict[pd.DataFrame] = {}  # type: ignore
         self.all_scenarios_summary_filepath = self.project_path / Path(all_scenarios_summary_filename)
         self.logger = logging.getLogger(__name__)
+        self._worker_pool = None
 
     def get_sim_mgr_for(self, sz_name):
         return self._scenarios[sz_name]
@@ -100,7 +103,7 @@ class ProjectManager:
         sc_config = self._merge_config(specific_config_path)
         sc_path = self.__get_scenario_path_for_name(name)
         assert not os.path.exists(sc_path), f"cannot create new scenario named {name}, folder {sc_path} exists"
-        simMgr = SimulationManager(sc_path, sc_config, self.ureg, fids_to_use=self._fids_to_use)
+        simMgr = SimulationManager(sc_path, sc_config, self.ureg, fids_to_use=self._fids_to_use, worker_pool=self.get_worker_pool())
         simMgr.create_bldg_models()
         simMgr.save_bldg_containers()
         simMgr.create_IDFs()
@@ -109,15 +112,26 @@ class ProjectManager:
     def __get_scenario_path_for_name(self, name):
         return self.project_path / Path(str(name))
 
-    def derive_scenario(self, base_scenario_name, new_scenario_name, change_bldg_model_method_ref: Callable[[BuildingModel], Any]) -> None:
+    def derive_scenario(
+        self,
+        base_scenario_name,
+        new_scenario_name,
+        change_bldg_model_method_ref: Callable[[BuildingModel], Any],
+        share_unchanged_model_parts: bool = True,
+    ) -> None:
         """
         Generate a new scenario based on an existing one. The building models are copied from the base scenario, this means randomly assigned constructions and variable profiles
         are preserved.
         For the so copied building models, the passed method is called, thereafter the IDFs are generated.
 
+        By default the copied building models share geometry, neighbours, construction objects and schedules with the base scenario (see BuildingModel.structural_copy()).
+        Your method can replace those, e.g. set a new construction with set_construction_for_bldg_elem(), but must not modify them in place. If your method needs
+        to do so, pass share_unchanged_model_parts=False to get deep copies of the building models.
+
         :param base_scenario_name: name of the scenario to be used as a base
         :param new_scenario_name: name for the new scenario
         :param change_bldg_model_method_ref: method to be called for each building model, modifing it's parameters to adapt to the new scenario
+        :param share_unchanged_model_parts: if False, building models are deep copied instead of sharing unchanged parts with the base scenario
         :return: nothing, new scenario is saved
         """
 
@@ -128,7 +142,7 @@ class ProjectManager:
         except KeyError:
             raise KeyError(f"No existing scenario named {base_scenario_name} found in project manager")
 
-        new_mgr: SimulationManager = SimulationManager.new_manager_from_template(base, sc_path)
+        new_mgr: SimulationManager = SimulationManager.new_manager_from_template(base, sc_path, share_unchanged_model_parts)
 
         for bldg_container in new_mgr.bldg_containers.values():
             bldg_container.clear_results()
@@ -151,7 +165,7 @@ class ProjectManager:
         if not os.path.exists(sc_path):
             return False
         sc_config = self._merge_config(specific_config_path)
-        simMgr = SimulationManager(sc_path, sc_config, self.ureg, load_from_disk=True)
+        simMgr = SimulationManager(sc_path, sc_config, self.ureg, load_from_disk=True, worker_pool=self.get_worker_pool())
         if simMgr.is_ready_to_run_sim():
             self._scenarios[name] = simMgr
             return True
@@ -162,16 +176,40 @@ class ProjectManager:
         """
         For all defined scenarios, run the E+ simulation if no results folder is present for the scenario
 
+        The simulations of all those scenarios are queued at once on the shared worker pool, so workers do not get idle at the end of each scenario.
+        Results of each scenario are processed and saved as soon as all its simulations finished.
+
         :param: be careful with passing only a subset of fids here in case some of the scenarios were run for more
                 buildings it might result in a mess when trying to create a summary or relaoding etc.
         :return: None
         """
-        for name, scenario in self._scenarios.items():
-            if not scenario.output_folders:
-                scenario.run_simulations()
-                scenario.process_results()
-                scenario.save_bldg_containers()
-                scenario.save_summary_result()
+        scenarios_to_run = {name: scenario for name, scenario in self._scenarios.items() if not scenario.output_folders}
+        pending_sims = {}
+        for name, scenario in scenarios_to_run.items():
+            pending_sims[name] = scenario.submit_simulations(callback=self._get_progress_logger(name))
+            self.logger.info(f"scenario {name}: {len(set(pending_sims[name].values()))} simulations queued")
+        for name, scenario in scenarios_to_run.items():
+            scenario.collect_simulations(pending_sims[name])
+            scenario.process_results()
+            scenario.save_bldg_containers()
+            scenario.save_summary_result()
+            self.logger.info(f"scenario {name} simulated and results saved")
+
+    def _get_progress_logger(self, scenario_name) -> Callable[[Any], None]:
+        nr_of_sims_done = 0
+
+        def log_progress(_):
+            nonlocal nr_of_sims_done
+            nr_of_sims_done += 1
+            self.logger.info(f"scenario {scenario_name}: {nr_of_sims_done} simulations finished")
+
+        return log_progress
+
+    def get_worker_pool(self):
+        """:return: process pool shared by all scenarios of the project, created on first call"""
+        if self._worker_pool is None:
+            self._worker_pool = create_worker_pool(self._mgr_config["NR_OF_PARALLEL_WORKERS"], logging_cfg=self._mgr_config["WORKER_LOGGING"])
+        return self._worker_pool
 
     def collect_all_scenario_summaries(
         self,
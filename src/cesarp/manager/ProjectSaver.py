@@ -20,6 +20,8 @@
 #
 from typing import Dict, Any, Optional, Union
 import os
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 import shutil
 import glob
 import logging
@@ -32,7 +34,9 @@ import sys
 import requests
 
 import cesarp.common.version_info
+from cesarp.manager import _default_config_file
 from cesarp.manager.FileStorageHandler import FileStorageHandler
+from cesarp.manager.project_archive import ParallelArchiveWriter, save_manifest
 from cesarp.manager.BuildingContainer import BuildingContainer
 from cesarp.model.BuildingModel import BuildingModel
 from cesarp.model.Site import Site
@@ -44,12 +48,12 @@ from cesarp.common.config_loader import save_config_to_file
 from cesarp.graphdb_access import _default_config_file as graph_db_access_default_config
 
 
-def add_folder_to_zip(zip_file: ZipFile, folder: Union[str, Path], sub_dir_in_zip: str = "") -> Dict[str, str]:
+def add_folder_to_zip(zip_file: Union[ZipFile, ParallelArchiveWriter], folder: Union[str, Path], sub_dir_in_zip: str = "") -> Dict[str, str]:
     """
     add folder and subelements to zip
 
     :param zip_file: [description]
-    :type zip_file: ZipFile
+    :type zip_file: Union[ZipFile, ParallelArchiveWriter]
     :param folder: [description]
     :type folder: Union[str, Path]
     :param sub_dir_in_zip: [description], defaults to ""
@@ -73,7 +77,7 @@ def add_folder_to_zip(zip_file: ZipFile, folder: Union[str, Path], sub_dir_in_zi
     return added_items
 
 
-def add_file_to_zip(zip_file: ZipFile, filepath, subdir="", filename_in_zip=None) -> str:
+def add_file_to_zip(zip_file: Union[ZipFile, ParallelArchiveWriter], filepath, subdir="", filename_in_zip=None) -> str:
     if not filename_in_zip:
         filename_in_zip = os.path.basename(filepath)
     full_path_in_zip = str(subdir / Path(filename_in_zip))
@@ -89,6 +93,9 @@ class ProjectSaver:
     simulation. To do so, create a instance of this class and then call *create_zip_file()*.
 
     If you use the SimulationManager, see its *save_to_zip()* method, which calls this ProjectSaver and initializes everything as needed.
+
+    The files are compressed in parallel, see MANAGER:PROJECT_ARCHIVE in the configuration. With INCREMENTAL set, only files changed since
+    the last save are included, the manifest in the ZIP lists for each file of the project the ZIP in which it is stored.
     """
 
     GIT_STATUS_FILENAME = "git_status_extended.txt"
@@ -98,6 +105,7 @@ class ProjectSaver:
     README_FILENAME = "README.md"
     MAIN_CONFIG_FILENAME = "main_config.yml"
     CONSTRUCTION_DATA_FILENAME = "construction_and_retrofit_data.ttl"
+    MANIFEST_FILENAME = "archive_manifest.json"
 
     def __init__(
         self,
@@ -139,6 +147,7 @@ class ProjectSaver:
         self._bldg_containers: Optional[Dict[int, BuildingContainer]] = bldg_containers
         self._src_wheel_zip_rel_path = None
         self._track_zipped_items: Dict[str, str] = {}
+        self._archive_cfg = cesarp.common.load_config_for_package(_default_config_file, "cesarp.manager", main_config)["PROJECT_ARCHIVE"]
         self._logger = logging.getLogger(__name__)
 
     def create_zip_file(self, include_bldg_models, include_idfs, include_eplus_output, include_src_pck) -> str:
@@ -158,32 +167,63 @@ class ProjectSaver:
         """
         env_files = self.create_environment_files()
         env_files_dir = self.RUNTIME_ENV_FOLDER
-        with ZipFile(self._zip_file_path, "w") as thezip:
-            for env_file in env_files:
-                thezip.write(env_file, env_files_dir + "/" + os.path.basename(env_file))
-            if include_src_pck:
-                src_wheel_tmp_file = self.create_source_wheel()
-                if src_wheel_tmp_file:
-                    self._src_wheel_zip_rel_path = env_files_dir + "/" + os.path.basename(src_wheel_tmp_file)
-                    thezip.write(src_wheel_tmp_file, self._src_wheel_zip_rel_path)
-            self.add_project_input_files(thezip)
-            self.add_cesarp_output_files(thezip, include_bldg_models, include_idfs, include_eplus_output)
-            add_file_to_zip(thezip, self._main_script_path)
-            add_file_to_zip(thezip, self.create_readme(include_bldg_models, include_idfs, include_eplus_output))
-            self.add_construction_data_ttl_file(thezip)
+        base_manifest = self._file_storage_handler.load_project_archive_manifest() if self._archive_cfg["INCREMENTAL"] else None
+        # the archive writer starts its worker processes, which must be done before any thread is started as forking a process with
+        # running threads can deadlock the child. building the wheel and downloading the construction data do not need the main
+        # process, it is done in threads while the project files are added
+        with ParallelArchiveWriter(
+            self._zip_file_path,
+            nr_of_workers=self._get_nr_of_archive_workers(),
+            chunk_size_mb=self._archive_cfg["CHUNK_SIZE_MB"],
+            compression_level=self._archive_cfg["COMPRESSION_LEVEL"],
+            base_manifest=base_manifest,
+        ) as thezip:
+            with ThreadPoolExecutor(max_workers=2) as background_tasks:
+                src_wheel_task = background_tasks.submit(self.create_source_wheel) if include_src_pck else None
+                construction_data_task = background_tasks.submit(self.create_construction_data_ttl_file)
+                for env_file in env_files:
+                    thezip.write(env_file, env_files_dir + "/" + os.path.basename(env_file))
+                self.add_project_input_files(thezip)
+                self.add_cesarp_output_files(thezip, include_bldg_models, include_idfs, include_eplus_output)
+                add_file_to_zip(thezip, self._main_script_path)
+                if src_wheel_task:
+                    src_wheel_tmp_file = src_wheel_task.result()
+                    if src_wheel_tmp_file:
+                        self._src_wheel_zip_rel_path = env_files_dir + "/" + os.path.basename(src_wheel_tmp_file)
+                        thezip.write(src_wheel_tmp_file, self._src_wheel_zip_rel_path)
+                add_file_to_zip(thezip, self.create_readme(include_bldg_models, include_idfs, include_eplus_output, bool(base_manifest)))
+                ttl_tmp_path = construction_data_task.result()
+                if ttl_tmp_path:
+                    add_file_to_zip(thezip, ttl_tmp_path, self.PROJ_RESSOURCES_FOLDER, self.CONSTRUCTION_DATA_FILENAME)
+                manifest = thezip.get_manifest()
+                manifest_tmp_path = self._temp_dir / Path(self.MANIFEST_FILENAME)
+                save_manifest(manifest, manifest_tmp_path)
+                add_file_to_zip(thezip, manifest_tmp_path)
+        self._file_storage_handler.save_project_archive_manifest(manifest)
 
         return str(self._zip_file_path)
 
-    def create_readme(self, include_bldg_models, include_idfs, include_eplus_output):
+    def _get_nr_of_archive_workers(self) -> int:
+        nr_of_workers = self._archive_cfg["NR_OF_WORKERS"]
+        if nr_of_workers == -1:
+            nr_of_workers = max(1, round(multiprocessing.cpu_count() / 2))
+        return nr_of_workers
+
+    def create_readme(self, include_bldg_models, include_idfs, include_eplus_output, is_incremental=False):
         tmp_readme = self._temp_dir / Path(self.README_FILENAME)
         with open(tmp_readme, "w") as fd:
             fd.writelines("README\n")
             fd.writelines("==========\n")
+            if is_incremental:
+                fd.writelines(
+                    f"\nThis ZIP only contains the files changed since the project was saved before. See {self.MANIFEST_FILENAME} for the ZIP in which each file is stored, "
+                    "unzip all of them to the same folder, starting with the oldest.\n\n"
+                )
             self.write_zip_description(fd, include_bldg_models, include_idfs, include_eplus_output)
             self.write_installation_instructions(fd)
         return tmp_readme
 
-    def add_cesarp_output_files(self, the_zip: ZipFile, include_bldg_models, include_idfs, include_eplus_output):
+    def add_cesarp_output_files(self, the_zip: Union[ZipFile, ParallelArchiveWriter], include_bldg_models, include_idfs, include_eplus_output):
         cesarp_out_dir = self.CESARP_OUTPUTS_FOLDER
         add_file_to_zip(the_zip, self._file_storage_handler.get_result_summary_filepath(), cesarp_out_dir)
         add_file_to_zip(the_zip, self._file_storage_handler.get_bldg_infos_used_filepath(), cesarp_out_dir)
@@ -278,14 +318,22 @@ class ProjectSaver:
 
         return model_rel_pathes
 
-    def add_project_input_files(self, the_zip: ZipFile):
+    def add_project_input_files(self, the_zip: Union[ZipFile, ParallelArchiveWriter]):
         cesarp_in_dir = self.PROJ_RESSOURCES_FOLDER
         zip_relative_config = self.add_files_from_config(the_zip, copy.deepcopy(self._main_config), cesarp_in_dir)
         zip_cnf_tmp_path = self._temp_dir / Path(self.MAIN_CONFIG_FILENAME)
         save_config_to_file(zip_relative_config, zip_cnf_tmp_path)
         add_file_to_zip(the_zip, zip_cnf_tmp_path)
 
-    def add_construction_data_ttl_file(self, the_zip: ZipFile):
+    def add_construction_data_ttl_file(self, the_zip: Union[ZipFile, ParallelArchiveWriter]):
+        ttl_tmp_path = self.create_construction_data_ttl_file()
+        if ttl_tmp_path:
+            add_file_to_zip(the_zip, ttl_tmp_path, self.PROJ_RESSOURCES_FOLDER, self.CONSTRUCTION_DATA_FILENAME)
+
+    def create_construction_data_ttl_file(self) -> Optional[Path]:
+        """
+        :return: path of the downloaded construction data, None if not configured to be saved
+        """
         graph_cfg = cesarp.common.load_config_for_package(graph_db_access_default_config, "cesarp.graphdb_access", self._main_config)
         if graph_cfg["REMOTE"]["ACTIVE"] and graph_cfg["REMOTE"]["SAVE_DB_EXPORT"]:
             try:
@@ -315,9 +363,10 @@ class ProjectSaver:
             r = requests.get(url=query, headers=headers, auth=(user, passwd))
             with open(ttl_tmp_path, "wb") as fd:
                 fd.write(r.content)
-            add_file_to_zip(the_zip, ttl_tmp_path, self.PROJ_RESSOURCES_FOLDER, self.CONSTRUCTION_DATA_FILENAME)
+            return ttl_tmp_path
+        return None
 
-    def add_files_from_config(self, the_zip: ZipFile, config: Dict[str, Any], path_in_zip: str):
+    def add_files_from_config(self, the_zip: Union[ZipFile, ParallelArchiveWriter], config: Dict[str, Any], path_in_zip: str):
         for k, val in config.items():
             if type(val) is dict:
                 config[k] = self.add_files_from_config(the_zip, val, path_in_zip)
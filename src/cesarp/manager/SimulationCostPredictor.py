@@ -0,0 +1,156 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Predicts the EnergyPlus runtime of a building, used to queue the simulations longest first (see MANAGER:SIMULATION_SCHEDULING).
+With the longest simulations started first, the last simulations to finish are short ones and all workers are busy until
+shortly before the end, instead of one large building running alone at the end.
+
+The runtime is modeled as linear in a few cost features of the building model. The coefficients start from rough defaults
+and are calibrated with the simulation times measured in earlier runs, which are collected to a samples file.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import nnls
+
+from cesarp.model.BuildingModel import BuildingModel
+from cesarp.eplus_adapter.idf_writer_geometry import get_representative_floor_nr
+
+FEATURE_NAMES = ["constant", "zone_timesteps", "surface_timesteps", "window_timesteps", "shading_pairs"]
+SIM_TIME_COLUMN = "simulation time in sec"
+FID_COLUMN = "fid"
+
+# number of zones, surfaces, windows and shading surfaces, see count_surfaces()
+SurfaceCounts = Tuple[int, int, int, int]
+
+# seconds per unit of each feature, rough values for EnergyPlus 9.x on a desktop machine
+_DEFAULT_COEFFICIENTS = np.array([5.0, 0.3, 0.03, 0.05, 0.0005])
+
+
+class SimulationCostPredictor:
+    """
+    Runtime in seconds predicted as linear combination of the features (see FEATURE_NAMES and get_cost_features()):
+
+    - constant: startup, warmup and writing of outputs
+    - zone_timesteps and surface_timesteps, window_timesteps: heat balance per zone and surface, solved every timestep
+    - shading_pairs: the shadow calculation checks every shading surface against every surface of the building
+    """
+
+    def __init__(self, coefficients: Optional[Sequence[float]] = None):
+        self.coefficients = np.array(coefficients if coefficients is not None else _DEFAULT_COEFFICIENTS, dtype=float)
+        assert len(self.coefficients) == len(FEATURE_NAMES), f"expected {len(FEATURE_NAMES)} coefficients for {FEATURE_NAMES}"
+
+    @staticmethod
+    def get_cost_features(surface_counts: SurfaceCounts, nr_of_timesteps: int) -> List[float]:
+        """
+        :param surface_counts: zones and surfaces of the building to simulate as written to the IDF, see count_surfaces()
+        :param nr_of_timesteps: timesteps per hour used for the simulation, see EPLUS_ADAPTER:SIMULATION_SETTINGS:NR_OF_TIMESTEPS
+        :return: value for each of FEATURE_NAMES
+        """
+        (nr_of_zones, nr_of_surfaces, nr_of_windows, nr_of_shading_surfaces) = surface_counts
+        return [
+            1.0,
+            float(nr_of_zones * nr_of_timesteps),
+            float(nr_of_surfaces * nr_of_timesteps),
+            float(nr_of_windows * nr_of_timesteps),
+            float(nr_of_shading_surfaces * (nr_of_surfaces + nr_of_windows)),
+        ]
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        :param features: one row per building, columns according to FEATURE_NAMES
+        :return: predicted runtime in seconds per building
+        """
+        return np.asarray(features, dtype=float).reshape(-1, len(FEATURE_NAMES)) @ self.coefficients
+
+    def calibrate(self, features: np.ndarray, sim_times: np.ndarray, prior_weight: float) -> None:
+        """
+        Fit the coefficients to the measured simulation times with non-negative least squares. The current coefficients act as prior,
+        with prior_weight being roughly the number of samples needed to outweigh it, so few samples only adjust the coefficients a bit.
+
+        :param features: one row per simulation, columns according to FEATURE_NAMES
+        :param sim_times: measured simulation time in seconds per simulation
+        :param prior_weight: weight of the current coefficients
+        """
+        features = np.asarray(features, dtype=float).reshape(-1, len(FEATURE_NAMES))
+        sim_times = np.asarray(sim_times, dtype=float)
+        if len(sim_times) == 0:
+            return
+        # scale features so that the prior has a comparable weight for all coefficients
+        scale = np.maximum(np.abs(features).mean(axis=0), 1e-9)
+        prior_rows = np.sqrt(prior_weight) * np.diag(scale)
+        lhs = np.vstack([features, prior_rows])
+        rhs = np.concatenate([sim_times, prior_rows @ self.coefficients])
+        (self.coefficients, _) = nnls(lhs, rhs)
+
+    @classmethod
+    def from_samples(cls, samples: Optional[pd.DataFrame], prior_weight: float) -> "SimulationCostPredictor":
+        """
+        :param samples: measured simulation times with columns FEATURE_NAMES and SIM_TIME_COLUMN, see to_samples(); None to get a not calibrated predictor
+        :param prior_weight: see calibrate()
+        """
+        predictor = cls()
+        if samples is not None and not samples.empty:
+            predictor.calibrate(samples[FEATURE_NAMES].to_numpy(), samples[SIM_TIME_COLUMN].to_numpy(), prior_weight)
+        return predictor
+
+
+def count_surfaces(bldg_model: BuildingModel, floor_groups: Optional[List[List[int]]] = None) -> SurfaceCounts:
+    """
+    Counted in the worker writing the IDF, see cesarp.manager.processing_steps.bldg_model_to_idf_no_exception(), thus the building model
+    does not need to be loaded again to schedule the simulation.
+
+    :param bldg_model: building model to simulate
+    :param floor_groups: floors modeled as one zone with a zone multiplier, see cesarp.eplus_adapter.idf_writer_geometry.group_repeated_floors(); None if one zone per floor is written
+    :return: number of zones, surfaces of the building, windows and shading surfaces (walls and roofs of the neighbours)
+    """
+    bldg_shape = bldg_model.bldg_shape
+    modeled_floor_nrs = [get_representative_floor_nr(group) for group in floor_groups] if floor_groups else list(range(len(bldg_shape.walls)))
+    nr_of_zones = len(modeled_floor_nrs)
+    # walls, groundfloor, roof and a floor and ceiling between each pair of zones
+    nr_of_surfaces = sum(len(bldg_shape.walls[floor_nr]) for floor_nr in modeled_floor_nrs) + 2 + 2 * (nr_of_zones - 1)
+    nr_of_windows = sum(window is not None for floor_nr in modeled_floor_nrs for window in bldg_shape.windows[floor_nr])
+    nr_of_shading_surfaces = sum(len(neighbour.walls[0]) + 1 for neighbour in bldg_model.neighbours.values()) if bldg_model.neighbours else 0
+    return (nr_of_zones, nr_of_surfaces, nr_of_windows, nr_of_shading_surfaces)
+
+
+def to_samples(features_per_fid: Dict[int, List[float]], sim_time_per_fid: Dict[int, float]) -> pd.DataFrame:
+    """
+    :return: DataFrame with columns fid, FEATURE_NAMES and SIM_TIME_COLUMN, one row per fid contained in both dicts
+    """
+    fids = [fid for fid in features_per_fid.keys() if fid in sim_time_per_fid]
+    samples = pd.DataFrame([features_per_fid[fid] for fid in fids], columns=FEATURE_NAMES)
+    samples.insert(0, FID_COLUMN, fids)
+    samples[SIM_TIME_COLUMN] = [sim_time_per_fid[fid] for fid in fids]
+    return samples
+
+
+def order_longest_first(fids: Iterable[int], predicted_costs: Dict[int, float]) -> List[int]:
+    """
+    :param fids: fids in the order used for fids with equal cost
+    :param predicted_costs: predicted cost per fid, fids without prediction get the median of the predictions
+    :return: fids ordered by decreasing predicted cost
+    """
+    fids = list(fids)
+    default_cost = float(np.median(list(predicted_costs.values()))) if predicted_costs else 0.0
+    return sorted(fids, key=lambda fid: -predicted_costs.get(fid, default_cost))
@@ -20,13 +20,16 @@
 # Contact: https://www.empa.ch/web/s313
 #
 import logging
+import logging.handlers
 import copy
 
-from typing import Iterable, Dict, Any, Optional, Set, Sequence, List, Union
+from typing import Callable, Iterable, Dict, Any, Optional, Set, Sequence, List, Union
 import multiprocessing
+import multiprocessing.pool
 import atexit
 import math
 from multiprocessing.managers import SyncManager, BaseManager
+import numpy as np
 import pandas as pd
 import os
 from pathlib import Path
@@ -40,20 +43,35 @@ from cesarp.common import config_loader
 import cesarp.common.filehandling
 import cesarp.common.DatasetMetadata
 from cesarp.manager import processing_steps
+from cesarp.manager import stage_profiling
+from cesarp.manager import memory_admission
+from cesarp.manager import worker_logging
+from cesarp.manager.stage_profiling import StageRecord
 
 from cesarp.model.BuildingModel import BuildingModel
 from cesarp.manager.BuildingContainer import BuildingContainer
 from cesarp.manager import _default_config_file
 from cesarp.manager.FileStorageHandler import FileStorageHandler, get_timestamp
 from cesarp.manager.ProjectSaver import ProjectSaver
+from cesarp.manager.SimulationCostPredictor import SimulationCostPredictor, SurfaceCounts, order_longest_first, to_samples
 from cesarp.results.EnergyDemandSimulationResults import EnergyDemandSimulationResults
 from cesarp.results.ResultProcessor import OperationalEmissionsAndCostsResult
+from cesarp.results.DistrictLoadAggregator import DistrictLoadAggregator, get_age_class
 import cesarp.eplus_adapter.eplus_eso_results_handling
 import cesarp.eplus_adapter.eplus_sim_runner
 from cesarp.eplus_adapter.eplus_error_file_handling import EPLUS_ERROR_FILE_NAME
 from cesarp.eplus_adapter.idf_strings import ResultsFrequency
 from cesarp.results.ResultProcessor import ResultProcessor
 from cesarp.eplus_adapter.RelativeAuxiliaryFilesHandler import RelativeAuxiliaryFilesHandler
+from cesarp.weather.WeatherFileRegistry import WeatherFileRegistry
+from cesarp.surrogate.SurrogateFeatureExtractor import SurrogateFeatureExtractor
+from cesarp.surrogate.SurrogateModel import SurrogateModel
+from cesarp.emissons_cost.OperationalEmissionsAndCostsVectorized import OperationalEmissionsAndCostsVectorized, split_per_bldg
+from cesarp.common.CesarpException import CesarpException
+
+
+_SIMULATION_BACKEND_ENERGYPLUS = "ENERGYPLUS"
+_SIMULATION_BACKEND_SURROGATE = "SURROGATE"
 
 
 def define_fid_batches(all_fids, nr_of_batches):
@@ -113,6 +131,7 @@ class SimulationManager:
         load_from_disk: bool = False,
         fids_to_use: List[int] = None,
         delete_old_logs=True,
+        worker_pool: Optional[multiprocessing.pool.Pool] = None,
     ):
         """
         :param base_output_path: full folder path where idf, eplus output and other cesar-p output and intermediate files are stored.
@@ -128,6 +147,9 @@ class SimulationManager:
         :type fids_to_use: List[int]
         :param delete_old_logs: if true old \\*-cesarp-logs folder are deleted when a new worker pool is created
         :type delete_old_logs: bool
+        :param worker_pool: pool of workers to be used, e.g. to share one pool between several SimulationManagers (see create_worker_pool()).
+                            if not passed, an own pool is created when needed
+        :type worker_pool: Optional[multiprocessing.pool.Pool]
         """
         self.logger = logging.getLogger(__name__)
         assert not (load_from_disk and (fids_to_use is not None)), "if load_from_disk is True you cannot pass fids_to_use"
@@ -146,7 +168,9 @@ class SimulationManager:
 
         self.failed_fids: Set[int] = set()
 
-        self._worker_pool = None
+        self._worker_pool = worker_pool
+        # for each fid the fid of the building actually simulated, differs if simulations are deduplicated
+        self._simulated_fid_per_fid: Dict[int, int] = {}
 
         if not fids_to_use:
             fids_to_use = self.get_fids_from_config()
@@ -156,9 +180,20 @@ class SimulationManager:
         self.output_folders: Dict[int, str] = {}
         self.idf_pathes: Dict[int, str] = {}
         self.weather_files: Dict[int, str] = {}
+        # zones and surfaces per fid as written to the IDF by create_IDFs(), used to schedule the simulations without loading the building models
+        self.surface_counts: Dict[int, SurfaceCounts] = {}
+        self.weather_registry = WeatherFileRegistry(self._custom_config)
+        # relative uncertainty per fid of the demands predicted by the surrogate model, see predict_with_surrogate()
+        self.surrogate_relative_uncertainty: Dict[int, float] = {}
+        # records of the processing steps run on the workers, only collected if STAGE_PROFILING is active, see get_run_profile()
+        self.run_profile: List[StageRecord] = []
+        # cost features of the buildings queued for simulation, only collected if SIMULATION_SCHEDULING is active
+        self._sim_cost_features: Dict[int, List[float]] = {}
+        # hourly loads summed up per group of buildings by process_results(), only if LOAD_AGGREGATION is active
+        self.load_aggregation: Optional[DistrictLoadAggregator] = None
 
         if load_from_disk:
-            self.bldg_containers = self._storage.load_existing_bldg_containers()
+            self.bldg_containers = self._storage.load_existing_bldg_containers(self._get_worker_pool())
             self.idf_pathes = self._storage.load_existing_idfs()
             if self.idf_pathes:
                 self.weather_files = self._storage.load_existing_weather_mapping()
@@ -245,13 +280,14 @@ class SimulationManager:
         fid_batches = define_fid_batches(list(self.bldg_containers.keys()), worker_pool._processes)
         sia_params_gen_lock = self._get_lock()
         job_res_list = [
-            self._get_worker_pool().apply_async(
+            self._apply_async(
                 processing_steps.create_bldg_models_batch_no_exception,
                 (fid_batch, self._custom_config, sia_params_gen_lock),
             )
             for fid_batch in fid_batches
         ]
-        result_per_worker = [res.get() for res in job_res_list]
+        result_per_worker = [self._get_result(res) for res in job_res_list]
+        self._save_run_profile()
 
         all_per_bldg_info_used = pd.DataFrame()
         bldg_model_creation_failed: Set[int] = set()
@@ -283,21 +319,23 @@ class SimulationManager:
         assert idf_pathes_to_write, "No of the buildings has a model assigned. call create_bldg_models() first."
 
         job_res_dict = {
-            fid: self._get_worker_pool().apply_async(
+            fid: self._apply_async(
                 processing_steps.bldg_model_to_idf_no_exception,
                 (self.bldg_containers[fid].get_bldg_model(), idf_path_for_fid, aux_fh, self._custom_config),
                 error_callback=processing_steps.log_error,
             )
             for fid, idf_path_for_fid in idf_pathes_to_write.items()
         }
-        res_tuples_dict = {fid: res.get() for fid, res in job_res_dict.items()}
+        res_tuples_dict = {fid: self._get_result(res) for fid, res in job_res_dict.items()}
+        self._save_run_profile()
 
         idf_write_failed = []
         # the entries of the result correspond to the return values of processing_steps.bldg_model_to_idf_no_exception
-        for fid, (successful, idf_path, weather_file) in res_tuples_dict.items():
+        for fid, (successful, idf_path, weather_file, surface_counts) in res_tuples_dict.items():
             if successful:
                 self.weather_files[fid] = weather_file
                 self.idf_pathes[fid] = idf_path
+                self.surface_counts[fid] = surface_counts
             else:
                 idf_write_failed.append(fid)
                 self.bldg_containers[fid].set_error()
@@ -312,34 +350,244 @@ class SimulationManager:
 
     def run_simulations(self) -> List[int]:
         """
-        Run EnergyPlus simulation
+        Run EnergyPlus simulation, or with MANAGER:SIMULATION_BACKEND set to "SURROGATE" predict the demands with the surrogate model and
+        run EnergyPlus only for the buildings with uncertain predictions, see predict_with_surrogate().
 
-        :param bldg_fids_to_create_idf_for: gis fids of buildings for which to run the simulation; if None simulation is run for all created IDF's
         :return: fid's for which EnergyPlus simulation failed
         """
-        assert self.is_ready_to_run_sim(), "please run create_IDFs before calling run_simulation"
+        return self.collect_simulations(self.submit_simulations())
+
+    def submit_simulations(self, callback: Optional[Callable[[Any], None]] = None) -> Dict[int, multiprocessing.pool.AsyncResult]:
+        """
+        First part of run_simulations(), queues the EnergyPlus simulations of all buildings on the worker pool without waiting for them to finish.
+        Allows to queue simulations of several SimulationManagers sharing the same worker pool, see ProjectManager.run_not_simulated_scenarios().
+        Pass the returned dict to collect_simulations().
+        If MANAGER:SIMULATION_DEDUPLICATION is active, buildings with identical IDF and weather file share one simulation job.
+        Simulations are queued grouped by weather file, see _order_by_weather_file(), or longest first if MANAGER:SIMULATION_SCHEDULING is active,
+        see _order_longest_first().
+
+        With MANAGER:SIMULATION_BACKEND set to "SURROGATE", the demands of all buildings are predicted with the surrogate model first
+        and only the buildings with uncertain predictions are queued, see predict_with_surrogate().
+
+        If MANAGER:MEMORY_ADMISSION is active, the workers only start EnergyPlus as long as the estimated memory of the running simulations
+        fits into the memory budget, see cesarp.manager.memory_admission.
+
+        :param callback: optional, called in the main process with the result of each simulation as soon as it finished
+        :return: dict with fid as key and the pending result of the simulation job as value
+        """
+        backend = self._mgr_config["SIMULATION_BACKEND"]["BACKEND"]
+        if backend not in [_SIMULATION_BACKEND_ENERGYPLUS, _SIMULATION_BACKEND_SURROGATE]:
+            raise CesarpException(f"MANAGER:SIMULATION_BACKEND:BACKEND {backend} not known, use {_SIMULATION_BACKEND_ENERGYPLUS} or {_SIMULATION_BACKEND_SURROGATE}")
+        if backend == _SIMULATION_BACKEND_ENERGYPLUS:
+            assert self.is_ready_to_run_sim(), "please run create_IDFs before calling run_simulation"
 
         # clear any results
         for container in self.bldg_containers.values():
             container.clear_results()
 
-        bldg_gis_ids_to_simulate = list(self.idf_pathes.keys())
+        if backend == _SIMULATION_BACKEND_SURROGATE:
+            bldg_gis_ids_to_simulate = self.predict_with_surrogate()
+            assert all(fid in self.idf_pathes and fid in self.weather_files for fid in bldg_gis_ids_to_simulate), "please run create_IDFs before calling run_simulation"
+        else:
+            bldg_gis_ids_to_simulate = list(self.idf_pathes.keys())
         expected_output_folders = self._storage.get_eplus_output_pathes(bldg_gis_ids_to_simulate)
 
+        if self._mgr_config["SIMULATION_DEDUPLICATION"]["ACTIVE"]:
+            self._simulated_fid_per_fid = self._get_simulated_fid_per_fid(bldg_gis_ids_to_simulate)
+        else:
+            self._simulated_fid_per_fid = {fid: fid for fid in bldg_gis_ids_to_simulate}
+
         # avoid loading config from disk for each simulation, thus load here and pass on
         config_eplus = cesarp.eplus_adapter.eplus_sim_runner.get_config(self._custom_config)
-        job_res_dict = {
-            fid: self._get_worker_pool().apply_async(
+        fids_to_queue = self._order_by_weather_file(set(self._simulated_fid_per_fid.values()))
+        if self._mgr_config["SIMULATION_SCHEDULING"]["ACTIVE"]:
+            fids_to_queue = self._order_longest_first(fids_to_queue, config_eplus["SIMULATION_SETTINGS"]["NR_OF_TIMESTEPS"])
+        if self._mgr_config["MEMORY_ADMISSION"]["ACTIVE"]:
+            budget_mb = memory_admission.get_memory_budget_mb(self._mgr_config["MEMORY_ADMISSION"])
+            memory_budget = memory_admission.get_shared_memory_budget(budget_mb)
+            memory_estimates = self._estimate_sim_memory_mb(fids_to_queue, budget_mb)
+        else:
+            memory_budget = None
+            memory_estimates = {}
+        sim_jobs = {
+            fid: self._apply_async(
                 processing_steps.run_simulation_no_exception,
-                (self.idf_pathes[fid], self.weather_files[fid], expected_output_folders[fid], config_eplus),
+                (self.idf_pathes[fid], self.weather_files[fid], expected_output_folders[fid], config_eplus, fid, memory_budget, memory_estimates.get(fid, 0.0)),
+                callback=callback,
             )
-            for fid in bldg_gis_ids_to_simulate
+            for fid in fids_to_queue
         }
-        res_tuples_dict = {fid: res.get() for fid, res in job_res_dict.items()}
+        return {fid: sim_jobs[self._simulated_fid_per_fid[fid]] for fid in bldg_gis_ids_to_simulate}
+
+    def predict_with_surrogate(self) -> List[int]:
+        """
+        Predict the annual demands of all buildings having a building model with the surrogate model saved to MANAGER:SIMULATION_BACKEND:SURROGATE_MODEL_FILE.
+        For buildings with a relative uncertainty of the prediction up to MANAGER:SIMULATION_BACKEND:MAX_RELATIVE_UNCERTAINTY, the predicted demands
+        are set as demand results to the building containers, if DO_CALC_OP_EMISSIONS_AND_COSTS is True operational emissions and costs as well.
+        The relative uncertainty per building is stored to surrogate_relative_uncertainty.
+
+        :return: fid's of the buildings for which the prediction is too uncertain, those should be simulated with EnergyPlus
+        """
+        backend_cfg = self._mgr_config["SIMULATION_BACKEND"]
+        surrogate = SurrogateModel.load(backend_cfg["SURROGATE_MODEL_FILE"], self._custom_config)
+        fids = self._get_fids_having_bldg_model()
+        feature_extractor = SurrogateFeatureExtractor(self._unit_reg, self._custom_config, self.weather_registry)
+        features = feature_extractor.get_features_for(self.bldg_containers[fid].get_bldg_model() for fid in fids)
+        (demand_results, relative_uncertainty) = surrogate.predict_demand_results(features, self._unit_reg)
+        self.surrogate_relative_uncertainty = dict(zip(fids, relative_uncertainty.tolist()))
+        fids_predicted = []
+        fids_uncertain = []
+        for fid, demand_res, uncertainty in zip(fids, demand_results, relative_uncertainty):
+            if uncertainty <= backend_cfg["MAX_RELATIVE_UNCERTAINTY"]:
+                self.bldg_containers[fid].set_energy_demand_sim_res(demand_res)
+                fids_predicted.append(fid)
+            else:
+                fids_uncertain.append(fid)
+        if self._mgr_config["DO_CALC_OP_EMISSIONS_AND_COSTS"]:
+            self._set_op_cost_and_emission_from_demand_res(fids_predicted)
+        self.logger.info(f"demands of {len(fids_predicted)} buildings predicted by surrogate model, {len(fids_uncertain)} buildings need to be simulated with EnergyPlus")
+        return fids_uncertain
+
+    def train_surrogate_model(self, save_to_path: Optional[Union[str, Path]] = None) -> SurrogateModel:
+        """
+        Train the surrogate model on all buildings having a building model and a demand result, thus call after process_results().
+        Use a project simulated with EnergyPlus representative for the buildings and scenarios you want to predict.
+
+        :param save_to_path: file to save the trained model to, if None it is saved to MANAGER:SIMULATION_BACKEND:SURROGATE_MODEL_FILE
+        :return: trained surrogate model
+        """
+        fids = [fid for fid in self._get_fids_having_bldg_model() if self.bldg_containers[fid].has_demand_result()]
+        feature_extractor = SurrogateFeatureExtractor(self._unit_reg, self._custom_config, self.weather_registry)
+        features = feature_extractor.get_features_for(self.bldg_containers[fid].get_bldg_model() for fid in fids)
+        targets = np.array([SurrogateModel.get_targets(self.bldg_containers[fid].get_energy_demand_sim_res(), self._unit_reg) for fid in fids]).reshape(len(fids), -1)
+        surrogate = SurrogateModel(self._custom_config)
+        surrogate.fit(features, targets)
+        surrogate.save(save_to_path if save_to_path else self._mgr_config["SIMULATION_BACKEND"]["SURROGATE_MODEL_FILE"])
+        return surrogate
+
+    def _set_op_cost_and_emission_from_demand_res(self, bldg_fids: List[int]) -> None:
+        """calculate operational emissions and costs from the demand results set to the containers, all buildings in one go"""
+        summaries = {fid: self.bldg_containers[fid].get_bldg_model_summary() for fid in bldg_fids}
+        fids = [fid for fid, summary in summaries.items() if summary.e_carrier_heating and summary.e_carrier_dhw and summary.simulation_year]
+        if len(fids) < len(bldg_fids):
+            self.logger.error(
+                f"no operational cost and emission results for fids {sorted(set(bldg_fids) - set(fids))}, energy carrier for dhw or heating or simulation year is None"
+            )
+        if not fids:
+            return
+        ureg = self._unit_reg
+        demand_res = [self.bldg_containers[fid].get_energy_demand_sim_res() for fid in fids]
+
+        def as_array(get_value, unit):
+            return np.array([get_value(res).to(unit).m for res in demand_res]) * unit
+
+        spec_unit = ureg.kWh / ureg.m**2 / ureg.year
+        tot_unit = ureg.kWh / ureg.year
+        op_res = OperationalEmissionsAndCostsVectorized(ureg, self._custom_config).get_operational_emissions_and_costs(
+            as_array(lambda res: res.specific_dhw_demand, spec_unit),
+            as_array(lambda res: res.tot_dhw_demand, tot_unit),
+            [summaries[fid].e_carrier_dhw for fid in fids],
+            as_array(lambda res: res.specific_heating_demand, spec_unit),
+            as_array(lambda res: res.tot_heating_demand, tot_unit),
+            [summaries[fid].e_carrier_heating for fid in fids],
+            as_array(lambda res: res.specific_electricity_demand, spec_unit),
+            as_array(lambda res: res.tot_electricity_demand, tot_unit),
+            [summaries[fid].simulation_year for fid in fids],
+        )
+        for fid, op_res_for_fid in split_per_bldg(op_res, fids).items():
+            self.bldg_containers[fid].set_op_cost_and_emission(op_res_for_fid)
+
+    def _order_by_weather_file(self, bldg_fids: Set[int]) -> List[int]:
+        """
+        Registers the weather file of each building in the weather registry and orders the buildings so that the ones
+        sharing a weather file are simulated one after the other, thus the weather file is likely in the page cache when
+        EnergyPlus reads it. Weather file used by most buildings comes first.
+        """
+        for fid in bldg_fids:
+            try:
+                self.weather_registry.register(fid, self.weather_files[fid])
+            except CesarpException:
+                self.logger.error(f"weather file {self.weather_files[fid]} for fid {fid} not found, simulation will fail")
+        fids_per_weather_file = {weather_file: sorted(bldg_fids.intersection(fids)) for weather_file, fids in self.weather_registry.get_fids_per_weather_file().items()}
+        fids_per_weather_file = {weather_file: fids for weather_file, fids in fids_per_weather_file.items() if fids}
+        self.logger.info(f"number of simulations per weather file: { {weather_file: len(fids) for weather_file, fids in fids_per_weather_file.items()} }")
+        ordered_fids = [fid for fids in fids_per_weather_file.values() for fid in fids]
+        return ordered_fids + sorted(bldg_fids - set(ordered_fids))
+
+    def _order_longest_first(self, bldg_fids: List[int], nr_of_timesteps: int) -> List[int]:
+        """
+        Orders the buildings by decreasing predicted simulation time, see cesarp.manager.SimulationCostPredictor. The predictor is calibrated
+        with the simulation times measured in earlier runs. The features are based on the surfaces counted when writing the IDF, buildings
+        whose IDF was not written by this SimulationManager, e.g. reloaded from disk, get the median prediction.
+        """
+        scheduling_cfg = self._mgr_config["SIMULATION_SCHEDULING"]
+        predictor = SimulationCostPredictor.from_samples(self._storage.load_simulation_cost_samples(), scheduling_cfg["PRIOR_WEIGHT"])
+        self._sim_cost_features = {fid: SimulationCostPredictor.get_cost_features(self.surface_counts[fid], nr_of_timesteps) for fid in bldg_fids if fid in self.surface_counts}
+        fids_with_features = list(self._sim_cost_features.keys())
+        predicted_costs = dict(zip(fids_with_features, predictor.predict(np.array([self._sim_cost_features[fid] for fid in fids_with_features])).tolist()))
+        self.logger.info(f"predicted simulation time of {len(predicted_costs)} buildings is {sum(predicted_costs.values()):.0f}s in total, queuing longest first")
+        return order_longest_first(bldg_fids, predicted_costs)
+
+    def _estimate_sim_memory_mb(self, bldg_fids: List[int], budget_mb: float) -> Dict[int, float]:
+        """
+        Estimated peak memory of EnergyPlus per building, see cesarp.manager.memory_admission.estimate_sim_memory_mb().
+        Buildings whose IDF was not written by this SimulationManager, e.g. reloaded from disk, get the median estimate.
+        """
+        admission_cfg = self._mgr_config["MEMORY_ADMISSION"]
+        estimates = {fid: memory_admission.estimate_sim_memory_mb(self.surface_counts[fid], admission_cfg) for fid in bldg_fids if fid in self.surface_counts}
+        default_estimate = float(np.median(list(estimates.values()))) if estimates else float(admission_cfg["BASE_MB"])
+        estimates = {fid: estimates.get(fid, default_estimate) for fid in bldg_fids}
+        if estimates:
+            self.logger.info(f"memory budget for simulations is {budget_mb:.0f}MB, estimated memory per simulation is up to {max(estimates.values()):.0f}MB")
+        return estimates
+
+    def _save_simulation_cost_samples(self, sim_time_per_fid: Dict[int, float]) -> None:
+        """append measured simulation times of the buildings for which cost features were collected to the samples used for calibration"""
+        samples = to_samples(self._sim_cost_features, sim_time_per_fid)
+        if not samples.empty:
+            self._storage.save_simulation_cost_samples(samples, self._mgr_config["SIMULATION_SCHEDULING"]["MAX_NR_OF_SAMPLES"])
+
+    def _get_simulated_fid_per_fid(self, bldg_fids: List[int]) -> Dict[int, int]:
+        """
+        :return: for each fid the fid of the first building having the same IDF and weather file, see cesarp.eplus_adapter.idf_canonicalization
+        """
+        worker_pool = self._get_worker_pool()
+        fid_batches = define_fid_batches(bldg_fids, worker_pool._processes)
+        jobs = [
+            self._apply_async(processing_steps.get_simulation_keys_batch_no_exception, ({fid: (self.idf_pathes[fid], self.weather_files[fid]) for fid in batch},))
+            for batch in fid_batches
+        ]
+        sim_keys = {fid: key for job in jobs for fid, key in self._get_result(job).items()}
+        simulated_fid_per_key: Dict[str, int] = {}
+        simulated_fid_per_fid = {}
+        for fid in sorted(bldg_fids):
+            key = sim_keys[fid]
+            simulated_fid_per_fid[fid] = fid if key is None else simulated_fid_per_key.setdefault(key, fid)
+        nr_of_sims = len(set(simulated_fid_per_fid.values()))
+        self.logger.info(f"{len(bldg_fids) - nr_of_sims} of {len(bldg_fids)} simulations are skipped, as they are identical to another simulation")
+        return simulated_fid_per_fid
+
+    def collect_simulations(self, job_res_dict: Dict[int, multiprocessing.pool.AsyncResult]) -> List[int]:
+        """
+        Second part of run_simulations(), waits for the simulation jobs queued with submit_simulations() and registers their output.
+
+        :param job_res_dict: dict as returned by submit_simulations()
+        :return: fid's for which EnergyPlus simulation failed
+        """
+        expected_output_folders = self._storage.get_eplus_output_pathes(list(job_res_dict.keys()))
+        # with deduplication several fids share the same job
+        res_per_job = {job: self._get_result(job) for job in set(job_res_dict.values())}
+        res_tuples_dict = {fid: res_per_job[job] for fid, job in job_res_dict.items()}
+        self._save_run_profile()
         eplus_run_timelog = {}
         fids_sim_failed = []
         fids_sim_successful = []
         for fid, (successful, sim_time) in res_tuples_dict.items():
+            simulated_fid = self._simulated_fid_per_fid.get(fid, fid)
+            if simulated_fid != fid:
+                sim_time = 0
+                if successful:
+                    link_output_folder(expected_output_folders[simulated_fid], expected_output_folders[fid])
             eplus_run_timelog[fid] = sim_time
             if successful:
                 fids_sim_successful.append(fid)
@@ -353,6 +601,13 @@ class SimulationManager:
             self.failed_fids.update(fids_sim_failed)
 
         self._storage.save_eplus_sim_time_log(eplus_run_timelog)
+        if self._mgr_config["SIMULATION_SCHEDULING"]["ACTIVE"]:
+            # only simulations actually run are representative, not the ones failed or copied from another building
+            self._save_simulation_cost_samples(
+                {fid: sim_time for fid, sim_time in eplus_run_timelog.items() if fid in fids_sim_successful and self._simulated_fid_per_fid.get(fid, fid) == fid and sim_time > 0}
+            )
+        if self._mgr_config["SIMULATION_DEDUPLICATION"]["ACTIVE"]:
+            self._storage.save_simulation_dedup_mapping({fid: self._simulated_fid_per_fid[fid] for fid in res_tuples_dict.keys()})
         self._storage.combine_eplus_error_files(fids_sim_failed, fids_sim_successful, EPLUS_ERROR_FILE_NAME)
         return fids_sim_failed
 
@@ -360,6 +615,7 @@ class SimulationManager:
         """
         Process EnergyPlus output of all the simulations run and collect all annual results.
         Make sure you add the all parameters you want to be in the summary with frequency ANNUAL in your YML config according to cesarp.eplus_adapter.default_config.yml
+        If MANAGER:LOAD_AGGREGATION is active, the hourly loads are summed up per group of buildings while reading the results, see attribute *load_aggregation*.
 
         :param bldg_fids_to_create_idf_for: gis fids of buildings which to integrate in the summary; if None results for all simulations run are collected
         :param save_summary: if True, the summary table is saved to a CSVY file in the base folder, filename according to configuration
@@ -368,6 +624,17 @@ class SimulationManager:
         if not bldg_fids_to_use:
             bldg_fids_to_use = list(self.output_folders.keys())
 
+        aggregation_cfg = self._mgr_config["LOAD_AGGREGATION"]
+        if aggregation_cfg["ACTIVE"]:
+            load_meters = aggregation_cfg["METERS"]
+            meters_not_in_output = cesarp.eplus_adapter.eplus_eso_results_handling.get_meters_not_in_hourly_output(load_meters, self._custom_config)
+            if meters_not_in_output:
+                raise CesarpException(f"LOAD_AGGREGATION needs {meters_not_in_output} in EPLUS_ADAPTER:OUTPUT_METER:HOURLY of your configuration")
+            load_groups_per_fid = self._get_load_groups(bldg_fids_to_use)
+        else:
+            load_meters = None
+            load_groups_per_fid = {}
+
         worker_pool = self._get_worker_pool()
         fid_batches = define_fid_batches(bldg_fids_to_use, worker_pool._processes)
 
@@ -375,30 +642,44 @@ class SimulationManager:
         for fid_batch in fid_batches:
             inputs_for_batch = {}
             for fid in fid_batch:
-                this_bldg_model: BuildingModel = self.bldg_containers[fid].get_bldg_model()
+                # use summary, so that building models of lazy loaded containers do not need to be loaded
+                this_bldg_summary = self.bldg_containers[fid].get_bldg_model_summary()
                 inputs_for_batch[fid] = (
                     self.output_folders[fid],
-                    this_bldg_model.bldg_construction.installation_characteristics.e_carrier_heating,
-                    this_bldg_model.bldg_construction.installation_characteristics.e_carrier_dhw,
-                    this_bldg_model.site.simulation_year,
+                    this_bldg_summary.e_carrier_heating,
+                    this_bldg_summary.e_carrier_dhw,
+                    this_bldg_summary.simulation_year,
                 )
 
-            job_res = self._get_worker_pool().apply_async(
+            job_res = self._apply_async(
                 processing_steps._collect_result_summary_batch,
-                (inputs_for_batch, self._mgr_config["DO_CALC_OP_EMISSIONS_AND_COSTS"], self._custom_config),
+                (
+                    inputs_for_batch,
+                    self._mgr_config["DO_CALC_OP_EMISSIONS_AND_COSTS"],
+                    self._custom_config,
+                    load_meters,
+                    {fid: load_groups_per_fid[fid] for fid in fid_batch if fid in load_groups_per_fid},
+                ),
                 error_callback=processing_steps.log_error,
             )
             job_res_list.append(job_res)
 
         # get back worker result
-        res_list = [res.get() for res in job_res_list]
+        res_list = [self._get_result(res) for res in job_res_list]
+        self._save_run_profile()
         all_eplus_err_levels: Dict[int, EnergyDemandSimulationResults] = {}
         all_demand_res: Dict[int, EnergyDemandSimulationResults] = {}
         all_op_emission_cost_res: Dict[int, OperationalEmissionsAndCostsResult] = {}
-        for (err_levels, demands, op_emissions_costs) in res_list:
+        load_aggregation = DistrictLoadAggregator(load_meters) if load_meters else None
+        for (err_levels, demands, op_emissions_costs, batch_load_aggregation) in res_list:
             all_eplus_err_levels.update(err_levels)
             all_demand_res.update(demands)
             all_op_emission_cost_res.update(op_emissions_costs)
+            if load_aggregation is not None and batch_load_aggregation is not None:
+                load_aggregation.merge(batch_load_aggregation)
+        if load_aggregation is not None:
+            self.load_aggregation = load_aggregation
+            self._storage.save_district_loads(load_aggregation)
 
         # make sure no old result entries are present, should be cleared before running the simulations, but to make sure
         map(lambda x: x.clear_results(), self.bldg_containers.values())
@@ -415,6 +696,41 @@ class SimulationManager:
 
         return None
 
+    def _get_load_groups(self, bldg_fids: Iterable[int]) -> Dict[int, Dict[str, str]]:
+        """
+        :return: per fid the group of each grouping in MANAGER:LOAD_AGGREGATION:GROUP_BY
+        """
+        aggregation_cfg = self._mgr_config["LOAD_AGGREGATION"]
+        groupings = aggregation_cfg["GROUP_BY"]
+        unknown_groupings = set(groupings) - {"BLDG_TYPE", "AGE_CLASS", "COMMUNITY"}
+        if unknown_groupings:
+            raise CesarpException(f"LOAD_AGGREGATION:GROUP_BY {unknown_groupings} not known, use BLDG_TYPE, AGE_CLASS or COMMUNITY")
+        if "COMMUNITY" in groupings:
+            if not self._mgr_config["SITE_PER_CH_COMMUNITY"]["ACTIVE"]:
+                raise CesarpException("LOAD_AGGREGATION:GROUP_BY COMMUNITY is only possible if SITE_PER_CH_COMMUNITY is active")
+            mapping_file_cfg = self._mgr_config["SITE_PER_CH_COMMUNITY"]["BLDG_TO_COMMUNITY_FILE"]
+            community_per_fid = cesarp.common.read_csvy(
+                mapping_file_cfg["PATH"],
+                ["bldg_fid", "community_id"],
+                mapping_file_cfg["LABELS"],
+                mapping_file_cfg["SEPARATOR"],
+                index_column_name="bldg_fid",
+            )["community_id"].to_dict()
+
+        groups_per_fid = {}
+        for fid in bldg_fids:
+            bldg_summary = self.bldg_containers[fid].get_bldg_model_summary()
+            groups = {}
+            for grouping in groupings:
+                if grouping == "BLDG_TYPE":
+                    groups[grouping] = bldg_summary.bldg_type.name
+                elif grouping == "AGE_CLASS":
+                    groups[grouping] = get_age_class(bldg_summary.year_of_construction, aggregation_cfg["AGE_CLASS_BOUNDS"])
+                else:
+                    groups[grouping] = str(community_per_fid[fid])
+            groups_per_fid[fid] = groups
+        return groups_per_fid
+
     def get_all_results_summary(self):
         all_eplus_err_levels = {fid: cont.get_eplus_error_level().name if cont.get_eplus_error_level() else "" for fid, cont in self.bldg_containers.items()}
         all_eplus_err_df = ResultProcessor.convert_eplus_error_level_to_df(all_eplus_err_levels)
@@ -438,6 +754,15 @@ class SimulationManager:
 
         return all_results
 
+    def get_run_profile(self) -> pd.DataFrame:
+        """
+        Wall and cpu time, memory and I/O per processing step and building, recorded on the workers if MANAGER:STAGE_PROFILING:ACTIVE is True.
+        The profile is saved to MANAGER:STAGE_PROFILING:PROFILE_FILE_REL after each step. Use cesarp.manager.stage_profiling.summarize() to get totals per step.
+
+        :return: one row per processing step and building, for columns see cesarp.manager.stage_profiling.StageRecord
+        """
+        return stage_profiling.records_to_df(self.run_profile)
+
     def collect_custom_results(self, result_keys: Sequence, results_frequency: ResultsFrequency) -> pd.DataFrame:
         """
         Process EnergyPlus output of all the simulated buildings. You can specify which parameters should be collected and the frequency (e.g. ANNUAL, HOURLY).
@@ -515,18 +840,33 @@ class SimulationManager:
             },
         )
 
+    def _apply_async(self, func: Callable, args: Sequence[Any], callback: Optional[Callable[[Any], None]] = None, error_callback=None) -> multiprocessing.pool.AsyncResult:
+        """
+        Queue a processing step on the worker pool, profiled if STAGE_PROFILING is active. Get the result with _get_result().
+        """
+        profiling_cfg = self._mgr_config["STAGE_PROFILING"]
+        if not profiling_cfg["ACTIVE"]:
+            return self._get_worker_pool().apply_async(func, args, callback=callback, error_callback=error_callback)
+        profiled_callback = (lambda res: callback(res[0])) if callback else None
+        return self._get_worker_pool().apply_async(
+            stage_profiling.call_profiled, (func, args, profiling_cfg["TRACEMALLOC"]), callback=profiled_callback, error_callback=error_callback
+        )
+
+    def _get_result(self, job_res: multiprocessing.pool.AsyncResult) -> Any:
+        """wait for a job queued with _apply_async() and return the result of the processing step"""
+        if not self._mgr_config["STAGE_PROFILING"]["ACTIVE"]:
+            return job_res.get()
+        (res, records) = job_res.get()
+        self.run_profile.extend(records)
+        return res
+
+    def _save_run_profile(self) -> None:
+        if self._mgr_config["STAGE_PROFILING"]["ACTIVE"]:
+            self._storage.save_run_profile(self.get_run_profile())
+
     def _get_worker_pool(self):
         if self._worker_pool is None:
-            if self.delete_old_logs:
-                delete_old_logs()
-            mplogger = multiprocessing.log_to_stderr()
-            mplogger.setLevel(logging.WARNING)  # set to INFO if you want to see details about process management
-            processors = self._mgr_config["NR_OF_PARALLEL_WORKERS"]
-            if processors == -1:
-                processors = max(1, round(multiprocessing.cpu_count() / 2))
-            self.logger.info(f"creating worker pool with {processors} processors")
-            self._worker_pool = multiprocessing.Pool(processors, initializer=init_worker)
-            atexit.register(self._worker_pool.close)
+            self._worker_pool = create_worker_pool(self._mgr_config["NR_OF_PARALLEL_WORKERS"], self.delete_old_logs, self._mgr_config["WORKER_LOGGING"])
 
         return self._worker_pool
 
@@ -547,12 +887,15 @@ class SimulationManager:
         return sia_params_gen_lock
 
     @classmethod
-    def new_manager_from_template(cls, base_scenario_manager, new_manager_basepath):
+    def new_manager_from_template(cls, base_scenario_manager, new_manager_basepath, share_unchanged_model_parts: bool = True):
         """
         Create new Simulation manager, copy configuration and building models from existing SimulationManager
 
         :param base_scenario_manager: SimulationManager to be used as a template for the newly created instance
         :param new_manager_basepath: basepath folder for the new SimulationManager
+        :param share_unchanged_model_parts: if True, geometry, neighbours, constructions and schedules are shared with the
+                                            building models of the template, see BuildingModel.structural_copy().
+                                            if False, building models are deep copied.
         :return: new instance of SimulationManager class
         """
         new_manager = cls(
@@ -560,10 +903,12 @@ class SimulationManager:
             base_scenario_manager._custom_config,
             base_scenario_manager._unit_reg,
             base_scenario_manager._fids_to_use,
+            worker_pool=base_scenario_manager._worker_pool,
         )
         new_manager.bldg_containers = {fid: BuildingContainer() for fid in base_scenario_manager.bldg_containers.keys()}
         for fid, container in new_manager.bldg_containers.items():
-            container.set_bldg_model(copy.deepcopy(base_scenario_manager.bldg_containers[fid].get_bldg_model()))
+            base_model = base_scenario_manager.bldg_containers[fid].get_bldg_model()
+            container.set_bldg_model(base_model.structural_copy() if share_unchanged_model_parts else copy.deepcopy(base_model))
             try:
                 container.set_retrofit_log(copy.deepcopy(base_scenario_manager.bldg_containers[fid].get_retrofit_log()))
             except KeyError:
@@ -572,8 +917,64 @@ class SimulationManager:
         return new_manager
 
 
-def init_worker():
-    init_log_to_file()
+def link_output_folder(simulated_output_folder: Union[str, Path], output_folder: Union[str, Path]) -> None:
+    """
+    Fills the output folder of a building whose simulation was deduplicated with hard links to the EnergyPlus output files of the
+    building actually simulated, thus the output is not copied but each building still has its own output folder.
+    Files are copied if hard links are not supported, e.g. when the folders are on different file systems.
+    """
+    shutil.copytree(simulated_output_folder, output_folder, copy_function=_link_or_copy, dirs_exist_ok=True)
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    # remove existing file first, it might be a link to src and copying would then overwrite src itself
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def create_worker_pool(nr_of_workers: int, do_delete_old_logs: bool = True, logging_cfg: Optional[Dict[str, Any]] = None) -> multiprocessing.pool.Pool:
+    """
+    :param nr_of_workers: number of worker processes, -1 means half of the available processors
+    :param do_delete_old_logs: if true old \\*-cesarp-logs folder are deleted
+    :param logging_cfg: optional, configuration MANAGER:WORKER_LOGGING. If CENTRAL_LOG is active the workers log to one central log file
+                        written by the main process (see cesarp.manager.worker_logging), otherwise each worker writes its own log file.
+    :return: new pool of worker processes, it is closed at exit of the main process
+    """
+    if do_delete_old_logs:
+        delete_old_logs()
+    if logging_cfg is not None and logging_cfg["CENTRAL_LOG"]:
+        (log_queue, log_listener) = worker_logging.start_central_log(f"{get_timestamp()}-cesarp-logs", logging_cfg)
+    else:
+        (log_queue, log_listener) = (None, None)
+    mplogger = multiprocessing.log_to_stderr()
+    mplogger.setLevel(logging.WARNING)  # set to INFO if you want to see details about process management
+    if nr_of_workers == -1:
+        nr_of_workers = max(1, round(multiprocessing.cpu_count() / 2))
+    logging.getLogger(__name__).info(f"creating worker pool with {nr_of_workers} processors")
+    worker_pool = multiprocessing.Pool(nr_of_workers, initializer=init_worker, initargs=(log_queue,))
+    if log_listener is None:
+        atexit.register(worker_pool.close)
+    else:
+        atexit.register(_close_pool_and_stop_central_log, worker_pool, log_listener)
+    return worker_pool
+
+
+def _close_pool_and_stop_central_log(worker_pool: multiprocessing.pool.Pool, log_listener: logging.handlers.QueueListener) -> None:
+    worker_pool.close()
+    # the workers send their last log records when exiting, thus the listener is stopped after all workers are joined
+    worker_pool.join()
+    log_listener.stop()
+
+
+def init_worker(log_queue=None):
+    if log_queue is None:
+        init_log_to_file()
+    else:
+        worker_logging.init_worker_logging(log_queue)
     cesarp.common.init_unit_registry()
 
 
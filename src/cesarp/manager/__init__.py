@@ -62,6 +62,20 @@ class                                                                        des
 
 :py:mod:`cesarp.manager.json_pickling`                                       Saving a BuildingContainer or BuildingModel to disk (actually any object, but tested and used for those two)
 
+:py:mod:`cesarp.manager.binary_pickling`                                     Saving many BuildingContainer objects to compact binary archives, faster to reload than the json files
+
+:py:class:`cesarp.manager.LazyBuildingContainer`                             BuildingContainer loaded from a binary archive, the BuildingModel is only read from disk when accessed
+
+:py:mod:`cesarp.manager.stage_profiling`                                     Records wall and cpu time, memory and I/O per building for each processing step, see MANAGER:STAGE_PROFILING
+
+:py:mod:`cesarp.manager.SimulationCostPredictor`                             Predicts the EnergyPlus runtime per building to queue simulations longest first, see MANAGER:SIMULATION_SCHEDULING
+
+:py:mod:`cesarp.manager.memory_admission`                                    Starts EnergyPlus only while the estimated memory of the running simulations fits a budget, see MANAGER:MEMORY_ADMISSION
+
+:py:mod:`cesarp.manager.worker_logging`                                      Central JSON lines log for all worker processes, written by the main process, see MANAGER:WORKER_LOGGING
+
+:py:mod:`cesarp.manager.project_archive`                                     Writes ZIP files with the compression done by worker processes, used by the ProjectSaver, see MANAGER:PROJECT_ARCHIVE
+
 ============================================================================ ===========================================================
 
 
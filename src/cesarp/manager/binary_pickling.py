@@ -0,0 +1,187 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Binary archive format for BuildingContainer objects, alternative to the one-json-file-per-building storage of
+:py:mod:`cesarp.manager.json_pickling`.
+
+Several containers are stored in one archive file. Each container is pickled on its own (pickle protocol 5), so
+single containers can be read back without reading the whole archive. Pint quantities are pickled against the
+application unit registry, thus make sure :py:func:`cesarp.common.init_unit_registry` was called before reading.
+
+Layout of an archive file:
+
+- 8 bytes magic ``CESARPBA`` followed by the archive format version (unsigned 16bit, little endian)
+- pickled BuildingContainer objects, one after the other
+- pickled archive index, dict with the archive version, the container version, per fid (offset, length) of the pickled container
+  and per fid a summary (all container entries except the building model and a :py:class:`cesarp.manager.BuildingContainer.BldgModelSummary`)
+- offset of the archive index (unsigned 64bit, little endian)
+
+Attention: as with any pickled data, only read archives from sources you trust.
+"""
+from typing import Dict, Tuple, Optional, Iterable, Union, Any
+from pathlib import Path
+import pickle
+import struct
+
+from cesarp.manager.BuildingContainer import BuildingContainer, BldgModelSummary
+from cesarp.common.CesarpException import CesarpException
+
+_ARCHIVE_MAGIC = b"CESARPBA"
+_HEADER_STRUCT = struct.Struct("<8sH")
+_TRAILER_STRUCT = struct.Struct("<Q")
+_PICKLE_PROTOCOL = 5
+
+# 1 - initial version of the archive format
+# 2 - added per building summary to the archive index, needed for lazy loading of the containers
+_ARCHIVE_VERSION = 2
+
+_INDEX_KEY_ARCHIVE_VERSION = "archive_version"
+_INDEX_KEY_CONTAINER_VERSION = "container_version"
+_INDEX_KEY_ENTRIES = "entries"
+_INDEX_KEY_SUMMARIES = "summaries"
+
+
+def save_bldg_containers_to_archive(bldg_containers: Dict[int, BuildingContainer], filepath: Union[str, Path]) -> Dict[int, Tuple[int, int]]:
+    """
+    :param bldg_containers: dict with fid as key and the building container to save
+    :param filepath: full path of archive file to write, existing file is overwritten
+    :return: dict with fid as key and (offset, length) of the pickled building container within the archive file as value
+    """
+    entries: Dict[int, Tuple[int, int]] = {}
+    summaries: Dict[int, Tuple[Dict[str, Any], Optional[BldgModelSummary]]] = {}
+    with open(filepath, "wb") as fh:
+        fh.write(_HEADER_STRUCT.pack(_ARCHIVE_MAGIC, _ARCHIVE_VERSION))
+        for fid, container in bldg_containers.items():
+            assert isinstance(container, BuildingContainer), f"object to save for fid {fid} is not a BuildingContainer"
+            pickled_container = pickle.dumps(container, protocol=_PICKLE_PROTOCOL)
+            entries[fid] = (fh.tell(), len(pickled_container))
+            summaries[fid] = _summarize(container)
+            fh.write(pickled_container)
+        index_offset = fh.tell()
+        index = {
+            _INDEX_KEY_ARCHIVE_VERSION: _ARCHIVE_VERSION,
+            _INDEX_KEY_CONTAINER_VERSION: BuildingContainer._CONTAINER_VERSION,
+            _INDEX_KEY_ENTRIES: entries,
+            _INDEX_KEY_SUMMARIES: summaries,
+        }
+        fh.write(pickle.dumps(index, protocol=_PICKLE_PROTOCOL))
+        fh.write(_TRAILER_STRUCT.pack(index_offset))
+    return entries
+
+
+def read_archive_index(filepath: Union[str, Path]) -> Dict[int, Tuple[int, int]]:
+    """
+    :param filepath: full path of archive file
+    :return: dict with fid as key and (offset, length) of the pickled building container within the archive file as value
+    """
+    with open(filepath, "rb") as fh:
+        return _read_index(fh, filepath)[_INDEX_KEY_ENTRIES]
+
+
+def read_archive_summaries(filepath: Union[str, Path]) -> Dict[int, Tuple[int, int, Dict[str, Any], Optional[BldgModelSummary]]]:
+    """
+    Read the index of an archive including the per building summaries, without reading the building containers.
+    For archives written with version 1 the summaries are created by reading each of the containers once.
+
+    :param filepath: full path of archive file
+    :return: dict with fid as key and as value (offset, length, container entries except building model, building model summary or None if the container has no model)
+    """
+    with open(filepath, "rb") as fh:
+        index = _read_index(fh, filepath)
+    return {fid: (offset, length, *index[_INDEX_KEY_SUMMARIES][fid]) for fid, (offset, length) in index[_INDEX_KEY_ENTRIES].items()}
+
+
+def read_bldg_container_at(filepath: Union[str, Path], offset: int, length: int) -> BuildingContainer:
+    """
+    Read one single building container from an archive. Use :py:func:`read_archive_index` to get offset and length.
+    """
+    with open(filepath, "rb") as fh:
+        _check_header(fh, filepath)
+        fh.seek(offset)
+        return _unpickle_container(fh.read(length), filepath)
+
+
+def read_bldg_containers_from_archive(filepath: Union[str, Path], fids: Optional[Iterable[int]] = None) -> Dict[int, BuildingContainer]:
+    """
+    :param filepath: full path of archive file
+    :param fids: fids of the containers to read, if None all containers in the archive are read
+    :return: dict with fid as key and the upgraded building container as value
+    """
+    with open(filepath, "rb") as fh:
+        entries: Dict[int, Tuple[int, int]] = _read_index(fh, filepath)[_INDEX_KEY_ENTRIES]
+        if fids is None:
+            fids = entries.keys()
+        bldg_containers: Dict[int, BuildingContainer] = {}
+        for fid in fids:
+            offset, length = entries[fid]
+            fh.seek(offset)
+            bldg_containers[fid] = _unpickle_container(fh.read(length), filepath)
+    return bldg_containers
+
+
+def _check_header(fh, filepath) -> int:
+    (magic, archive_version) = _HEADER_STRUCT.unpack(fh.read(_HEADER_STRUCT.size))
+    if magic != _ARCHIVE_MAGIC:
+        raise CesarpException(f"{filepath} is not a building container archive")
+    if archive_version > _ARCHIVE_VERSION:
+        raise CesarpException(f"{filepath} has archive version {archive_version}, this cesar-p version supports archives up to version {_ARCHIVE_VERSION}")
+    return archive_version
+
+
+def _read_index(fh, filepath) -> Dict[str, Any]:
+    archive_version = _check_header(fh, filepath)
+    fh.seek(-_TRAILER_STRUCT.size, 2)
+    index_end = fh.tell()
+    (index_offset,) = _TRAILER_STRUCT.unpack(fh.read(_TRAILER_STRUCT.size))
+    fh.seek(index_offset)
+    index = pickle.loads(fh.read(index_end - index_offset))
+    while archive_version < _ARCHIVE_VERSION:
+        index = _INDEX_UPGRADES[archive_version](index, fh, filepath)
+        archive_version = index[_INDEX_KEY_ARCHIVE_VERSION]
+    return index
+
+
+def _upgrade_index_from_v1(index: Dict[str, Any], fh, filepath) -> Dict[str, Any]:
+    summaries = {}
+    for fid, (offset, length) in index[_INDEX_KEY_ENTRIES].items():
+        fh.seek(offset)
+        summaries[fid] = _summarize(_unpickle_container(fh.read(length), filepath))
+    index[_INDEX_KEY_SUMMARIES] = summaries
+    index[_INDEX_KEY_ARCHIVE_VERSION] = 2
+    return index
+
+
+# per archive version the method upgrading the index read from disk to the next version
+_INDEX_UPGRADES = {1: _upgrade_index_from_v1}
+
+
+def _summarize(container: BuildingContainer) -> Tuple[Dict[str, Any], Optional[BldgModelSummary]]:
+    model_summary = container.get_bldg_model_summary() if container.has_bldg_model() else None
+    return (container.get_entries_without_bldg_model(), model_summary)
+
+
+def _unpickle_container(pickled_container: bytes, filepath) -> BuildingContainer:
+    bldg_cont = pickle.loads(pickled_container)
+    if not isinstance(bldg_cont, BuildingContainer):
+        raise CesarpException(f"entry in {filepath} is not a BuildingContainer")
+    bldg_cont.upgrade_if_necessary()
+    return bldg_cont
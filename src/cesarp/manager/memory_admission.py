@@ -0,0 +1,205 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Admission control for the EnergyPlus simulations run on the worker pool, see MANAGER:MEMORY_ADMISSION.
+
+The memory needed by each simulation is estimated from the number of surfaces written to the IDF. Before starting EnergyPlus, a worker reserves the
+estimated memory from a :py:class:`MemoryBudget` shared by all workers, waiting until enough of the budget is free. Thus the
+number of simulations running in parallel adapts to the size of the buildings and the worker pool can be sized to the number of
+processors without risking to run out of memory when a few large buildings are simulated at the same time.
+
+Reservations are granted in the order they are requested. A simulation estimated to need more than the whole budget runs alone.
+Reservations of worker processes which are gone, e.g. killed or because the pool was terminated, are reclaimed.
+"""
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, List, Optional, Tuple
+
+from cesarp.common.CesarpException import CesarpException
+from cesarp.manager.SimulationCostPredictor import SurfaceCounts
+
+# share of the physical memory used as budget if MEMORY_BUDGET_MB is -1
+_SHARE_OF_PHYSICAL_MEMORY = 0.8
+# seconds between checks whether the owners of the reservations are still alive while waiting for memory
+_OWNER_CHECK_INTERVAL_S = 1.0
+# windows process access right and wait result used to check whether a process is alive
+_SYNCHRONIZE = 0x00100000
+_WAIT_TIMEOUT = 0x00000102
+
+
+class MemoryBudget:
+    """
+    Memory available for simulations, shared between the worker processes through a manager process (see get_shared_memory_budget()).
+
+    Each reservation is recorded with the process id of its owner. Waiting reservations check regularly whether the owners of the
+    reservations queued or granted before them are still alive, thus the memory and the place in the queue of a worker killed or of
+    a terminated pool are reclaimed and do not block the following simulations.
+    """
+
+    def __init__(self, budget_mb: float):
+        assert budget_mb > 0, "memory budget must be positive"
+        self._budget_mb = budget_mb
+        self._next_ticket = 0
+        # tickets in the order requested, not yet granted: {ticket: owner_pid}
+        self._waiting: Dict[int, Optional[int]] = {}
+        # granted reservations: {ticket: (owner_pid, amount_mb)}
+        self._reserved: Dict[int, Tuple[Optional[int], float]] = {}
+        self._condition = threading.Condition()
+
+    def reserve(self, estimate_mb: float, exclusive: bool = False, owner_pid: Optional[int] = None) -> int:
+        """
+        Blocks until the memory can be reserved. Reservations are granted first come first served.
+
+        :param estimate_mb: estimated memory needed, capped to the budget
+        :param exclusive: if True the whole budget is reserved, e.g. to retry a simulation killed because the system run out of memory
+        :param owner_pid: process id of the process using the memory, if given the reservation is reclaimed when that process is gone
+        :return: ticket of the reservation, pass it to release() when done
+        """
+        amount_mb = self._budget_mb if exclusive else min(estimate_mb, self._budget_mb)
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._waiting[ticket] = owner_pid
+            while True:
+                self._reclaim_abandoned()
+                if ticket not in self._waiting:
+                    raise CesarpException(f"memory reservation abandoned, owner process {owner_pid} is gone")
+                if next(iter(self._waiting)) == ticket and self.get_reserved_mb() + amount_mb <= self._budget_mb:
+                    break
+                self._condition.wait(timeout=_OWNER_CHECK_INTERVAL_S)
+            del self._waiting[ticket]
+            self._reserved[ticket] = (owner_pid, amount_mb)
+            self._condition.notify_all()
+        return ticket
+
+    def release(self, ticket: int) -> None:
+        with self._condition:
+            self._reserved.pop(ticket, None)
+            self._condition.notify_all()
+
+    def get_budget_mb(self) -> float:
+        return self._budget_mb
+
+    def get_reserved_mb(self) -> float:
+        return sum(amount_mb for (_, amount_mb) in self._reserved.values())
+
+    def _reclaim_abandoned(self) -> None:
+        abandoned_waiting = [ticket for ticket, owner_pid in self._waiting.items() if owner_pid is not None and not _is_process_alive(owner_pid)]
+        abandoned_reserved = [ticket for ticket, (owner_pid, _) in self._reserved.items() if owner_pid is not None and not _is_process_alive(owner_pid)]
+        for ticket in abandoned_waiting:
+            del self._waiting[ticket]
+        for ticket in abandoned_reserved:
+            del self._reserved[ticket]
+        if abandoned_waiting or abandoned_reserved:
+            self._condition.notify_all()
+
+
+def _is_process_alive(pid: int) -> bool:
+    if sys.platform == "win32":
+        # os.kill() would terminate the process on windows
+        import ctypes
+
+        handle = ctypes.windll.kernel32.OpenProcess(_SYNCHRONIZE, False, pid)
+        if not handle:
+            return False
+        try:
+            return ctypes.windll.kernel32.WaitForSingleObject(handle, 0) == _WAIT_TIMEOUT
+        finally:
+            ctypes.windll.kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MemoryBudgetManager(BaseManager):
+    pass
+
+
+MemoryBudgetManager.register("MemoryBudget", MemoryBudget)
+
+# manager processes and budgets per budget size, shared by all SimulationManagers of the main process as they might share the worker pool
+_shared_budgets: Dict[float, Any] = {}
+_budget_managers: List[MemoryBudgetManager] = []
+
+
+def get_shared_memory_budget(budget_mb: float):
+    """
+    :param budget_mb: memory available for simulations in MB
+    :return: proxy to a MemoryBudget which can be passed to the worker processes, the same for all calls with the same budget
+    """
+    if budget_mb not in _shared_budgets:
+        manager = MemoryBudgetManager()
+        manager.start()
+        _budget_managers.append(manager)
+        _shared_budgets[budget_mb] = manager.MemoryBudget(budget_mb)  # type: ignore
+    return _shared_budgets[budget_mb]
+
+
+@contextmanager
+def admitted(memory_budget: Optional[MemoryBudget], estimate_mb: float, exclusive: bool = False):
+    """
+    Reserve memory from the budget for the duration of the with block. Does nothing if memory_budget is None.
+    """
+    if memory_budget is None:
+        yield
+        return
+    ticket = memory_budget.reserve(estimate_mb, exclusive, os.getpid())
+    try:
+        yield
+    finally:
+        memory_budget.release(ticket)
+
+
+def get_memory_budget_mb(admission_cfg: Dict[str, Any]) -> float:
+    """
+    :param admission_cfg: configuration MANAGER:MEMORY_ADMISSION
+    :return: MEMORY_BUDGET_MB, if it is -1 a share of the physical memory of the machine
+    """
+    budget_mb = admission_cfg["MEMORY_BUDGET_MB"]
+    if budget_mb != -1:
+        return float(budget_mb)
+    try:
+        physical_memory_mb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**2
+    except (AttributeError, ValueError, OSError):
+        raise CesarpException("physical memory of this machine cannot be determined, please set MANAGER:MEMORY_ADMISSION:MEMORY_BUDGET_MB")
+    return _SHARE_OF_PHYSICAL_MEMORY * physical_memory_mb
+
+
+def estimate_sim_memory_mb(surface_counts: SurfaceCounts, admission_cfg: Dict[str, Any]) -> float:
+    """
+    Estimate of the peak memory of EnergyPlus when simulating the building. Besides a base amount, EnergyPlus needs memory per
+    surface and for the shadow calculation per pair of surfaces, including windows and the walls and roofs of the neighbours.
+
+    :param surface_counts: zones and surfaces of the building to simulate as written to the IDF, see cesarp.manager.SimulationCostPredictor.count_surfaces()
+    :param admission_cfg: configuration MANAGER:MEMORY_ADMISSION
+    :return: estimated memory in MB
+    """
+    (_, nr_of_surfaces, nr_of_windows, nr_of_shading_surfaces) = surface_counts
+    nr_of_all_surfaces = nr_of_surfaces + nr_of_windows + nr_of_shading_surfaces
+    return admission_cfg["BASE_MB"] + admission_cfg["PER_SURFACE_MB"] * nr_of_all_surfaces + admission_cfg["PER_SURFACE_PAIR_MB"] * nr_of_all_surfaces**2
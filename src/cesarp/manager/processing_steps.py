@@ -31,6 +31,7 @@ study the type of the arguments and return values carefully.
 
 import os
 import logging
+import shutil
 import pandas as pd
 import pint
 import time
@@ -42,10 +43,16 @@ from cesarp.model.BuildingModel import BuildingModel
 from cesarp.manager.BldgModelFactory import BldgModelFactory
 from cesarp.eplus_adapter.CesarIDFWriter import CesarIDFWriter
 import cesarp.eplus_adapter.eplus_sim_runner
+import cesarp.eplus_adapter.idf_canonicalization
 from cesarp.eplus_adapter.eplus_error_file_handling import EplusErrorLevel
 from cesarp.emissons_cost.OperationalEmissionsAndCosts import OperationalEmissionsAndCostsResult
 from cesarp.results.EnergyDemandSimulationResults import EnergyDemandSimulationResults
 from cesarp.results.ResultProcessor import ResultProcessor
+from cesarp.results.DistrictLoadAggregator import DistrictLoadAggregator
+from cesarp.manager.stage_profiling import profile_stage
+from cesarp.manager.worker_logging import log_context
+from cesarp.manager import memory_admission
+from cesarp.manager.SimulationCostPredictor import count_surfaces
 
 
 def all_preparation_steps_batch_no_exception(
@@ -63,7 +70,7 @@ def all_preparation_steps_batch_no_exception(
     weather_files = {}
     idf_pathes_written = {}
     idf_write_failed = []
-    for fid, (successful, idf_path, weather_file) in write_idf_res.items():
+    for fid, (successful, idf_path, weather_file, _) in write_idf_res.items():
         if successful:
             weather_files[fid] = weather_file
             idf_pathes_written[fid] = idf_path
@@ -90,7 +97,8 @@ def create_bldg_models_batch_no_exception(bldg_fids_to_create_model_for, config,
                                        infos per building used during model creation,
                                        fids for which building model could not be created)
     """
-    bldg_models_factory = BldgModelFactory(pint.get_application_registry(), config, sia_params_gen_lock)
+    with profile_stage("init_bldg_model_factory"):
+        bldg_models_factory = BldgModelFactory(pint.get_application_registry(), config, sia_params_gen_lock)
 
     bldg_models = {bldg_fid: _create_bldg_model_no_exception(bldg_fid, bldg_models_factory) for bldg_fid in bldg_fids_to_create_model_for}  # type: ignore
     failed_fids = [fid for fid, model in bldg_models.items() if not model]
@@ -100,13 +108,15 @@ def create_bldg_models_batch_no_exception(bldg_fids_to_create_model_for, config,
 
 
 def _create_bldg_model_no_exception(bldg_fid, bldg_models_factory: BldgModelFactory):
-    try:
-        return bldg_models_factory.create_bldg_model(bldg_fid)
-    except Exception as ex:
-        logger = logging.getLogger(__name__)
-        logger.error(f"Could not create builing model for {bldg_fid}. Skip this building and continue....")
-        logger.exception(ex)
-    return None
+    with log_context(bldg_fid):
+        try:
+            with profile_stage("create_bldg_model", bldg_fid):
+                return bldg_models_factory.create_bldg_model(bldg_fid)
+        except Exception as ex:
+            logger = logging.getLogger(__name__)
+            logger.error(f"Could not create builing model for {bldg_fid}. Skip this building and continue....")
+            logger.exception(ex)
+        return None
 
 
 def bldg_model_to_idf_no_exception(bldg_model, idf_file_path, profiles_files_handler, custom_config):
@@ -116,58 +126,109 @@ def bldg_model_to_idf_no_exception(bldg_model, idf_file_path, profiles_files_han
 
     :param args: list with [bldg_model: BuildingModel, idf_file_path, profiles_file_handler, custom_config], for last three see arguments of cesarp.eplus_adapter.CesarIDFWriter()
     :param idf_file_path: full filepath to idf file to be created
-    :return: tuple(fid, True, weather_file) when idf writing was successful, tuple(fid, False, None) otherwise
+    :return: tuple(True, idf_file_path, weather_file, surface_counts) when idf writing was successful, tuple(False, None, None, None) otherwise.
+             surface_counts are the zones and surfaces written to the idf, see cesarp.manager.SimulationCostPredictor.count_surfaces()
     """
     unit_reg = pint.get_application_registry()
 
     logger = logging.getLogger(__name__)
-
-    try:
-        logger.info(f"create idf and get weather file for building fid {bldg_model.fid}, {idf_file_path}")
-        my_idf_writer = CesarIDFWriter(idf_file_path, unit_reg, profiles_files_handler, custom_config=custom_config)
-        my_idf_writer.write_bldg_model(bldg_model)
-        return (True, idf_file_path, bldg_model.site.weather_file_path)
-    except Exception as ex:
-        fid = bldg_model.fid if bldg_model else None
-        if os.path.isfile(idf_file_path):
-            os.remove(idf_file_path)
-        logger.error(f"Could not write IDF for {fid}")
-        logger.exception(ex)
-        return (False, None, None)
-
-
-def run_simulation_no_exception(idf_path, weather_file, output_folder, config_eplus):
-    start = time.time()
+    fid = bldg_model.fid if bldg_model else None
+
+    with log_context(fid):
+        try:
+            logger.info(f"create idf and get weather file for building fid {fid}, {idf_file_path}")
+            with profile_stage("write_idf", fid):
+                my_idf_writer = CesarIDFWriter(idf_file_path, unit_reg, profiles_files_handler, custom_config=custom_config)
+                my_idf_writer.write_bldg_model(bldg_model)
+            return (True, idf_file_path, bldg_model.site.weather_file_path, count_surfaces(bldg_model, my_idf_writer.floor_groups))
+        except Exception as ex:
+            if os.path.isfile(idf_file_path):
+                os.remove(idf_file_path)
+            logger.error(f"Could not write IDF for {fid}")
+            logger.exception(ex)
+            return (False, None, None, None)
+
+
+def run_simulation_no_exception(idf_path, weather_file, output_folder, config_eplus, fid=None, memory_budget=None, memory_estimate_mb=0.0):
+    """
+    :param memory_budget: optional, proxy to a cesarp.manager.memory_admission.MemoryBudget. If passed, EnergyPlus is only started when
+                          memory_estimate_mb can be reserved and a simulation killed by the system, e.g. when out of memory, is retried
+                          reserving the whole budget.
+    :param memory_estimate_mb: estimated memory needed by EnergyPlus for the simulation
+    :return: (True if simulation was successful, simulation time in seconds not including the time waiting for memory)
+    """
+    logger = logging.getLogger(__name__)
+    exclusive = False
+    with log_context(fid):
+        while True:
+            with memory_admission.admitted(memory_budget, memory_estimate_mb, exclusive):
+                start = time.time()
+                try:
+                    logger.info(f"run e+ with idf {idf_path}")
+                    with profile_stage("run_simulation", fid):
+                        cesarp.eplus_adapter.eplus_sim_runner.run_single(idf_path, weather_file, output_folder, ep_config=config_eplus)
+                    return (True, time.time() - start)
+                except cesarp.eplus_adapter.eplus_sim_runner.EnergyPlusKilledError as ex:
+                    if memory_budget is None or exclusive:
+                        logger.error(f"EnergyPlus was killed during simulation run for {idf_path}")
+                        logger.exception(ex)
+                        return (False, time.time() - start)
+                    logger.warning(f"EnergyPlus was killed during simulation run for {idf_path}, retrying with the whole memory budget reserved")
+                    shutil.rmtree(output_folder, ignore_errors=True)
+                    exclusive = True
+                except Exception as ex:
+                    logger.error(f"Exception during simulation run for {idf_path}")
+                    logger.exception(ex)
+                    return (False, time.time() - start)
+
+
+def get_simulation_keys_batch_no_exception(idf_and_weather_pathes: Dict[int, Tuple[str, str]]) -> Dict[int, Optional[str]]:
+    """
+    :param idf_and_weather_pathes: {fid: (idf_path, weather_file_path)}
+    :return: {fid: simulation key}, key is None if it could not be determined
+    """
     logger = logging.getLogger(__name__)
-    try:
-        logger.info(f"run e+ with idf {idf_path}")
-        cesarp.eplus_adapter.eplus_sim_runner.run_single(idf_path, weather_file, output_folder, ep_config=config_eplus)
-        return (True, time.time() - start)
-    except Exception as ex:
-        logger.error(f"Exception during simulation run for {idf_path}")
-        logger.exception(ex)
-    return (False, time.time() - start)
+    sim_keys: Dict[int, Optional[str]] = {}
+    for fid, (idf_path, weather_file) in idf_and_weather_pathes.items():
+        with log_context(fid):
+            try:
+                with profile_stage("get_simulation_key", fid):
+                    sim_keys[fid] = cesarp.eplus_adapter.idf_canonicalization.get_simulation_key(idf_path, weather_file)
+            except Exception as ex:
+                logger.warning(f"could not determine simulation key for {idf_path}, it is simulated on its own")
+                logger.exception(ex)
+                sim_keys[fid] = None
+    return sim_keys
 
 
 def _collect_result_summary_batch(
-    input_tuples_per_fid, do_calc_op_emissions_and_costs, custom_config
-) -> Tuple[Dict[int, EplusErrorLevel], Dict[int, Optional[EnergyDemandSimulationResults]], Dict[int, Optional[OperationalEmissionsAndCostsResult]]]:
+    input_tuples_per_fid, do_calc_op_emissions_and_costs, custom_config, load_meters=None, load_groups_per_fid=None
+) -> Tuple[
+    Dict[int, EplusErrorLevel], Dict[int, Optional[EnergyDemandSimulationResults]], Dict[int, Optional[OperationalEmissionsAndCostsResult]], Optional[DistrictLoadAggregator]
+]:
     """
     :param input_tuples_per_fid: {fid: (eplus_output_folder, heating_energy_carrier, dhw_energy_carrier, simulation_year)}}
     :param custom_config: custom configuration entries
-    :return: (simulation res table, emission res table, fuel cost res table)
+    :param load_meters: hourly meters to aggregate over the buildings of the batch, None if no aggregation is wanted
+    :param load_groups_per_fid: {fid: {grouping: group}} groups used for the aggregation of the hourly loads
+    :return: (simulation res table, emission res table, fuel cost res table, aggregated hourly loads of the batch or None)
     """
     unit_reg = pint.get_application_registry()
-    res_processor = ResultProcessor(unit_reg, do_calc_op_emissions_and_costs, custom_config)
+    load_aggregator = DistrictLoadAggregator(load_meters) if load_meters else None
+    with profile_stage("init_result_processor"):
+        res_processor = ResultProcessor(unit_reg, do_calc_op_emissions_and_costs, custom_config, load_aggregator)
     for (
         fid,
         (eplus_output_folder, heating_energy_carrier, dhw_energy_carrier, sim_year),
     ) in input_tuples_per_fid.items():
-        res_processor.process_results_for(fid, eplus_output_folder, heating_energy_carrier, dhw_energy_carrier, sim_year)
+        with profile_stage("collect_results", fid):
+            load_groups = load_groups_per_fid.get(fid) if load_groups_per_fid else None
+            res_processor.process_results_for(fid, eplus_output_folder, heating_energy_carrier, dhw_energy_carrier, sim_year, load_groups)
     return (
         res_processor.eplus_err_level_per_bldg,
         res_processor.simulation_result_per_bldg,
         res_processor.emission_and_cost_per_bldg,
+        load_aggregator,
     )
 
 
@@ -0,0 +1,371 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Writing ZIP archives with the compression done in parallel by worker processes.
+
+The files are read in chunks by the main process, each chunk is compressed independently by a worker into a raw deflate stream,
+the compressed chunks are then appended in order to the archive. Chunks compressed independently and ended with a sync flush can be
+concatenated to one valid deflate stream (this is what pigz does), thus the archive can be read with any zip tool.
+Only a limited number of chunks is pending at the same time, so the memory used does not depend on the size of the files.
+As zipfile.ZipFile can only add data it compresses itself, the headers and the central directory of the archive are written by this
+module, following the ZIP file format specification (APPNOTE.TXT of PKWARE), including the ZIP64 extensions for big archives.
+
+For incremental archives, pass the manifest of the previous archive. Files with the same content hash as listed in the manifest are not
+added again, the manifest of the new archive lists all files along with the name of the archive holding the file.
+"""
+from typing import Any, BinaryIO, Deque, Dict, List, Optional, Tuple, Union
+from collections import deque
+from pathlib import Path
+import hashlib
+import json
+import logging
+import multiprocessing
+import multiprocessing.pool
+import os
+import struct
+import zlib
+from zipfile import ZipInfo, ZIP_DEFLATED, ZIP64_LIMIT
+
+from cesarp.common.CesarpException import CesarpException
+
+# chunks smaller than that are compressed in the main process, sending them to a worker costs more than compressing them
+_MIN_CHUNK_SIZE_FOR_WORKER = 16 * 1024
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+# records of the ZIP file format, see APPNOTE.TXT sections 4.3.7, 4.3.12, 4.3.14 - 4.3.16 and 4.5.3
+_LOCAL_FILE_HEADER = struct.Struct("<IHHHHHIIIHH")
+_LOCAL_FILE_HEADER_SIGNATURE = 0x04034B50
+_CENTRAL_DIR_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_CENTRAL_DIR_HEADER_SIGNATURE = 0x02014B50
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_END_OF_CENTRAL_DIR_SIGNATURE = 0x06054B50
+_ZIP64_END_OF_CENTRAL_DIR = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_END_OF_CENTRAL_DIR_SIGNATURE = 0x06064B50
+_ZIP64_END_OF_CENTRAL_DIR_LOCATOR = struct.Struct("<IIQI")
+_ZIP64_END_OF_CENTRAL_DIR_LOCATOR_SIGNATURE = 0x07064B50
+_ZIP64_EXTRA_HEADER = struct.Struct("<HH")
+_ZIP64_EXTRA_ID = 0x0001
+_VERSION_DEFLATE = 20
+_VERSION_ZIP64 = 45
+_FLAG_UTF8_FILENAME = 0x800
+_MAX_UINT32 = 0xFFFFFFFF
+_MAX_UINT16 = 0xFFFF
+
+
+def compress_chunk(data: bytes, compression_level: int, is_last: bool) -> bytes:
+    """
+    :param data: uncompressed chunk
+    :param compression_level: zlib compression level, 0-9
+    :param is_last: True for the last chunk of a file, the deflate stream is then terminated
+    :return: raw deflate data of the chunk
+    """
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if is_last else zlib.Z_SYNC_FLUSH)
+
+
+def get_content_hash(file_path: Union[str, Path]) -> str:
+    """:return: sha256 hex digest of the file contents"""
+    content_hash = hashlib.sha256()
+    with open(file_path, "rb") as fd:
+        for block in iter(lambda: fd.read(_HASH_BLOCK_SIZE), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def load_manifest(manifest_path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """:return: manifest as saved with save_manifest(), empty dict if the file does not exist"""
+    if not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path, "r") as fd:
+        return json.load(fd)
+
+
+def save_manifest(manifest: Dict[str, Dict[str, Any]], manifest_path: Union[str, Path]) -> None:
+    os.makedirs(Path(manifest_path).parent, exist_ok=True)
+    with open(manifest_path, "w") as fd:
+        json.dump(manifest, fd, indent=1, sort_keys=True)
+
+
+class _PendingEntry:
+    def __init__(self, zinfo: ZipInfo, zip64: bool):
+        self.zinfo = zinfo
+        self.zip64 = zip64
+        self.header_written = False
+
+
+class ParallelArchiveWriter:
+    """
+    Write files to a ZIP archive, the files are compressed with deflate by a pool of worker processes.
+    Use as context manager or call close() when all files are added. *write()* has the same signature as for ZipFile, thus the module
+    methods of cesarp.manager.ProjectSaver adding files or folders can be used with this writer as well.
+    The worker processes are started in the constructor, create the writer before starting any threads in the main process.
+    """
+
+    def __init__(
+        self,
+        zip_file_path: Union[str, Path],
+        nr_of_workers: int = 1,
+        chunk_size_mb: float = 4,
+        compression_level: int = 6,
+        base_manifest: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        """
+        :param zip_file_path: full path of the archive to write, an existing file is overwritten
+        :param nr_of_workers: number of processes compressing the chunks, 1 means compressing in the main process
+        :param chunk_size_mb: files are read and compressed in chunks of that size
+        :param compression_level: zlib compression level, 0-9
+        :param base_manifest: manifest of the previous archive, see get_manifest(); files unchanged since then are not added to the archive
+        """
+        if not 0 <= compression_level <= 9:
+            raise CesarpException(f"compression level must be between 0 and 9, got {compression_level}")
+        self._zip_file_path = zip_file_path
+        self._archive_name = os.path.basename(zip_file_path)
+        self._chunk_size = max(1, int(chunk_size_mb * 1024 * 1024))
+        self._compression_level = compression_level
+        self._base_manifest = base_manifest if base_manifest is not None else {}
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._max_pending_chunks = 4 * max(1, nr_of_workers)
+        self._pending: Deque[Tuple[_PendingEntry, Union[bytes, "multiprocessing.pool.AsyncResult[bytes]"], bool]] = deque()
+        self._entries_written: List[ZipInfo] = []
+        self._pool = multiprocessing.Pool(nr_of_workers) if nr_of_workers > 1 else None
+        self._fp: Optional[BinaryIO] = open(zip_file_path, "wb")
+        self._end_of_entries = 0
+        self._logger = logging.getLogger(__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
+
+    def write(self, filename: Union[str, Path], arcname: Optional[str] = None) -> bool:
+        """
+        Add a file to the archive. The file is read completely before the method returns, thus it can be deleted right after.
+        The compressed data is written to the archive as soon as the workers are done.
+
+        :param filename: path of the file to add
+        :param arcname: path of the file within the archive, defaults to filename
+        :return: False if the file was not added because it is unchanged since the archive of the base manifest, True otherwise
+        """
+        zinfo = ZipInfo.from_file(filename, arcname)
+        if zinfo.is_dir():
+            raise CesarpException(f"{filename} is a folder, add the files within instead")
+        previous_entry = self._base_manifest.get(zinfo.filename)
+        if previous_entry is not None and previous_entry["size"] == zinfo.file_size and previous_entry["sha256"] == get_content_hash(filename):
+            self._manifest[zinfo.filename] = previous_entry
+            return False
+
+        zinfo.compress_type = ZIP_DEFLATED
+        zinfo.CRC = 0  # the header is written again with the CRC and sizes after the last chunk
+        entry = _PendingEntry(zinfo, zip64=zinfo.file_size * 1.05 > ZIP64_LIMIT)
+        content_hash = hashlib.sha256()
+        crc = 0
+        file_size = 0
+        with open(filename, "rb") as fd:
+            chunk = fd.read(self._chunk_size)
+            while True:
+                next_chunk = fd.read(self._chunk_size) if len(chunk) == self._chunk_size else b""
+                is_last = not next_chunk
+                content_hash.update(chunk)
+                crc = zlib.crc32(chunk, crc)
+                file_size += len(chunk)
+                if is_last:
+                    zinfo.CRC = crc
+                    zinfo.file_size = file_size
+                self._queue_chunk(entry, chunk, is_last)
+                if is_last:
+                    break
+                chunk = next_chunk
+
+        self._manifest[zinfo.filename] = {"size": file_size, "sha256": content_hash.hexdigest(), "archive": self._archive_name}
+        return True
+
+    def get_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: per file in the archive, respectively in the archive of the base manifest if it was unchanged, the size, content hash and name of the archive holding the file
+        """
+        return dict(self._manifest)
+
+    def close(self) -> None:
+        try:
+            while self._pending:
+                self._write_next_chunk()
+            self._write_central_directory()
+        except BaseException:
+            self._abort()
+            raise
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _abort(self) -> None:
+        """Stop the workers and close the archive with the files completely written so far"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+        self._pending.clear()
+        self._write_central_directory()
+
+    def _queue_chunk(self, entry: _PendingEntry, chunk: bytes, is_last: bool) -> None:
+        compressed_or_result: Union[bytes, "multiprocessing.pool.AsyncResult[bytes]"]
+        if self._pool is not None and len(chunk) >= _MIN_CHUNK_SIZE_FOR_WORKER:
+            compressed_or_result = self._pool.apply_async(compress_chunk, (chunk, self._compression_level, is_last))
+        else:
+            compressed_or_result = compress_chunk(chunk, self._compression_level, is_last)
+        self._pending.append((entry, compressed_or_result, is_last))
+        while len(self._pending) > self._max_pending_chunks:
+            self._write_next_chunk()
+
+    def _write_next_chunk(self) -> None:
+        (entry, compressed_or_result, is_last) = self._pending.popleft()
+        compressed = compressed_or_result if isinstance(compressed_or_result, bytes) else compressed_or_result.get()
+        fp = self._get_open_file()
+        zinfo = entry.zinfo
+        if not entry.header_written:
+            fp.seek(self._end_of_entries)
+            zinfo.header_offset = self._end_of_entries
+            zinfo.compress_size = 0
+            fp.write(_get_local_file_header(zinfo, entry.zip64))
+            entry.header_written = True
+        fp.write(compressed)
+        zinfo.compress_size += len(compressed)
+        if is_last:
+            if not entry.zip64 and (zinfo.file_size > ZIP64_LIMIT or zinfo.compress_size > ZIP64_LIMIT):
+                raise CesarpException(f"{zinfo.filename} did grow while adding it to the archive {self._zip_file_path}")
+            end_of_entry = fp.tell()
+            fp.seek(zinfo.header_offset)
+            fp.write(_get_local_file_header(zinfo, entry.zip64))
+            fp.seek(end_of_entry)
+            self._end_of_entries = end_of_entry
+            self._entries_written.append(zinfo)
+
+    def _write_central_directory(self) -> None:
+        if self._fp is None:
+            return
+        fp = self._fp
+        self._fp = None
+        with fp:
+            fp.seek(self._end_of_entries)
+            fp.truncate()
+            central_dir_offset = self._end_of_entries
+            for zinfo in self._entries_written:
+                fp.write(_get_central_dir_header(zinfo))
+            central_dir_size = fp.tell() - central_dir_offset
+            nr_of_entries = len(self._entries_written)
+            if nr_of_entries > _MAX_UINT16 or central_dir_offset > ZIP64_LIMIT or central_dir_size > ZIP64_LIMIT:
+                zip64_end_offset = fp.tell()
+                fp.write(
+                    _ZIP64_END_OF_CENTRAL_DIR.pack(
+                        _ZIP64_END_OF_CENTRAL_DIR_SIGNATURE,
+                        _ZIP64_END_OF_CENTRAL_DIR.size - 12,  # size of the remaining record
+                        _VERSION_ZIP64,
+                        _VERSION_ZIP64,
+                        0,
+                        0,
+                        nr_of_entries,
+                        nr_of_entries,
+                        central_dir_size,
+                        central_dir_offset,
+                    )
+                )
+                fp.write(_ZIP64_END_OF_CENTRAL_DIR_LOCATOR.pack(_ZIP64_END_OF_CENTRAL_DIR_LOCATOR_SIGNATURE, 0, zip64_end_offset, 1))
+            fp.write(
+                _END_OF_CENTRAL_DIR.pack(
+                    _END_OF_CENTRAL_DIR_SIGNATURE,
+                    0,
+                    0,
+                    min(nr_of_entries, _MAX_UINT16),
+                    min(nr_of_entries, _MAX_UINT16),
+                    min(central_dir_size, _MAX_UINT32),
+                    min(central_dir_offset, _MAX_UINT32),
+                    0,
+                )
+            )
+
+    def _get_open_file(self) -> BinaryIO:
+        if self._fp is None:
+            raise CesarpException(f"archive {self._zip_file_path} is already closed")
+        return self._fp
+
+
+def _get_local_file_header(zinfo: ZipInfo, zip64: bool) -> bytes:
+    """
+    :param zip64: if True, the sizes are written to the ZIP64 extra field, must be the same when the header is written again with the final sizes
+    """
+    (filename, flags) = _encode_filename(zinfo)
+    extra = _ZIP64_EXTRA_HEADER.pack(_ZIP64_EXTRA_ID, 16) + struct.pack("<QQ", zinfo.file_size, zinfo.compress_size) if zip64 else b""
+    header = _LOCAL_FILE_HEADER.pack(
+        _LOCAL_FILE_HEADER_SIGNATURE,
+        _VERSION_ZIP64 if zip64 else _VERSION_DEFLATE,
+        flags,
+        ZIP_DEFLATED,
+        *_get_dos_time_and_date(zinfo),
+        zinfo.CRC,
+        _MAX_UINT32 if zip64 else zinfo.compress_size,
+        _MAX_UINT32 if zip64 else zinfo.file_size,
+        len(filename),
+        len(extra),
+    )
+    return header + filename + extra
+
+
+def _get_central_dir_header(zinfo: ZipInfo) -> bytes:
+    (filename, flags) = _encode_filename(zinfo)
+    zip64_fields = [value for value in [zinfo.file_size, zinfo.compress_size, zinfo.header_offset] if value > ZIP64_LIMIT]
+    extra = _ZIP64_EXTRA_HEADER.pack(_ZIP64_EXTRA_ID, 8 * len(zip64_fields)) + struct.pack(f"<{len(zip64_fields)}Q", *zip64_fields) if zip64_fields else b""
+    version = _VERSION_ZIP64 if zip64_fields else _VERSION_DEFLATE
+    header = _CENTRAL_DIR_HEADER.pack(
+        _CENTRAL_DIR_HEADER_SIGNATURE,
+        (zinfo.create_system << 8) | max(version, zinfo.create_version),
+        version,
+        flags,
+        ZIP_DEFLATED,
+        *_get_dos_time_and_date(zinfo),
+        zinfo.CRC,
+        _MAX_UINT32 if zinfo.compress_size > ZIP64_LIMIT else zinfo.compress_size,
+        _MAX_UINT32 if zinfo.file_size > ZIP64_LIMIT else zinfo.file_size,
+        len(filename),
+        len(extra),
+        0,
+        0,
+        0,
+        zinfo.external_attr,
+        _MAX_UINT32 if zinfo.header_offset > ZIP64_LIMIT else zinfo.header_offset,
+    )
+    return header + filename + extra
+
+
+def _encode_filename(zinfo: ZipInfo) -> Tuple[bytes, int]:
+    """:return: (encoded filename, general purpose flags)"""
+    try:
+        return (zinfo.filename.encode("ascii"), 0)
+    except UnicodeEncodeError:
+        return (zinfo.filename.encode("utf-8"), _FLAG_UTF8_FILENAME)
+
+
+def _get_dos_time_and_date(zinfo: ZipInfo) -> Tuple[int, int]:
+    (year, month, day, hour, minute, second) = zinfo.date_time
+    return ((hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day)
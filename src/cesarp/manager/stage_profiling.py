@@ -0,0 +1,207 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Instrumentation of the processing steps run on the worker pool, see :py:mod:`cesarp.manager.processing_steps`.
+
+The processing steps wrap their work per building with :py:func:`profile_stage`. Records are only collected when the step
+is called through :py:func:`call_profiled`, which the SimulationManager does if MANAGER:STAGE_PROFILING:ACTIVE is True.
+Otherwise profile_stage only keeps track of the current stage and building, which is added to the log records of the workers
+when logging to the central log (see :py:mod:`cesarp.manager.worker_logging`).
+
+Per stage and building the following is recorded:
+
+- wall time and cpu time, cpu time includes child processes (e.g. EnergyPlus) started during the stage
+- peak resident memory of the worker process at the end of the stage. This is the high-water mark since the start of the worker, thus it
+  can stem from an earlier stage or building. Use peak_traced_mb for the memory used by a single stage.
+- peak memory allocated by python during the stage, only if TRACEMALLOC is active as tracing slows down processing considerably
+- bytes read and written by the worker process including its child processes, reads served from the page cache are counted as well. Only available on Linux.
+"""
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None  # type: ignore
+
+_PROC_IO_FILE = "/proc/self/io"
+
+# records of the currently running profiled call, None if not profiling
+_collector: Optional[List["StageRecord"]] = None
+# stage and fid of the stage currently running in this process, None if outside of profile_stage
+_current_stage: Optional[Tuple[str, Optional[int]]] = None
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    fid: Optional[int]
+    pid: int
+    wall_time_s: float
+    cpu_time_s: float
+    worker_peak_rss_mb: Optional[float]
+    peak_traced_mb: Optional[float]
+    read_bytes: Optional[int]
+    written_bytes: Optional[int]
+
+
+@contextmanager
+def profile_stage(stage: str, fid: Optional[int] = None) -> Iterator[None]:
+    """
+    Record resource usage of the code within the with-block, if called within :py:func:`call_profiled`.
+    Stages must not be nested.
+
+    :param stage: name of the stage
+    :param fid: fid of the building processed, None if the stage is not specific to a building
+    """
+    global _current_stage
+    _current_stage = (stage, fid)
+    try:
+        if _collector is None:
+            yield
+        else:
+            with _record_stage(_collector, stage, fid):
+                yield
+    finally:
+        _current_stage = None
+
+
+def get_current_stage() -> Optional[Tuple[str, Optional[int]]]:
+    """:return: (stage, fid) of the stage currently running in this process, None if not within :py:func:`profile_stage`"""
+    return _current_stage
+
+
+@contextmanager
+def _record_stage(collector: List[StageRecord], stage: str, fid: Optional[int]) -> Iterator[None]:
+    is_tracing = tracemalloc.is_tracing()
+    if is_tracing:
+        _reset_traced_peak()
+    io_start = _read_io_counters()
+    cpu_start = _cpu_time()
+    wall_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = _cpu_time() - cpu_start
+        io_end = _read_io_counters()
+        collector.append(
+            StageRecord(
+                stage=stage,
+                fid=fid,
+                pid=os.getpid(),
+                wall_time_s=wall_time,
+                cpu_time_s=cpu_time,
+                worker_peak_rss_mb=_peak_rss_mb(),
+                peak_traced_mb=tracemalloc.get_traced_memory()[1] / 1024**2 if is_tracing else None,
+                read_bytes=io_end[0] - io_start[0] if io_start and io_end else None,
+                written_bytes=io_end[1] - io_start[1] if io_start and io_end else None,
+            )
+        )
+
+
+def call_profiled(func: Callable[..., Any], args: Sequence[Any], trace_memory: bool = False) -> Tuple[Any, List[StageRecord]]:
+    """
+    Call func with args and collect the records of all stages run within. Module-level method to be run on the worker pool.
+
+    :param func: processing step to call
+    :param args: positional arguments for func
+    :param trace_memory: if True, python memory allocations are traced with tracemalloc
+    :return: tuple with the return value of func and the list of stage records
+    """
+    global _collector
+    _collector = []
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        result = func(*args)
+        return (result, _collector)
+    finally:
+        _collector = None
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def records_to_df(records: Sequence[StageRecord]) -> pd.DataFrame:
+    """:return: one row per record, columns are the fields of StageRecord"""
+    run_profile = pd.DataFrame([asdict(record) for record in records], columns=[field.name for field in fields(StageRecord)])
+    run_profile["fid"] = run_profile["fid"].astype("Int64")  # keep fids integer even if there are stages not specific to a building
+    return run_profile
+
+
+def summarize(run_profile: pd.DataFrame) -> pd.DataFrame:
+    """
+    :param run_profile: as returned by records_to_df
+    :return: per stage number of records, total, mean and max wall time, total cpu time, max worker peak rss and total bytes read and written
+    """
+    return run_profile.groupby("stage").agg(
+        count=("wall_time_s", "count"),
+        wall_time_total_s=("wall_time_s", "sum"),
+        wall_time_mean_s=("wall_time_s", "mean"),
+        wall_time_max_s=("wall_time_s", "max"),
+        cpu_time_total_s=("cpu_time_s", "sum"),
+        worker_peak_rss_max_mb=("worker_peak_rss_mb", "max"),
+        read_bytes_total=("read_bytes", "sum"),
+        written_bytes_total=("written_bytes", "sum"),
+    )
+
+
+def _cpu_time() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _reset_traced_peak() -> None:
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:  # python < 3.9, restarting clears the traces and thus the peak
+        traceback_limit = tracemalloc.get_traceback_limit()
+        tracemalloc.stop()
+        tracemalloc.start(traceback_limit)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024  # bytes on mac, kilobytes on linux
+
+
+def _read_io_counters() -> Optional[Tuple[int, int]]:
+    """:return: (bytes read, bytes written) by the current process and its terminated children, None if not available"""
+    try:
+        with open(_PROC_IO_FILE) as io_file:
+            counters: Dict[str, int] = {}
+            for line in io_file:
+                (name, value) = line.split(":", 1)
+                counters[name] = int(value)
+        return (counters["rchar"], counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
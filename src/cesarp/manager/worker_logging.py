@@ -0,0 +1,162 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+Central log for the worker processes, see MANAGER:WORKER_LOGGING.
+
+Instead of each worker writing its own log file, the workers put their log records to a queue. A listener thread in the main
+process writes all records to one size-bounded, rotating log file. Each line of the log is a JSON object with the fields
+time, level, process, logger, fid, stage and message. Stage and fid are set for records logged within a processing stage of
+a building (see :py:func:`cesarp.manager.stage_profiling.profile_stage`). The processing steps wrap all work for a building,
+including their error handling, with :py:func:`log_context`, thus the fid is set for records logged outside of a stage as well
+and the log of one building can be selected with :py:func:`read_central_log`.
+"""
+import datetime
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from cesarp.manager import stage_profiling
+
+LOG_FIELDS = ["time", "level", "process", "logger", "fid", "stage", "message"]
+
+# fid of the building currently processed in this process, None if outside of log_context
+_current_fid: Optional[int] = None
+
+
+@contextmanager
+def log_context(fid: Optional[int]) -> Iterator[None]:
+    """
+    Add the fid to the records logged within the with-block, also to the ones logged outside of a processing stage.
+
+    :param fid: fid of the building processed
+    """
+    global _current_fid
+    previous_fid = _current_fid
+    _current_fid = fid
+    try:
+        yield
+    finally:
+        _current_fid = previous_fid
+
+
+class StageContextFilter(logging.Filter):
+    """Adds stage and fid of the processing stage currently running in the process to the log records, outside of a stage the fid of the log context"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        current_stage = stage_profiling.get_current_stage()
+        (stage, fid) = current_stage if current_stage else (None, None)
+        setattr(record, "stage", stage)
+        setattr(record, "fid", fid if fid is not None else _current_fid)
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a log record as one line of JSON with the fields LOG_FIELDS"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            message = f"{message}\n{record.exc_text}"
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "process": record.processName,
+            "logger": record.name,
+            "fid": getattr(record, "fid", None),
+            "stage": getattr(record, "stage", None),
+            "message": message,
+        }
+        return json.dumps(entry, default=str)
+
+
+def start_central_log(log_dir: Union[str, Path], logging_cfg: Dict[str, Any]) -> Tuple[Any, logging.handlers.QueueListener]:
+    """
+    Start the listener writing the log records received from the workers to the central log file.
+
+    :param log_dir: folder to write the log file to
+    :param logging_cfg: configuration MANAGER:WORKER_LOGGING
+    :return: (queue to pass to init_worker_logging() of the workers, listener - call stop() after the workers are joined to write remaining records and close the file)
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        Path(log_dir) / logging_cfg["FILENAME_REL"],
+        maxBytes=int(logging_cfg["MAX_FILE_SIZE_MB"] * 1024**2),
+        backupCount=logging_cfg["NR_OF_BACKUP_FILES"],
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(JsonLinesFormatter())
+    log_queue: "multiprocessing.Queue[logging.LogRecord]" = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return (log_queue, listener)
+
+
+def init_worker_logging(log_queue) -> None:
+    """
+    Send all log records of level INFO and above of the worker process to the central log. To be called in the worker initializer.
+
+    :param log_queue: queue returned by start_central_log()
+    """
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(logging.INFO)
+    queue_handler.addFilter(StageContextFilter())
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(logging.DEBUG)
+    cl = logging.getLogger("cesarp")
+    cl.setLevel(logging.INFO)
+    cl.propagate = False
+    cl.addHandler(queue_handler)
+
+
+def read_central_log(log_file: Union[str, Path], fid: Optional[int] = None, stage: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read the central log including the rotated backup files, oldest records first.
+
+    :param log_file: path of the log file, as configured in MANAGER:WORKER_LOGGING:FILENAME_REL
+    :param fid: if set, only records logged while processing that building are returned
+    :param stage: if set, only records of that processing stage are returned
+    :return: one row per record, columns LOG_FIELDS
+    """
+    log_file = Path(log_file)
+    backup_files: List[Path] = [backup for backup in log_file.parent.glob(f"{log_file.name}.*") if backup.suffix[1:].isdigit()]
+    backup_files.sort(key=lambda backup: int(backup.suffix[1:]), reverse=True)
+    entries: List[Dict[str, Any]] = []
+    for file_path in backup_files + [log_file]:
+        with open(file_path, encoding="utf-8") as fh:
+            entries.extend(json.loads(line) for line in fh if line.strip())
+    log = pd.DataFrame(entries, columns=LOG_FIELDS)
+    log["fid"] = log["fid"].astype("Int64")
+    if fid is not None:
+        log = log[log["fid"] == fid]
+    if stage is not None:
+        log = log[log["stage"] == stage]
+    return log.reset_index(drop=True)
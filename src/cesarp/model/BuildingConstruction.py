@@ -20,6 +20,7 @@
 # Contact: https://www.empa.ch/web/s313
 #
 import logging
+import copy
 import pint
 from typing import Optional
 from dataclasses import dataclass
@@ -162,6 +163,19 @@ class BuildingConstruction:
             return False
         return True
 
+    def structural_copy(self) -> "BuildingConstruction":
+        """
+        Copy sharing the Construction and WindowConstruction objects with the original, but not the assignment of constructions
+        to building elements, thus replacing a construction with set_construction_for_bldg_elem() does not affect the original.
+        Do not modify the shared construction objects in place.
+        """
+        the_copy = copy.copy(self)
+        the_copy.__constr_elems = copy.copy(self.__constr_elems)
+        the_copy.installation_characteristics = copy.copy(self.installation_characteristics)
+        if the_copy.installation_characteristics is not None:
+            the_copy.installation_characteristics.lighting_characteristics = copy.copy(self.installation_characteristics.lighting_characteristics)
+        return the_copy
+
     def upgrade_model_remove_floor(self):
         try:
             del self.__constr_elems["INTERNAL_FLOOR"]
@@ -20,6 +20,7 @@
 # Contact: https://www.empa.ch/web/s313
 #
 from typing import Mapping, Dict, Any
+import copy
 import pandas as pd
 
 from cesarp.model.Site import Site
@@ -109,3 +110,20 @@ class BuildingModel:
         if self._class_version <= 1.6:
             self.bldg_construction.upgrade_model_remove_floor()
             self._class_version = 1.7
+
+    def structural_copy(self) -> "BuildingModel":
+        """
+        Copy of the building model sharing the parts which are usually not changed between scenarios with the original
+        instead of duplicating them as copy.deepcopy() would do. This makes creating a copy fast and keeps memory usage low.
+
+        Shared with the original (replace them instead of modifying them in place):
+        bldg_shape, neighbours, neighbours_construction_props, site ground temperatures, Construction/WindowConstruction objects and schedules
+
+        Copied (can be modified in place without affecting the original):
+        site, bldg_construction incl. installation characteristics, bldg_operation_mapping incl. operational parameter objects
+        """
+        the_copy = copy.copy(self)
+        the_copy.site = copy.copy(self.site)
+        the_copy.bldg_construction = self.bldg_construction.structural_copy()
+        the_copy.bldg_operation_mapping = self.bldg_operation_mapping.structural_copy()
+        return the_copy
@@ -18,6 +18,7 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
+import copy
 import pint
 from dataclasses import dataclass
 from typing import Any
@@ -124,3 +125,12 @@ class BuildingOperation:
     @classmethod
     def emptyObj(cls):
         return cls(None, None, None, None, None, None)
+
+    def structural_copy(self) -> "BuildingOperation":
+        """
+        Copy of the operational parameters sharing the schedule objects with the original. Do not modify the shared schedules in place.
+        """
+        the_copy = copy.copy(self)
+        for attr in ["occupancy", "electric_appliances", "lighting", "dhw", "hvac", "night_vent", "win_shading_ctrl"]:
+            setattr(the_copy, attr, copy.copy(getattr(self, attr)))
+        return the_copy
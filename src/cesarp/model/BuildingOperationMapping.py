@@ -18,7 +18,7 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from cesarp.model.BuildingOperation import BuildingOperation
 from cesarp.common.CesarpException import CesarpException
 
@@ -42,6 +42,20 @@ class BuildingOperationMapping:
         # sourcery skip: remove-zero-from-range
         self.add_operation_assignment(list(range(0, nr_of_floors)), building_op)
 
+    def structural_copy(self) -> "BuildingOperationMapping":
+        """
+        Copy of the mapping, see BuildingOperation.structural_copy(). A BuildingOperation assigned to several floor groups
+        is only copied once, so it is still the same object for all its assignments in the copy.
+        """
+        the_copy = BuildingOperationMapping()
+        copied_ops: Dict[int, BuildingOperation] = {}
+        for (floor_nrs, bldg_op) in self._op_assignments:
+            if id(bldg_op) not in copied_ops:
+                copied_ops[id(bldg_op)] = bldg_op.structural_copy()
+            the_copy._op_assignments.append((list(floor_nrs), copied_ops[id(bldg_op)]))
+        the_copy.all_assigned_floor_nrs = list(self.all_assigned_floor_nrs)
+        return the_copy
+
     def get_operation_for_floor(self, floor_nr: int):
         """for fast access to all building operation assignment please use get_operation_assignment"""
         for floor_nrs, bldg_op in self._op_assignments:
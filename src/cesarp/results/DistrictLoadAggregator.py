@@ -0,0 +1,186 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+import logging
+import numpy as np
+import pandas as pd
+
+from cesarp.common.CesarpException import CesarpException
+
+DISTRICT_GROUPING = "DISTRICT"
+DISTRICT_GROUP = "all"
+
+
+def get_age_class(year_of_construction: int, age_class_bounds: Sequence[int]) -> str:
+    """
+    :param year_of_construction: construction year of the building
+    :param age_class_bounds: first year of each age class, e.g. [1946, 1961] results in the classes before 1946, 1946-1960 and 1961 and later
+    :return: label of the age class
+    """
+    bounds = sorted(age_class_bounds)
+    if not bounds or year_of_construction < bounds[0]:
+        return f"before {bounds[0]}" if bounds else "all"
+    for (start, next_start) in zip(bounds, bounds[1:]):
+        if year_of_construction < next_start:
+            return f"{start}-{next_start - 1}"
+    return f"{bounds[-1]} and later"
+
+
+class DistrictLoadAggregator:
+    """
+    Sums up the hourly loads of the buildings per group, e.g. for the whole district or per building type, without keeping the per building series.
+    Besides the sum of the loads, the sum of the peak loads of the single buildings is recorded, from which the simultaneity factor is calculated.
+
+    Usage:
+    1. initialize the class, one instance per worker process
+    2. call *add_building* for each of the buildings, passing the groups the building belongs to
+    3. combine the instances of the workers with *merge*
+    4. get the load curves, load duration curves and peak loads per grouping
+
+    All buildings are in the group DISTRICT_GROUP of grouping DISTRICT_GROUPING. Loads are in kW, as mean of each hour.
+    """
+
+    LOAD_UNIT = "kW"
+
+    def __init__(self, meters: Sequence[str]):
+        """
+        :param meters: names of the hourly meters to aggregate, e.g. DistrictHeating:HVAC
+        """
+        self.meters = list(meters)
+        self._nr_of_hours: Optional[int] = None
+        # per (grouping, group) the sum of the loads, array of shape (nr of meters, nr of hours)
+        self._load_sum: Dict[Tuple[str, str], np.ndarray] = dict()
+        # per (grouping, group) the sum of the peak loads of the single buildings, one value per meter
+        self._peak_sum: Dict[Tuple[str, str], np.ndarray] = dict()
+        self._nr_of_bldgs: Dict[Tuple[str, str], int] = dict()
+        self._logger = logging.getLogger(__name__)
+
+    def add_building(self, fid: int, groups: Mapping[str, str], load_per_meter: Mapping[str, np.ndarray]) -> bool:
+        """
+        :param fid: fid of the building, used for logging only
+        :param groups: for each grouping the group the building belongs to, e.g. {"BLDG_TYPE": "MFH"}
+        :param load_per_meter: hourly loads in kW for each of the meters
+        :return: True if the building was added, False if a meter is missing or the number of hours does not match
+        """
+        missing_meters = [meter for meter in self.meters if meter not in load_per_meter]
+        if missing_meters:
+            self._logger.warning(f"hourly results for {missing_meters} not found for fid {fid}, building not included in the aggregated loads")
+            return False
+        loads = np.vstack([load_per_meter[meter] for meter in self.meters])
+        if self._nr_of_hours is None:
+            self._nr_of_hours = loads.shape[1]
+        elif loads.shape[1] != self._nr_of_hours:
+            self._logger.warning(f"fid {fid} has {loads.shape[1]} hourly values instead of {self._nr_of_hours}, building not included in the aggregated loads")
+            return False
+        peaks = loads.max(axis=1)
+        for group_key in [(DISTRICT_GROUPING, DISTRICT_GROUP)] + [(grouping, str(group)) for grouping, group in groups.items()]:
+            if group_key in self._load_sum:
+                self._load_sum[group_key] += loads
+                self._peak_sum[group_key] += peaks
+                self._nr_of_bldgs[group_key] += 1
+            else:
+                self._load_sum[group_key] = loads.copy()
+                self._peak_sum[group_key] = peaks.copy()
+                self._nr_of_bldgs[group_key] = 1
+        return True
+
+    def merge(self, other: "DistrictLoadAggregator") -> None:
+        """add the sums of another aggregator, e.g. the one of another worker"""
+        if other.meters != self.meters:
+            raise CesarpException(f"cannot merge load aggregation of meters {other.meters} into one of meters {self.meters}")
+        if other._nr_of_hours is None:
+            return
+        if self._nr_of_hours is None:
+            self._nr_of_hours = other._nr_of_hours
+        elif other._nr_of_hours != self._nr_of_hours:
+            raise CesarpException(f"cannot merge load aggregation of {other._nr_of_hours} hours into one of {self._nr_of_hours} hours")
+        for group_key, load_sum in other._load_sum.items():
+            if group_key in self._load_sum:
+                self._load_sum[group_key] += load_sum
+                self._peak_sum[group_key] += other._peak_sum[group_key]
+                self._nr_of_bldgs[group_key] += other._nr_of_bldgs[group_key]
+            else:
+                self._load_sum[group_key] = load_sum.copy()
+                self._peak_sum[group_key] = other._peak_sum[group_key].copy()
+                self._nr_of_bldgs[group_key] = other._nr_of_bldgs[group_key]
+
+    def get_groupings(self) -> List[str]:
+        return sorted(set(grouping for (grouping, _) in self._load_sum.keys()))
+
+    def get_groups(self, grouping: str = DISTRICT_GROUPING) -> List[str]:
+        return sorted(group for (a_grouping, group) in self._load_sum.keys() if a_grouping == grouping)
+
+    def get_load_curves(self, grouping: str = DISTRICT_GROUPING) -> pd.DataFrame:
+        """
+        :return: aggregated hourly loads in kW, index is the hour of the simulation period, columns a multiindex of group and meter
+        """
+        return self._to_df(grouping, lambda load_sum: load_sum)
+
+    def get_load_duration_curves(self, grouping: str = DISTRICT_GROUPING) -> pd.DataFrame:
+        """
+        :return: aggregated hourly loads in kW sorted descending per column, index is the number of hours with a higher load, columns a multiindex of group and meter
+        """
+        return self._to_df(grouping, lambda load_sum: -np.sort(-load_sum, axis=1))
+
+    def get_peak_loads(self, grouping: str = DISTRICT_GROUPING) -> pd.DataFrame:
+        """
+        The simultaneity factor is the peak of the aggregated load divided by the sum of the peak loads of the single buildings.
+
+        :return: one row per group and meter (multiindex), columns are peak load, hour of the peak, sum of the peak loads of the single buildings,
+                 simultaneity factor and number of buildings
+        """
+        rows = []
+        index = []
+        for group in self.get_groups(grouping):
+            load_sum = self._load_sum[(grouping, group)]
+            peak_sum = self._peak_sum[(grouping, group)]
+            for meter_idx, meter in enumerate(self.meters):
+                peak = load_sum[meter_idx].max()
+                rows.append(
+                    [
+                        peak,
+                        int(load_sum[meter_idx].argmax()),
+                        peak_sum[meter_idx],
+                        peak / peak_sum[meter_idx] if peak_sum[meter_idx] > 0 else np.nan,
+                        self._nr_of_bldgs[(grouping, group)],
+                    ]
+                )
+                index.append((group, meter))
+        return pd.DataFrame(
+            rows,
+            index=pd.MultiIndex.from_tuples(index, names=["group", "meter"]),
+            columns=[f"peak load [{self.LOAD_UNIT}]", "hour of peak", f"sum of single building peaks [{self.LOAD_UNIT}]", "simultaneity factor", "nr of buildings"],
+        )
+
+    def _to_df(self, grouping: str, convert) -> pd.DataFrame:
+        columns = []
+        data = []
+        for group in self.get_groups(grouping):
+            converted = convert(self._load_sum[(grouping, group)])
+            for meter_idx, meter in enumerate(self.meters):
+                columns.append((group, meter))
+                data.append(converted[meter_idx])
+        if not data:
+            return pd.DataFrame()
+        load_df = pd.DataFrame(np.array(data).T, columns=pd.MultiIndex.from_tuples(columns, names=["group", "meter"]))
+        load_df.index.name = "hour"
+        return load_df
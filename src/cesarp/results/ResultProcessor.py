@@ -23,7 +23,7 @@ import pint
 import logging
 import pandas as pd
 from collections import OrderedDict
-from typing import Dict, Any, Tuple, Optional, Union
+from typing import Dict, Any, Mapping, Tuple, Optional, Union
 from enum import Enum
 from pathlib import Path
 
@@ -40,6 +40,7 @@ from cesarp.eplus_adapter.eplus_error_file_handling import (
     EPLUS_ERROR_FILE_NAME,
 )
 from cesarp.results.EnergyDemandSimulationResults import EnergyDemandSimulationResults
+from cesarp.results.DistrictLoadAggregator import DistrictLoadAggregator
 from cesarp.model.EnergySource import EnergySource
 
 
@@ -84,6 +85,7 @@ class ResultProcessor:
     """
     Handles annual results aggregation.
     In case energy carriers for heating and domestic hot water are provided, operational emissions and costs are calculated.
+    If a DistrictLoadAggregator is passed, the hourly loads of each building are added to it, using the same parsed eso file as the annual results.
 
     Usage:
     1. initialize the class
@@ -96,8 +98,15 @@ class ResultProcessor:
 
     MULTI_IDX_NAMES = ["unit", "var_name"]
 
-    def __init__(self, ureg: pint.UnitRegistry, do_calc_op_emissions_and_costs: bool = True, custom_config: Optional[Dict[str, Any]] = None):
+    def __init__(
+        self,
+        ureg: pint.UnitRegistry,
+        do_calc_op_emissions_and_costs: bool = True,
+        custom_config: Optional[Dict[str, Any]] = None,
+        load_aggregator: Optional[DistrictLoadAggregator] = None,
+    ):
         self.ureg = ureg
+        self.load_aggregator = load_aggregator
         self._do_calc_op_emissions_and_costs = do_calc_op_emissions_and_costs
         self._op_emission_cost_calc: Optional[OperationalEmissionsAndCosts] = None
         if self._do_calc_op_emissions_and_costs:
@@ -114,6 +123,7 @@ class ResultProcessor:
         heating_energy_carrier: Optional[EnergySource],
         dhw_energy_carrier: Optional[EnergySource],
         sim_year: Optional[int],
+        load_groups: Optional[Mapping[str, str]] = None,
     ) -> Tuple[EplusErrorLevel, Optional[EnergyDemandSimulationResults], Optional[OperationalEmissionsAndCostsResult]]:
         """
         Call this method for each building you want to add the results.
@@ -129,6 +139,8 @@ class ResultProcessor:
         :type dhw_energy_carrier: Optional[EnergySource]
         :param sim_year: simulation year, used to lookup cost and emission values
         :type sim_year: Optional[int]
+        :param load_groups: for each grouping the group of the building used to aggregate the hourly loads, only used if a load aggregator was passed on init
+        :type load_groups: Optional[Mapping[str, str]]
         :return: see type
         :rtype: Tuple[EplusErrorLevel, Optional[EnergyDemandSimulationResults], Optional[OperationalEmissionsAndCostsResult]]
         """
@@ -136,7 +148,11 @@ class ResultProcessor:
         sim_res: EnergyDemandSimulationResults = None  # type: ignore
         eplus_err_level = check_eplus_error_level(eplus_result_folder / Path(EPLUS_ERROR_FILE_NAME))
         if eplus_err_level != EplusErrorLevel.FATAL:
-            sim_res = cesarp.eplus_adapter.eplus_eso_results_handling.collect_cesar_simulation_summary(eplus_result_folder, self.ureg)
+            eso = cesarp.eplus_adapter.eplus_eso_results_handling.read_result_eso(eplus_result_folder)
+            sim_res = cesarp.eplus_adapter.eplus_eso_results_handling.collect_cesar_simulation_summary(eplus_result_folder, self.ureg, eso)
+            if self.load_aggregator is not None:
+                hourly_loads = cesarp.eplus_adapter.eplus_eso_results_handling.get_hourly_meter_values(eso, self.load_aggregator.meters, self.ureg)
+                self.load_aggregator.add_building(fid, load_groups if load_groups else {}, hourly_loads)
         if self._op_emission_cost_calc:
             if dhw_energy_carrier and heating_energy_carrier and sim_year:
                 emission_and_costs = self._op_emission_cost_calc.get_operational_emissions_and_costs(
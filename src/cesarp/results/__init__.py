@@ -32,5 +32,7 @@ class                                                       description
 =========================================================== ===========================================================
 :py:class:`cesarp.results.ResultProcessor`                  Handling of annual results, including operational emissions and costs
 
+:py:class:`cesarp.results.DistrictLoadAggregator`           Hourly loads summed up per group of buildings, with peak loads, load duration curves and simultaneity factors
+
 =========================================================== ===========================================================
 """
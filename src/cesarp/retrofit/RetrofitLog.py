@@ -19,14 +19,26 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
+from array import array
+import itertools
+import json
+import math
+import os
+import numpy as np
 import pandas as pd
 import pint
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterable, Optional, Union
 from enum import Enum
 from cesarp.model.BuildingElement import BuildingElement
 
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ModuleNotFoundError:
+    pass
+
 
 class LOG_KEYS(Enum):
     BLDG_FID = "bldg_fid"
@@ -41,6 +53,25 @@ class LOG_KEYS(Enum):
     NEW_CONSTRUCTION_NAME = "new_construction_name"
 
 
+# typecode of the array holding the column, None for columns held in a list of strings
+_COLUMN_TYPES: Dict[LOG_KEYS, Optional[str]] = {
+    LOG_KEYS.BLDG_FID: "q",
+    LOG_KEYS.BLDG_ELEMENT: None,
+    LOG_KEYS.RETROFITTED_AREA: "d",
+    LOG_KEYS.YEAR_OF_RETROFIT: "q",
+    LOG_KEYS.RETROFIT_TARGET: None,
+    LOG_KEYS.COSTS: "d",
+    LOG_KEYS.NON_RENEWABLE_PEN: "d",
+    LOG_KEYS.CO2_EMISSION: "d",
+    LOG_KEYS.OLD_CONSTRUCTION_NAME: None,
+    LOG_KEYS.NEW_CONSTRUCTION_NAME: None,
+}
+_QUANTITY_COLUMNS = [LOG_KEYS.RETROFITTED_AREA, LOG_KEYS.COSTS, LOG_KEYS.NON_RENEWABLE_PEN, LOG_KEYS.CO2_EMISSION]
+_NO_YEAR = -1  # value in column YEAR_OF_RETROFIT when no year was given
+_PARQUET_UNITS_METADATA_KEY = b"cesarp_retrofit_log_units"
+_PARQUET_CHUNK_FILE_PATTERN = "retrofit_log_part_{:05d}.parquet"
+
+
 class RetrofitLog:
     """
     Log retrofit entries. Log can either by used per building or for a site, as building fid is included in each
@@ -48,10 +79,20 @@ class RetrofitLog:
     The idea is to save the retrofit information as fine grained as possible. To get any information out of the log,
     the best is to convert it to a dataframe with convert_to_df method and then e.g. sum the costs column
     or query how many buildings got a window retrofitted or whatever information interests you.
+
+    The entries are stored column wise, numbers in typed arrays and pint quantities as magnitudes with one unit per column
+    (the unit of the first logged value, see get_units()). For big logs, e.g. for all buildings of a city over several retrofit periods,
+    call enable_flush_to_parquet() to write the log in chunks to disk, thus only the last chunk is held in memory.
+    Writing Parquet files requires pyarrow.
     """
 
     def __init__(self):
-        self.my_log_entries: List[Dict[LOG_KEYS, Any]] = []
+        self._columns: Dict[LOG_KEYS, Any] = {key: _new_column(typecode) for key, typecode in _COLUMN_TYPES.items()}
+        self._units: Dict[LOG_KEYS, Optional[str]] = {key: None for key in _QUANTITY_COLUMNS}
+        self._flush_folder: Optional[str] = None
+        self._flush_chunk_size: Optional[int] = None
+        self._nr_of_flushed_chunks = 0
+        self._nr_of_flushed_entries = 0
 
     def log_retrofit_measure(
         self,
@@ -66,58 +107,119 @@ class RetrofitLog:
         old_construction_name: str,
         new_construction_name: str,
     ):
-        self.my_log_entries.append(
-            {
-                LOG_KEYS.BLDG_FID: bldg_fid,
-                LOG_KEYS.BLDG_ELEMENT: bldg_element,
-                LOG_KEYS.RETROFITTED_AREA: retrofitted_area,
-                LOG_KEYS.YEAR_OF_RETROFIT: year_of_retrofit,
-                LOG_KEYS.RETROFIT_TARGET: retrofit_target,
-                LOG_KEYS.COSTS: costs,
-                LOG_KEYS.NON_RENEWABLE_PEN: non_renewable_pen,
-                LOG_KEYS.CO2_EMISSION: co2_emission,
-                LOG_KEYS.OLD_CONSTRUCTION_NAME: old_construction_name,
-                LOG_KEYS.NEW_CONSTRUCTION_NAME: new_construction_name,
-            }
-        )
+        self._columns[LOG_KEYS.BLDG_FID].append(bldg_fid)
+        self._columns[LOG_KEYS.BLDG_ELEMENT].append(bldg_element.name if bldg_element is not None else None)
+        self._columns[LOG_KEYS.YEAR_OF_RETROFIT].append(year_of_retrofit if year_of_retrofit is not None else _NO_YEAR)
+        self._columns[LOG_KEYS.RETROFIT_TARGET].append(retrofit_target)
+        self._columns[LOG_KEYS.OLD_CONSTRUCTION_NAME].append(old_construction_name)
+        self._columns[LOG_KEYS.NEW_CONSTRUCTION_NAME].append(new_construction_name)
+        for key, value in zip(_QUANTITY_COLUMNS, [retrofitted_area, costs, non_renewable_pen, co2_emission]):
+            self._columns[key].append(self._to_magnitude(key, value))
+        self._flush_if_chunk_full()
+
+    def __len__(self) -> int:
+        return self._nr_of_flushed_entries + len(self._columns[LOG_KEYS.BLDG_FID])
+
+    def get_units(self) -> Dict[str, Optional[str]]:
+        """:return: unit of the columns holding quantities, None if no value was logged for the column"""
+        return {key.value: unit for key, unit in self._units.items()}
 
     def was_construction_retrofitted_in(self, year: int, bldg_fid: int = None) -> bool:
-        if not self.my_log_entries:
+        if len(self) == 0:
             return False
+        log_as_df = self.convert_to_df() if self._nr_of_flushed_chunks > 0 else None
+        fids = log_as_df[LOG_KEYS.BLDG_FID.value] if log_as_df is not None else self._columns[LOG_KEYS.BLDG_FID]
+        years = log_as_df[LOG_KEYS.YEAR_OF_RETROFIT.value].fillna(_NO_YEAR) if log_as_df is not None else self._columns[LOG_KEYS.YEAR_OF_RETROFIT]
         if not bldg_fid:
-            try:
-                bldg_fid = self.my_log_entries[0][LOG_KEYS.BLDG_FID]
-            except KeyError:
-                return False
-            assert all([e[LOG_KEYS.BLDG_FID] == bldg_fid for e in self.my_log_entries]), "no bldg fid passed to but log has entries from multiple buildings"
+            bldg_fid = fids[0]
+            assert all([fid == bldg_fid for fid in fids]), "no bldg fid passed to but log has entries from multiple buildings"
 
         # TODO add more criteria to only get constructional retrofit when log is extended for system retrofit
-        any_construction_retrofit_measure = any([entry[LOG_KEYS.YEAR_OF_RETROFIT] == year and entry[LOG_KEYS.BLDG_FID] == bldg_fid for entry in self.my_log_entries])
+        any_construction_retrofit_measure = any([entry_year == year and entry_fid == bldg_fid for entry_year, entry_fid in zip(years, fids)])
         return any_construction_retrofit_measure
 
-    def append_log(self, ret_log_to_append):
-        self.my_log_entries + ret_log_to_append.my_log_entries
+    def append_log(self, ret_log_to_append: "RetrofitLog") -> None:
+        """
+        Append all entries of the given log to this log. Values of columns holding quantities are converted to the units of this log.
+        """
+        for chunk in ret_log_to_append._iter_flushed_chunks():
+            self._append_columns(chunk, ret_log_to_append._units)
+        self._append_columns(ret_log_to_append._columns, ret_log_to_append._units)
+
+    def enable_flush_to_parquet(self, folder: Union[str, Path], chunk_size: int = 100000) -> None:
+        """
+        From now on, whenever chunk_size entries are in memory they are written to a new Parquet file in the given folder and
+        removed from memory. The folder can be read as a whole, e.g. with pandas.read_parquet(folder).
+        Methods accessing all entries, e.g. convert_to_df, do read the flushed chunks back from disk.
+
+        :param folder: folder to write the chunks to, created if it does not exist. Existing chunk files are overwritten.
+        :param chunk_size: number of log entries per Parquet file
+        """
+        _check_pyarrow_available()
+        assert chunk_size > 0, "chunk size must be at least one"
+        os.makedirs(folder, exist_ok=True)
+        self._flush_folder = str(folder)
+        self._flush_chunk_size = chunk_size
+        self._flush_if_chunk_full()
+
+    def flush(self) -> None:
+        """
+        Write all entries held in memory to the chunk folder, see enable_flush_to_parquet().
+        """
+        assert self._flush_folder is not None, "call enable_flush_to_parquet before flush"
+        if len(self._columns[LOG_KEYS.BLDG_FID]) > 0:
+            _write_parquet(self._columns_to_df(self._columns), self.get_units(), self._get_chunk_path(self._nr_of_flushed_chunks))
+            self._nr_of_flushed_chunks += 1
+            self._nr_of_flushed_entries += len(self._columns[LOG_KEYS.BLDG_FID])
+            self._clear_columns()
 
     def save(self, filepath: Union[str, Path]) -> None:
         """
-        Save the retrofit log as a csv.
+        Save the retrofit log as a csv. The unit of the columns holding quantities is added to the column name, e.g. "costs [CHF]".
 
         :param filepath: filename with full path to write retrofit log to
         :type filepath: Union[str, path]
         """
-        if self.my_log_entries:
+        if len(self) > 0:
             log_as_df = self.convert_to_df()
+            log_as_df.columns = [f"{col} [{self._units[LOG_KEYS(col)]}]" if LOG_KEYS(col) in self._units else col for col in log_as_df.columns]
             log_as_df.to_csv(filepath)
         else:
             logging.getLogger(__name__).info("did not write retrofit log because it is empty")
 
+    def save_parquet(self, filepath: Union[str, Path]) -> None:
+        """
+        Save the retrofit log to one Parquet file, chunk by chunk. Columns are as for convert_to_df(), the units of the
+        columns holding quantities are saved as json in the file metadata under key cesarp_retrofit_log_units.
+        Requires pyarrow.
+
+        :param filepath: filename with full path to write retrofit log to
+        """
+        _check_pyarrow_available()
+        if len(self) == 0:
+            logging.getLogger(__name__).info("did not write retrofit log because it is empty")
+            return
+        units = self.get_units()
+        writer = None
+        try:
+            writer = pyarrow.parquet.ParquetWriter(str(filepath), _get_arrow_schema(units))
+            for chunk in itertools.chain(self._iter_flushed_chunks(), [self._columns]):
+                if len(chunk[LOG_KEYS.BLDG_FID]) > 0:
+                    writer.write_table(_df_to_arrow_table(self._columns_to_df(chunk), units))
+        finally:
+            if writer is not None:
+                writer.close()
+
     def convert_to_df(self) -> pd.DataFrame:
         """
-        :return: the retrofit log as a dataframe. Each retrofit measure as a row, columns are the entries of LOG_KEYS enum
+        :return: the retrofit log as a dataframe. Each retrofit measure as a row, columns are the entries of LOG_KEYS enum. Building element is
+                 given as the name of the BuildingElement enum member. Columns holding quantities contain the magnitudes, units see get_units() or attribute "units" of the dataframe.
         :rtype: pd.DataFrame
         """
-        log_as_df = pd.DataFrame(self.my_log_entries)
-        log_as_df.columns = [log_key.value for log_key in LOG_KEYS]
+        chunks = [self._columns_to_df(chunk) for chunk in self._iter_flushed_chunks()]
+        chunks.append(self._columns_to_df(self._columns))
+        log_as_df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+        log_as_df.attrs["units"] = self.get_units()
         return log_as_df
 
     def get_sum_of_costs_and_emissions(self) -> Dict[str, pint.Quantity]:
@@ -128,5 +230,134 @@ class RetrofitLog:
         :return: pandas Series with sum of costs and emission, as described above
         :rtype: Dict[str, pint.Quantity]
         """
+        ureg = pint.get_application_registry()
         ret_log_as_df = self.convert_to_df()
-        return ret_log_as_df[[LOG_KEYS.COSTS.value, LOG_KEYS.CO2_EMISSION.value, LOG_KEYS.NON_RENEWABLE_PEN.value]].apply(sum)
+        sum_keys = [LOG_KEYS.COSTS, LOG_KEYS.CO2_EMISSION, LOG_KEYS.NON_RENEWABLE_PEN]
+        sums = np.empty(len(sum_keys), dtype=object)  # filled element wise, otherwise pint strips the units
+        for idx, key in enumerate(sum_keys):
+            sums[idx] = ureg.Quantity(ret_log_as_df[key.value].sum(), self._units[key])
+        return pd.Series(sums, index=[key.value for key in sum_keys])
+
+    @property
+    def my_log_entries(self) -> List[Dict[LOG_KEYS, Any]]:
+        """
+        Log entries as one dict per retrofit measure, as the log was stored in earlier versions. Prefer convert_to_df().
+        """
+        ureg = pint.get_application_registry()
+        log_as_df = self.convert_to_df()
+        entries = []
+        for row in log_as_df.itertuples(index=False):
+            entry = {key: value for key, value in zip(LOG_KEYS, row)}
+            entry[LOG_KEYS.BLDG_ELEMENT] = BuildingElement[entry[LOG_KEYS.BLDG_ELEMENT]] if entry[LOG_KEYS.BLDG_ELEMENT] is not None else None
+            entry[LOG_KEYS.YEAR_OF_RETROFIT] = int(entry[LOG_KEYS.YEAR_OF_RETROFIT]) if not pd.isna(entry[LOG_KEYS.YEAR_OF_RETROFIT]) else None
+            for key in _QUANTITY_COLUMNS:
+                entry[key] = ureg.Quantity(entry[key], self._units[key]) if not math.isnan(entry[key]) else None
+            entries.append(entry)
+        return entries
+
+    @my_log_entries.setter
+    def my_log_entries(self, entries: List[Dict[Any, Any]]) -> None:
+        # used when restoring logs saved with a version storing the log as a list of dicts
+        self.__init__()  # type: ignore
+        for entry in entries:
+            entry_by_key = {LOG_KEYS(key) if not isinstance(key, LOG_KEYS) else key: value for key, value in entry.items()}
+            values: List[Any] = [entry_by_key.get(key, None) for key in LOG_KEYS]
+            self.log_retrofit_measure(*values)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "columns": {key.value: list(values) for key, values in self._columns.items()},
+            "units": {key.value: unit for key, unit in self._units.items()},
+            "flush_folder": self._flush_folder,
+            "flush_chunk_size": self._flush_chunk_size,
+            "nr_of_flushed_chunks": self._nr_of_flushed_chunks,
+            "nr_of_flushed_entries": self._nr_of_flushed_entries,
+        }
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "RetrofitLog":
+        # the copy holds all entries in memory and does not flush, otherwise it would write its chunks over the ones of this log
+        the_copy = RetrofitLog()
+        the_copy.append_log(self)
+        memo[id(self)] = the_copy
+        return the_copy
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        if "my_log_entries" in state:
+            self.my_log_entries = state["my_log_entries"]
+            return
+        self._columns = {key: _new_column(typecode, state["columns"][key.value]) for key, typecode in _COLUMN_TYPES.items()}
+        self._units = {key: state["units"][key.value] for key in _QUANTITY_COLUMNS}
+        self._flush_folder = state["flush_folder"]
+        self._flush_chunk_size = state["flush_chunk_size"]
+        self._nr_of_flushed_chunks = state["nr_of_flushed_chunks"]
+        self._nr_of_flushed_entries = state["nr_of_flushed_entries"]
+
+    def _to_magnitude(self, key: LOG_KEYS, value: Optional[pint.Quantity]) -> float:
+        if value is None:
+            return math.nan
+        if self._units[key] is None:
+            self._units[key] = str(value.units)
+        return value.to(self._units[key]).m
+
+    def _append_columns(self, columns: Dict[LOG_KEYS, Any], units: Dict[LOG_KEYS, Optional[str]]) -> None:
+        for key in LOG_KEYS:
+            if key in _QUANTITY_COLUMNS and units[key] is not None:
+                if self._units[key] is None:
+                    self._units[key] = units[key]
+                factor = pint.get_application_registry().Quantity(1, units[key]).to(self._units[key]).m
+                self._columns[key].extend(value * factor for value in columns[key])
+            else:
+                self._columns[key].extend(columns[key])
+        self._flush_if_chunk_full()
+
+    def _flush_if_chunk_full(self) -> None:
+        if self._flush_chunk_size is not None and len(self._columns[LOG_KEYS.BLDG_FID]) >= self._flush_chunk_size:
+            self.flush()
+
+    def _clear_columns(self) -> None:
+        self._columns = {key: _new_column(typecode) for key, typecode in _COLUMN_TYPES.items()}
+
+    def _iter_flushed_chunks(self):
+        for chunk_nr in range(self._nr_of_flushed_chunks):
+            chunk_df = pd.read_parquet(self._get_chunk_path(chunk_nr))
+            yield {key: chunk_df[key.value].fillna(_NO_YEAR).astype(int).tolist() if key == LOG_KEYS.YEAR_OF_RETROFIT else chunk_df[key.value].tolist() for key in LOG_KEYS}
+
+    def _get_chunk_path(self, chunk_nr: int) -> str:
+        return os.path.join(str(self._flush_folder), _PARQUET_CHUNK_FILE_PATTERN.format(chunk_nr))
+
+    @staticmethod
+    def _columns_to_df(columns: Dict[LOG_KEYS, Any]) -> pd.DataFrame:
+        data = {}
+        for key, typecode in _COLUMN_TYPES.items():
+            if key == LOG_KEYS.YEAR_OF_RETROFIT:
+                data[key.value] = pd.array([year if year != _NO_YEAR else None for year in columns[key]], dtype="Int64")
+            elif typecode == "q":
+                data[key.value] = pd.array(list(columns[key]), dtype="int64")
+            elif typecode == "d":
+                data[key.value] = pd.array(list(columns[key]), dtype="float64")
+            else:
+                data[key.value] = pd.Series(list(columns[key]), dtype=object)
+        return pd.DataFrame(data)
+
+
+def _new_column(typecode: Optional[str], values: Iterable[Any] = ()) -> Any:
+    return array(typecode, values) if typecode is not None else list(values)
+
+
+def _check_pyarrow_available() -> None:
+    if "pyarrow" not in globals():
+        raise ModuleNotFoundError("writing the retrofit log to Parquet requires pyarrow, please install it (e.g. with extra parquet of cesar-p)")
+
+
+def _get_arrow_schema(units: Dict[str, Optional[str]]):
+    arrow_types = {"q": pyarrow.int64(), "d": pyarrow.float64(), None: pyarrow.string()}
+    fields = [pyarrow.field(key.value, arrow_types[typecode]) for key, typecode in _COLUMN_TYPES.items()]
+    return pyarrow.schema(fields, metadata={_PARQUET_UNITS_METADATA_KEY: json.dumps(units).encode()})
+
+
+def _df_to_arrow_table(log_as_df: pd.DataFrame, units: Dict[str, Optional[str]]):
+    return pyarrow.Table.from_pandas(log_as_df, schema=_get_arrow_schema(units), preserve_index=False)
+
+
+def _write_parquet(log_as_df: pd.DataFrame, units: Dict[str, Optional[str]], filepath: str) -> None:
+    pyarrow.parquet.write_table(_df_to_arrow_table(log_as_df, units), filepath)
@@ -46,6 +46,7 @@ class/module                                                                 des
 ============================================================================ ===========================================================
 :py:class:`cesarp.retrofit.RetrofitLog`                                      This class is used to keep track of retrofit measures (e.g. by BuildingElementsRetrofitter).
                                                                              Each change of a building element is logged along with the area, costs for retrofit and embodied emissions.
+                                                                             Entries are stored column wise and can be written to Parquet files in chunks (requires pyarrow).
 
 :py:class:`cesarp.retrofit.BuildingElementsRetrofitter`                      Responsible for performing the retrofit for specific building and building element
 
@@ -20,7 +20,8 @@
 # Contact: https://www.empa.ch/web/s313
 #
 import pint
-from typing import Dict, Any, Optional
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
 import logging
 
 import cesarp.common
@@ -36,48 +37,60 @@ class ConstructionRetrofitCosts:
         self._cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)
         self.ureg = ureg
         self.insulation_cost_lookup = retrofit_input_parser.read_insulation_costs(self._cfg["INSULATION_COST_LOOKUP"], ureg)
+        self._insulation_cost_tables = self._compile_insulation_cost_tables()
         self._window_cost_lookup = retrofit_input_parser.read_window_costs(self._cfg["WINDOW_COST_LOOKUP"], ureg)
         self.logger = logging.getLogger(__name__)
 
-    def _get_cost_for_layer_retrofit(self, bldg_elem: BuildingElement, layer_function: LayerFunction, insulation_thickness: pint.Quantity):
+    def _compile_insulation_cost_tables(self) -> Dict[Tuple[BuildingElement, LayerFunction], Tuple[np.ndarray, np.ndarray]]:
+        """
+        Convert the insulation cost lookup into sorted arrays of thickness in m and costs in CHF/m2 per building element and
+        layer function, with an entry for 0 costs at thickness 0 prepended. If several cost entries match, the first one is used.
+        """
+        tables: Dict[Tuple[BuildingElement, LayerFunction], Tuple[np.ndarray, np.ndarray]] = {}
+        for retrofit_cost in self.insulation_cost_lookup:
+            if not retrofit_cost.cost_per_thickness:
+                continue
+            thickness_in_m = np.array([thickness.to(self.ureg.m).m for thickness in retrofit_cost.cost_per_thickness.keys()])
+            costs_chf_m2 = np.array([costs.to(self.ureg.CHF / self.ureg.m**2).m for costs in retrofit_cost.cost_per_thickness.values()])
+            order = np.argsort(thickness_in_m, kind="stable")
+            table = (np.concatenate(([0.0], thickness_in_m[order])), np.concatenate(([0.0], costs_chf_m2[order])))
+            for bldg_elem in retrofit_cost.applicable_to:
+                tables.setdefault((bldg_elem, retrofit_cost.layer_function), table)
+        return tables
+
+    def get_costs_for_layer_retrofits(self, bldg_elem: BuildingElement, layer_function: LayerFunction, insulation_thicknesses: pint.Quantity) -> pint.Quantity:
         """
-        Go through the cost table and find costs matching for the passed bldg element and layer function.
-        Return the costs for matching layer thickness or interpolate if necessary.
+        Costs for retrofit of layers with the given function of the passed bldg element, for many thicknesses at once.
+        Costs for thicknesses between the entries of the cost table are interpolated linearly.
         Extrapolation:
         - between thickness 0 and first entry assuming 0 costs for thickness 0.
         - for thickness bigger than the last entry, extrapolate with the costs/m of the last entry (assuming linear growth in costs)
 
+        :param bldg_elem: BuildingElement for which to get retrofit costs
+        :param layer_function: function of the layers that got retrofitted
+        :param insulation_thicknesses: thicknesses of added insulation, scalar or array quantity
+        :return: costs for retrofit in CHF/m2, same shape as insulation_thicknesses
+        """
+        try:
+            (thickness_table, costs_table) = self._insulation_cost_tables[(bldg_elem, layer_function)]
+        except KeyError:
+            raise Exception(f"No cost information found for {bldg_elem.name} {layer_function.name}")
+        thickness_in_m = np.asarray(insulation_thicknesses.to(self.ureg.m).m, dtype=float)
+        costs = np.interp(thickness_in_m, thickness_table, costs_table)
+        costs = np.where(thickness_in_m > thickness_table[-1], thickness_in_m * costs_table[-1] / thickness_table[-1], costs)
+        return costs * self.ureg.CHF / self.ureg.m**2
+
+    def _get_cost_for_layer_retrofit(self, bldg_elem: BuildingElement, layer_function: LayerFunction, insulation_thickness: pint.Quantity):
+        """
+        Return the costs for matching layer thickness or interpolate if necessary, see get_costs_for_layer_retrofits()
+
         :param bldg_elem: BuildingElement for which to get retrofit costs
         :param layer_function: function of the layer that got retrofitted
         :param insulation_thickness: thickness of added insulation
-        :return: costs for retrofit in CHF/m2, returns 0 if no matching cost entry was found
+        :return: costs for retrofit in CHF/m2, raises Exception if no matching cost entry was found
         """
-        return_unit_chf_m2 = self.ureg.CHF / self.ureg.m**2
-        insulation_thickness_in_m = insulation_thickness.to(self.ureg.m)
-        for retrofit_cost in self.insulation_cost_lookup:
-            if retrofit_cost.layer_function == layer_function and bldg_elem in retrofit_cost.applicable_to:
-                last_thickness_in_m = 0 * self.ureg.m
-                last_costs = 0 * self.ureg.CHF / self.ureg.m**2
-                for thickness_entry, current_costs in retrofit_cost.cost_per_thickness.items():
-                    current_thickness_in_m = thickness_entry.to(self.ureg.m)
-                    if insulation_thickness_in_m == current_thickness_in_m:
-                        return current_costs.to(return_unit_chf_m2)
-                    if insulation_thickness_in_m > thickness_entry.to(self.ureg.m):
-                        last_thickness_in_m = current_thickness_in_m
-                        last_costs = current_costs
-                    else:
-                        delta_thickness = current_thickness_in_m - last_thickness_in_m
-                        delta_costs = current_costs - last_costs
-                        delta_costs_per_m = delta_costs / delta_thickness
-                        delta_costs = delta_costs_per_m * (insulation_thickness_in_m - last_thickness_in_m)
-                        costs = last_costs + delta_costs
-                        return costs.to(return_unit_chf_m2)
-                if last_thickness_in_m.m != 0:
-                    cost_per_m = last_costs / last_thickness_in_m
-                    return (cost_per_m * insulation_thickness_in_m).to(return_unit_chf_m2)
-
-        # no matching cost entry was found
-        raise Exception(f"No cost information found for {bldg_elem.name} {layer_function.name}")
+        costs = self.get_costs_for_layer_retrofits(bldg_elem, layer_function, insulation_thickness)
+        return float(costs.m) * costs.u
 
     def get_costs_for_construction_retrofit(self, constr: Construction):
         """
@@ -19,8 +19,11 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
-from typing import Dict, Any, List, Iterable, Optional
+from typing import Dict, Any, List, Iterable, Optional, Tuple
 import logging
+import multiprocessing.pool
+import numpy as np
+import pandas as pd
 import pint
 from dataclasses import dataclass
 
@@ -31,8 +34,11 @@ from cesarp.model.EnergySource import EnergySource
 from cesarp.model.BldgType import BldgType
 from cesarp.model.BuildingElement import BuildingElement
 from cesarp.model.BuildingModel import BuildingModel
+from cesarp.model.BuildingConstruction import BuildingConstruction
+from cesarp.model.BldgShape import BldgShapeDetailed
 from cesarp.results.EnergyDemandSimulationResults import EnergyDemandSimulationResults
-from cesarp.emissons_cost.OperationalEmissionsAndCosts import OperationalEmissionsAndCosts
+from cesarp.emissons_cost.OperationalEmissionsAndCosts import SPECIFIC_ENERGY_DEMAND_UNIT
+from cesarp.emissons_cost.OperationalEmissionsAndCostsVectorized import OperationalEmissionsAndCostsVectorized
 from cesarp.energy_strategy.RetrofitRates import RetrofitRates
 
 from cesarp.retrofit.RetrofitLog import RetrofitLog
@@ -73,9 +79,7 @@ class EnergyPerspective2050BldgElementsRetrofitter:
     To carry out the retrofits the cesarp.retrofit.BuildingElementsRetrofitter is used.
 
     Retrofit strategy only applied so far for residential buildings!
-    Emission and costs for retrofit can only be calculated for rectangualr footprint shapes, as the area of the groundfloor and
-    roof area are required and calculating the area of polygon area is not yet implemented (e.g. one could use shaply or another lib to do that).
-    In case of non-rectangular footprint shape, retrofit emission and costs for roof and groundfloor are set to None in RetrofitLog
+    Emission and costs for retrofit are calculated for arbitrary polygonal footprint shapes, see cesarp.geometry.polygon_metrics.
 
     The percentages of full and partial retrofit depending on building age and retrofit year/period are configurable
     through input files and are located in the cesarp.energy_strategy, as they relate to the energy strategy.
@@ -88,6 +92,11 @@ class EnergyPerspective2050BldgElementsRetrofitter:
     year_of_construction in the range of 2001-2005, the assigned retrofit rates for age class 2001-2005 are ignored.
     """
 
+    _COL_BLDG_TYPE = "bldg_type"
+    _COL_YEAR_OF_CONSTRUCTION = "year_of_construction"
+    _COL_IS_CANDIDATE = "is_candidate"
+    _TOTAL_DEMAND_UNIT = "kW * h / year"
+
     def __init__(self, ureg: pint.UnitRegistry, custom_config: Optional[Dict[str, Any]] = None):
         """
         :param ureg:
@@ -95,7 +104,8 @@ class EnergyPerspective2050BldgElementsRetrofitter:
         :param custom_config:
         """
         self._cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)
-        self._op_emissions_calculator = OperationalEmissionsAndCosts(ureg, custom_config)
+        self._ureg = ureg
+        self._op_emissions_calculator = OperationalEmissionsAndCostsVectorized(ureg, custom_config)
         self._energy_target = EnergyTargetLookup(self._cfg["ENERGY_TARGETS_LOOKUP_FILE"], ureg)
         self._supported_bldg_types = [BldgType.MFH, BldgType.SFH]
         self._retrofit_rates_accessor: RetrofitRates = RetrofitRates(custom_config)
@@ -109,6 +119,7 @@ class EnergyPerspective2050BldgElementsRetrofitter:
         year_of_retrofit: int,
         bldg_containers_current: Dict[int, BuildingContainer],
         bldg_containers_prev_period: Dict[int, BuildingContainer],
+        worker_pool: Optional[multiprocessing.pool.Pool] = None,
     ) -> RetrofitLog:
         """
         Retrofit building construction.
@@ -120,10 +131,16 @@ class EnergyPerspective2050BldgElementsRetrofitter:
         used, make sure that if your retrofit strategy involves system retrofit to perform the system retrofit before
         calling this method.
 
+        The buildings to retrofit are selected first, based on a table with the model summaries and the operational emissions
+        of all buildings. Then the retrofit is applied to the selected buildings, in parallel if a worker pool is passed and
+        at least PARALLEL_RETROFIT_MIN_NR_OF_BLDGS buildings are selected. In that case, each worker uses its own
+        BuildingElementsRetrofitter with default settings, thus any changes to the retrofitter of this instance are not considered.
+
         :param bldg_containers_current: dictionary with key fid, value the building container of the bldg for the
                                         current retrofit period, no simulation results expected
         :param bldg_containers_prev_period: dictionary with key fid, value the building container of the bldg for the
                                             previos retrofit period, should include simulation results and retrofit log
+        :param worker_pool: optional process pool used to apply the retrofit measures
         :return: retrofit log for including retrofit measures for all buildings
         """
         retrofit_categories_by_bt = self._define_nr_of_bldgs_to_retrofit(year_of_retrofit, bldg_containers_current.values())
@@ -132,41 +149,31 @@ class EnergyPerspective2050BldgElementsRetrofitter:
 
         self._per_elem_construction_retrofitter.set_year_of_retrofit(year_of_retrofit)
 
-        for fid, container_current in bldg_containers_current.items():
-            self._per_elem_construction_retrofitter.reset_retrofit_log()
-            model_current = container_current.get_bldg_model()
-
-            if (
-                model_current.bldg_construction.installation_characteristics.e_carrier_dhw is not None
-                and model_current.bldg_construction.installation_characteristics.e_carrier_heating is not None
-            ):
-                container_prev_sim = bldg_containers_prev_period[fid]
-
-                energy_demand_last_period = container_prev_sim.get_energy_demand_sim_res()
-                emission_target_reached = self._check_emissions_below_target(
-                    energy_demand_last_period,
-                    model_current.bldg_construction.installation_characteristics.e_carrier_dhw,
-                    model_current.bldg_construction.installation_characteristics.e_carrier_heating,
-                    model_current.site.simulation_year,
-                )
-                retrofitted_in_last_period = self._check_retrofitted_in_last_period(container_prev_sim.get_bldg_model().site.simulation_year, container_prev_sim.get_retrofit_log())
-
-                if not emission_target_reached and not retrofitted_in_last_period:
-                    for ret_category in retrofit_categories_by_bt[model_current.bldg_type]:
-                        if ret_category.constr_ac.isInClass(model_current.year_of_construction):
-                            if not ret_category.is_target_nr_of_bldgs_reached():
-                                self._do_retrofit(model_current, ret_category.bldg_elems_to_retrofit)
-                                ret_category.increment_retrofitted_cnt()
-                                break
-
-                if container_current.has_retrofit_log():
-                    container_current.get_retrofit_log().append_log(self._per_elem_construction_retrofitter.retrofit_log)
-                else:
-                    container_current.set_retrofit_log(self._per_elem_construction_retrofitter.retrofit_log)
-
-                self._all_buildings_retrofit_log.append_log(self._per_elem_construction_retrofitter.retrofit_log)
+        candidates = self._get_retrofit_candidates(bldg_containers_current, bldg_containers_prev_period)
+        bldg_elems_to_retrofit_per_fid = self._select_bldgs_to_retrofit(candidates, retrofit_categories_by_bt)
+
+        if worker_pool is not None and len(bldg_elems_to_retrofit_per_fid) >= self._cfg["PARALLEL_RETROFIT_MIN_NR_OF_BLDGS"]:
+            retrofit_log_per_fid = self._do_retrofits_in_parallel(year_of_retrofit, bldg_containers_current, bldg_elems_to_retrofit_per_fid, worker_pool)
+        else:
+            retrofit_log_per_fid = {}
+            for fid in candidates.index:
+                self._per_elem_construction_retrofitter.reset_retrofit_log()
+                if fid in bldg_elems_to_retrofit_per_fid:
+                    model = bldg_containers_current[fid].get_bldg_model()
+                    self._do_retrofit(model, bldg_elems_to_retrofit_per_fid[fid])
+                    # make sure that the retrofitted model is kept, e.g. for containers loading the model only on access
+                    bldg_containers_current[fid].set_bldg_model(model)
+                retrofit_log_per_fid[fid] = self._per_elem_construction_retrofitter.retrofit_log
+
+        for fid in candidates.index:
+            container_current = bldg_containers_current[fid]
+            bldg_retrofit_log = retrofit_log_per_fid.get(fid, RetrofitLog())
+            if container_current.has_retrofit_log():
+                container_current.get_retrofit_log().append_log(bldg_retrofit_log)
             else:
-                self._logger.warn(f"energy carrier for DHW and Heating not available for {fid}, thus that building was NOT considered for retrofit")
+                container_current.set_retrofit_log(bldg_retrofit_log)
+
+            self._all_buildings_retrofit_log.append_log(bldg_retrofit_log)
 
         return self._all_buildings_retrofit_log
 
@@ -244,48 +251,182 @@ class EnergyPerspective2050BldgElementsRetrofitter:
 
         nr_of_bldgs = {bt: {ac: 0 for ac in age_buckets} for bt in self._supported_bldg_types}
         for bldg_c in bldg_containers:
-            model = bldg_c.get_bldg_model()
+            model_summary = bldg_c.get_bldg_model_summary()
             for bucket in age_buckets:
-                if bucket.isInClass(model.year_of_construction):
-                    if model.bldg_type not in self._supported_bldg_types:
-                        raise Exception(f"{__file__} does not support bldg type {model.bldg_type} of bldg fid {model.fid}")
-                    nr_of_bldgs[model.bldg_type][bucket] += 1
+                if bucket.isInClass(model_summary.year_of_construction):
+                    if model_summary.bldg_type not in self._supported_bldg_types:
+                        raise Exception(f"{__file__} does not support bldg type {model_summary.bldg_type} of bldg fid {model_summary.fid}")
+                    nr_of_bldgs[model_summary.bldg_type][bucket] += 1
                     break
 
         return nr_of_bldgs
 
+    def _get_retrofit_candidates(self, bldg_containers_current: Dict[int, BuildingContainer], bldg_containers_prev_period: Dict[int, BuildingContainer]) -> pd.DataFrame:
+        """
+        :return: table with one row per building having dhw and heating energy carrier defined, index is the fid and columns
+                 bldg_type, year_of_construction, is_candidate - True if the building is not below the emission targets and was
+                 not retrofitted in the last period
+        """
+        summaries = []
+        dhw_carriers: List[EnergySource] = []
+        heating_carriers: List[EnergySource] = []
+        demands_prev_period = []
+        retrofitted_in_last_period = []
+        for fid, container_current in bldg_containers_current.items():
+            summary = container_current.get_bldg_model_summary()
+            if summary.e_carrier_dhw is None or summary.e_carrier_heating is None:
+                self._logger.warn(f"energy carrier for DHW and Heating not available for {fid}, thus that building was NOT considered for retrofit")
+                continue
+            container_prev_sim = bldg_containers_prev_period[fid]
+            summaries.append(summary)
+            dhw_carriers.append(summary.e_carrier_dhw)
+            heating_carriers.append(summary.e_carrier_heating)
+            demands_prev_period.append(container_prev_sim.get_energy_demand_sim_res())
+            retrofitted_in_last_period.append(
+                self._check_retrofitted_in_last_period(container_prev_sim.get_bldg_model_summary().simulation_year, container_prev_sim.get_retrofit_log())
+            )
+
+        candidates = pd.DataFrame(
+            {
+                self._COL_BLDG_TYPE: [summary.bldg_type for summary in summaries],
+                self._COL_YEAR_OF_CONSTRUCTION: [summary.year_of_construction for summary in summaries],
+            },
+            index=pd.Index([summary.fid for summary in summaries], dtype=int),
+        )
+        if summaries:
+            emission_target_reached = self._check_emissions_below_target(
+                demands_prev_period,
+                dhw_carriers,
+                heating_carriers,
+                [summary.simulation_year for summary in summaries],
+            )
+        else:
+            emission_target_reached = np.zeros(0, dtype=bool)
+        candidates[self._COL_IS_CANDIDATE] = ~emission_target_reached & ~np.array(retrofitted_in_last_period, dtype=bool)
+        return candidates
+
+    def _select_bldgs_to_retrofit(self, candidates: pd.DataFrame, retrofit_categories_by_bt: Dict[BldgType, List[RetrofitCategoryDetails]]) -> Dict[int, List[BuildingElement]]:
+        """
+        Distribute the candidate buildings to the retrofit categories. Per building type and age class the candidates are assigned
+        in the order of the table to the retrofit categories of that age class, until the target number of buildings of each category is reached.
+        The retrofitted counter of the retrofit categories is updated.
+
+        :param candidates: table as returned by _get_retrofit_candidates
+        :param retrofit_categories_by_bt: retrofit categories as returned by _define_nr_of_bldgs_to_retrofit
+        :return: dict with the fids of the buildings to retrofit as key and the building elements to retrofit as value
+        """
+        bldg_elems_per_fid: Dict[int, List[BuildingElement]] = {}
+        is_candidate = candidates[self._COL_IS_CANDIDATE].to_numpy(dtype=bool)
+        yoc = candidates[self._COL_YEAR_OF_CONSTRUCTION].to_numpy()
+        fids = candidates.index.to_numpy()
+        not_yet_assigned = np.ones(len(candidates), dtype=bool)
+        for bldg_type, ret_categories in retrofit_categories_by_bt.items():
+            in_bldg_type = is_candidate & (candidates[self._COL_BLDG_TYPE] == bldg_type).to_numpy(dtype=bool)
+            categories_per_ac: Dict[AgeClass, List[RetrofitCategoryDetails]] = {}
+            for ret_category in ret_categories:
+                categories_per_ac.setdefault(ret_category.constr_ac, []).append(ret_category)
+            for age_class, categories_of_ac in categories_per_ac.items():
+                in_bucket = in_bldg_type & not_yet_assigned & age_class.isInClass(yoc)
+                fids_in_bucket = fids[in_bucket]
+                not_yet_assigned &= ~in_bucket
+                nr_of_bldgs_per_category = [max(category.target_nr_of_bldgs_to_retrofit - category.nr_of_bldgs_retrofitted, 0) for category in categories_of_ac]
+                category_ends = np.cumsum(nr_of_bldgs_per_category)
+                category_starts = category_ends - nr_of_bldgs_per_category
+                for category, start, end in zip(categories_of_ac, category_starts, category_ends):
+                    fids_for_category = fids_in_bucket[start:end]
+                    category.nr_of_bldgs_retrofitted += len(fids_for_category)
+                    for fid in fids_for_category:
+                        bldg_elems_per_fid[int(fid)] = category.bldg_elems_to_retrofit
+        return bldg_elems_per_fid
+
+    def _do_retrofits_in_parallel(
+        self,
+        year_of_retrofit: int,
+        bldg_containers: Dict[int, BuildingContainer],
+        bldg_elems_to_retrofit_per_fid: Dict[int, List[BuildingElement]],
+        worker_pool: multiprocessing.pool.Pool,
+    ) -> Dict[int, RetrofitLog]:
+        """
+        Retrofit the building constructions in the worker processes. Only construction and shape of the buildings are passed
+        to the workers, the retrofitted constructions are set to the building models afterwards.
+
+        :return: retrofit log per retrofitted building
+        """
+        models = {fid: bldg_containers[fid].get_bldg_model() for fid in bldg_elems_to_retrofit_per_fid.keys()}
+        fid_batches = np.array_split(np.array(list(models.keys())), worker_pool._processes)  # type: ignore
+        async_results = [
+            worker_pool.apply_async(
+                retrofit_bldg_constructions_batch,
+                (year_of_retrofit, {int(fid): (models[fid].bldg_construction, models[fid].bldg_shape, bldg_elems_to_retrofit_per_fid[fid]) for fid in batch}),
+            )
+            for batch in fid_batches
+            if len(batch) > 0
+        ]
+        retrofit_log_per_fid = {}
+        for async_res in async_results:
+            for fid, (retrofitted_construction, bldg_retrofit_log) in async_res.get().items():
+                models[fid].bldg_construction = retrofitted_construction
+                # make sure that the retrofitted model is kept, e.g. for containers loading the model only on access
+                bldg_containers[fid].set_bldg_model(models[fid])
+                retrofit_log_per_fid[fid] = bldg_retrofit_log
+        return retrofit_log_per_fid
+
     def _do_retrofit(self, model: BuildingModel, elems_to_retrofit: List[BuildingElement]) -> None:
         self._per_elem_construction_retrofitter.set_bldg_elems_to_retrofit(elems_to_retrofit)
         self._per_elem_construction_retrofitter.retrofit_bldg_construction(model.fid, model.bldg_construction, model.bldg_shape)
 
     def _check_emissions_below_target(
         self,
-        energy_demand: EnergyDemandSimulationResults,
-        dhw_carrier: EnergySource,
-        heating_carrier: EnergySource,
-        year_for_emission_calc,
-    ):
+        energy_demands: List[EnergyDemandSimulationResults],
+        dhw_carriers: List[EnergySource],
+        heating_carriers: List[EnergySource],
+        years_for_emission_calc: List[int],
+    ) -> np.ndarray:
         """
-        Returns True if operational costs and emissions are below the required SIA target
+        Returns per building True if operational costs and emissions are below the required SIA target
         Translated from Matlab CESAR script constret_decision.m
         """
+
+        def as_array(values: List[pint.Quantity], unit: str) -> pint.Quantity:
+            return self._ureg.Quantity(np.array([value.to(unit).m for value in values], dtype=float), unit)
+
         op_emissions_costs = self._op_emissions_calculator.get_operational_emissions_and_costs(
-            specific_dhw_demand=energy_demand.specific_dhw_demand,
-            total_dhw_demand=energy_demand.tot_dhw_demand,
-            dhw_carrier=dhw_carrier,
-            specific_heating_demand=energy_demand.specific_heating_demand,
-            total_heating_demand=energy_demand.tot_dhw_demand,
-            heating_carrier=heating_carrier,
-            specific_electricity_demand=energy_demand.specific_electricity_demand,
-            total_electricity_demand=energy_demand.tot_electricity_demand,
-            sim_year=year_for_emission_calc,
+            specific_dhw_demand=as_array([demand.specific_dhw_demand for demand in energy_demands], SPECIFIC_ENERGY_DEMAND_UNIT),
+            total_dhw_demand=as_array([demand.tot_dhw_demand for demand in energy_demands], self._TOTAL_DEMAND_UNIT),
+            dhw_carriers=dhw_carriers,
+            specific_heating_demand=as_array([demand.specific_heating_demand for demand in energy_demands], SPECIFIC_ENERGY_DEMAND_UNIT),
+            total_heating_demand=as_array([demand.tot_dhw_demand for demand in energy_demands], self._TOTAL_DEMAND_UNIT),
+            heating_carriers=heating_carriers,
+            specific_electricity_demand=as_array([demand.specific_electricity_demand for demand in energy_demands], SPECIFIC_ENERGY_DEMAND_UNIT),
+            total_electricity_demand=as_array([demand.tot_electricity_demand for demand in energy_demands], self._TOTAL_DEMAND_UNIT),
+            sim_years=years_for_emission_calc,
         )
-        bldg_op_pen = op_emissions_costs.total_pen.to(self._energy_target.pen_unit)
-        bldg_op_co2 = op_emissions_costs.total_co2_emission.to(self._energy_target.co2_unit)
-        if bldg_op_pen.m <= self._energy_target.get_resi_op_pen_target(new_bldg=False).m and bldg_op_co2.m <= self._energy_target.get_resi_op_co2_target(new_bldg=False).m:
-            return True
-        return False
+        bldg_op_pen = op_emissions_costs.total_pen.to(self._energy_target.pen_unit).m
+        bldg_op_co2 = op_emissions_costs.total_co2_emission.to(self._energy_target.co2_unit).m
+        return (bldg_op_pen <= self._energy_target.get_resi_op_pen_target(new_bldg=False).m) & (bldg_op_co2 <= self._energy_target.get_resi_op_co2_target(new_bldg=False).m)
 
     def _check_retrofitted_in_last_period(self, last_period_year: int, last_sim_retrofit: RetrofitLog):
         # TODO should it really only look at the last year? (see issue 109 on gitlab)
         return last_sim_retrofit.was_construction_retrofitted_in(last_period_year)
+
+
+def retrofit_bldg_constructions_batch(
+    year_of_retrofit: int, constructions_to_retrofit: Dict[int, Tuple[BuildingConstruction, BldgShapeDetailed, List[BuildingElement]]]
+) -> Dict[int, Tuple[BuildingConstruction, RetrofitLog]]:
+    """
+    Method used to retrofit the constructions of a batch of buildings in a worker process, see EnergyPerspective2050BldgElementsRetrofitter.retrofit_site()
+    Module-Level method to be able to parallelize to mutliple processes.
+
+    :param year_of_retrofit: year of the retrofit period
+    :param constructions_to_retrofit: {fid: (building construction, building shape, building elements to retrofit)}
+    :return: {fid: (retrofitted building construction, retrofit log of the building)}
+    """
+    per_elem_construction_retrofitter = BuildingElementsRetrofitter(pint.get_application_registry())
+    per_elem_construction_retrofitter.set_year_of_retrofit(year_of_retrofit)
+    retrofitted = {}
+    for fid, (bldg_construction, bldg_shape, bldg_elems_to_retrofit) in constructions_to_retrofit.items():
+        per_elem_construction_retrofitter.reset_retrofit_log()
+        per_elem_construction_retrofitter.set_bldg_elems_to_retrofit(bldg_elems_to_retrofit)
+        per_elem_construction_retrofitter.retrofit_bldg_construction(fid, bldg_construction, bldg_shape)
+        retrofitted[fid] = (bldg_construction, per_elem_construction_retrofitter.retrofit_log)
+    return retrofitted
@@ -26,11 +26,13 @@ from typing import Dict
 
 import cesarp.common
 from cesarp.retrofit.energy_perspective_2050.EnergyPerspective2050BldgElementsRetrofitter import EnergyPerspective2050BldgElementsRetrofitter
+from cesarp.retrofit.energy_perspective_2050 import _default_config_file
 from cesarp.retrofit.RetrofitLog import RetrofitLog
 from cesarp.model.BuildingModel import BuildingModel
 from cesarp.manager.ProjectManager import ProjectManager
 
 RETROFIT_LOG_NAME = "retrofit_log_all_periods.csv"
+RETROFIT_LOG_PARQUET_FOLDER_NAME = "retrofit_log_all_periods_parquet"
 
 
 class EnergyPerspective2050RetrofitManager:
@@ -66,6 +68,7 @@ class EnergyPerspective2050RetrofitManager:
         self._proj_base_path = project_base_path
         self._proj_mgr = ProjectManager(base_config_path, project_base_path, fids_to_use=fids_to_use, unit_reg=ureg)
         base_config = cesarp.common.load_config_full(base_config_path)
+        self._cfg = cesarp.common.load_config_for_package(_default_config_file, "cesarp.retrofit.energy_perspective_2050", base_config)
         self._retrofitter = EnergyPerspective2050BldgElementsRetrofitter(ureg, base_config)
         assert list(weather_per_period.keys()) == self._retrofitter.get_retrofit_periods(), (
             f"periods used in weather file list {list(weather_per_period.keys())} do not match the ones of the "
@@ -100,20 +103,28 @@ class EnergyPerspective2050RetrofitManager:
         # retrofit needs energy demand from previous simulation to calculate emissions, thus run simulation for
         # before going to the next retrofit period
         self._proj_mgr.run_not_simulated_scenarios()
+        all_periods_retrofit_log = RetrofitLog()
+        if self._cfg["RETROFIT_LOG_PARQUET"]["ACTIVE"]:
+            all_periods_retrofit_log.enable_flush_to_parquet(self._proj_base_path / Path(RETROFIT_LOG_PARQUET_FOLDER_NAME), self._cfg["RETROFIT_LOG_PARQUET"]["CHUNK_SIZE"])
         # create and run scenario for each retrofit period
         for sim_year in retrofit_period_years[1:]:
             sz_name = str(sim_year)
             self._current_sim_period_year = sim_year
             self._proj_mgr.derive_scenario(prev_sz_name, sz_name, self._change_sim_year_for_model)
-            self._retrofitter.retrofit_site(
+            period_retrofit_log = self._retrofitter.retrofit_site(
                 sim_year,
                 self._proj_mgr.get_sim_mgr_for(sz_name).bldg_containers,
                 self._proj_mgr.get_sim_mgr_for(prev_sz_name).bldg_containers,
+                worker_pool=self._proj_mgr.get_worker_pool(),
             )
+            all_periods_retrofit_log.append_log(period_retrofit_log)
             self._proj_mgr.run_not_simulated_scenarios()
             prev_sz_name = sz_name
 
-        self._retrofitter.get_retrofit_log().save(str(self._proj_base_path / Path(RETROFIT_LOG_NAME)))
+        if self._cfg["RETROFIT_LOG_PARQUET"]["ACTIVE"]:
+            all_periods_retrofit_log.flush()
+        else:
+            all_periods_retrofit_log.save(str(self._proj_base_path / Path(RETROFIT_LOG_NAME)))
         return self._proj_mgr.collect_all_scenario_summaries(
             metadata_descr_project_summary=f"Retrofit sceanarios created with {__name__}. Simulation year and weather defined in configuarion is not used! "
             f"following weather files were used: {self._weather_per_period}. For other "
@@ -20,24 +20,30 @@
 # Contact: https://www.empa.ch/web/s313
 #
 import os
+from typing import Optional
 from cesarp.model.Site import Site
 from cesarp.site.SiteGroundTemperatureFactory import SiteGroundTemperatureFactory
+from cesarp.site.SiteRegistry import SiteRegistry
 import cesarp.common
 from cesarp.site import _default_config_file
 
 
 class SingleSiteFactory:
-    def __init__(self, weather_file_path, unit_reg, custom_config=None):
+    def __init__(self, weather_file_path, unit_reg, custom_config=None, site_registry: Optional[SiteRegistry] = None):
+        """
+        :param site_registry: registry the site is taken from, if None a new one is created
+        """
         if custom_config is None:
             custom_config = {}
         cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)
         if not os.path.isfile(weather_file_path):
             raise Exception(f"{weather_file_path} does not exist. please provide an existing file when initializing SingleSiteFactory")
-        self.the_site = Site(
+        self.site_registry = site_registry if site_registry is not None else SiteRegistry()
+        self.the_site: Site = self.site_registry.get_site(
             weather_file_path,
             SiteGroundTemperatureFactory(unit_reg, custom_config).get_ground_temperatures(),
             cfg["SIMULATION_YEAR"],
         )
 
     def get_site(self, bldg_fid):
-        return self.the_site
+        return self.site_registry.register(bldg_fid, self.the_site.weather_file_path, self.the_site.site_ground_temperatures, self.the_site.simulation_year)
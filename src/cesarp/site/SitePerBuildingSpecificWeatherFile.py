@@ -19,20 +19,32 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
-from typing import Dict
-import os
+from typing import Dict, Optional
 import logging
 from pathlib import Path
 from cesarp.model.Site import Site
 from cesarp.site.SiteGroundTemperatureFactory import SiteGroundTemperatureFactory
+from cesarp.site.SiteRegistry import SiteRegistry
 import cesarp.common
 from cesarp.site import _default_config_file
+from cesarp.weather.WeatherFileRegistry import WeatherFileRegistry
+from cesarp.common.CesarpException import CesarpException
 
 
 class SitePerBuildingSpecificWeatherFile:
-    def __init__(self, bldg_to_weather_file_mapping: Dict[int, str], weather_files_folder_path, unit_reg, custom_config=None):
+    def __init__(
+        self,
+        bldg_to_weather_file_mapping: Dict[int, str],
+        weather_files_folder_path,
+        unit_reg,
+        custom_config=None,
+        weather_registry: Optional[WeatherFileRegistry] = None,
+        site_registry: Optional[SiteRegistry] = None,
+    ):
         """
         :param bldg_to_weather_file_mapping: Dict mapping building fid to a weather file name
+        :param weather_registry: registry used to validate the weather files, if None a new one is created
+        :param site_registry: registry the sites are taken from, if None a new one is created
         """
         if custom_config is None:
             custom_config = {}
@@ -42,9 +54,13 @@ class SitePerBuildingSpecificWeatherFile:
         cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)
         self.simulation_year = cfg["SIMULATION_YEAR"]
         self._logger = logging.getLogger(__name__)
+        self.weather_registry = weather_registry if weather_registry is not None else WeatherFileRegistry(custom_config)
+        self.site_registry = site_registry if site_registry is not None else SiteRegistry()
 
-    def get_site(self, bldg_fid):
+    def get_site(self, bldg_fid) -> Site:
         weather_file_path = str(self.weather_files_folder_path / Path(self.bldg_to_weather_file_mapping[bldg_fid]))
-        if not os.path.exists(weather_file_path):
+        try:
+            self.weather_registry.resolve(weather_file_path)
+        except CesarpException:
             raise FileNotFoundError(f"{weather_file_path} does not exist. please provide an existing file for bldg_fid {bldg_fid} in the WEATHER_FILE_PER_BLDG_FILE")
-        return Site(weather_file_path, self.ground_temps, self.simulation_year)
+        return self.site_registry.register(bldg_fid, weather_file_path, self.ground_temps, self.simulation_year)
@@ -19,9 +19,10 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
-from typing import Dict, Protocol
+from typing import Dict, Optional, Protocol
 from cesarp.model.Site import Site
 from cesarp.site.SiteGroundTemperatureFactory import SiteGroundTemperatureFactory
+from cesarp.site.SiteRegistry import SiteRegistry
 from cesarp.weather.swiss_communities.SwissCommunityWeatherChooser import SwissCommunityWeatherChooser
 import cesarp.common
 from cesarp.site import _default_config_file
@@ -33,9 +34,10 @@ class WeahterChooserProtocol(Protocol):
 
 
 class SitePerSwissCommunityFactory:
-    def __init__(self, bldg_to_community_id_mapping: Dict[int, int], unit_reg, custom_config=None):
+    def __init__(self, bldg_to_community_id_mapping: Dict[int, int], unit_reg, custom_config=None, site_registry: Optional[SiteRegistry] = None):
         """
         :param bldg_to_community_id_mapping: Dict mapping building fid to a community name
+        :param site_registry: registry the sites are taken from, if None a new one is created
         """
         if custom_config is None:
             custom_config = {}
@@ -44,7 +46,14 @@ class SitePerSwissCommunityFactory:
         self.ground_temps = SiteGroundTemperatureFactory(unit_reg, custom_config).get_ground_temperatures()
         cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)
         self.simulation_year = cfg["SIMULATION_YEAR"]
+        self.site_registry = site_registry if site_registry is not None else SiteRegistry()
+        self._weather_file_per_community: Dict[int, str] = {}
 
-    def get_site(self, bldg_fid):
+    def get_site(self, bldg_fid) -> Site:
         community_id = self.bldg_to_community_mapping[bldg_fid]
-        return Site(self.weather_file_chooser.get_weather_file(community_id), self.ground_temps, self.simulation_year)
+        try:
+            weather_file = self._weather_file_per_community[community_id]
+        except KeyError:
+            weather_file = self.weather_file_chooser.get_weather_file(community_id)
+            self._weather_file_per_community[community_id] = weather_file
+        return self.site_registry.register(bldg_fid, weather_file, self.ground_temps, self.simulation_year)
@@ -0,0 +1,97 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+from typing import Dict, Hashable, List, Tuple
+import numpy as np
+import pint
+
+from cesarp.model.Site import Site
+from cesarp.model.SiteGroundTemperatures import SiteGroundTemperatures
+
+
+class SiteRegistry:
+    """
+    Interns Site objects, so that there is only one Site per distinct weather file, ground temperatures and simulation year.
+    Each Site gets an integer site id, per building the site id is stored. Building models created with sites from the registry
+    share the Site objects by reference, which saves memory and serialization size when creating many building models.
+
+    Site objects returned by the registry are shared, do not change them.
+    """
+
+    def __init__(self):
+        self._sites: List[Site] = []
+        self._site_id_per_key: Dict[Tuple[Hashable, ...], int] = {}
+        self._site_id_per_fid: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        """number of distinct sites"""
+        return len(self._sites)
+
+    def get_site(self, weather_file_path: str, site_ground_temperatures: SiteGroundTemperatures, simulation_year: int) -> Site:
+        """
+        :return: the Site with the passed parameters, created if there is none in the registry yet
+        """
+        return self._sites[self._get_site_id(weather_file_path, site_ground_temperatures, simulation_year)]
+
+    def register(self, bldg_fid: int, weather_file_path: str, site_ground_temperatures: SiteGroundTemperatures, simulation_year: int) -> Site:
+        """
+        Get the Site with the passed parameters and record it as the site of the building, replaces the site registered before for that building.
+
+        :return: the Site with the passed parameters
+        """
+        site_id = self._get_site_id(weather_file_path, site_ground_temperatures, simulation_year)
+        self._site_id_per_fid[bldg_fid] = site_id
+        return self._sites[site_id]
+
+    def get_site_id(self, bldg_fid: int) -> int:
+        return self._site_id_per_fid[bldg_fid]
+
+    def get_site_by_id(self, site_id: int) -> Site:
+        return self._sites[site_id]
+
+    def get_site_for_bldg(self, bldg_fid: int) -> Site:
+        return self._sites[self._site_id_per_fid[bldg_fid]]
+
+    def get_site_id_per_fid(self) -> Dict[int, int]:
+        return dict(self._site_id_per_fid)
+
+    def _get_site_id(self, weather_file_path: str, site_ground_temperatures: SiteGroundTemperatures, simulation_year: int) -> int:
+        key = (str(weather_file_path), _ground_temperatures_key(site_ground_temperatures), simulation_year)
+        try:
+            return self._site_id_per_key[key]
+        except KeyError:
+            self._sites.append(Site(weather_file_path, site_ground_temperatures, simulation_year))
+            site_id = len(self._sites) - 1
+            self._site_id_per_key[key] = site_id
+            return site_id
+
+
+def _ground_temperatures_key(ground_temps: SiteGroundTemperatures) -> Tuple[Hashable, ...]:
+    """:return: hashable representation of the values of the ground temperatures"""
+    return tuple(_quantity_key(value) for value in (ground_temps.building_surface, ground_temps.shallow, ground_temps.deep, ground_temps.ground_temp_per_month))
+
+
+def _quantity_key(value) -> Tuple[Hashable, ...]:
+    if isinstance(value, pint.Quantity):
+        return (tuple(np.atleast_1d(value.m).tolist()), str(value.u))
+    if isinstance(value, (list, tuple)):
+        return tuple(_quantity_key(entry) for entry in value)
+    return (value,)
@@ -43,6 +43,12 @@ class/module                                                            descript
 :py:class:`cesarp.site.SitePerSwissCommunityFactory`                    interface for distributed site in switzerland, each building is assigned
                                                                         to a community and for each community a weather file is assigned
 
+:py:class:`cesarp.site.SitePerBuildingSpecificWeatherFile`              interface when the weather file is given per building
+
+:py:class:`cesarp.site.SiteRegistry`                                    one shared Site object per distinct weather file, ground temperatures
+                                                                        and simulation year, with an integer site id per building. Used by the
+                                                                        site factories above
+
 ======================================================================= ===========================================================
 
 """
@@ -0,0 +1,176 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+import pint
+
+import cesarp.common
+from cesarp.surrogate import _default_config_file
+from cesarp.geometry import area_calculator
+from cesarp.model.BuildingModel import BuildingModel
+from cesarp.model.Construction import Construction
+from cesarp.model.WindowConstruction import WindowConstruction
+from cesarp.weather.WeatherFileRegistry import WeatherFileRegistry
+
+# name and unit of the entries in the feature vector
+FEATURES = [
+    ("total_floor_area", "m**2"),
+    ("wall_area", "m**2"),  # without window glass area
+    ("window_area", "m**2"),
+    ("roof_area", "m**2"),
+    ("groundfloor_area", "m**2"),
+    ("wall_u_value", "W/(m**2*K)"),
+    ("roof_u_value", "W/(m**2*K)"),
+    ("groundfloor_u_value", "W/(m**2*K)"),
+    ("window_u_value", "W/(m**2*K)"),
+    ("envelope_heat_loss_per_floor_area", "W/(m**2*K)"),  # sum of U-value times area of envelope elements per floor area
+    ("glazing_ratio", ""),
+    ("infiltration_rate", "ACH"),
+    ("year_of_construction", ""),
+    ("floor_area_per_person", "m**2"),
+    ("appliances_power_per_area", "W/m**2"),
+    ("lighting_power_per_area", "W/m**2"),
+    ("dhw_power_per_area", "W/m**2"),
+    ("outdoor_air_flow_per_area", "m**3/(h*m**2)"),
+    ("heating_degree_days", "K*day"),
+    ("cooling_degree_days", "K*day"),
+    ("global_horizontal_radiation", "kWh/m**2"),
+    ("envelope_heat_loss_x_heating_degree_days", "kWh/m**2"),
+]
+FEATURE_NAMES = [name for (name, _) in FEATURES]
+
+
+class SurrogateFeatureExtractor:
+    """
+    Extracts a fixed feature vector from a BuildingModel as input for the SurrogateModel, see FEATURES for the entries.
+
+    U-values are simplified: sum of the thermal resistances of all layers plus a fixed surface resistance, thermal bridges
+    and the frame of windows are neglected. Operational parameters are averaged over all floors of the building.
+    Weather features are calculated once per weather file, see cesarp.weather.WeatherFileRegistry.
+    """
+
+    def __init__(self, ureg: pint.UnitRegistry, custom_config: Optional[Dict[str, Any]] = None, weather_registry: Optional[WeatherFileRegistry] = None):
+        """
+        :param ureg: application unit registry
+        :param custom_config: dict with custom configuration entries, for options see surrogate_config.yml
+        :param weather_registry: registry used to read the weather files, if None a new one is created
+        """
+        self._cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)
+        self._ureg = ureg
+        self._weather_registry = weather_registry if weather_registry is not None else WeatherFileRegistry(custom_config)
+        self._weather_features: Dict[str, Tuple[float, float, float]] = {}
+
+    def get_features(self, bldg_model: BuildingModel) -> np.ndarray:
+        """
+        :return: feature vector, entries as in FEATURES
+        """
+        ureg = self._ureg
+        shape = bldg_model.bldg_shape
+        constr = bldg_model.bldg_construction
+        floor_area = area_calculator.calc_total_floor_area(shape)
+        wall_area = area_calculator.calc_wall_area_without_window_glass_area(shape)
+        window_area = area_calculator.calc_window_glass_area(shape)
+        roof_area = area_calculator.calc_roof_area(shape)
+        groundfloor_area = area_calculator.calc_groundfloor_area(shape)
+        u_wall = self.calc_u_value(constr.wall_constr)
+        u_roof = self.calc_u_value(constr.roof_constr)
+        u_groundfloor = self.calc_u_value(constr.groundfloor_constr)
+        u_window = self.calc_u_value(constr.window_constr)
+        heat_loss_per_floor_area = (u_wall * wall_area + u_roof * roof_area + u_groundfloor * groundfloor_area + u_window * window_area) / floor_area
+        (hdd, cdd, radiation) = self._get_weather_features(bldg_model.site.weather_file_path)
+        return np.array(
+            [
+                floor_area,
+                wall_area,
+                window_area,
+                roof_area,
+                groundfloor_area,
+                u_wall,
+                u_roof,
+                u_groundfloor,
+                u_window,
+                heat_loss_per_floor_area,
+                _magnitude(constr.glazing_ratio, ureg.dimensionless),
+                _magnitude(constr.infiltration_rate, ureg.ACH),
+                bldg_model.year_of_construction,
+                *self._get_operation_features(bldg_model),
+                hdd,
+                cdd,
+                radiation,
+                heat_loss_per_floor_area * hdd * 24 / 1000,
+            ],
+            dtype=float,
+        )
+
+    def get_features_for(self, bldg_models: Iterable[BuildingModel]) -> np.ndarray:
+        """
+        :return: array with one row per building model, columns as in FEATURES
+        """
+        rows = [self.get_features(bldg_model) for bldg_model in bldg_models]
+        return np.array(rows, dtype=float).reshape(len(rows), len(FEATURES))
+
+    def calc_u_value(self, construction: Union[Construction, WindowConstruction]) -> float:
+        """
+        :return: simplified U-value in W/(m2*K)
+        """
+        layers = construction.glass.layers if isinstance(construction, WindowConstruction) else construction.layers
+        resistance = sum(layer.thermal_resistance.to(self._ureg.m**2 * self._ureg.K / self._ureg.W).m for layer in layers)
+        return 1 / (resistance + self._cfg["SURFACE_RESISTANCE"])
+
+    def _get_operation_features(self, bldg_model: BuildingModel) -> List[float]:
+        ureg = self._ureg
+        features_per_floor: List[List[float]] = []
+        for (floor_nrs, bldg_op) in bldg_model.bldg_operation_mapping.get_operation_assignments():
+            op_features = [
+                _magnitude(bldg_op.occupancy.floor_area_per_person, ureg.m**2),
+                _magnitude(bldg_op.electric_appliances.power_demand_per_area, ureg.W / ureg.m**2),
+                _magnitude(bldg_op.lighting.power_demand_per_area, ureg.W / ureg.m**2),
+                _magnitude(bldg_op.dhw.power_demand_per_area, ureg.W / ureg.m**2),
+                _magnitude(bldg_op.hvac.outdoor_air_flow_per_zone_floor_area, ureg.m**3 / (ureg.h * ureg.m**2)),
+            ]
+            features_per_floor += [op_features] * len(floor_nrs)
+        return list(np.mean(features_per_floor, axis=0))
+
+    def _get_weather_features(self, weather_file_path: str) -> Tuple[float, float, float]:
+        """
+        :return: heating degree days, cooling degree days, annual global horizontal radiation in kWh/m2
+        """
+        try:
+            return self._weather_features[weather_file_path]
+        except KeyError:
+            pass
+        hourly = self._weather_registry.get_weather_data(weather_file_path).hourly
+        nr_of_days = len(hourly["dry_bulb_temperature"]) // 24
+        daily_mean_temp = hourly["dry_bulb_temperature"][: nr_of_days * 24].reshape(nr_of_days, 24).mean(axis=1)
+        hdd_cfg = self._cfg["HEATING_DEGREE_DAYS"]
+        heating_days = daily_mean_temp < hdd_cfg["HEATING_LIMIT"]
+        hdd = float(np.sum(hdd_cfg["INDOOR_TEMPERATURE"] - daily_mean_temp[heating_days]))
+        cdd = float(np.sum(np.maximum(daily_mean_temp - self._cfg["COOLING_DEGREE_DAYS"]["BASE_TEMPERATURE"], 0)))
+        radiation = float(np.sum(hourly["global_horizontal_radiation"]) / 1000)
+        self._weather_features[weather_file_path] = (hdd, cdd, radiation)
+        return (hdd, cdd, radiation)
+
+
+def _magnitude(value, unit) -> float:
+    if isinstance(value, pint.Quantity):
+        return float(value.to(unit).m)
+    return float(value)
@@ -0,0 +1,191 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+from typing import Any, Dict, List, Optional, Tuple, Union
+from pathlib import Path
+import logging
+import numpy as np
+import pint
+
+import cesarp.common
+from cesarp.common.CesarpException import CesarpException
+from cesarp.results.EnergyDemandSimulationResults import EnergyDemandSimulationResults
+from cesarp.surrogate import _default_config_file
+from cesarp.surrogate.SurrogateFeatureExtractor import FEATURE_NAMES
+
+# predicted targets, all are specific annual demands in kWh/(m2*year)
+TARGET_NAMES = ["heating", "cooling", "dhw", "electricity"]
+
+# 1 - initial version of the saved model
+_MODEL_FILE_VERSION = 1
+
+
+class SurrogateModel:
+    """
+    Ridge regression predicting the specific annual heating, cooling, dhw and electricity demand from the feature vector
+    of a building, see SurrogateFeatureExtractor.
+
+    The uncertainty of a prediction is the standard deviation combining the spread of the predictions of an ensemble of models
+    trained on bootstrap samples of the training data and the residual variance of the model trained on all training data.
+    Thus predictions for buildings different from the ones in the training data get a higher uncertainty.
+    """
+
+    def __init__(self, custom_config: Optional[Dict[str, Any]] = None):
+        """
+        :param custom_config: dict with custom configuration entries, for options see surrogate_config.yml
+        """
+        self._cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)
+        self._logger = logging.getLogger(__name__)
+        self._feature_mean: Optional[np.ndarray] = None
+        self._feature_std: Optional[np.ndarray] = None
+        # coefficients with intercept in the first row, shape (nr of models, nr of features + 1, nr of targets), first model is trained on all data
+        self._coefficients: Optional[np.ndarray] = None
+        self._residual_var: Optional[np.ndarray] = None
+        self.nr_of_training_samples = 0
+
+    def is_trained(self) -> bool:
+        return self._coefficients is not None
+
+    def fit(self, features: np.ndarray, targets: np.ndarray) -> None:
+        """
+        :param features: array with one row per building, columns as in cesarp.surrogate.SurrogateFeatureExtractor.FEATURES
+        :param targets: array with one row per building, columns as in TARGET_NAMES, specific demands in kWh/(m2*year)
+        """
+        features = np.asarray(features, dtype=float)
+        targets = np.asarray(targets, dtype=float)
+        if features.ndim != 2 or features.shape[1] != len(FEATURE_NAMES):
+            raise CesarpException(f"expected features with {len(FEATURE_NAMES)} columns, got shape {features.shape}")
+        if targets.shape != (features.shape[0], len(TARGET_NAMES)):
+            raise CesarpException(f"expected targets with shape {(features.shape[0], len(TARGET_NAMES))}, got {targets.shape}")
+        if features.shape[0] < 2:
+            raise CesarpException("at least two buildings are needed to train the surrogate model")
+        self._feature_mean = features.mean(axis=0)
+        std = features.std(axis=0)
+        self._feature_std = np.where(std > 0, std, 1.0)
+        design = self._design_matrix(features)
+        alpha = self._cfg["RIDGE_ALPHA"]
+        nr_of_samples = features.shape[0]
+        rng = np.random.default_rng(self._cfg["RANDOM_SEED"])
+        samples = [np.arange(nr_of_samples)] + [rng.integers(0, nr_of_samples, nr_of_samples) for _ in range(self._cfg["NR_OF_BOOTSTRAP_MODELS"])]
+        self._coefficients = np.stack([_fit_ridge(design[sample], targets[sample], alpha) for sample in samples])
+        residuals = targets - design @ self._coefficients[0]
+        self._residual_var = np.sum(residuals**2, axis=0) / max(nr_of_samples - 1, 1)
+        self.nr_of_training_samples = nr_of_samples
+        self._logger.info(f"surrogate model trained on {nr_of_samples} buildings, residual standard deviation per target {dict(zip(TARGET_NAMES, np.sqrt(self._residual_var)))}")
+
+    def predict(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param features: array with one row per building, columns as in cesarp.surrogate.SurrogateFeatureExtractor.FEATURES
+        :return: (predicted specific demands, standard deviation of the prediction), both with one row per building and columns as in TARGET_NAMES, in kWh/(m2*year)
+        """
+        if not self.is_trained():
+            raise CesarpException("surrogate model is not trained, call fit() or load a trained model")
+        assert self._coefficients is not None and self._residual_var is not None
+        design = self._design_matrix(np.asarray(features, dtype=float).reshape(-1, len(FEATURE_NAMES)))
+        predictions = np.einsum("sf,mft->mst", design, self._coefficients)
+        mean = np.maximum(predictions[0], 0)
+        std = np.sqrt(predictions[1:].var(axis=0) + self._residual_var) if len(predictions) > 1 else np.broadcast_to(np.sqrt(self._residual_var), mean.shape)
+        return (mean, std)
+
+    def predict_demand_results(self, features: np.ndarray, ureg: pint.UnitRegistry) -> Tuple[List[EnergyDemandSimulationResults], np.ndarray]:
+        """
+        :param features: array with one row per building, columns as in cesarp.surrogate.SurrogateFeatureExtractor.FEATURES
+        :return: (predicted demands per building, relative uncertainty per building). The relative uncertainty is the standard deviation
+                 of the total of all predicted demands divided by that total.
+        """
+        (mean, std) = self.predict(features)
+        floor_areas = np.asarray(features, dtype=float).reshape(-1, len(FEATURE_NAMES))[:, FEATURE_NAMES.index("total_floor_area")]
+        total_std = np.sqrt(np.sum(std**2, axis=1))
+        relative_uncertainty = total_std / np.maximum(mean.sum(axis=1), np.finfo(float).eps)
+        tot_unit = ureg.kWh / ureg.year
+        results = [
+            EnergyDemandSimulationResults(
+                tot_heating_demand=float(heating * area) * tot_unit,
+                tot_dhw_demand=float(dhw * area) * tot_unit,
+                tot_electricity_demand=float(electricity * area) * tot_unit,
+                tot_cooling_demand=float(cooling * area) * tot_unit,
+                total_floor_area=float(area) * ureg.m**2,
+            )
+            for (heating, cooling, dhw, electricity), area in zip(mean, floor_areas)  # order as in TARGET_NAMES
+        ]
+        return (results, relative_uncertainty)
+
+    @staticmethod
+    def get_targets(sim_res: EnergyDemandSimulationResults, ureg: pint.UnitRegistry) -> List[float]:
+        """
+        :return: specific demands in kWh/(m2*year) of simulated results, order as in TARGET_NAMES, to be used for training
+        """
+        spec_unit = ureg.kWh / ureg.m**2 / ureg.year
+        return [
+            sim_res.specific_heating_demand.to(spec_unit).m,
+            sim_res.specific_cooling_demand.to(spec_unit).m,
+            sim_res.specific_dhw_demand.to(spec_unit).m,
+            sim_res.specific_electricity_demand.to(spec_unit).m,
+        ]
+
+    def save(self, filepath: Union[str, Path]) -> None:
+        if not self.is_trained():
+            raise CesarpException("surrogate model is not trained, nothing to save")
+        assert self._feature_mean is not None and self._feature_std is not None and self._coefficients is not None and self._residual_var is not None
+        with open(filepath, "wb") as fh:
+            np.savez(
+                fh,
+                version=np.array(_MODEL_FILE_VERSION),
+                feature_names=np.array(FEATURE_NAMES),
+                target_names=np.array(TARGET_NAMES),
+                feature_mean=self._feature_mean,
+                feature_std=self._feature_std,
+                coefficients=self._coefficients,
+                residual_var=self._residual_var,
+                nr_of_training_samples=np.array(self.nr_of_training_samples),
+            )
+
+    @classmethod
+    def load(cls, filepath: Union[str, Path], custom_config: Optional[Dict[str, Any]] = None) -> "SurrogateModel":
+        """
+        :param filepath: file written with save()
+        :raises CesarpException: if the model was trained with other features or targets than the ones of this cesar-p version
+        """
+        model = cls(custom_config)
+        with np.load(filepath, allow_pickle=False) as saved:
+            if int(saved["version"]) > _MODEL_FILE_VERSION:
+                raise CesarpException(f"{filepath} has surrogate model version {int(saved['version'])}, this cesar-p version supports up to {_MODEL_FILE_VERSION}")
+            if list(saved["feature_names"]) != FEATURE_NAMES or list(saved["target_names"]) != TARGET_NAMES:
+                raise CesarpException(f"surrogate model {filepath} was trained with different features or targets, please train it again")
+            model._feature_mean = saved["feature_mean"]
+            model._feature_std = saved["feature_std"]
+            model._coefficients = saved["coefficients"]
+            model._residual_var = saved["residual_var"]
+            model.nr_of_training_samples = int(saved["nr_of_training_samples"])
+        return model
+
+    def _design_matrix(self, features: np.ndarray) -> np.ndarray:
+        standardized = (features - self._feature_mean) / self._feature_std
+        return np.column_stack((np.ones(len(standardized)), standardized))
+
+
+def _fit_ridge(design: np.ndarray, targets: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    :return: coefficients, shape (nr of columns of design, nr of targets), the intercept in the first column of design is not penalized
+    """
+    penalty = alpha * np.eye(design.shape[1])
+    penalty[0, 0] = 0
+    return np.linalg.solve(design.T @ design + penalty, design.T @ targets)
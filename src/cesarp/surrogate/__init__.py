@@ -0,0 +1,52 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+"""
+surrogate
+============
+
+Surrogate model predicting annual heating, cooling, domestic hot water and electricity demand of a building without
+running EnergyPlus, e.g. for screening many retrofit or weather variants of a large site. The prediction comes with
+an uncertainty, so that only buildings with uncertain predictions need to be simulated with EnergyPlus.
+
+The surrogate is trained on buildings which were simulated with EnergyPlus. Use it through the SimulationManager:
+
+- train and save it with :py:meth:`cesarp.manager.SimulationManager.SimulationManager.train_surrogate_model` after
+  running the simulations and processing the results of a representative set of buildings
+- select it as backend for run_simulations() with MANAGER - SIMULATION_BACKEND - BACKEND: "SURROGATE"
+
+The classes/modules built to be used from outside (API of package):
+
+======================================================================= ===========================================================
+class/module                                                            description
+======================================================================= ===========================================================
+:py:class:`cesarp.surrogate.SurrogateFeatureExtractor`                  fixed feature vector per BuildingModel (envelope areas,
+                                                                        U-values, glazing ratio, operational parameters, degree days)
+
+:py:class:`cesarp.surrogate.SurrogateModel`                             ridge regression with bootstrap uncertainty estimate,
+                                                                        trained on simulated results, pure numpy
+======================================================================= ===========================================================
+
+"""
+import os
+from pathlib import Path
+
+_default_config_file = os.path.dirname(__file__) / Path("surrogate_config.yml")
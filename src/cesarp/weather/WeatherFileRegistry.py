@@ -0,0 +1,233 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+import cesarp.common
+from cesarp.common.CesarpException import CesarpException
+from cesarp.weather import _default_config_file
+
+# hourly values read from the EPW data rows, key is the column index in the EPW file
+_EPW_HOURLY_COLUMNS = {
+    1: "month",
+    2: "day",
+    3: "hour",
+    6: "dry_bulb_temperature",
+    7: "dew_point_temperature",
+    8: "relative_humidity",
+    9: "atmospheric_pressure",
+    13: "global_horizontal_radiation",
+    14: "direct_normal_radiation",
+    15: "diffuse_horizontal_radiation",
+    20: "wind_direction",
+    21: "wind_speed",
+}
+_EPW_NR_OF_HEADER_LINES = 8
+
+# 1 - initial version of the sidecar format
+_SIDECAR_VERSION = 1
+_SIDECAR_KEY_VERSION = "sidecar_version"
+_SIDECAR_KEY_HASH = "epw_sha256"
+_SIDECAR_KEY_LOCATION = "location"
+_SIDECAR_KEY_COORDINATES = "coordinates"
+
+
+@dataclass
+class WeatherData:
+    """
+    Content of an EPW weather file. Units of the hourly values as in the EPW file, e.g. °C, %, Pa, Wh/m2, m/s.
+    """
+
+    location: str
+    latitude: float
+    longitude: float
+    time_zone: float
+    elevation: float
+    hourly: Dict[str, np.ndarray]  # keys see _EPW_HOURLY_COLUMNS
+
+
+class WeatherFileRegistry:
+    """
+    Registry of the weather files used in a run.
+
+    - Each distinct weather file is resolved to an absolute path and checked for existence only once.
+    - Keeps track of which buildings use which weather file, so simulations can be grouped by weather file.
+    - Gives access to the parsed hourly data of the EPW files, e.g. for degree days or sanity checks of the weather.
+      Parsed data is cached in a binary sidecar file next to the EPW file, see REGISTRY:PARSED_CACHE in weather_config.yml.
+    """
+
+    def __init__(self, custom_config: Optional[Dict[str, Any]] = None):
+        """
+        :param custom_config: dict with custom configuration entries, for options see weather_config.yml
+        """
+        self._cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)["REGISTRY"]
+        self._logger = logging.getLogger(__name__)
+        self._resolved: Dict[str, str] = {}
+        self._weather_file_per_fid: Dict[int, str] = {}
+        self._weather_data: Dict[str, Tuple[Tuple[int, int], WeatherData]] = {}
+
+    def resolve(self, weather_file_path: Union[str, Path]) -> str:
+        """
+        :param weather_file_path: path to a weather file
+        :return: absolute path of the weather file
+        :raises CesarpException: if the weather file does not exist
+        """
+        key = str(weather_file_path)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        resolved = os.path.abspath(key)
+        if not os.path.isfile(resolved):
+            raise CesarpException(f"weather file {resolved} not found on disk")
+        self._resolved[key] = resolved
+        return resolved
+
+    def register(self, bldg_fid: int, weather_file_path: Union[str, Path]) -> str:
+        """
+        Record that the building uses the weather file, replaces the weather file registered before for that building.
+
+        :return: absolute path of the weather file
+        :raises CesarpException: if the weather file does not exist
+        """
+        resolved = self.resolve(weather_file_path)
+        self._weather_file_per_fid[bldg_fid] = resolved
+        return resolved
+
+    def get_weather_file(self, bldg_fid: int) -> str:
+        return self._weather_file_per_fid[bldg_fid]
+
+    def get_fids_per_weather_file(self) -> Dict[str, List[int]]:
+        """
+        :return: registered buildings grouped by weather file, weather file used by most buildings first
+        """
+        fids_per_weather_file: Dict[str, List[int]] = {}
+        for fid, weather_file in self._weather_file_per_fid.items():
+            fids_per_weather_file.setdefault(weather_file, []).append(fid)
+        return dict(sorted(fids_per_weather_file.items(), key=lambda entry: len(entry[1]), reverse=True))
+
+    def get_nr_of_bldgs_per_weather_file(self) -> Dict[str, int]:
+        """
+        :return: number of registered buildings per weather file, weather file used by most buildings first
+        """
+        return {weather_file: len(fids) for weather_file, fids in self.get_fids_per_weather_file().items()}
+
+    def get_weather_data(self, weather_file_path: Union[str, Path]) -> WeatherData:
+        """
+        The EPW file is parsed only once per registry, and with the parsed cache active only once as long as it does not change.
+
+        :param weather_file_path: path to an EPW weather file
+        :return: location and hourly data of the weather file
+        """
+        resolved = self.resolve(weather_file_path)
+        stat = os.stat(resolved)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if resolved in self._weather_data and self._weather_data[resolved][0] == stamp:
+            return self._weather_data[resolved][1]
+        with open(resolved, "rb") as fh:
+            epw_content = fh.read()
+        epw_hash = hashlib.sha256(epw_content).hexdigest()
+        weather_data = None
+        if self._cfg["PARSED_CACHE"]["ACTIVE"]:
+            sidecar_path = resolved + self._cfg["PARSED_CACHE"]["SIDECAR_EXTENSION"]
+            weather_data = self._read_sidecar(sidecar_path, epw_hash)
+        if weather_data is None:
+            weather_data = parse_epw(epw_content, resolved)
+            if self._cfg["PARSED_CACHE"]["ACTIVE"]:
+                self._write_sidecar(weather_data, epw_hash, sidecar_path)
+        self._weather_data[resolved] = (stamp, weather_data)
+        return weather_data
+
+    def _read_sidecar(self, sidecar_path: str, epw_hash: str) -> Optional[WeatherData]:
+        if not os.path.isfile(sidecar_path):
+            return None
+        try:
+            with np.load(sidecar_path, allow_pickle=False) as sidecar:
+                if int(sidecar[_SIDECAR_KEY_VERSION]) != _SIDECAR_VERSION or str(sidecar[_SIDECAR_KEY_HASH]) != epw_hash:
+                    return None
+                (latitude, longitude, time_zone, elevation) = (float(val) for val in sidecar[_SIDECAR_KEY_COORDINATES])
+                return WeatherData(
+                    location=str(sidecar[_SIDECAR_KEY_LOCATION]),
+                    latitude=latitude,
+                    longitude=longitude,
+                    time_zone=time_zone,
+                    elevation=elevation,
+                    hourly={name: sidecar[name] for name in _EPW_HOURLY_COLUMNS.values()},
+                )
+        except Exception as ex:
+            self._logger.warning(f"could not read parsed weather data cache {sidecar_path}, parsing weather file again. Reason: {ex}")
+            return None
+
+    def _write_sidecar(self, weather_data: WeatherData, epw_hash: str, sidecar_path: str) -> None:
+        try:
+            (fd, tmp_path) = tempfile.mkstemp(dir=os.path.dirname(sidecar_path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    np.savez(
+                        fh,
+                        **{
+                            _SIDECAR_KEY_VERSION: np.array(_SIDECAR_VERSION),
+                            _SIDECAR_KEY_HASH: np.array(epw_hash),
+                            _SIDECAR_KEY_LOCATION: np.array(weather_data.location),
+                            _SIDECAR_KEY_COORDINATES: np.array([weather_data.latitude, weather_data.longitude, weather_data.time_zone, weather_data.elevation]),
+                        },
+                        **weather_data.hourly,
+                    )
+                os.replace(tmp_path, sidecar_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        except Exception as ex:
+            self._logger.warning(f"could not write parsed weather data cache {sidecar_path}, weather file is parsed again in the next run. Reason: {ex}")
+
+
+def parse_epw(epw_content: bytes, epw_path_for_msg: str = "") -> WeatherData:
+    """
+    :param epw_content: content of an EPW weather file
+    :param epw_path_for_msg: path of the weather file, used for error messages only
+    :return: location and hourly data of the weather file
+    """
+    lines = epw_content.decode("latin-1").splitlines()
+    location = lines[0].split(",")
+    if location[0].strip().upper() != "LOCATION" or len(location) < 10:
+        raise CesarpException(f"{epw_path_for_msg} is not a valid EPW weather file, first line must be the LOCATION header")
+    data = pd.read_csv(
+        io.StringIO("\n".join(lines[_EPW_NR_OF_HEADER_LINES:])),
+        header=None,
+        usecols=list(_EPW_HOURLY_COLUMNS.keys()),
+    )
+    return WeatherData(
+        location=location[1],
+        latitude=float(location[6]),
+        longitude=float(location[7]),
+        time_zone=float(location[8]),
+        elevation=float(location[9]),
+        hourly={name: data[col].to_numpy(dtype=float) for col, name in _EPW_HOURLY_COLUMNS.items()},
+    )
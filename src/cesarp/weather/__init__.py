@@ -20,7 +20,8 @@
 #
 """
 
-Package handles weather files per community and is used together with :py:class:`cesarp.site.SitePerSwissCommunityFactory`
+Package handles weather files per community and is used together with :py:class:`cesarp.site.SitePerSwissCommunityFactory`.
+Besides that, it keeps track of the weather files used in a run and gives access to their hourly data.
 
 The classes/modules built to be used from outside (API of package):
 
@@ -29,6 +30,13 @@ class/module                                                                 des
 ============================================================================ ====================================================
 :py:class:`cesarp.weather.swiss_communities.SwissCommunityWeatherChooser`    mapping a weather file to each community
 
+:py:class:`cesarp.weather.WeatherFileRegistry`                               validates each weather file once, counts buildings per weather
+                                                                             file and gives access to the parsed hourly data of the EPW files
+
 ============================================================================ ====================================================
 
 """
+import os
+from pathlib import Path
+
+_default_config_file = os.path.dirname(__file__) / Path("weather_config.yml")
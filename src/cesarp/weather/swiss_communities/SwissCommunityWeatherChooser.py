@@ -25,6 +25,8 @@ import logging
 import pandas as pd
 from typing import Dict, Any, Optional
 from cesarp.weather.swiss_communities import _default_config_file
+from cesarp.weather.WeatherFileRegistry import WeatherFileRegistry
+from cesarp.common.CesarpException import CesarpException
 import cesarp.common
 
 
@@ -35,13 +37,15 @@ class SwissCommunityWeatherChooser:
     Based on a lookup table mapping each community to one of those weather stations the assignment of the weather file is made.
     """
 
-    def __init__(self, custom_config: Optional[Dict[str, Any]] = None):
+    def __init__(self, custom_config: Optional[Dict[str, Any]] = None, weather_registry: Optional[WeatherFileRegistry] = None):
         """
         Create an instance of SwissCommunityWeatherChooser
 
         :param custom_config: dict with custom configuration entries, for options see swiss_communities_weather.yml
+        :param weather_registry: registry used to validate the weather files, if None a new one is created
         """
         self.cfg = cesarp.common.load_config_for_package(_default_config_file, __package__, custom_config)
+        self.weather_registry = weather_registry if weather_registry is not None else WeatherFileRegistry(custom_config)
         self.communityID_to_stationID = self.__read_community_station_mapping(self.cfg["COMMUNITY_TO_STATION"])
 
     def get_weather_file(self, community_id: int):
@@ -52,7 +56,9 @@ class SwissCommunityWeatherChooser:
 
         weather_file_name = weather_station + "." + self.cfg["WEATHER_FILES"]["EXTENSION"]
         weather_station_file_as_path = self.cfg["WEATHER_FILES"]["PATH"] / Path(weather_file_name)
-        if not weather_station_file_as_path.is_file():
+        try:
+            self.weather_registry.resolve(weather_station_file_as_path)
+        except CesarpException:
             raise Exception(f"for community {community_id} assigned weather file {str(weather_station_file_as_path)} not found on disk")
         logging.getLogger(__name__).info(f"{community_id} weather file {str(weather_station_file_as_path)} was assigned")
         return str(weather_station_file_as_path)
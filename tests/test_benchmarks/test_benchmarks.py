@@ -0,0 +1,85 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import pytest
+
+import cesarp.common
+from cesarp.eplus_adapter import eplus_eso_results_handling
+from cesarp.eplus_adapter.eplus_error_file_handling import EplusErrorLevel, check_eplus_error_level
+from cesarp.eplus_adapter.idf_strings import ResultsFrequency
+from benchmarks import fake_energyplus
+from benchmarks.synthetic_site import SyntheticSiteParams, create_footprint, create_site
+from benchmarks.run_benchmarks import compare_reports
+
+_IDF = """
+Zone, ZONEFLOOR0;  ! comment
+Zone, ZONEFLOOR1;
+BuildingSurface:Detailed, floor0, Floor, constr, ZONEFLOOR0, Ground, , NoSun, NoWind, , 4, 0,0,0, 0,10,0, 20,10,0, 20,0,0;
+BuildingSurface:Detailed, floor1, FLOOR, constr, ZONEFLOOR1, Surface, ceiling0, NoSun, NoWind, , 4, 0,0,3, 0,10,3, 20,10,3, 20,0,3;
+BuildingSurface:Detailed, wall0, Wall, constr, ZONEFLOOR0, Outdoors, , SunExposed, WindExposed, , 4, 0,0,0, 0,0,3, 0,10,3, 0,10,0;
+Output:Meter, DistrictHeating:HVAC, RunPeriod;
+Output:Meter, DistrictHeating:Building, RunPeriod;
+Output:Meter, Electricity:Facility, RunPeriod;
+Output:Meter, DistrictCooling:Facility, RunPeriod;
+Output:Meter, DistrictHeating:HVAC, Hourly;
+Output:Variable, *, Zone Air Temperature, Hourly;
+"""
+
+
+def test_footprint():
+    footprint = create_footprint(0, 0, 8, 10)
+    assert len(footprint) == 9
+    assert footprint[0] == footprint[-1]
+    signed_area = sum(x1 * y2 - x2 * y1 for ((x1, y1), (x2, y2)) in zip(footprint[:-1], footprint[1:])) / 2
+    assert signed_area < 0  # clockwise
+
+
+def test_create_site(tmp_path):
+    files = create_site(SyntheticSiteParams(nr_of_bldgs=5, nr_of_vertices=6), tmp_path)
+    vertices = files["vertices"].read_text().splitlines()
+    assert len(vertices) == 1 + 5 * 7
+    assert len(files["bldg_info"].read_text().splitlines()) == 1 + 5
+
+
+def test_fake_eplus_output_is_readable(tmp_path):
+    ureg = cesarp.common.init_unit_registry()
+    idf_path = tmp_path / "test.idf"
+    idf_path.write_text(_IDF)
+    weather_path = tmp_path / "weather.epw"
+    weather_path.write_text("")
+    output_dir = tmp_path / "out"
+    assert fake_energyplus.main(["--weather", str(weather_path), "--output-directory", str(output_dir), "--expandobjects", str(idf_path)]) == 0
+
+    sim_res = eplus_eso_results_handling.collect_cesar_simulation_summary(output_dir, ureg)
+    assert sim_res.total_floor_area.to(ureg.m**2).m == pytest.approx(400)
+    assert sim_res.specific_heating_demand.to(ureg.kWh / ureg.m**2 / ureg.year).m == pytest.approx(80)
+    hourly = eplus_eso_results_handling.collect_multi_params_for_site({1: output_dir}, ["DistrictHeating:HVAC", "Zone Air Temperature"], ResultsFrequency.HOURLY)
+    assert len(hourly[hourly["var"] == "DistrictHeating:HVAC"]) == fake_energyplus.HOURS_PER_YEAR
+    assert check_eplus_error_level(output_dir / "eplusout.err") == EplusErrorLevel.NO_ERRORS
+
+
+def test_compare_reports():
+    def report(create_idf_time):
+        return {"scenarios": [{"name": "small", "stages": {"create_IDFs": {"wall_s": create_idf_time}, "save_summary_result": {"wall_s": 0.01}}}]}
+
+    assert compare_reports(report(1.1), report(1.0), max_slowdown=0.25, min_seconds=0.5) == []
+    regressions = compare_reports(report(1.5), report(1.0), max_slowdown=0.25, min_seconds=0.5)
+    assert len(regressions) == 1 and "create_IDFs" in regressions[0]
@@ -0,0 +1,82 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+import pytest
+import pandas as pd
+from pathlib import Path
+
+import cesarp.energy_strategy.compiled_tables as compiled_tables
+from cesarp.energy_strategy import get_selected_energy_strategy_cfg
+from cesarp.energy_strategy.RetrofitRates import RetrofitRates
+from cesarp.model.BldgType import BldgType
+
+
+@pytest.fixture
+def custom_conf_compiled(tmp_path):
+    compiled_tables._bundles_in_memory.clear()
+    return {"ENERGY_STRATEGY": {"ENERGY_STRATEGY_SELECTION": "WWB", "WWB": {"COMPILED_TABLES": {"ACTIVE": True, "FILE": str(tmp_path / Path("wwb.bin"))}}}}
+
+
+def test_compiled_table_same_as_source(custom_conf_compiled):
+    es_cfg = get_selected_energy_strategy_cfg(custom_conf_compiled)
+    file_cfg = es_cfg["RETROFIT"]["PARTIAL_SHARES"]["SFH"]
+    table = compiled_tables.get_source_table(es_cfg, file_cfg["PATH"], file_cfg["SEPARATOR"])
+    assert os.path.exists(es_cfg["COMPILED_TABLES"]["FILE"])
+    pd.testing.assert_frame_equal(table, pd.read_csv(file_cfg["PATH"], sep=file_cfg["SEPARATOR"]))
+
+    # reading from the bundle file in a new process
+    compiled_tables._bundles_in_memory.clear()
+    table_from_bundle = compiled_tables.get_source_table(es_cfg, file_cfg["PATH"], file_cfg["SEPARATOR"])
+    pd.testing.assert_frame_equal(table_from_bundle, table)
+
+
+def test_stale_source_is_compiled_again(custom_conf_compiled, tmp_path):
+    es_cfg = get_selected_energy_strategy_cfg(custom_conf_compiled)
+    source_file = tmp_path / Path("table.csv")
+    pd.DataFrame({"a": [1, 2], "b": [3, 4]}).to_csv(source_file, sep=";", index=False)
+    assert compiled_tables.get_source_table(es_cfg, source_file, ";")["b"].tolist() == [3, 4]
+
+    stat = os.stat(source_file)
+    pd.DataFrame({"a": [1, 2], "b": [5, 6]}).to_csv(source_file, sep=";", index=False)
+    os.utime(source_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    compiled_tables._bundles_in_memory.clear()
+    assert compiled_tables.get_source_table(es_cfg, source_file, ";")["b"].tolist() == [5, 6]
+
+
+def test_retrofit_rates_compiled_same_as_parsed(custom_conf_compiled):
+    rates_compiled = RetrofitRates(custom_conf_compiled)
+    rates_parsed = RetrofitRates({"ENERGY_STRATEGY": {"ENERGY_STRATEGY_SELECTION": "WWB", "WWB": {"COMPILED_TABLES": {"ACTIVE": False}}}})
+    for bldg_type in [BldgType.SFH, BldgType.MFH]:
+        assert rates_compiled.get_full_retrofit_rate_per_age_class(2030, bldg_type) == rates_parsed.get_full_retrofit_rate_per_age_class(2030, bldg_type)
+        assert rates_compiled.get_partial_retrofit_rates_per_age_class(2030, bldg_type) == rates_parsed.get_partial_retrofit_rates_per_age_class(2030, bldg_type)
+
+
+def test_bundle_in_user_cache_dir_by_default(tmp_path, monkeypatch):
+    compiled_tables._bundles_in_memory.clear()
+    monkeypatch.setattr(compiled_tables, "_get_user_cache_dir", lambda: str(tmp_path / Path("cache")))
+    es_cfg = get_selected_energy_strategy_cfg({"ENERGY_STRATEGY": {"ENERGY_STRATEGY_SELECTION": "WWB"}})
+    assert es_cfg["COMPILED_TABLES"]["FILE"] is None
+    file_cfg = es_cfg["RETROFIT"]["PARTIAL_SHARES"]["SFH"]
+    compiled_tables.get_source_table(es_cfg, file_cfg["PATH"], file_cfg["SEPARATOR"])
+    assert len(list((tmp_path / Path("cache")).glob("energy_strategy_*.bin"))) == 1
+    nep_cfg = get_selected_energy_strategy_cfg({"ENERGY_STRATEGY": {"ENERGY_STRATEGY_SELECTION": "NEP"}})
+    assert compiled_tables._get_default_bundle_file(nep_cfg) != compiled_tables._get_default_bundle_file(es_cfg)
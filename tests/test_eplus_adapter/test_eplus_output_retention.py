@@ -0,0 +1,90 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+import cesarp.common
+from cesarp.eplus_adapter import eplus_eso_results_handling, eplus_output_retention
+from cesarp.eplus_adapter.eplus_error_file_handling import check_eplus_error_level, EplusErrorLevel
+from cesarp.eplus_adapter.idf_strings import ResultsFrequency
+
+_TESTFIXTURE_FOLDER = os.path.dirname(__file__) / Path("testfixture")
+_RETENTION_CFG = {"DELETE_PATTERNS": ["*.audit", "*.mtr"], "COMPRESS_PATTERNS": ["*.eso", "*.eio", "*.err"], "COMPRESSION_LEVEL": 6}
+
+
+_EIO_CONTENT = """Program Version,EnergyPlus, Version 9.3.0
+! <Zone Summary>, Number of Zones, Number of Zone Surfaces, Number of SubSurfaces
+ Zone Summary,2,12,4
+! <Zone Information>,Zone Name,Zone Multiplier,Zone List Multiplier,Floor Area {m2},Volume {m3}
+ Zone Information, ZONEFLOOR0,1,1,100.00,300.00
+ Zone Information, ZONEFLOOR1,1,1,100.00,300.00
+"""
+
+
+@pytest.fixture
+def output_folders(tmp_path):
+    """sample EnergyPlus output once as is and once with the retention policy applied"""
+    folders = {}
+    for name in ["original", "retained"]:
+        folder = tmp_path / name
+        folder.mkdir()
+        shutil.copy(_TESTFIXTURE_FOLDER / "solar_potential" / "eplusout.eso", folder / "eplusout.eso")
+        shutil.copy(_TESTFIXTURE_FOLDER / "eplusout_severe.err", folder / "eplusout.err")
+        (folder / "eplusout.eio").write_text(_EIO_CONTENT)
+        (folder / "eplusout.audit").write_text("audit")
+        (folder / "eplusout.mtr").write_text("meters")
+        folders[name] = folder
+    eplus_output_retention.apply_retention_policy(folders["retained"], _RETENTION_CFG)
+    return folders
+
+
+def test_retention_policy(output_folders):
+    assert sorted(path.name for path in output_folders["retained"].iterdir()) == ["eplusout.eio.gz", "eplusout.err.gz", "eplusout.eso.gz"]
+    original_size = sum(path.stat().st_size for path in output_folders["original"].iterdir())
+    retained_size = sum(path.stat().st_size for path in output_folders["retained"].iterdir())
+    assert retained_size < original_size / 4
+    assert eplus_output_retention.output_file_exists(output_folders["retained"] / "eplusout.eso")
+    assert not eplus_output_retention.output_file_exists(output_folders["retained"] / "eplusout.mtr")
+
+
+def test_open_output_file(output_folders):
+    for mode in ["r", "rb"]:
+        with eplus_output_retention.open_output_file(output_folders["original"] / "eplusout.eio", mode) as original:
+            with eplus_output_retention.open_output_file(output_folders["retained"] / "eplusout.eio", mode) as retained:
+                assert original.read() == retained.read()
+    with pytest.raises(FileNotFoundError):
+        eplus_output_retention.open_output_file(output_folders["retained"] / "eplusout.mtr")
+
+
+def test_results_read_from_compressed_output(output_folders):
+    ureg = cesarp.common.init_unit_registry()
+    (original, retained) = (output_folders["original"], output_folders["retained"])
+    assert eplus_eso_results_handling.collect_cesar_simulation_summary(retained, ureg) == eplus_eso_results_handling.collect_cesar_simulation_summary(original, ureg)
+    hourly = {
+        name: eplus_eso_results_handling.collect_multi_params_for_site({99: folder}, ["DistrictHeating:HVAC"], ResultsFrequency.HOURLY) for name, folder in output_folders.items()
+    }
+    assert len(hourly["retained"]) == 8760
+    assert hourly["retained"].equals(hourly["original"])
+    assert check_eplus_error_level(retained / "eplusout.err") == check_eplus_error_level(original / "eplusout.err") == EplusErrorLevel.SEVERE
@@ -0,0 +1,73 @@
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+import os
+import pytest
+import shutil
+from pathlib import Path
+
+from cesarp.eplus_adapter.idf_canonicalization import canonicalize_idf, get_simulation_key
+
+_IDF_TEMPLATE = """
+Version,9.5;  !- Version Identifier
+
+Shading:Building:Detailed,
+    Ext{neigh}_Wall0,    !- Name
+    ,                        !- Transmittance Schedule Name
+    4,                       !- Number of Vertices
+    0, 0, 0,    !- Vertex 1 Xcoordinate, Ycoordinate, Zcoordinate
+    0, 0, 10,
+    10, 0, 10,
+    10, 0, {x};
+
+ShadingProperty:Reflectance,
+    Ext{neigh}_Wall0,   !- Shading Surface Name
+    0.2;                 !- Diffuse Solar Reflectance of Unglazed Part of Shading Surface
+"""
+
+
+@pytest.fixture
+def res_folder():
+    res_folder = os.path.dirname(__file__) / Path("result") / Path("idf_canonicalization")
+    shutil.rmtree(res_folder, ignore_errors=True)
+    os.makedirs(res_folder)
+    yield res_folder
+    shutil.rmtree(res_folder, ignore_errors=True)
+
+
+def test_canonicalize_idf():
+    canonical = canonicalize_idf(_IDF_TEMPLATE.format(neigh=123, x=0))
+    assert "!-" not in canonical
+    assert "Ext123" not in canonical
+    assert canonical == canonicalize_idf(_IDF_TEMPLATE.format(neigh=45, x=0).replace("    ", "\t"))
+    assert canonical != canonicalize_idf(_IDF_TEMPLATE.format(neigh=45, x=1))
+
+
+def test_get_simulation_key(res_folder):
+    weather_file = os.path.dirname(__file__) / Path("testfixture") / Path("DummyWeather.epw")
+    idf_pathes = {}
+    for fid, neigh, x in [(1, 2, 0), (2, 1, 0), (3, 1, 1)]:
+        idf_pathes[fid] = res_folder / Path(f"fid_{fid}.idf")
+        with open(idf_pathes[fid], "w") as idf_file:
+            idf_file.write(_IDF_TEMPLATE.format(neigh=neigh, x=x))
+    assert get_simulation_key(idf_pathes[1], weather_file) == get_simulation_key(idf_pathes[2], weather_file)
+    assert get_simulation_key(idf_pathes[1], weather_file) != get_simulation_key(idf_pathes[3], weather_file)
+    assert get_simulation_key(idf_pathes[1], weather_file) != get_simulation_key(idf_pathes[1], idf_pathes[3])
@@ -0,0 +1,103 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import copy
+import pytest
+from eppy.modeleditor import IDF
+from six import StringIO
+
+import cesarp.common
+import cesarp.eplus_adapter.idf_strings
+from cesarp.eplus_adapter import idf_writer_construction, idf_construction_cache
+from cesarp.eplus_adapter import _default_config_file as eplus_adpater_config_file
+from tests.test_eplus_adapter.test_construction_writing import get_sample_opaque_constr, get_sample_win_constr
+
+
+def _create_idf():
+    idfstring = cesarp.eplus_adapter.idf_strings.version.format("9.5.0")
+    return IDF(StringIO(idfstring))
+
+
+@pytest.fixture
+def ureg():
+    eplus_cfg = cesarp.common.config_loader.load_config_for_package(eplus_adpater_config_file, "cesarp.eplus_adapter")
+    IDF.setiddname(eplus_cfg["CUSTOM_IDD_9_5"])
+    idf_construction_cache.clear_cache()
+    yield cesarp.common.init_unit_registry()
+    idf_construction_cache.clear_cache()
+
+
+def _add_constructions(idf, constructions, ureg, use_cache):
+    names = []
+    for constr, is_window in constructions:
+        if use_cache:
+            names.append(idf_construction_cache.add_cached(idf, constr, lambda target_idf: idf_writer_construction.add_detailed_construction(target_idf, constr, ureg, is_window)))
+        else:
+            names.append(idf_writer_construction.add_detailed_construction(idf, constr, ureg, is_window))
+    return names
+
+
+def test_cached_idf_objects_equal_to_directly_written(ureg):
+    opaque_constr = get_sample_opaque_constr(ureg)
+    # second construction sharing materials with the first one
+    other_constr = copy.deepcopy(opaque_constr)
+    other_constr.name = "the_other_sample_construction"
+    other_constr.layers = other_constr.layers[1:]
+    constructions = [(opaque_constr, False), (get_sample_win_constr(ureg).glass, True), (other_constr, False)]
+
+    idf_direct = _create_idf()
+    expected_names = _add_constructions(idf_direct, constructions, ureg, use_cache=False)
+
+    idf_first_bldg = _create_idf()
+    assert _add_constructions(idf_first_bldg, constructions, ureg, use_cache=True) == expected_names
+    assert idf_construction_cache.get_nr_of_cached_entries() == 3
+    assert idf_first_bldg.idfstr() == idf_direct.idfstr()
+
+    idf_second_bldg = _create_idf()
+    assert _add_constructions(idf_second_bldg, constructions, ureg, use_cache=True) == expected_names
+    assert idf_construction_cache.get_nr_of_cached_entries() == 3
+    assert idf_second_bldg.idfstr() == idf_direct.idfstr()
+
+
+def test_cached_idf_objects_are_copies(ureg):
+    opaque_constr = get_sample_opaque_constr(ureg)
+    idf_first_bldg = _create_idf()
+    _add_constructions(idf_first_bldg, [(opaque_constr, False)], ureg, use_cache=True)
+    idf_first_bldg.idfobjects["CONSTRUCTION"][0].Outside_Layer = "modified"
+
+    idf_second_bldg = _create_idf()
+    _add_constructions(idf_second_bldg, [(opaque_constr, False)], ureg, use_cache=True)
+    assert idf_second_bldg.idfobjects["CONSTRUCTION"][0].Outside_Layer != "modified"
+
+
+def test_same_name_different_properties_cached_separately(ureg):
+    opaque_constr = get_sample_opaque_constr(ureg)
+    changed_constr = copy.deepcopy(opaque_constr)
+    changed_constr.layers[0].thickness = 0.3 * ureg.m
+    assert idf_construction_cache.get_structural_key(opaque_constr) != idf_construction_cache.get_structural_key(changed_constr)
+
+    _add_constructions(_create_idf(), [(opaque_constr, False)], ureg, use_cache=True)
+    idf_changed = _create_idf()
+    _add_constructions(idf_changed, [(changed_constr, False)], ureg, use_cache=True)
+    assert idf_construction_cache.get_nr_of_cached_entries() == 2
+    idf_direct = _create_idf()
+    _add_constructions(idf_direct, [(changed_constr, False)], ureg, use_cache=False)
+    assert idf_changed.idfstr() == idf_direct.idfstr()
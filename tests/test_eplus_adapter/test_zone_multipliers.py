@@ -0,0 +1,147 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+import shutil
+from pathlib import Path
+import pandas as pd
+import pytest
+from eppy.modeleditor import IDF
+
+import cesarp.common
+from cesarp.manager.BldgModelFactory import BldgModelFactory
+from cesarp.eplus_adapter.CesarIDFWriter import CesarIDFWriter
+from cesarp.eplus_adapter.RelativeAuxiliaryFilesHandler import RelativeAuxiliaryFilesHandler
+from cesarp.eplus_adapter import idf_writer_geometry
+from cesarp.eplus_adapter import eplus_sim_runner
+from cesarp.eplus_adapter import eplus_eso_results_handling
+
+_TESTFIXTURE_FOLDER = os.path.dirname(__file__) / Path("testfixture")
+_RESULT_FOLDER = os.path.dirname(__file__) / Path("results_zone_multipliers")
+_NR_OF_FLOORS = 12  # building with 30m height
+
+
+@pytest.fixture
+def res_folder():
+    res_folder = Path(_RESULT_FOLDER).absolute()
+    shutil.rmtree(res_folder, ignore_errors=True)
+    os.makedirs(res_folder)
+    yield res_folder
+    shutil.rmtree(res_folder, ignore_errors=True)
+
+
+@pytest.fixture
+def ureg():
+    return cesarp.common.init_unit_registry()
+
+
+@pytest.fixture
+def config(res_folder):
+    site_vertices = pd.read_csv(_TESTFIXTURE_FOLDER / Path("SiteVertices.csv"))
+    site_vertices.loc[site_vertices["TARGET_FID"] == 2, "HEIGHT"] = 30
+    site_vertices_file = res_folder / Path("SiteVertices_tall.csv")
+    site_vertices.to_csv(site_vertices_file, index=False)
+    bldg_info_file = _TESTFIXTURE_FOLDER / Path("BuildingInformation.csv")
+    config = dict()
+    config["MANAGER"] = dict()
+    config["MANAGER"]["SITE_VERTICES_FILE"] = {"PATH": site_vertices_file}
+    config["MANAGER"]["BLDG_FID_FILE"] = {"PATH": bldg_info_file}
+    config["MANAGER"]["BLDG_AGE_FILE"] = {"PATH": bldg_info_file}
+    config["MANAGER"]["BLDG_TYPE_PER_BLDG_FILE"] = {"PATH": bldg_info_file}
+    config["MANAGER"]["BLDG_INSTALLATION_FILE"] = {"PATH": bldg_info_file}
+    config["MANAGER"]["BUILDING_OPERATION_FACTORY_CLASS"] = "cesarp.operation.fixed.FixedBuildingOperationFactory.FixedBuildingOperationFactory"
+    config["MANAGER"]["SINGLE_SITE"] = {"ACTIVE": True, "WEATHER_FILE": _TESTFIXTURE_FOLDER / Path("DummyWeather.epw")}
+    config["MANAGER"]["SITE_PER_CH_COMMUNITY"] = {"ACTIVE": False}
+    config["GEOMETRY"] = {"NEIGHBOURHOOD": {"RADIUS": 1}}
+    return config
+
+
+@pytest.fixture
+def bldg_model(config, ureg):
+    return BldgModelFactory(ureg, config).create_bldg_model(2)
+
+
+def write_idf(bldg_model, config, ureg, res_folder, zone_multipliers_active):
+    config["EPLUS_ADAPTER"] = {"ZONE_MULTIPLIERS": {"ACTIVE": zone_multipliers_active}}
+    idf_folder = res_folder / Path(f"zone_multipliers_{zone_multipliers_active}")
+    os.makedirs(idf_folder)
+    idf_path = idf_folder / Path("fid_2.idf")
+    profile_file_handler = RelativeAuxiliaryFilesHandler()
+    profile_file_handler.set_destination(idf_folder, "profiles")
+    CesarIDFWriter(idf_path, ureg, profile_file_handler, custom_config=config).write_bldg_model(bldg_model)
+    return idf_path
+
+
+def test_group_repeated_floors(bldg_model):
+    bldg_shape = bldg_model.bldg_shape
+    assert bldg_shape.get_nr_of_floors() == _NR_OF_FLOORS
+    assert idf_writer_geometry.group_repeated_floors(bldg_shape, lambda floor_a, floor_b: True) == [[0], list(range(1, 11)), [11]]
+    # a floor with different operation splits the group
+    assert idf_writer_geometry.group_repeated_floors(bldg_shape, lambda floor_a, floor_b: (floor_a == 5) == (floor_b == 5)) == [[0], [1, 2, 3, 4], [5], [6, 7, 8, 9, 10], [11]]
+    # a floor with a different geometry splits the group
+    bldg_shape.windows[7][0] = None
+    assert idf_writer_geometry.group_repeated_floors(bldg_shape, lambda floor_a, floor_b: True) == [[0], [1, 2, 3, 4, 5, 6], [7], [8, 9, 10], [11]]
+
+
+def test_group_repeated_floors_low_bldg(bldg_model):
+    bldg_shape = bldg_model.bldg_shape
+    (all_walls, all_internal_floors) = (bldg_shape.walls, bldg_shape.internal_floors)
+    for nr_of_floors in [1, 2, 3]:
+        bldg_shape.walls = all_walls[:nr_of_floors]
+        bldg_shape.internal_floors = all_internal_floors[: nr_of_floors - 1]
+        assert idf_writer_geometry.group_repeated_floors(bldg_shape, lambda floor_a, floor_b: True) == [[floor_nr] for floor_nr in range(nr_of_floors)]
+
+
+def test_idf_with_zone_multipliers(bldg_model, config, ureg, res_folder):
+    idf_path = write_idf(bldg_model, config, ureg, res_folder, zone_multipliers_active=True)
+    idf = IDF(str(idf_path))
+    zones = idf.idfobjects["ZONE"]
+    assert [zone.Name for zone in zones] == ["ZoneFloor0", "ZoneFloor6", "ZoneFloor11"]
+    assert [zone.Multiplier for zone in zones] == [1, 10, 1]
+    internal_surfaces = [surface for surface in idf.idfobjects["BUILDINGSURFACE:DETAILED"] if surface.Surface_Type.lower() in ["floor", "ceiling"]]
+    for surface in internal_surfaces:
+        if surface.Outside_Boundary_Condition.lower() != "ground":
+            assert surface.Outside_Boundary_Condition.lower() == "adiabatic"
+    # each zone gets its operation
+    assert len(idf.idfobjects["PEOPLE"]) == 3
+
+
+def test_idf_without_zone_multipliers(bldg_model, config, ureg, res_folder):
+    idf_path = write_idf(bldg_model, config, ureg, res_folder, zone_multipliers_active=False)
+    zones = IDF(str(idf_path)).idfobjects["ZONE"]
+    assert len(zones) == _NR_OF_FLOORS
+    assert all(zone.Multiplier in ["", 1] for zone in zones)
+
+
+@pytest.mark.skipif(not os.path.isfile(eplus_sim_runner.get_eplus_executable()), reason="EnergyPlus not installed")
+def test_zone_multipliers_against_full_simulation(bldg_model, config, ureg, res_folder):
+    weather_file = str(_TESTFIXTURE_FOLDER / Path("DummyWeather.epw"))
+    results = {}
+    for zone_multipliers_active in [False, True]:
+        idf_path = write_idf(bldg_model, config, ureg, res_folder, zone_multipliers_active)
+        output_path = res_folder / Path(f"eplus_output_{zone_multipliers_active}")
+        eplus_sim_runner.run_single(idf_path, weather_file, output_path, custom_config=config)
+        results[zone_multipliers_active] = eplus_eso_results_handling.collect_cesar_simulation_summary(output_path, ureg)
+    (full, multiplied) = (results[False], results[True])
+    assert multiplied.total_floor_area.m == pytest.approx(full.total_floor_area.m, rel=0.001)
+    assert multiplied.tot_dhw_demand.m == pytest.approx(full.tot_dhw_demand.m, rel=0.01)
+    assert multiplied.tot_electricity_demand.m == pytest.approx(full.tot_electricity_demand.m, rel=0.01)
+    assert multiplied.tot_heating_demand.m == pytest.approx(full.tot_heating_demand.m, rel=0.1)
@@ -108,3 +108,15 @@ def test_glz_ratio_check_walls_too_small(flat_site_vertices, caplog):
         overall_glz_ratio = geom_builder._check_glz_ratio(bldg_shape_small_walls)
 
     assert pytest.approx(0.1548, abs=0.001) == overall_glz_ratio
+
+
+def test_neighbour_shading_reduction(flat_site_vertices):
+    site_bldgs = vertices_basics.convert_flat_site_vertices_to_per_bldg_footprint(flat_site_vertices)
+    cfg_all = {"GEOMETRY": {"NEIGHBOURHOOD": {"RADIUS": 500}}}
+    cfg_reduced = {"GEOMETRY": {"NEIGHBOURHOOD": {"RADIUS": 500, "SHADING_REDUCTION": {"ACTIVE": True}}}}
+    all_neighbours = GeometryBuilder(2, site_bldgs, _set_glz_ratio, BldgType.MFH, cfg_all).get_bldg_shape_of_neighbours()
+    assert sorted(all_neighbours.keys()) == [1, 3, 4, 5, 6, 7, 8, 9]
+    geom_builder = GeometryBuilder(2, site_bldgs, _set_glz_ratio, BldgType.MFH, cfg_reduced)
+    # buildings in a row with the same height, the ones further away than about 140m are too low to cast a relevant shadow
+    assert sorted(geom_builder.get_bldg_shape_of_neighbours().keys()) == [1, 3, 4, 5]
+    assert len(geom_builder._neighbours) == 8
@@ -0,0 +1,102 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import math
+import numpy as np
+import pandas as pd
+import pytest
+
+from cesarp.geometry import neighbour_shading_reduction
+from cesarp.geometry import polygon_metrics
+
+
+def rectangle(x, y, width, depth):
+    """clockwise footprint with lower left corner at x, y"""
+    return pd.DataFrame({"x": [x, x, x + width, x + width], "y": [y, y + depth, y + depth, y]}, dtype=float)
+
+
+def bldg(gis_fid, footprint_shape, height):
+    return {"gis_fid": gis_fid, "footprint_shape": footprint_shape, "height": height, "main_vertex_x": footprint_shape.loc[0, "x"], "main_vertex_y": footprint_shape.loc[0, "y"]}
+
+
+@pytest.fixture
+def main():
+    return bldg(1, rectangle(0, 0, 10, 10), 10)
+
+
+def test_cull_neighbours(main):
+    close = bldg(2, rectangle(15, 0, 10, 10), 10)
+    far_and_low = bldg(3, rectangle(90, 0, 10, 10), 5)
+    far_and_high = bldg(4, rectangle(90, 0, 10, 10), 40)
+    far_and_narrow = bldg(5, rectangle(0, 90, 1, 1), 40)
+    kept = neighbour_shading_reduction.cull_neighbours(main, [close, far_and_low, far_and_high, far_and_narrow], min_elevation_angle=5, min_solid_angle=0.01)
+    assert [neigh["gis_fid"] for neigh in kept] == [2, 4]
+
+
+def test_view_angles(main):
+    main_polygon = neighbour_shading_reduction._to_polygon(main["footprint_shape"])
+    neigh_polygon = neighbour_shading_reduction._to_polygon(rectangle(20, 20, 10, 10))
+    (elevation, solid_angle) = neighbour_shading_reduction.calc_view_angles(main_polygon, neigh_polygon, math.sqrt(200))
+    assert math.degrees(elevation) == pytest.approx(45)
+    # seen from corner (10, 10) of main the neighbour covers the azimuth range between its corners (30, 20) and (20, 30)
+    assert solid_angle == pytest.approx((math.atan2(20, 10) - math.atan2(10, 20)) * math.sin(elevation))
+
+
+def test_merge_adjacent_neighbours():
+    row_a = bldg(10, rectangle(0, 20, 10, 10), 12)
+    row_b = bldg(11, rectangle(10, 20, 10, 10), 14)
+    row_c = bldg(12, rectangle(20.05, 20, 10, 10), 12)
+    much_higher = bldg(13, rectangle(30.05, 20, 10, 10), 30)
+    separate = bldg(14, rectangle(0, 50, 10, 10), 12)
+    merged = neighbour_shading_reduction.merge_adjacent_neighbours([row_a, row_b, row_c, much_higher, separate], max_distance=0.1, max_height_difference=3)
+    assert sorted(neigh["gis_fid"] for neigh in merged) == [10, 13, 14]
+    row = [neigh for neigh in merged if neigh["gis_fid"] == 10][0]
+    assert row["height"] == pytest.approx((12 + 14 + 12) / 3)
+    assert polygon_metrics.calc_area_of_polygon(row["footprint_shape"]) == pytest.approx(30.05 * 10)
+    assert len(row["footprint_shape"]) == 4
+    assert not neighbour_shading_reduction._to_polygon(row["footprint_shape"]).exterior.is_ccw
+    assert (row["main_vertex_x"], row["main_vertex_y"]) == tuple(row["footprint_shape"].loc[0, ["x", "y"]])
+    assert [neigh for neigh in merged if neigh["gis_fid"] == 14][0] is separate
+
+
+def test_merge_keeps_courtyard_bldgs_separate():
+    ring = [bldg(1, rectangle(0, 0, 30, 10), 10), bldg(2, rectangle(0, 10, 10, 10), 10), bldg(3, rectangle(20, 10, 10, 10), 10), bldg(4, rectangle(0, 20, 30, 10), 10)]
+    merged = neighbour_shading_reduction.merge_adjacent_neighbours(ring, max_distance=0.1, max_height_difference=3)
+    assert [neigh["gis_fid"] for neigh in merged] == [1, 2, 3, 4]
+
+
+def test_simplify_footprint():
+    angles = np.linspace(0, 2 * math.pi, 60, endpoint=False)
+    circle = pd.DataFrame({"x": 10 * np.cos(angles), "y": 10 * np.sin(angles)})
+    simplified = neighbour_shading_reduction.simplify_footprint(circle, max_nr_of_vertices=12)
+    assert 4 <= len(simplified) <= 12
+    assert polygon_metrics.calc_area_of_polygon(simplified) == pytest.approx(polygon_metrics.calc_area_of_polygon(circle), rel=0.1)
+    assert neighbour_shading_reduction._to_polygon(simplified).exterior.is_ccw
+
+
+def test_reduce_neighbours_does_not_change_input(main):
+    angles = np.linspace(0, 2 * math.pi, 40, endpoint=False)
+    round_bldg = bldg(2, pd.DataFrame({"x": 30 + 5 * np.cos(angles), "y": 5 * np.sin(angles)}), 20)
+    cfg = {"MIN_ELEVATION_ANGLE": 5, "MIN_SOLID_ANGLE": 0.01, "MERGE_ADJACENT": {"ACTIVE": True, "MAX_DISTANCE": 0.1, "MAX_HEIGHT_DIFFERENCE": 3}, "MAX_NR_OF_VERTICES": 8}
+    reduced = neighbour_shading_reduction.reduce_neighbours(main, [round_bldg], cfg)
+    assert len(reduced) == 1
+    assert len(reduced[0]["footprint_shape"]) <= 8
+    assert len(round_bldg["footprint_shape"]) == 40
@@ -0,0 +1,54 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import numpy as np
+import pandas as pd
+import pytest
+
+from cesarp.geometry import polygon_metrics
+from cesarp.geometry.CesarGeometryException import CesarGeometryException
+
+
+def test_area_l_shaped_footprint():
+    l_shape = pd.DataFrame([[0, 0], [10, 0], [10, 5], [5, 5], [5, 10], [0, 10]], columns=["x", "y"]).astype("float64")
+    assert polygon_metrics.calc_area_of_polygon(l_shape) == pytest.approx(75)
+    assert polygon_metrics.calc_perimeter_of_polygon(l_shape) == pytest.approx(40)
+
+
+def test_area_tilted_polygon_3d():
+    # roof surface with 45° slope, 10m wide and 5m projected depth
+    tilted = pd.DataFrame([[0, 0, 3], [10, 0, 3], [10, 5, 8], [0, 5, 8]], columns=["x", "y", "z"]).astype("float64")
+    assert polygon_metrics.calc_area_of_polygon(tilted) == pytest.approx(10 * 5 * np.sqrt(2))
+
+
+def test_areas_of_many_polygons_large_coordinates():
+    # swiss LV95 coordinates, wall and a triangular gable
+    wall = np.array([[2600000.0, 1200000.0, 0], [2600010.0, 1200000.0, 0], [2600010.0, 1200000.0, 3], [2600000.0, 1200000.0, 3]])
+    gable = np.array([[2600000.0, 1200000.0, 3], [2600010.0, 1200000.0, 3], [2600005.0, 1200000.0, 5]])
+    areas = polygon_metrics.calc_areas_of_polygons([wall, gable, wall])
+    np.testing.assert_allclose(areas, [30, 10, 30])
+    np.testing.assert_allclose(polygon_metrics.calc_perimeters_of_polygons([wall, gable]), [26, 10 + 2 * np.sqrt(29)])
+    assert len(polygon_metrics.calc_areas_of_polygons([])) == 0
+
+
+def test_invalid_polygon():
+    with pytest.raises(CesarGeometryException):
+        polygon_metrics.calc_area_of_polygon(np.array([[0, 0], [1, 1]]))
@@ -0,0 +1,208 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import cesarp.eplus_adapter.eplus_sim_runner
+from cesarp.common.CesarpException import CesarpException
+from cesarp.eplus_adapter.eplus_sim_runner import EnergyPlusKilledError
+from cesarp.manager import memory_admission, processing_steps
+from cesarp.manager.memory_admission import MemoryBudget
+from cesarp.manager.SimulationCostPredictor import count_surfaces
+
+_ADMISSION_CFG = {"MEMORY_BUDGET_MB": 1000, "BASE_MB": 100, "PER_SURFACE_MB": 1, "PER_SURFACE_PAIR_MB": 0.01}
+
+
+def _bldg_model(nr_of_neighbours):
+    bldg_shape = SimpleNamespace(walls=[[object()] * 4] * 2, windows=[[object()] * 4] * 2, internal_floors=[object()])
+    neighbours = {fid: SimpleNamespace(walls=[[object()] * 4]) for fid in range(nr_of_neighbours)}
+    return SimpleNamespace(bldg_shape=bldg_shape, neighbours=neighbours)
+
+
+def test_estimate_sim_memory():
+    # 8 walls, groundfloor, roof, floor and ceiling, 8 windows
+    assert memory_admission.estimate_sim_memory_mb(count_surfaces(_bldg_model(0)), _ADMISSION_CFG) == pytest.approx(100 + 20 + 0.01 * 20**2)
+    assert memory_admission.estimate_sim_memory_mb(count_surfaces(_bldg_model(10)), _ADMISSION_CFG) == pytest.approx(100 + 70 + 0.01 * 70**2)
+
+
+def test_memory_budget_mb():
+    assert memory_admission.get_memory_budget_mb(_ADMISSION_CFG) == 1000
+    if hasattr(os, "sysconf"):
+        assert memory_admission.get_memory_budget_mb({"MEMORY_BUDGET_MB": -1}) > 0
+
+
+def test_reservations_stay_within_budget():
+    budget = MemoryBudget(100)
+    running = []
+    max_reserved = []
+
+    def simulate(estimate_mb):
+        with memory_admission.admitted(budget, estimate_mb):
+            running.append(estimate_mb)
+            max_reserved.append(sum(running))
+            time.sleep(0.02)
+            running.remove(estimate_mb)
+
+    threads = [threading.Thread(target=simulate, args=(estimate_mb,)) for estimate_mb in [40, 40, 40, 70, 20, 250, 10]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert len(max_reserved) == len(threads)
+    # simulation estimated above the budget is capped to the budget and thus runs alone
+    assert max(max_reserved) <= 250
+    assert all(reserved <= 100 for reserved in max_reserved if reserved != 250)
+    assert budget.get_reserved_mb() == 0
+
+
+def test_reservations_first_come_first_served():
+    budget = MemoryBudget(100)
+    first = budget.reserve(60)
+    admitted = []
+    tickets = []
+
+    def reserve(estimate_mb):
+        tickets.append(budget.reserve(estimate_mb))
+        admitted.append(estimate_mb)
+
+    big = threading.Thread(target=reserve, args=(80,))
+    big.start()
+    time.sleep(0.05)
+    small = threading.Thread(target=reserve, args=(10,))
+    small.start()
+    time.sleep(0.05)
+    # small one would fit, but has to wait for the big one requested before
+    assert admitted == []
+    budget.release(first)
+    big.join(timeout=10)
+    small.join(timeout=10)
+    assert admitted == [80, 10]
+    assert budget.get_reserved_mb() == 90
+    for ticket in tickets:
+        budget.release(ticket)
+    budget.reserve(10, exclusive=True)
+    assert budget.get_reserved_mb() == 100
+
+
+def test_shared_memory_budget():
+    budget = memory_admission.get_shared_memory_budget(123)
+    assert memory_admission.get_shared_memory_budget(123) is budget
+    ticket = budget.reserve(200)
+    assert budget.get_reserved_mb() == 123
+    budget.release(ticket)
+    assert budget.get_reserved_mb() == 0
+
+
+def _start_owner_process():
+    return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+
+
+def test_reservation_of_dead_owner_reclaimed(monkeypatch):
+    monkeypatch.setattr(memory_admission, "_OWNER_CHECK_INTERVAL_S", 0.01)
+    budget = MemoryBudget(100)
+    owner = _start_owner_process()
+    budget.reserve(80, owner_pid=owner.pid)
+    # owner killed while holding the reservation, e.g. by SIGKILL which skips the release
+    owner.kill()
+    owner.wait()
+    admitted = []
+    waiting = threading.Thread(target=lambda: admitted.append(budget.reserve(50, owner_pid=os.getpid())))
+    waiting.start()
+    waiting.join(timeout=10)
+    assert len(admitted) == 1
+    assert budget.get_reserved_mb() == 50
+
+
+def test_abandoned_ticket_skipped(monkeypatch):
+    monkeypatch.setattr(memory_admission, "_OWNER_CHECK_INTERVAL_S", 0.01)
+    budget = MemoryBudget(100)
+    budget.reserve(80, owner_pid=os.getpid())
+    owner = _start_owner_process()
+    abandoned = []
+
+    def reserve_abandoned():
+        try:
+            budget.reserve(50, owner_pid=owner.pid)
+        except CesarpException:
+            abandoned.append(True)
+
+    first_in_queue = threading.Thread(target=reserve_abandoned)
+    first_in_queue.start()
+    time.sleep(0.05)
+    admitted = []
+    next_in_queue = threading.Thread(target=lambda: admitted.append(budget.reserve(10, owner_pid=os.getpid())))
+    next_in_queue.start()
+    time.sleep(0.05)
+    assert admitted == []
+    # owner killed while waiting for its reservation, the ticket must not block the following reservations
+    owner.kill()
+    owner.wait()
+    first_in_queue.join(timeout=10)
+    next_in_queue.join(timeout=10)
+    assert abandoned == [True]
+    assert len(admitted) == 1
+    assert budget.get_reserved_mb() == 90
+
+
+def test_killed_simulation_retried_exclusive(tmp_path, monkeypatch):
+    calls = []
+
+    def run_single(idf_path, weather_file, output_folder, ep_config):
+        calls.append(budget.get_reserved_mb())
+        os.makedirs(output_folder)
+        if len(calls) == 1:
+            raise EnergyPlusKilledError("killed")
+
+    monkeypatch.setattr(cesarp.eplus_adapter.eplus_sim_runner, "run_single", run_single)
+    budget = MemoryBudget(100)
+    (successful, _) = processing_steps.run_simulation_no_exception("a.idf", "a.epw", str(tmp_path / "out"), {}, 1, budget, 30)
+    assert successful
+    assert calls == [30, 100]
+    assert budget.get_reserved_mb() == 0
+
+
+def test_killed_simulation_not_retried_without_budget(tmp_path, monkeypatch):
+    def run_single(idf_path, weather_file, output_folder, ep_config):
+        raise EnergyPlusKilledError("killed")
+
+    monkeypatch.setattr(cesarp.eplus_adapter.eplus_sim_runner, "run_single", run_single)
+    (successful, _) = processing_steps.run_simulation_no_exception("a.idf", "a.epw", str(tmp_path / "out"), {})
+    assert not successful
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="signals are POSIX only")
+def test_killed_energyplus_detected(tmp_path, monkeypatch):
+    fake_eplus = tmp_path / "energyplus"
+    fake_eplus.write_text("#!/bin/sh\nkill -9 $$\n")
+    fake_eplus.chmod(0o755)
+    (tmp_path / "a.idf").write_text("")
+    (tmp_path / "a.epw").write_text("")
+    monkeypatch.setenv("ENERGYPLUS_EXE", str(fake_eplus))
+    ep_config = cesarp.eplus_adapter.eplus_sim_runner.get_config()
+    with pytest.raises(EnergyPlusKilledError):
+        cesarp.eplus_adapter.eplus_sim_runner.run_single(tmp_path / "a.idf", str(tmp_path / "a.epw"), str(tmp_path / "out"), ep_config=ep_config)
@@ -0,0 +1,107 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import logging
+import os
+import random
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from cesarp.manager import project_archive
+from cesarp.manager.project_archive import ParallelArchiveWriter
+
+
+@pytest.fixture
+def project_files(tmp_path):
+    rnd = random.Random(42)
+    sizes = {"empty.txt": 0, "small.txt": 300, "large.txt": 3 * 1024 * 1024 + 17}
+    files = []
+    text_block = bytes(rnd.choice(b"abcdef \n") for _ in range(64 * 1024))
+    for name, size in sizes.items():
+        file_path = tmp_path / name
+        file_path.write_bytes((text_block * (size // len(text_block) + 1))[:size])
+        files.append(file_path)
+    return files
+
+
+@pytest.mark.parametrize("nr_of_workers", [1, 2])
+def test_archive_readable_by_zipfile(tmp_path, project_files, nr_of_workers):
+    zip_path = tmp_path / "project.zip"
+    with ParallelArchiveWriter(zip_path, nr_of_workers=nr_of_workers, chunk_size_mb=1) as writer:
+        for file_path in project_files:
+            assert writer.write(file_path, str(Path("sub") / file_path.name))
+
+    with zipfile.ZipFile(zip_path) as the_zip:
+        assert the_zip.testzip() is None
+        assert sorted(the_zip.namelist()) == sorted(f"sub/{file_path.name}" for file_path in project_files)
+        for file_path in project_files:
+            assert the_zip.read(f"sub/{file_path.name}") == file_path.read_bytes()
+    assert os.path.getsize(zip_path) < sum(os.path.getsize(file_path) for file_path in project_files)
+
+
+def test_zip64_archive_readable_by_zipfile(tmp_path, project_files, monkeypatch):
+    # with a low limit the ZIP64 records are written for files, offsets and the central directory as for archives bigger than 2GB
+    monkeypatch.setattr(project_archive, "ZIP64_LIMIT", 1000)
+    zip_path = tmp_path / "project.zip"
+    with ParallelArchiveWriter(zip_path, chunk_size_mb=1) as writer:
+        for file_path in project_files:
+            writer.write(file_path, f"ressourcen/{file_path.name}")
+
+    with zipfile.ZipFile(zip_path) as the_zip:
+        assert the_zip.testzip() is None
+        for file_path in project_files:
+            assert the_zip.read(f"ressourcen/{file_path.name}") == file_path.read_bytes()
+
+
+def test_aborted_archive_holds_completed_files(tmp_path, project_files):
+    zip_path = tmp_path / "project.zip"
+    with pytest.raises(ValueError):
+        with ParallelArchiveWriter(zip_path, chunk_size_mb=1) as writer:
+            writer.write(project_files[1], "small_\u00e4.txt")
+            writer.write(project_files[2], "large.txt")
+            raise ValueError("aborted")
+
+    with zipfile.ZipFile(zip_path) as the_zip:
+        assert the_zip.testzip() is None
+        assert the_zip.namelist() == ["small_\u00e4.txt"]
+        assert the_zip.read("small_\u00e4.txt") == project_files[1].read_bytes()
+
+
+def test_incremental_archive(tmp_path, project_files):
+    with ParallelArchiveWriter(tmp_path / "first.zip") as writer:
+        for file_path in project_files:
+            writer.write(file_path, file_path.name)
+    first_manifest = writer.get_manifest()
+
+    with open(project_files[1], "ab") as fd:
+        fd.write(b"changed")
+    with ParallelArchiveWriter(tmp_path / "second.zip", base_manifest=first_manifest) as writer:
+        added = [writer.write(file_path, file_path.name) for file_path in project_files]
+    second_manifest = writer.get_manifest()
+
+    assert added == [False, True, False]
+    with zipfile.ZipFile(tmp_path / "second.zip") as the_zip:
+        assert the_zip.namelist() == ["small.txt"]
+    assert second_manifest["small.txt"]["archive"] == "second.zip"
+    assert second_manifest["large.txt"] == first_manifest["large.txt"]
+    assert second_manifest["large.txt"]["archive"] == "first.zip"
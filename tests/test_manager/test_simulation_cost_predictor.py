@@ -0,0 +1,118 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import heapq
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from cesarp.manager.SimulationCostPredictor import FEATURE_NAMES, SIM_TIME_COLUMN, SimulationCostPredictor, count_surfaces, order_longest_first, to_samples
+from cesarp.manager.FileStorageHandler import FileStorageHandler
+
+
+def _bldg_model(nr_of_floors, walls_per_floor, nr_of_neighbours):
+    walls = [[object()] * walls_per_floor for _ in range(nr_of_floors)]
+    windows = [[object()] * (walls_per_floor - 1) + [None] for _ in range(nr_of_floors)]
+    neighbours = {fid: SimpleNamespace(walls=[[object()] * 4]) for fid in range(nr_of_neighbours)}
+    bldg_shape = SimpleNamespace(walls=walls, windows=windows, internal_floors=[object()] * (nr_of_floors - 1))
+    return SimpleNamespace(bldg_shape=bldg_shape, neighbours=neighbours)
+
+
+def _makespan(sim_times, nr_of_workers):
+    # workers take the next queued job as soon as they are free
+    workers = [0.0] * nr_of_workers
+    for sim_time in sim_times:
+        heapq.heappush(workers, heapq.heappop(workers) + sim_time)
+    return max(workers)
+
+
+def test_cost_features():
+    features = SimulationCostPredictor.get_cost_features(count_surfaces(_bldg_model(nr_of_floors=3, walls_per_floor=4, nr_of_neighbours=2)), nr_of_timesteps=4)
+    nr_of_surfaces = 3 * 4 + 2 + 2 * 2
+    nr_of_windows = 3 * 3
+    assert features == [1.0, 3 * 4, nr_of_surfaces * 4, nr_of_windows * 4, 2 * 5 * (nr_of_surfaces + nr_of_windows)]
+
+
+def test_surfaces_counted_with_zone_multipliers():
+    bldg_model = _bldg_model(nr_of_floors=6, walls_per_floor=4, nr_of_neighbours=1)
+    # floors 1 to 4 written as one zone with multiplier 4
+    (nr_of_zones, nr_of_surfaces, nr_of_windows, nr_of_shading_surfaces) = count_surfaces(bldg_model, [[0], [1, 2, 3, 4], [5]])
+    assert nr_of_zones == 3
+    assert nr_of_surfaces == 3 * 4 + 2 + 2 * 2
+    assert nr_of_windows == 3 * 3
+    assert nr_of_shading_surfaces == 5
+    assert count_surfaces(bldg_model, [[0], [1], [2], [3], [4], [5]]) == count_surfaces(bldg_model)
+
+
+def test_bigger_building_predicted_longer():
+    predictor = SimulationCostPredictor()
+    small = SimulationCostPredictor.get_cost_features(count_surfaces(_bldg_model(1, 4, 0)), 4)
+    big = SimulationCostPredictor.get_cost_features(count_surfaces(_bldg_model(8, 12, 20)), 4)
+    (small_time, big_time) = predictor.predict(np.array([small, big]))
+    assert 0 < small_time < big_time
+
+
+def test_calibration_recovers_coefficients():
+    true_coefficients = np.array([2.0, 0.1, 0.02, 0.0, 0.001])
+    rng = np.random.default_rng(42)
+    features = np.column_stack([np.ones(200), rng.uniform(4, 200, (200, len(FEATURE_NAMES) - 1))])
+    features[:, 4] *= 1000
+    predictor = SimulationCostPredictor()
+    predictor.calibrate(features, features @ true_coefficients, prior_weight=0.01)
+    assert np.allclose(predictor.coefficients, true_coefficients, rtol=0.05, atol=1e-3)
+
+
+def test_few_samples_keep_prior():
+    features = np.array([[1.0, 20, 200, 40, 5000]])
+    predictor = SimulationCostPredictor()
+    uncalibrated_time = predictor.predict(features)[0]
+    predictor.calibrate(features, np.array([uncalibrated_time * 3]), prior_weight=10)
+    assert uncalibrated_time < predictor.predict(features)[0] < uncalibrated_time * 3
+
+
+def test_order_longest_first():
+    assert order_longest_first([1, 2, 3, 4], {1: 10.0, 2: 30.0, 3: 10.0}) == [2, 1, 3, 4]
+    assert order_longest_first([4, 3, 2, 1], {1: 10.0, 2: 30.0, 3: 10.0, 4: 40.0}) == [4, 2, 3, 1]
+
+
+def test_longest_first_shortens_makespan():
+    # many short simulations and a few long ones, the long ones are queued last when ordered by fid
+    sim_times = {fid: 10.0 for fid in range(42)}
+    sim_times.update({fid: 120.0 for fid in range(42, 45)})
+    ordered = order_longest_first(sorted(sim_times.keys()), sim_times)
+    makespan_by_fid = _makespan([sim_times[fid] for fid in sorted(sim_times.keys())], nr_of_workers=4)
+    makespan_longest_first = _makespan([sim_times[fid] for fid in ordered], nr_of_workers=4)
+    assert makespan_by_fid == 230.0
+    assert makespan_longest_first == 200.0
+
+
+def test_samples_saved_and_truncated(tmp_path):
+    storage = FileStorageHandler(tmp_path / "project", {"MANAGER": {"SIMULATION_SCHEDULING": {"CALIBRATION_FILE_REL": str(tmp_path / "shared" / "samples.csv")}}})
+    assert storage.load_simulation_cost_samples() is None
+    features = {fid: [1.0, fid, fid, fid, fid] for fid in range(5)}
+    storage.save_simulation_cost_samples(to_samples(features, {0: 1.0, 1: 2.0, 2: 3.0}), max_nr_of_samples=4)
+    storage.save_simulation_cost_samples(to_samples(features, {3: 4.0, 4: 5.0}), max_nr_of_samples=4)
+    samples = storage.load_simulation_cost_samples()
+    assert samples[SIM_TIME_COLUMN].tolist() == [2.0, 3.0, 4.0, 5.0]
+    pd.testing.assert_frame_equal(samples[FEATURE_NAMES], pd.DataFrame([features[fid] for fid in range(1, 5)], columns=FEATURE_NAMES))
+    calibrated = SimulationCostPredictor.from_samples(samples, prior_weight=1)
+    assert not np.allclose(calibrated.coefficients, SimulationCostPredictor().coefficients)
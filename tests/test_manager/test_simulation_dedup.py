@@ -0,0 +1,40 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+
+from cesarp.manager.SimulationManager import link_output_folder
+
+
+def test_output_of_deduplicated_simulation_linked(tmp_path):
+    simulated = tmp_path / "fid_1"
+    (simulated / "sub").mkdir(parents=True)
+    (simulated / "eplusout.err").write_text("no errors")
+    (simulated / "sub" / "eplusout.csv").write_text("1,2,3")
+    link_output_folder(simulated, tmp_path / "fid_2")
+    assert (tmp_path / "fid_2" / "eplusout.err").read_text() == "no errors"
+    assert (tmp_path / "fid_2" / "sub" / "eplusout.csv").read_text() == "1,2,3"
+    assert os.path.samefile(simulated / "eplusout.err", tmp_path / "fid_2" / "eplusout.err")
+
+    # linking again, e.g. when the simulations are run again, keeps the output of the simulated building
+    link_output_folder(simulated, tmp_path / "fid_2")
+    assert (simulated / "eplusout.err").read_text() == "no errors"
+    assert (tmp_path / "fid_2" / "eplusout.err").read_text() == "no errors"
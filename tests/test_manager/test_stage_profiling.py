@@ -0,0 +1,88 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+import tracemalloc
+
+import pytest
+
+from cesarp.manager import stage_profiling
+from cesarp.manager.stage_profiling import profile_stage
+
+
+def _step_writing_files(folder, fids):
+    with profile_stage("setup"):
+        pass
+    for fid in fids:
+        with profile_stage("write_file", fid):
+            with open(os.path.join(folder, f"{fid}.txt"), "w") as fh:
+                fh.write("x" * 1000)
+    return len(fids)
+
+
+def test_not_profiling_outside_call_profiled(tmp_path):
+    assert _step_writing_files(tmp_path, [1, 2]) == 2
+    assert stage_profiling._collector is None
+
+
+@pytest.mark.parametrize("trace_memory", [False, True])
+def test_call_profiled(tmp_path, trace_memory):
+    (res, records) = stage_profiling.call_profiled(_step_writing_files, (tmp_path, [1, 2, 3]), trace_memory)
+    assert res == 3
+    assert [(rec.stage, rec.fid) for rec in records] == [("setup", None), ("write_file", 1), ("write_file", 2), ("write_file", 3)]
+    assert all(rec.wall_time_s >= 0 and rec.pid == os.getpid() for rec in records)
+    assert (records[1].peak_traced_mb is not None) == trace_memory
+    if records[1].written_bytes is not None:  # only available on linux
+        assert records[1].written_bytes >= 1000
+    assert stage_profiling._collector is None
+
+    run_profile = stage_profiling.records_to_df(records)
+    assert len(run_profile) == 4
+    assert list(run_profile.columns)[5] == "worker_peak_rss_mb"
+    summary = stage_profiling.summarize(run_profile)
+    assert summary.loc["write_file", "count"] == 3
+
+
+def test_call_profiled_exception():
+    def failing_step():
+        with profile_stage("fail", 1):
+            raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        stage_profiling.call_profiled(failing_step, ())
+    assert stage_profiling._collector is None
+
+
+def test_traced_peak_without_reset_peak(monkeypatch):
+    # tracemalloc.reset_peak is only available from python 3.9 on
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+
+    def step_allocating():
+        with profile_stage("big"):
+            big = bytearray(20 * 1024**2)
+            del big
+        with profile_stage("small"):
+            pass
+
+    (_, records) = stage_profiling.call_profiled(step_allocating, (), trace_memory=True)
+    assert records[0].peak_traced_mb >= 20
+    assert records[1].peak_traced_mb < 1
+    assert not tracemalloc.is_tracing()
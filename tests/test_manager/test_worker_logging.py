@@ -0,0 +1,99 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import logging
+import logging.handlers
+import multiprocessing
+from types import SimpleNamespace
+
+from cesarp.manager import processing_steps
+from cesarp.manager import worker_logging
+from cesarp.manager.SimulationManager import init_worker
+from cesarp.manager.stage_profiling import profile_stage
+
+_LOGGING_CFG = {"CENTRAL_LOG": True, "FILENAME_REL": "workers.jsonl", "MAX_FILE_SIZE_MB": 10, "NR_OF_BACKUP_FILES": 2}
+
+
+def _process_bldg(fid):
+    logger = logging.getLogger("cesarp.manager.test")
+    logger.debug("not logged")
+    logger.info("before stage")
+    with profile_stage("create_model", fid):
+        logger.info(f"processing {fid}")
+        try:
+            raise ValueError(f"bad building {fid}")
+        except ValueError as ex:
+            logger.exception(ex)
+    return fid
+
+
+def test_workers_log_to_central_log(tmp_path):
+    (log_queue, listener) = worker_logging.start_central_log(tmp_path, _LOGGING_CFG)
+    with multiprocessing.Pool(2, initializer=init_worker, initargs=(log_queue,)) as pool:
+        assert pool.map(_process_bldg, [1, 2, 3]) == [1, 2, 3]
+    listener.stop()
+    log = worker_logging.read_central_log(tmp_path / _LOGGING_CFG["FILENAME_REL"])
+    assert list(log.columns) == worker_logging.LOG_FIELDS
+    assert len(log) == 9
+    assert (log["message"] == "before stage").sum() == 3
+    assert log[log["message"] == "before stage"]["fid"].isna().all()
+    log_of_bldg = worker_logging.read_central_log(tmp_path / _LOGGING_CFG["FILENAME_REL"], fid=2)
+    assert log_of_bldg["message"].iloc[0] == "processing 2"
+    assert log_of_bldg["message"].iloc[1].startswith("bad building 2\nTraceback")
+    assert (log_of_bldg["stage"] == "create_model").all()
+    assert set(log_of_bldg["level"]) == {"INFO", "ERROR"}
+
+
+def _write_idf_of_invalid_model(idf_path):
+    return processing_steps.bldg_model_to_idf_no_exception(SimpleNamespace(fid=4), idf_path, None, {})
+
+
+def test_fid_logged_outside_of_stage(tmp_path):
+    (log_queue, listener) = worker_logging.start_central_log(tmp_path, _LOGGING_CFG)
+    with multiprocessing.Pool(1, initializer=init_worker, initargs=(log_queue,)) as pool:
+        assert pool.apply(_write_idf_of_invalid_model, (str(tmp_path / "fid_4.idf"),)) == (False, None, None, None)
+    listener.stop()
+    log_of_bldg = worker_logging.read_central_log(tmp_path / _LOGGING_CFG["FILENAME_REL"], fid=4)
+    assert log_of_bldg["message"].iloc[0].startswith("create idf")
+    assert (log_of_bldg["message"] == "Could not write IDF for 4").sum() == 1
+    assert log_of_bldg[log_of_bldg["level"] == "ERROR"]["stage"].isna().all()
+    with worker_logging.log_context(5):
+        with worker_logging.log_context(6):
+            pass
+        assert worker_logging._current_fid == 5
+    assert worker_logging._current_fid is None
+
+
+def test_central_log_rotated(tmp_path):
+    cfg = {**_LOGGING_CFG, "MAX_FILE_SIZE_MB": 0.001}
+    (log_queue, listener) = worker_logging.start_central_log(tmp_path, cfg)
+    logger = logging.getLogger("cesarp.test_central_log_rotated")
+    logger.propagate = False
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    for nr in range(20):
+        logger.info(f"message {nr}")
+    listener.stop()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["workers.jsonl", "workers.jsonl.1", "workers.jsonl.2"]
+    log = worker_logging.read_central_log(tmp_path / cfg["FILENAME_REL"])
+    # oldest records are dropped, order is kept
+    assert 0 < len(log) < 20
+    assert log["message"].tolist() == [f"message {nr}" for nr in range(20 - len(log), 20)]
@@ -23,6 +23,7 @@
 ATTENTION! With jsonpickle 1.4.1 something is broken with the object-reference id's. Thus we still use version 1.3!
 Removing all pandas dataframes contained in the serialized object did not help.
 """
+import copy
 import pandas as pd
 import pytest
 import os
@@ -53,7 +54,10 @@ from cesarp.geometry.GeometryBuilderFactory import GeometryBuilderFactory
 from cesarp.geometry.csv_input_parser import read_sitevertices_from_csv
 from cesarp.eplus_adapter.CesarIDFWriter import CesarIDFWriter
 import cesarp.manager.json_pickling
+import cesarp.manager.binary_pickling
 from cesarp.manager.BuildingContainer import BuildingContainer
+from cesarp.manager.LazyBuildingContainer import LazyBuildingContainer, BldgModelCache
+from cesarp.manager.FileStorageHandler import FileStorageHandler
 from cesarp.eplus_adapter.eplus_error_file_handling import EplusErrorLevel
 
 from dataclasses import dataclass
@@ -336,6 +340,142 @@ def test_unpickle_bldg_container_version_2(fixture_folder):
     # the upgrade functionality for building container version 2 is not tested anymore, as in the normal workflow the functionality is not used anymore from cesar-p version 2.0.0 upwards
 
 
+def test_structural_copy(sample_model_with_constr, res_folder):
+    ureg = cesarp.common.init_unit_registry()
+    base_model = sample_model_with_constr
+    model_copy = base_model.structural_copy()
+    assert model_copy.bldg_shape is base_model.bldg_shape
+    assert model_copy.neighbours is base_model.neighbours
+    assert model_copy.bldg_construction.roof_constr is base_model.bldg_construction.roof_constr
+
+    model_copy.site.simulation_year = 2050
+    model_copy.bldg_construction.set_construction_for_bldg_elem(BuildingElement.ROOF, base_model.bldg_construction.wall_constr)
+    model_copy.bldg_construction.infiltration_rate = 0.1 * ureg.ACH
+    model_copy.bldg_construction.installation_characteristics.e_carrier_heating = EnergySource.HEATING_OIL
+    model_copy.bldg_operation_mapping.get_operation_for_floor(0).hvac.outdoor_air_flow_per_zone_floor_area = 1 * ureg.m**3 / ureg.sec / ureg.m**2
+    assert base_model.site.simulation_year == 2020
+    assert base_model.bldg_construction.roof_constr.name != base_model.bldg_construction.wall_constr.name
+    assert base_model.bldg_construction.infiltration_rate != 0.1 * ureg.ACH
+    assert base_model.bldg_construction.installation_characteristics.e_carrier_heating == EnergySource.WOOD
+    assert base_model.bldg_operation_mapping.get_operation_for_floor(0).hvac.outdoor_air_flow_per_zone_floor_area.m == 3.2
+    assert model_copy.bldg_operation_mapping.get_operation_for_floor(0) is model_copy.bldg_operation_mapping.get_operation_for_floor(1)
+
+    save_path = res_folder / Path("copied_model.json")
+    cesarp.manager.json_pickling.save_to_disk(model_copy, save_path)
+    parsed_model = cesarp.manager.json_pickling.read_from_disk(save_path)
+    assert parsed_model.site.simulation_year == 2050
+    assert parsed_model.bldg_construction.roof_constr.name == base_model.bldg_construction.wall_constr.name
+
+
+def test_bldg_container_archive(sample_model_with_constr, res_folder):
+    containers = {}
+    for fid in [1, 5, 22]:
+        bldg_cont = BuildingContainer()
+        bldg_cont.set_bldg_model(sample_model_with_constr)
+        bldg_cont.set_eplus_error_level(EplusErrorLevel.WARNING)
+        containers[fid] = bldg_cont
+    archive_path = res_folder / Path("bldg_containers_archive_0.bin")
+    cesarp.manager.binary_pickling.save_bldg_containers_to_archive(containers, archive_path)
+
+    parsed_containers = cesarp.manager.binary_pickling.read_bldg_containers_from_archive(archive_path)
+    assert list(parsed_containers.keys()) == [1, 5, 22]
+    parsed_model = parsed_containers[5].get_bldg_model()
+    assert parsed_containers[5].get_eplus_error_level() is EplusErrorLevel.WARNING
+    assert parsed_model.bldg_construction.infiltration_rate == sample_model_with_constr.bldg_construction.infiltration_rate
+    assert parsed_model.site.site_ground_temperatures.deep == sample_model_with_constr.site.site_ground_temperatures.deep
+    assert isinstance(parsed_model.bldg_shape.walls[0][0], pd.DataFrame)
+
+    index = cesarp.manager.binary_pickling.read_archive_index(archive_path)
+    (offset, length) = index[22]
+    single_cont = cesarp.manager.binary_pickling.read_bldg_container_at(archive_path, offset, length)
+    assert single_cont.get_bldg_model().bldg_type == BldgType.MFH
+
+
+def test_lazy_bldg_container(sample_model_with_constr, res_folder):
+    containers = {}
+    for fid in [1, 2]:
+        bldg_cont = BuildingContainer()
+        bldg_cont.set_bldg_model(sample_model_with_constr)
+        bldg_cont.set_eplus_error_level(EplusErrorLevel.NO_ERRORS)
+        containers[fid] = bldg_cont
+    containers[3] = BuildingContainer()
+    archive_path = res_folder / Path("bldg_containers_archive_0.bin")
+    cesarp.manager.binary_pickling.save_bldg_containers_to_archive(containers, archive_path)
+
+    model_cache = BldgModelCache(max_size=1)
+    lazy_containers = {
+        fid: LazyBuildingContainer(entries, model_summary, archive_path, offset, length, model_cache)
+        for fid, (offset, length, entries, model_summary) in cesarp.manager.binary_pickling.read_archive_summaries(archive_path).items()
+    }
+    assert lazy_containers[1].has_bldg_model()
+    assert not lazy_containers[1].is_bldg_model_loaded()
+    assert not lazy_containers[3].has_bldg_model()
+    assert lazy_containers[2].get_eplus_error_level() is EplusErrorLevel.NO_ERRORS
+    summary = lazy_containers[2].get_bldg_model_summary()
+    assert summary.fid == 22
+    assert summary.e_carrier_heating == EnergySource.WOOD
+    assert summary.simulation_year == 2020
+
+    model_1 = lazy_containers[1].get_bldg_model()
+    assert model_1 is lazy_containers[1].get_bldg_model()  # cached
+    lazy_containers[2].get_bldg_model()
+    assert model_1 is not lazy_containers[1].get_bldg_model()  # evicted by loading model of fid 2
+
+    plain_copy = lazy_containers[1].shallow_copy()
+    assert type(plain_copy) is BuildingContainer
+    assert plain_copy.get_bldg_model().bldg_type == BldgType.MFH
+
+
+def test_lazy_bldg_container_archive_rewritten(sample_model_with_constr, res_folder):
+    def container_with_bldg_type(bldg_type):
+        bldg_model = copy.deepcopy(sample_model_with_constr)
+        bldg_model.bldg_type = bldg_type
+        container = BuildingContainer()
+        container.set_bldg_model(bldg_model)
+        return container
+
+    storage = FileStorageHandler(res_folder / Path("project"), {"MANAGER": {"BLDG_CONTAINER_ARCHIVE": {"ACTIVE": True, "LAZY_LOADING": True}}})
+    # relative pathes in the model are resolved against the container folder when loading
+    for ressource_file in ["activity.csv", "cooling.csv", "dhw.csv", "electirc_appliance.csv", "heating.csv", "lighting.csv", "occupancy.csv", "ventilation.csv", "theWeather.epw"]:
+        (storage.container_save_path / Path(ressource_file)).touch()
+    storage.save_bldg_containers({1: container_with_bldg_type(BldgType.MFH), 2: container_with_bldg_type(BldgType.SFH)})
+    lazy_containers = storage.load_existing_bldg_containers()
+    assert lazy_containers[1].get_bldg_model().bldg_type == BldgType.MFH
+    assert lazy_containers[2].get_bldg_model().bldg_type == BldgType.SFH
+
+    # saving only fid 2 moves its container to the start of the archive, where the container of fid 1 was before
+    storage.save_bldg_containers({2: lazy_containers[2]})
+    assert lazy_containers[2].get_bldg_model().bldg_type == BldgType.SFH
+
+    modified_model = copy.deepcopy(lazy_containers[2].get_bldg_model())
+    modified_model.bldg_type = BldgType.MFH
+    lazy_containers[2].set_bldg_model(modified_model)
+    storage.save_bldg_containers({2: lazy_containers[2]})
+    reloaded_containers = storage.load_existing_bldg_containers()
+    assert list(reloaded_containers.keys()) == [2]
+    assert reloaded_containers[2].get_bldg_model().bldg_type == BldgType.MFH
+
+    # archive rewritten by someone else, e.g. another project using the same folder
+    archive_path = res_folder / Path("bldg_containers_archive_0.bin")
+    model_cache = BldgModelCache(max_size=5)
+    cesarp.manager.binary_pickling.save_bldg_containers_to_archive({1: container_with_bldg_type(BldgType.MFH)}, archive_path)
+    (offset, length) = cesarp.manager.binary_pickling.read_archive_index(archive_path)[1]
+    assert model_cache.get(archive_path, offset, length).bldg_type == BldgType.MFH
+    cesarp.manager.binary_pickling.save_bldg_containers_to_archive({1: container_with_bldg_type(BldgType.SFH)}, archive_path)
+    os.utime(archive_path, ns=(0, 0))  # make sure modification time differs even on file systems with coarse time resolution
+    (new_offset, new_length) = cesarp.manager.binary_pickling.read_archive_index(archive_path)[1]
+    assert new_offset == offset
+    assert model_cache.get(archive_path, new_offset, new_length).bldg_type == BldgType.SFH
+
+
+def test_bldg_container_archive_invalid_file(res_folder):
+    not_an_archive = res_folder / Path("not_an_archive.bin")
+    with open(not_an_archive, "wb") as fh:
+        fh.write(b"this is not a building container archive")
+    with pytest.raises(CesarpException):
+        cesarp.manager.binary_pickling.read_archive_index(not_an_archive)
+
+
 @dataclass
 class ChocolateChips:
     flour: int
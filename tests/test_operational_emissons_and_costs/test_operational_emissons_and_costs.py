@@ -20,9 +20,11 @@
 # Contact: https://www.empa.ch/web/s313
 #
 import pytest
+import numpy as np
 import cesarp.common
 from cesarp.model.EnergySource import EnergySource
 from cesarp.emissons_cost.OperationalEmissionsAndCosts import OperationalEmissionsAndCosts
+from cesarp.emissons_cost.OperationalEmissionsAndCostsVectorized import OperationalEmissionsAndCostsVectorized, split_per_bldg
 
 
 @pytest.fixture
@@ -175,3 +177,104 @@ def test_emissions_and_costs_no_ec(ureg):
     assert op_consumption_res.electricity.co2_emission.m >= 0
     assert op_consumption_res.total_co2_emission.u == expected_co2_emission_unit
     assert op_consumption_res.total_co2_emission.m >= 0
+
+
+def test_vectorized_emissions_and_costs_same_as_scalar(ureg):
+    kWh_per_year = ureg.kW * ureg.h / ureg.year
+    kWh_per_m2_per_year = ureg.kW * ureg.h / ureg.m**2 / ureg.year
+    dhw_carriers = [EnergySource.HEATING_OIL, EnergySource.NO, EnergySource.ELECTRICITY, EnergySource.WOOD]
+    heating_carriers = [EnergySource.HEATING_OIL, EnergySource.NO, EnergySource.HEAT_PUMP, EnergySource.GAS]
+    sim_years = [2015, 2015, 2030, 2050]
+    dhw_demand = np.array([11.58, 11.58, 20.1, 5.3])
+    tot_dhw_demand = np.array([14475, 14475, 2010, 530])
+    heating_demand = np.array([139.2, 139.2, 60.5, 20])
+    tot_heating_demand = np.array([174010, 174010, 6050, 2000])
+    el_demand = np.array([57.5630, 57.5630, 30, 10])
+    tot_el_demand = np.array([71953, 71953, 3000, 1000])
+
+    vectorized_res = OperationalEmissionsAndCostsVectorized(ureg).get_operational_emissions_and_costs(
+        specific_dhw_demand=dhw_demand * kWh_per_m2_per_year,
+        total_dhw_demand=tot_dhw_demand * kWh_per_year,
+        dhw_carriers=dhw_carriers,
+        specific_heating_demand=heating_demand * kWh_per_m2_per_year,
+        total_heating_demand=tot_heating_demand * kWh_per_year,
+        heating_carriers=heating_carriers,
+        specific_electricity_demand=el_demand * kWh_per_m2_per_year,
+        total_electricity_demand=tot_el_demand * kWh_per_year,
+        sim_years=sim_years,
+    )
+    res_per_bldg = split_per_bldg(vectorized_res, [1, 2, 3, 4])
+
+    op_calc = OperationalEmissionsAndCosts(ureg)
+    for idx, fid in enumerate([1, 2, 3, 4]):
+        expected = op_calc.get_operational_emissions_and_costs(
+            specific_dhw_demand=dhw_demand[idx] * kWh_per_m2_per_year,
+            total_dhw_demand=tot_dhw_demand[idx] * kWh_per_year,
+            dhw_carrier=dhw_carriers[idx],
+            specific_heating_demand=heating_demand[idx] * kWh_per_m2_per_year,
+            total_heating_demand=tot_heating_demand[idx] * kWh_per_year,
+            heating_carrier=heating_carriers[idx],
+            specific_electricity_demand=el_demand[idx] * kWh_per_m2_per_year,
+            total_electricity_demand=tot_el_demand[idx] * kWh_per_year,
+            sim_year=sim_years[idx],
+        )
+        res = res_per_bldg[fid]
+        assert res.simulation_year == expected.simulation_year
+        assert res.total_pen.m == pytest.approx(expected.total_pen.to(res.total_pen.u).m)
+        assert res.total_co2_emission.m == pytest.approx(expected.total_co2_emission.to(res.total_co2_emission.u).m)
+        for system in ["heating_system", "dhw_system", "electricity"]:
+            res_system = getattr(res, system)
+            expected_system = getattr(expected, system)
+            assert res_system.energy_carrier == expected_system.energy_carrier
+            assert res_system.pen.m == pytest.approx(expected_system.pen.to(res_system.pen.u).m)
+            assert res_system.co2_emission.m == pytest.approx(expected_system.co2_emission.to(res_system.co2_emission.u).m)
+            assert res_system.fuel_cost.m == pytest.approx(expected_system.fuel_cost.to(res_system.fuel_cost.u).m)
+
+
+def test_vectorized_missing_factor_raises(ureg, monkeypatch):
+    class EnergyStrategyWithoutWoodCosts:
+        def __init__(self, ureg, custom_config):
+            self.system_efficiencis = self
+            self.energy_mix = self
+            self.fuel_cost_factors = self
+            self.time_periods = [2015]
+
+        def get_heating_system_efficiency(self, carrier, sim_year):
+            return 0.9
+
+        get_dhw_system_efficiency = get_heating_system_efficiency
+        get_heating_value_factor = get_heating_system_efficiency
+
+        def get_pen_factor_for(self, carrier, sim_year):
+            return 1 * ureg.Oileq
+
+        def get_co2_coeff_for(self, carrier, sim_year):
+            return 0.1 * ureg.kg * ureg.CO2eq / ureg.MJ
+
+        def get_fuel_cost_factor(self, carrier, sim_year):
+            if carrier == EnergySource.WOOD:
+                raise KeyError(carrier)
+            return 0.1 * ureg.CHF / (ureg.kW * ureg.h)
+
+    monkeypatch.setattr("cesarp.emissons_cost.OperationalEmissionsAndCostsVectorized.EnergyStrategy", EnergyStrategyWithoutWoodCosts)
+    calculator = OperationalEmissionsAndCostsVectorized(ureg)
+    kWh_per_year = ureg.kW * ureg.h / ureg.year
+    kWh_per_m2_per_year = ureg.kW * ureg.h / ureg.m**2 / ureg.year
+
+    def calculate(heating_carriers):
+        demand = np.array([10.0, 20.0])
+        return calculator.get_operational_emissions_and_costs(
+            demand * kWh_per_m2_per_year,
+            demand * kWh_per_year,
+            [EnergySource.NO] * 2,
+            demand * kWh_per_m2_per_year,
+            demand * kWh_per_year,
+            heating_carriers,
+            demand * kWh_per_m2_per_year,
+            demand * kWh_per_year,
+            2015,
+        )
+
+    assert np.all(np.isfinite(calculate([EnergySource.GAS, EnergySource.NO]).heating_system.fuel_cost.m))
+    with pytest.raises(KeyError, match="fuel cost factor"):
+        calculate([EnergySource.GAS, EnergySource.WOOD])
@@ -0,0 +1,86 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import cesarp.common
+from cesarp.eplus_adapter import eplus_eso_results_handling
+from cesarp.eplus_adapter.idf_strings import ResultsFrequency
+from cesarp.results.DistrictLoadAggregator import DistrictLoadAggregator, get_age_class, DISTRICT_GROUPING, DISTRICT_GROUP
+
+_METERS = ["DistrictHeating:HVAC", "Electricity:Facility"]
+
+
+def _loads(heating, electricity):
+    return {"DistrictHeating:HVAC": np.array(heating, dtype=float), "Electricity:Facility": np.array(electricity, dtype=float)}
+
+
+def test_aggregation_merged_from_workers():
+    worker_1 = DistrictLoadAggregator(_METERS)
+    worker_1.add_building(1, {"BLDG_TYPE": "MFH"}, _loads([4, 1, 0], [1, 1, 1]))
+    worker_1.add_building(2, {"BLDG_TYPE": "SFH"}, _loads([0, 1, 4], [2, 0, 0]))
+    worker_2 = DistrictLoadAggregator(_METERS)
+    worker_2.add_building(3, {"BLDG_TYPE": "MFH"}, _loads([2, 2, 2], [0, 0, 3]))
+    assert not worker_2.add_building(4, {"BLDG_TYPE": "MFH"}, {"DistrictHeating:HVAC": np.zeros(3)})
+
+    district = DistrictLoadAggregator(_METERS)
+    district.merge(worker_1)
+    district.merge(worker_2)
+
+    assert district.get_groupings() == ["BLDG_TYPE", DISTRICT_GROUPING]
+    assert district.get_groups("BLDG_TYPE") == ["MFH", "SFH"]
+    load_curves = district.get_load_curves()
+    assert list(load_curves[(DISTRICT_GROUP, "DistrictHeating:HVAC")]) == [6, 4, 6]
+    assert list(district.get_load_curves("BLDG_TYPE")[("MFH", "Electricity:Facility")]) == [1, 1, 4]
+    assert list(district.get_load_duration_curves()[(DISTRICT_GROUP, "Electricity:Facility")]) == [4, 3, 1]
+
+    peaks = district.get_peak_loads()
+    heating_peak = peaks.loc[(DISTRICT_GROUP, "DistrictHeating:HVAC")]
+    assert heating_peak["peak load [kW]"] == 6
+    assert heating_peak["hour of peak"] == 0
+    assert heating_peak["sum of single building peaks [kW]"] == 10
+    assert heating_peak["simultaneity factor"] == pytest.approx(0.6)
+    assert heating_peak["nr of buildings"] == 3
+
+
+def test_age_class():
+    bounds = [1946, 1961, 1971]
+    assert get_age_class(1900, bounds) == "before 1946"
+    assert get_age_class(1946, bounds) == "1946-1960"
+    assert get_age_class(1970, bounds) == "1961-1970"
+    assert get_age_class(2020, bounds) == "1971 and later"
+
+
+def test_hourly_meters_from_eso():
+    ureg = cesarp.common.init_unit_registry()
+    res_folder = os.path.dirname(__file__) / Path("..") / Path("test_eplus_adapter") / Path("testfixture") / Path("solar_potential")
+    eso = eplus_eso_results_handling.read_result_eso(res_folder)
+    hourly = eplus_eso_results_handling.get_hourly_meter_values(eso, _METERS, ureg)
+    annual = eplus_eso_results_handling.collect_multi_params_for_site({1: res_folder}, _METERS, ResultsFrequency.ANNUAL)
+    for meter in _METERS:
+        assert len(hourly[meter]) == 8760
+        annual_kwh = (annual[annual["var"] == meter]["value"].iloc[0] * ureg.J).to(ureg.kWh).m
+        assert hourly[meter].sum() == pytest.approx(annual_kwh)
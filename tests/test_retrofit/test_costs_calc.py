@@ -19,6 +19,8 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
+import pytest
+
 import cesarp.common
 from cesarp.retrofit.embodied.ConstructionRetrofitCosts import ConstructionRetrofitCosts
 from cesarp.model.WindowConstruction import WindowConstruction, WindowGlassConstruction
@@ -68,3 +70,18 @@ def test_constr_costs():
     expected_cost_layer3_16cm = 90 * ureg.CHF / ureg.m**2
     my_constr.layers[2].retrofitted = True
     assert retCosts.get_costs_for_construction_retrofit(my_constr) == (expected_cost_layer2_19_5cm + expected_cost_layer3_16cm)
+
+
+def test_layer_costs_for_many_thicknesses():
+    ureg = cesarp.common.init_unit_registry()
+    retCosts = ConstructionRetrofitCosts(ureg, {})
+    thicknesses = [0, 0.05, 0.1, 0.195, 0.22, 0.3] * ureg.m
+    costs = retCosts.get_costs_for_layer_retrofits(BuildingElement.WALL, LayerFunction.INSULATION_OUTSIDE_BACK_VENTILATED, thicknesses)
+    # beyond the last entry (22cm, 460 CHF/m2) costs are extrapolated with the costs per m of the last entry
+    expected = [0, 145, 290, 435, 460, 460 / 0.22 * 0.3]
+    assert costs.u == ureg.CHF / ureg.m**2
+    assert costs.m == pytest.approx(expected)
+    for thickness, single_costs in zip(thicknesses, costs):
+        assert retCosts._get_cost_for_layer_retrofit(BuildingElement.WALL, LayerFunction.INSULATION_OUTSIDE_BACK_VENTILATED, thickness).m == pytest.approx(single_costs.m)
+    with pytest.raises(Exception):
+        retCosts.get_costs_for_layer_retrofits(BuildingElement.WINDOW, LayerFunction.INSULATION_OUTSIDE, thicknesses)
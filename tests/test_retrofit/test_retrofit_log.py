@@ -19,9 +19,12 @@
 #
 # Contact: https://www.empa.ch/web/s313
 #
+import copy
 import os
+import pytest
+import pandas as pd
 import cesarp.common
-from cesarp.retrofit.RetrofitLog import RetrofitLog
+from cesarp.retrofit.RetrofitLog import RetrofitLog, LOG_KEYS
 from cesarp.model.BuildingElement import BuildingElement
 
 
@@ -71,3 +74,78 @@ def test_retrofitted_in():
     assert myLogger.was_construction_retrofitted_in(year=2022, bldg_fid=22) == False
     assert myLogger.was_construction_retrofitted_in(year=2020, bldg_fid=22) == True
     assert myLogger.was_construction_retrofitted_in(year=2020, bldg_fid=33) == False
+
+
+def _log_roof_retrofit(ret_log, ureg, fid, year, costs):
+    ret_log.log_retrofit_measure(
+        bldg_fid=fid,
+        bldg_element=BuildingElement.ROOF,
+        retrofitted_area=100 * ureg.m**2,
+        year_of_retrofit=year,
+        retrofit_target="SIA380_MIN",
+        costs=costs,
+        non_renewable_pen=None,
+        co2_emission=3 * ureg.kg * ureg.CO2eq,
+        old_construction_name="bad_construction",
+        new_construction_name="good_construction",
+    )
+
+
+def test_append_log():
+    ureg = cesarp.common.init_unit_registry()
+    log_2020 = RetrofitLog()
+    _log_roof_retrofit(log_2020, ureg, 1, 2020, 2000 * ureg.CHF)
+    log_2030 = RetrofitLog()
+    _log_roof_retrofit(log_2030, ureg, 2, 2030, 3 * ureg.kCHF)
+    all_periods_log = RetrofitLog()
+    all_periods_log.append_log(log_2020)
+    all_periods_log.append_log(log_2030)
+    assert len(all_periods_log) == 2
+    log_as_df = all_periods_log.convert_to_df()
+    assert log_as_df["costs"].tolist() == [2000, 3000]
+    assert log_as_df["year"].tolist() == [2020, 2030]
+    assert log_as_df["non_renewable_pen"].isna().all()
+    assert all_periods_log.get_units()["costs"] == "CHF"
+    assert all_periods_log.get_sum_of_costs_and_emissions()["costs"] == 5000 * ureg.CHF
+    assert all_periods_log.was_construction_retrofitted_in(year=2030, bldg_fid=2)
+
+
+def test_restore_log_of_earlier_version():
+    ureg = cesarp.common.init_unit_registry()
+    the_log = RetrofitLog()
+    _log_roof_retrofit(the_log, ureg, 1, 2020, 2000 * ureg.CHF)
+    entries = the_log.my_log_entries
+    restored_log = RetrofitLog.__new__(RetrofitLog)
+    restored_log.__setstate__({"my_log_entries": entries})
+    pd.testing.assert_frame_equal(restored_log.convert_to_df(), the_log.convert_to_df())
+    assert restored_log.my_log_entries[0][LOG_KEYS.BLDG_ELEMENT] == BuildingElement.ROOF
+
+
+def test_flush_to_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    ureg = cesarp.common.init_unit_registry()
+    the_log = RetrofitLog()
+    the_log.enable_flush_to_parquet(tmp_path / "chunks", chunk_size=2)
+    for fid in range(5):
+        _log_roof_retrofit(the_log, ureg, fid, 2020, fid * ureg.CHF)
+    assert len(the_log) == 5
+    assert the_log.convert_to_df()["bldg_fid"].tolist() == list(range(5))
+    the_log.save_parquet(tmp_path / "log.parquet")
+    assert pd.read_parquet(tmp_path / "log.parquet")["costs"].tolist() == list(range(5))
+    the_log.flush()
+    assert len(pd.read_parquet(tmp_path / "chunks")) == 5
+
+
+def test_deepcopy_of_flushed_log(tmp_path):
+    pytest.importorskip("pyarrow")
+    ureg = cesarp.common.init_unit_registry()
+    the_log = RetrofitLog()
+    the_log.enable_flush_to_parquet(tmp_path / "chunks", chunk_size=2)
+    for fid in range(3):
+        _log_roof_retrofit(the_log, ureg, fid, 2020, fid * ureg.CHF)
+    log_copy = copy.deepcopy(the_log)
+    for fid in range(3, 5):
+        _log_roof_retrofit(log_copy, ureg, fid, 2020, fid * ureg.CHF)
+    assert log_copy.convert_to_df()["bldg_fid"].tolist() == list(range(5))
+    assert the_log.convert_to_df()["bldg_fid"].tolist() == list(range(3))
+    assert len(os.listdir(tmp_path / "chunks")) == 1
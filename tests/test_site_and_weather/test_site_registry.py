@@ -0,0 +1,57 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import pickle
+
+import cesarp.common
+from cesarp.site.SiteRegistry import SiteRegistry
+from cesarp.site.SiteGroundTemperatureFactory import SiteGroundTemperatureFactory
+from cesarp.site.SitePerSwissCommunityFactory import SitePerSwissCommunityFactory
+from tests.test_site_and_weather.test_weather_swiss_communities import get_testfixture_config
+
+
+def test_sites_are_interned():
+    ureg = cesarp.common.init_unit_registry()
+    ground_temps = SiteGroundTemperatureFactory(ureg).get_ground_temperatures()
+    same_ground_temps_other_object = SiteGroundTemperatureFactory(ureg).get_ground_temperatures()
+    other_ground_temps = SiteGroundTemperatureFactory(ureg, {"SITE": {"GROUND_TEMPERATURES": {"DEEP": "14 degC"}}}).get_ground_temperatures()
+    registry = SiteRegistry()
+    site_1 = registry.register(1, "a.epw", ground_temps, 2020)
+    assert registry.register(2, "a.epw", same_ground_temps_other_object, 2020) is site_1
+    assert registry.register(3, "a.epw", other_ground_temps, 2020) is not site_1
+    assert registry.register(4, "b.epw", ground_temps, 2020) is not site_1
+    assert registry.register(5, "a.epw", ground_temps, 2021) is not site_1
+    assert len(registry) == 4
+    assert registry.get_site_id(1) == registry.get_site_id(2) == 0
+    assert registry.get_site_for_bldg(4).weather_file_path == "b.epw"
+    assert registry.get_site_by_id(registry.get_site_id(5)).simulation_year == 2021
+
+
+def test_models_share_site_objects():
+    ureg = cesarp.common.init_unit_registry()
+    fid_to_community = {1: 191, 2: 152, 3: 3681}  # Dübendorf and Herrliberg share the weather station Zürich-SMA, Avers uses Davos
+    site_fact = SitePerSwissCommunityFactory(fid_to_community, ureg, get_testfixture_config())
+    sites = {fid: site_fact.get_site(fid) for fid in fid_to_community.keys()}
+    assert sites[1] is sites[2]
+    assert sites[3] is not sites[1]
+    assert len(site_fact.site_registry) == 2
+    # shared objects are only serialized once
+    assert len(pickle.dumps(sites)) < len(pickle.dumps({fid: pickle.loads(pickle.dumps(site)) for fid, site in sites.items()}))
@@ -0,0 +1,79 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+import shutil
+from pathlib import Path
+import pytest
+
+import cesarp.weather.WeatherFileRegistry
+from cesarp.weather.WeatherFileRegistry import WeatherFileRegistry
+from cesarp.common.CesarpException import CesarpException
+
+_TEST_EPW = os.path.dirname(__file__) / Path("./testfixture/weather_files/Bern.epw")
+
+
+@pytest.fixture
+def epw_copy(tmp_path):
+    epw_path = tmp_path / "Bern.epw"
+    shutil.copy(_TEST_EPW, epw_path)
+    return str(epw_path)
+
+
+def test_weather_data_parsed_and_cached(epw_copy, monkeypatch):
+    weather_data = WeatherFileRegistry().get_weather_data(epw_copy)
+    assert weather_data.location == "Bern/Belp"
+    assert weather_data.latitude == pytest.approx(46.91)
+    assert len(weather_data.hourly["dry_bulb_temperature"]) == 8760
+    assert weather_data.hourly["dry_bulb_temperature"][0] == pytest.approx(6.7)
+    assert os.path.isfile(epw_copy + ".cesarp-cache.npz")
+
+    # a new registry, e.g. in the next run, reads the sidecar instead of parsing the weather file
+    def parse_not_expected(*args, **kwargs):
+        raise AssertionError("weather file should not be parsed again")
+
+    monkeypatch.setattr(cesarp.weather.WeatherFileRegistry, "parse_epw", parse_not_expected)
+    cached = WeatherFileRegistry().get_weather_data(epw_copy)
+    assert cached.location == weather_data.location
+    assert (cached.hourly["wind_speed"] == weather_data.hourly["wind_speed"]).all()
+
+
+def test_sidecar_ignored_when_epw_changed(epw_copy):
+    WeatherFileRegistry().get_weather_data(epw_copy)
+    with open(epw_copy, "r", encoding="latin-1") as fh:
+        lines = fh.readlines()
+    lines[8] = lines[8].replace(",6.7,3.0,", ",-2.5,3.0,", 1)
+    with open(epw_copy, "w", encoding="latin-1") as fh:
+        fh.writelines(lines)
+    assert WeatherFileRegistry().get_weather_data(epw_copy).hourly["dry_bulb_temperature"][0] == pytest.approx(-2.5)
+
+
+def test_bldgs_per_weather_file(epw_copy, tmp_path):
+    other_epw = str(tmp_path / "Other.epw")
+    shutil.copy(epw_copy, other_epw)
+    registry = WeatherFileRegistry({"WEATHER": {"REGISTRY": {"PARSED_CACHE": {"ACTIVE": False}}}})
+    registry.register(1, epw_copy)
+    registry.register(2, other_epw)
+    registry.register(3, other_epw)
+    assert registry.get_nr_of_bldgs_per_weather_file() == {os.path.abspath(other_epw): 2, os.path.abspath(epw_copy): 1}
+    assert registry.get_fids_per_weather_file()[os.path.abspath(other_epw)] == [2, 3]
+    with pytest.raises(CesarpException):
+        registry.register(4, str(tmp_path / "NotExisting.epw"))
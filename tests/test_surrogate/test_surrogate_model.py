@@ -0,0 +1,134 @@
+# coding=utf-8
+#
+# Copyright (c) 2023, Empa, Leonie Fierz, Aaron Bojarski, Ricardo Parreira da Silva, Sven Eggimann.
+#
+# This file is part of CESAR-P - Combined Energy Simulation And Retrofit written in Python
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Contact: https://www.empa.ch/web/s313
+#
+import os
+from pathlib import Path
+import numpy as np
+import pytest
+
+import cesarp.common
+from cesarp.common.CesarpException import CesarpException
+from cesarp.surrogate.SurrogateModel import SurrogateModel, TARGET_NAMES
+from cesarp.surrogate.SurrogateFeatureExtractor import FEATURE_NAMES, SurrogateFeatureExtractor
+from cesarp.model.BuildingElement import BuildingElement
+from cesarp.model.Construction import Construction
+from cesarp.model.Layer import Layer, LayerFunction
+from cesarp.model.OpaqueMaterial import OpaqueMaterial
+from cesarp.manager.BldgModelFactory import BldgModelFactory
+
+_TOTAL_FLOOR_AREA_IDX = FEATURE_NAMES.index("total_floor_area")
+
+
+def _synthetic_training_data(nr_of_samples, rng):
+    features = rng.uniform(1, 2, size=(nr_of_samples, len(FEATURE_NAMES)))
+    features[:, _TOTAL_FLOOR_AREA_IDX] = rng.uniform(100, 1000, nr_of_samples)
+    weights = np.linspace(0.5, 5, len(FEATURE_NAMES) * len(TARGET_NAMES)).reshape(len(FEATURE_NAMES), len(TARGET_NAMES))
+    targets = features @ weights + rng.normal(0, 0.1, size=(nr_of_samples, len(TARGET_NAMES)))
+    return features, targets
+
+
+def test_fit_predict():
+    rng = np.random.default_rng(42)
+    (features, targets) = _synthetic_training_data(300, rng)
+    surrogate = SurrogateModel()
+    assert not surrogate.is_trained()
+    surrogate.fit(features, targets)
+    assert surrogate.is_trained()
+    (test_features, test_targets) = _synthetic_training_data(20, rng)
+    (mean, std) = surrogate.predict(test_features)
+    assert mean.shape == std.shape == test_targets.shape
+    assert np.allclose(mean, test_targets, rtol=0.05)
+    # far outside of the training data the prediction is more uncertain
+    (_, std_out_of_distribution) = surrogate.predict(test_features * 10)
+    assert np.all(std_out_of_distribution.sum(axis=1) > std.sum(axis=1))
+
+
+def test_predict_demand_results():
+    ureg = cesarp.common.init_unit_registry()
+    rng = np.random.default_rng(1)
+    surrogate = SurrogateModel()
+    surrogate.fit(*_synthetic_training_data(100, rng))
+    (test_features, _) = _synthetic_training_data(3, rng)
+    (demand_results, rel_uncertainty) = surrogate.predict_demand_results(test_features, ureg)
+    assert len(demand_results) == len(rel_uncertainty) == 3
+    res = demand_results[0]
+    assert res.total_floor_area.to(ureg.m**2).m == pytest.approx(test_features[0, _TOTAL_FLOOR_AREA_IDX])
+    assert res.tot_heating_demand.to(ureg.kWh / ureg.year).m == pytest.approx(res.specific_heating_demand.to(ureg.kWh / ureg.m**2 / ureg.year).m * res.total_floor_area.m)
+    assert SurrogateModel.get_targets(res, ureg) == pytest.approx(surrogate.predict(test_features[0:1])[0][0])
+    assert np.all(rel_uncertainty >= 0)
+
+
+def test_save_load(tmp_path):
+    rng = np.random.default_rng(3)
+    surrogate = SurrogateModel()
+    surrogate.fit(*_synthetic_training_data(50, rng))
+    filepath = tmp_path / "surrogate.npz"
+    surrogate.save(filepath)
+    loaded = SurrogateModel.load(filepath)
+    (test_features, _) = _synthetic_training_data(5, rng)
+    assert np.array_equal(loaded.predict(test_features)[0], surrogate.predict(test_features)[0])
+    assert np.array_equal(loaded.predict(test_features)[1], surrogate.predict(test_features)[1])
+    with np.load(filepath) as saved:
+        content = dict(saved)
+    content["feature_names"] = np.array(FEATURE_NAMES[:-1])
+    np.savez(tmp_path / "other_features.npz", **content)
+    with pytest.raises(CesarpException):
+        SurrogateModel.load(tmp_path / "other_features.npz")
+
+
+def test_u_value():
+    ureg = cesarp.common.init_unit_registry()
+    extractor = SurrogateFeatureExtractor(ureg)
+    insulation = OpaqueMaterial(
+        name="insulation",
+        density=30 * ureg.kg / ureg.m**3,
+        roughness=None,
+        solar_absorptance=None,
+        specific_heat=None,
+        thermal_absorptance=None,
+        conductivity=0.04 * ureg.W / (ureg.m * ureg.K),
+        visible_absorptance=None,
+    )
+    layer = Layer(name="ins", retrofitted=False, thickness=0.2 * ureg.m, material=insulation, function=LayerFunction.INSULATION_OUTSIDE)
+    wall = Construction(name="wall", layers=[layer], bldg_element=BuildingElement.WALL)
+    assert extractor.calc_u_value(wall) == pytest.approx(1 / (5 + 0.17))
+
+
+def test_features_of_bldg_model():
+    ureg = cesarp.common.init_unit_registry()
+    fixture_folder = os.path.dirname(__file__) / Path("..") / Path("test_manager") / Path("testfixture")
+    config = {
+        "MANAGER": {
+            "BLDG_AGE_FILE": {"PATH": fixture_folder / Path("BuildingYearOfCreation.csv")},
+            "SITE_VERTICES_FILE": {"PATH": fixture_folder / Path("SiteVertices.csv")},
+            "BLDG_TYPE_PER_BLDG_FILE": {"PATH": fixture_folder / Path("BuildingSIAType.csv")},
+            "BLDG_INSTALLATION_FILE": {"PATH": fixture_folder / Path("BuildingECarriers.csv")},
+            "SINGLE_SITE": {"WEATHER_FILE": fixture_folder / Path("Zurich_1.epw")},
+        }
+    }
+    bldg_model = BldgModelFactory(ureg, config).create_bldg_model(1)
+    features = SurrogateFeatureExtractor(ureg, config).get_features_for([bldg_model])
+    assert features.shape == (1, len(FEATURE_NAMES))
+    assert np.all(np.isfinite(features))
+    bldg_op = bldg_model.bldg_operation_mapping.get_operation_for_floor(0)
+    expected_air_flow = bldg_op.hvac.outdoor_air_flow_per_zone_floor_area.to(ureg.m**3 / (ureg.h * ureg.m**2)).m
+    assert features[0, FEATURE_NAMES.index("outdoor_air_flow_per_area")] == pytest.approx(expected_air_flow)
+    assert features[0, FEATURE_NAMES.index("year_of_construction")] == bldg_model.year_of_construction